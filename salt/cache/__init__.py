@@ -7,7 +7,9 @@ Loader mechanism for caching data, with data expiration, etc.
 
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import fnmatch
 import logging
+import sys
 import time
 
 # Import Salt libs
@@ -179,6 +181,50 @@ class Cache(object):
         fun = '{0}.fetch'.format(self.driver)
         return self.modules[fun](bank, key, **self._kwargs)
 
+    def store_many(self, items):
+        '''
+        Store the data of several keys using the specified module, in as few
+        requests to the cache backend as the module allows
+
+        :param items:
+            An iterable of ``(bank, key, data)`` tuples. See ``store`` for the
+            meaning of each one.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        items = list(items)
+        fun = '{0}.store_many'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](items, **self._kwargs)
+        for bank, key, data in items:
+            self.store(bank, key, data)
+
+    def fetch_many(self, items):
+        '''
+        Fetch the data of several keys using the specified module, in as few
+        requests to the cache backend as the module allows
+
+        :param items:
+            An iterable of ``(bank, key)`` tuples. See ``fetch`` for the
+            meaning of each one.
+
+        :return:
+            Return a dict mapping each ``(bank, key)`` tuple to the python
+            object fetched from the cache, or to an empty dict if the key was
+            not found.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        items = list(items)
+        fun = '{0}.fetch_many'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](items, **self._kwargs)
+        return dict((item, self.fetch(*item)) for item in items)
+
     def updated(self, bank, key):
         '''
         Get the last updated epoch for the specified key
@@ -243,6 +289,31 @@ class Cache(object):
         fun = '{0}.list'.format(self.driver)
         return self.modules[fun](bank, **self._kwargs)
 
+    def list_prefix(self, bank, prefix):
+        '''
+        Lists entries stored in the specified bank whose name starts with
+        prefix, filtered by the cache backend when the module allows it.
+
+        :param bank:
+            The name of the location inside the cache which will hold the key
+            and its associated data.
+
+        :param prefix:
+            The start of the names of the entries to list.
+
+        :return:
+            An iterable object containing the matching bank entries. Returns an
+            empty iterator if the bank doesn't exists.
+
+        :raises SaltCacheError:
+            Raises an exception if cache driver detected an error accessing data
+            in the cache backend (auth, permissions, etc).
+        '''
+        fun = '{0}.list_prefix'.format(self.driver)
+        if fun in self.modules:
+            return self.modules[fun](bank, prefix, **self._kwargs)
+        return [entry for entry in self.list(bank) if entry.startswith(prefix)]
+
     def contains(self, bank, key=None):
         '''
         Checks if the specified bank contains the specified key.
@@ -269,39 +340,87 @@ class Cache(object):
         return self.modules[fun](bank, key, **self._kwargs)
 
 
+def _sizeof(obj):
+    '''
+    Estimate the memory used by an object and by the objects it contains
+    '''
+    size = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(six.iterkeys(obj))
+            stack.extend(six.itervalues(obj))
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+
+class _MemCacheStorage(OrderedDict):
+    '''
+    The records of a memcache storage, from the least to the most recently
+    used, with their estimated size and the storage usage counters.
+    '''
+    def __init__(self):
+        super(_MemCacheStorage, self).__init__()
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
 class MemCache(Cache):
     '''
-    Short-lived in-memory cache store keeping values on time and/or size (count)
-    basis.
+    Short-lived in-memory cache store keeping values on time and/or size basis.
+
+    The least recently used values are evicted when the storage holds more
+    than ``memcache_max_items`` values or more than ``memcache_max_bytes``
+    bytes. The expiration time and the maximum size of a value can be set per
+    bank with ``memcache_bank_policy``.
     '''
-    # {<storage_id>: odict({<key>: [atime, data], ...}), ...}
+    # {<storage_id>: _MemCacheStorage({<key>: [atime, data], ...}), ...}
     data = {}
 
     def __init__(self, opts, **kwargs):
         super(MemCache, self).__init__(opts, **kwargs)
         self.expire = opts.get('memcache_expire_seconds', 10)
         self.max = opts.get('memcache_max_items', 1024)
+        self.max_bytes = opts.get('memcache_max_bytes', 0)
+        self.bank_policy = opts.get('memcache_bank_policy') or {}
         self.cleanup = opts.get('memcache_full_cleanup', False)
         self.debug = opts.get('memcache_debug', False)
         if self.debug:
             self.call = 0
             self.hit = 0
         self._storage = None
+        self._policies = {}
 
     @classmethod
-    def __cleanup(cls, expire):
-        now = time.time()
-        for storage in six.itervalues(cls.data):
-            for key, data in list(storage.items()):
-                if data[0] + expire < now:
-                    del storage[key]
-                else:
-                    break
+    def stats(cls):
+        '''
+        Return the usage counters of the memcache storages of this process
+        '''
+        ret = {}
+        for storage_id, storage in six.iteritems(cls.data):
+            ret[six.text_type(storage_id)] = {
+                'items': len(storage),
+                'bytes': storage.bytes,
+                'hits': storage.hits,
+                'misses': storage.misses,
+                'evictions': storage.evictions,
+            }
+        return ret
 
     def _get_storage_id(self):
-        fun = '{0}.storage_id'.format(self.driver)
+        fun = '{0}.get_storage_id'.format(self.driver)
         if fun in self.modules:
-            return self.modules[fun](self.kwargs)
+            return self.modules[fun](self._kwargs)
         else:
             return self.driver
 
@@ -310,48 +429,154 @@ class MemCache(Cache):
         if self._storage is None:
             storage_id = self._get_storage_id()
             if storage_id not in MemCache.data:
-                MemCache.data[storage_id] = OrderedDict()
+                MemCache.data[storage_id] = _MemCacheStorage()
             self._storage = MemCache.data[storage_id]
         return self._storage
 
+    def _policy(self, bank):
+        '''
+        Return the expiration time and the maximum value size of a bank, the
+        most specific matching pattern of ``memcache_bank_policy`` wins.
+        '''
+        if bank not in self._policies:
+            policy = {'expire': self.expire, 'max_item_bytes': 0}
+            patterns = [pattern for pattern in self.bank_policy
+                        if fnmatch.fnmatch(bank, pattern)]
+            if patterns:
+                policy.update(self.bank_policy[max(patterns, key=len)])
+            self._policies[bank] = policy
+        return self._policies[bank]
+
+    def _cleanup(self, now):
+        '''
+        Remove the expired records, starting from the least recently used one
+        '''
+        for item, record in list(self.storage.items()):
+            if record[0] + self._policy(item[0])['expire'] >= now:
+                break
+            self._drop(item)
+            self.storage.evictions += 1
+
+    def _full(self, size):
+        if self.max and len(self.storage) >= self.max:
+            return True
+        return bool(self.max_bytes) and self.storage.bytes + size > self.max_bytes
+
+    def _drop(self, item):
+        record = self.storage.pop(item, None)
+        if record is not None:
+            self.storage.bytes -= self.storage.sizes.pop(item, 0)
+        return record
+
+    def _get(self, item, now):
+        '''
+        Return the data of an unexpired record and mark it as the most recently
+        used one, or None if there is no such record.
+        '''
+        record = self.storage.pop(item, None)
+        if record is None:
+            self.storage.misses += 1
+            return None
+        if record[0] + self._policy(item[0])['expire'] < now:
+            self.storage.bytes -= self.storage.sizes.pop(item, 0)
+            self.storage.misses += 1
+            return None
+        self.storage.hits += 1
+        # update atime and move the record to the end
+        record[0] = now
+        self.storage[item] = record
+        return record
+
+    def _put(self, item, data, now):
+        '''
+        Keep a record of the data, evicting the least recently used records if
+        the storage is full.
+        '''
+        self._drop(item)
+        policy = self._policy(item[0])
+        if not policy['expire']:
+            return
+        size = _sizeof(data)
+        if policy['max_item_bytes'] and size > policy['max_item_bytes']:
+            return
+        if self.max_bytes and size > self.max_bytes:
+            return
+        cleaned = False
+        while self.storage and self._full(size):
+            if self.cleanup and not cleaned:
+                self._cleanup(now)
+                cleaned = True
+                continue
+            oldest, _ = self.storage.popitem(last=False)
+            self.storage.bytes -= self.storage.sizes.pop(oldest, 0)
+            self.storage.evictions += 1
+        self.storage[item] = [now, data]
+        self.storage.sizes[item] = size
+        self.storage.bytes += size
+
     def fetch(self, bank, key):
         if self.debug:
             self.call += 1
         now = time.time()
-        record = self.storage.pop((bank, key), None)
+        record = self._get((bank, key), now)
         # Have a cached value for the key
-        if record is not None and record[0] + self.expire >= now:
+        if record is not None:
             if self.debug:
                 self.hit += 1
                 log.debug(
                     'MemCache stats (call/hit/rate): %s/%s/%s',
                     self.call, self.hit, float(self.hit) / self.call
                 )
-            # update atime and return
-            record[0] = now
-            self.storage[(bank, key)] = record
             return record[1]
 
         # Have no value for the key or value is expired
         data = super(MemCache, self).fetch(bank, key)
-        if len(self.storage) >= self.max:
-            if self.cleanup:
-                MemCache.__cleanup(self.expire)
-            if len(self.storage) >= self.max:
-                self.storage.popitem(last=False)
-        self.storage[(bank, key)] = [now, data]
+        self._put((bank, key), data, now)
         return data
 
+    def fetch_many(self, items):
+        items = list(items)
+        if '{0}.fetch_many'.format(self.driver) not in self.modules:
+            return dict((item, self.fetch(*item)) for item in items)
+        now = time.time()
+        ret = {}
+        missing = []
+        for item in items:
+            record = self._get(item, now)
+            if record is not None:
+                ret[item] = record[1]
+            else:
+                missing.append(item)
+        if missing:
+            fetched = super(MemCache, self).fetch_many(missing)
+            for item in missing:
+                ret[item] = fetched.get(item, {})
+                self._put(item, ret[item], now)
+        return ret
+
+    def store_many(self, items):
+        items = list(items)
+        if '{0}.store_many'.format(self.driver) not in self.modules:
+            for bank, key, data in items:
+                self.store(bank, key, data)
+            return
+        for bank, key, _ in items:
+            self._drop((bank, key))
+        super(MemCache, self).store_many(items)
+        now = time.time()
+        for bank, key, data in items:
+            self._put((bank, key), data, now)
+
     def store(self, bank, key, data):
-        self.storage.pop((bank, key), None)
+        self._drop((bank, key))
         super(MemCache, self).store(bank, key, data)
-        if len(self.storage) >= self.max:
-            if self.cleanup:
-                MemCache.__cleanup(self.expire)
-            if len(self.storage) >= self.max:
-                self.storage.popitem(last=False)
-        self.storage[(bank, key)] = [time.time(), data]
+        self._put((bank, key), data, time.time())
 
     def flush(self, bank, key=None):
-        self.storage.pop((bank, key), None)
+        if key is None:
+            for item in list(self.storage):
+                if item[0] == bank:
+                    self._drop(item)
+        else:
+            self._drop((bank, key))
         super(MemCache, self).flush(bank, key)
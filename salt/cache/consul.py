@@ -47,6 +47,7 @@ value to ``consul``:
 
 '''
 from __future__ import absolute_import, print_function, unicode_literals
+import base64
 import logging
 try:
     import consul
@@ -54,11 +55,21 @@ try:
 except ImportError:
     HAS_CONSUL = False
 
+import salt.utils.stringutils
 from salt.exceptions import SaltCacheError
+from salt.ext import six
 
 log = logging.getLogger(__name__)
 api = None
 
+# The maximum number of operations in a Consul transaction
+_TXN_MAX_OPS = 64
+# The number of keys under a bank path from which fetch_many considers reading
+# the whole path at once, and the share of the entries of the path the keys
+# have to cover for it
+_BULK_READ_MIN = 10
+_BULK_READ_RATIO = 0.5
+
 
 # Define the module's virtual name
 __virtualname__ = 'consul'
@@ -126,6 +137,103 @@ def fetch(bank, key):
         )
 
 
+def _bulk_parent(bank):
+    '''
+    Return the parent path of a bank, read at once by fetch_many
+    '''
+    return bank.rsplit('/', 1)[0] if '/' in bank else bank
+
+
+def store_many(items):
+    '''
+    Store several key values, in transactions of up to 64 keys when the
+    python-consul package supports them.
+    '''
+    if not hasattr(api, 'txn'):
+        for bank, key, data in items:
+            store(bank, key, data)
+        return
+    for index in range(0, len(items), _TXN_MAX_OPS):
+        payload = []
+        for bank, key, data in items[index:index + _TXN_MAX_OPS]:
+            payload.append({'KV': {
+                'Verb': 'set',
+                'Key': '{0}/{1}'.format(bank, key),
+                'Value': salt.utils.stringutils.to_unicode(
+                    base64.b64encode(__context__['serial'].dumps(data)))}})
+        try:
+            api.txn.put(payload)
+        except Exception as exc:
+            raise SaltCacheError(
+                'There was an error writing {0} keys: {1}'.format(
+                    len(payload), exc
+                )
+            )
+
+
+def _bulk_entry(parent, bank, key):
+    '''
+    Return the entry of the parent bank path holding a key
+    '''
+    if bank == parent:
+        return key
+    return bank[len(parent) + 1:].split('/', 1)[0]
+
+
+def _bulk_read(parent, group):
+    '''
+    Return True when the keys of a group cover most of the entries of their
+    parent bank path, so that reading the whole path at once is cheaper than
+    reading each key
+    '''
+    if len(group) < _BULK_READ_MIN:
+        return False
+    try:
+        _, entries = api.kv.get(parent + '/', keys=True, separator='/')
+    except Exception as exc:
+        raise SaltCacheError(
+            'There was an error listing the keys under {0}: {1}'.format(
+                parent, exc
+            )
+        )
+    if not entries:
+        return False
+    covered = set(_bulk_entry(parent, bank, key) for bank, key in group)
+    return len(covered) >= len(entries) * _BULK_READ_RATIO
+
+
+def fetch_many(items):
+    '''
+    Fetch several key values. The keys sharing the same parent bank path are
+    read at once with a recursive request when they cover most of the path.
+    '''
+    groups = {}
+    for bank, key in items:
+        groups.setdefault(_bulk_parent(bank), []).append((bank, key))
+    ret = {}
+    for parent, group in six.iteritems(groups):
+        if not _bulk_read(parent, group):
+            for bank, key in group:
+                ret[(bank, key)] = fetch(bank, key)
+            continue
+        try:
+            _, values = api.kv.get(parent + '/', recurse=True)
+        except Exception as exc:
+            raise SaltCacheError(
+                'There was an error reading the keys under {0}: {1}'.format(
+                    parent, exc
+                )
+            )
+        values = dict((value['Key'], value['Value']) for value in values or [])
+        for bank, key in group:
+            value = values.get('{0}/{1}'.format(bank, key))
+            if value is None:
+                ret[(bank, key)] = {}
+            else:
+                ret[(bank, key)] = __context__['serial'].loads(value)
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
@@ -168,6 +276,29 @@ def list_(bank):
     return keys
 
 
+def list_prefix(bank, prefix):
+    '''
+    Return the entries stored in the specified bank whose name starts with
+    prefix.
+    '''
+    try:
+        _, keys = api.kv.get('{0}/{1}'.format(bank, prefix), keys=True, separator='/')
+    except Exception as exc:
+        raise SaltCacheError(
+            'There was an error getting the key "{0}": {1}'.format(
+                bank, exc
+            )
+        )
+    if keys is None:
+        return []
+    # Any key could be a branch and a leaf at the same time in Consul
+    # so we have to return a list of unique names only.
+    out = set()
+    for key in keys:
+        out.add(key[len(bank) + 1:].rstrip('/'))
+    return list(out)
+
+
 def contains(bank, key):
     '''
     Checks if the specified bank contains the specified key.
@@ -57,9 +57,16 @@ except ImportError:
     HAS_ETCD = False
 
 from salt.exceptions import SaltCacheError
+from salt.ext import six
 
 _DEFAULT_PATH_PREFIX = "/salt_cache"
 
+# The number of keys under a bank path from which fetch_many considers reading
+# the whole path at once, and the share of the entries of the path the keys
+# have to cover for it
+_BULK_READ_MIN = 10
+_BULK_READ_RATIO = 0.5
+
 if HAS_ETCD:
     # The client logging tries to decode('ascii') binary data
     # and is too verbose
@@ -152,6 +159,84 @@ def fetch(bank, key):
         )
 
 
+def _bulk_parent(bank):
+    '''
+    Return the parent path of a bank, read at once by fetch_many
+    '''
+    return bank.rsplit('/', 1)[0] if '/' in bank else bank
+
+
+def _bulk_entry(parent, bank, key):
+    '''
+    Return the entry of the parent bank path holding a key
+    '''
+    if bank == parent:
+        return key
+    return bank[len(parent) + 1:].split('/', 1)[0]
+
+
+def _bulk_read(parent, group):
+    '''
+    Return True when the keys of a group cover most of the entries of their
+    parent path, so that reading the whole path at once is cheaper than
+    reading each key
+    '''
+    if len(group) < _BULK_READ_MIN:
+        return False
+    path = '{0}/{1}'.format(path_prefix, parent)
+    try:
+        entries = [child.key for child in client.read(path).children
+                   if child.key != path]
+    except etcd.EtcdKeyNotFound:
+        return False
+    except Exception as exc:
+        raise SaltCacheError(
+            'There was an error listing the keys under {0}: {1}'.format(
+                path, exc
+            )
+        )
+    if not entries:
+        return False
+    covered = set(_bulk_entry(parent, bank, key) for bank, key in group)
+    return len(covered) >= len(entries) * _BULK_READ_RATIO
+
+
+def fetch_many(items):
+    '''
+    Fetch several key values. The keys sharing the same parent bank path are
+    read at once with a recursive request when they cover most of the path.
+    '''
+    _init_client()
+    groups = {}
+    for bank, key in items:
+        groups.setdefault(_bulk_parent(bank), []).append((bank, key))
+    ret = {}
+    for parent, group in six.iteritems(groups):
+        path = '{0}/{1}'.format(path_prefix, parent)
+        if not _bulk_read(parent, group):
+            for bank, key in group:
+                ret[(bank, key)] = fetch(bank, key)
+            continue
+        try:
+            leaves = client.read(path, recursive=True).leaves
+            values = dict((leaf.key, leaf.value) for leaf in leaves)
+        except etcd.EtcdKeyNotFound:
+            values = {}
+        except Exception as exc:
+            raise SaltCacheError(
+                'There was an error reading the keys under {0}: {1}'.format(
+                    path, exc
+                )
+            )
+        for bank, key in group:
+            value = values.get('{0}/{1}/{2}'.format(path_prefix, bank, key))
+            if value is None:
+                ret[(bank, key)] = {}
+            else:
+                ret[(bank, key)] = __context__['serial'].loads(value)
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
@@ -206,6 +291,14 @@ def ls(bank):
         )
 
 
+def list_prefix(bank, prefix):
+    '''
+    Return an iterable object containing the entries stored in the specified
+    bank whose name starts with prefix.
+    '''
+    return [entry for entry in ls(bank) if entry.startswith(prefix)]
+
+
 def contains(bank, key):
     '''
     Checks if the specified bank contains the specified key.
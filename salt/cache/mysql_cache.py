@@ -46,6 +46,7 @@ value to ``mysql``:
 from __future__ import absolute_import, print_function, unicode_literals
 from time import sleep
 import logging
+import re
 
 try:
     # Trying to import MySQLdb
@@ -70,6 +71,8 @@ from salt.exceptions import SaltCacheError
 _DEFAULT_DATABASE_NAME = "salt_cache"
 _DEFAULT_CACHE_TABLE_NAME = "cache"
 _RECONNECT_INTERVAL_SEC = 0.050
+# The number of keys read or written by a single query of the bulk functions
+_BULK_SIZE = 1000
 
 log = logging.getLogger(__name__)
 client = None
@@ -89,16 +92,20 @@ def __virtual__():
     return bool(MySQLdb), 'No python mysql client installed.' if MySQLdb is None else ''
 
 
-def run_query(conn, query, retries=3):
+def run_query(conn, query, retries=3, args=None, many=False):
     '''
     Get a cursor and run a query. Reconnect up to `retries` times if
-    needed.
+    needed. The query parameters are passed in `args`, a list of them is run
+    with executemany if `many` is set.
     Returns: cursor, affected rows counter
     Raises: SaltCacheError, AttributeError, OperationalError
     '''
     try:
         cur = conn.cursor()
-        out = cur.execute(query)
+        if many:
+            out = cur.executemany(query, args)
+        else:
+            out = cur.execute(query, args)
         return cur, out
     except (AttributeError, OperationalError) as e:
         if retries == 0:
@@ -111,7 +118,7 @@ def run_query(conn, query, retries=3):
             log.info("mysql_cache: recreating db connection due to: %r", e)
         global client
         client = MySQLdb.connect(**_mysql_kwargs)
-        return run_query(client, query, retries - 1)
+        return run_query(client, query, retries - 1, args=args, many=many)
     except Exception as e:
         if len(query) > 150:
             query = query[:150] + "<...>"
@@ -211,6 +218,38 @@ def fetch(bank, key):
     return __context__['serial'].loads(r[0])
 
 
+def store_many(items):
+    '''
+    Store several key values, in multi-row REPLACE queries.
+    '''
+    _init_client()
+    query = "REPLACE INTO {0} (bank, etcd_key, data) VALUES (%s, %s, %s)".format(
+        _table_name)
+    for index in range(0, len(items), _BULK_SIZE):
+        rows = [(bank, key, __context__['serial'].dumps(data))
+                for bank, key, data in items[index:index + _BULK_SIZE]]
+        cur, _ = run_query(client, query, args=rows, many=True)
+        cur.close()
+
+
+def fetch_many(items):
+    '''
+    Fetch several key values, in SELECT queries matching them with IN.
+    '''
+    _init_client()
+    ret = dict((item, {}) for item in items)
+    for index in range(0, len(items), _BULK_SIZE):
+        chunk = items[index:index + _BULK_SIZE]
+        query = "SELECT bank, etcd_key, data FROM {0} WHERE (bank, etcd_key) " \
+            "IN ({1})".format(_table_name, ', '.join(['(%s, %s)'] * len(chunk)))
+        args = [value for item in chunk for value in item]
+        cur, _ = run_query(client, query, args=args)
+        for bank, key, data in cur.fetchall():
+            ret[(bank, key)] = __context__['serial'].loads(data)
+        cur.close()
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content.
@@ -238,6 +277,21 @@ def ls(bank):
     return out
 
 
+def list_prefix(bank, prefix):
+    '''
+    Return an iterable object containing the entries stored in the specified
+    bank whose name starts with prefix.
+    '''
+    _init_client()
+    query = "SELECT etcd_key FROM {0} WHERE bank=%s AND etcd_key LIKE %s".format(
+        _table_name)
+    like = re.sub(r'([\\%_])', r'\\\1', prefix) + '%'
+    cur, _ = run_query(client, query, args=(bank, like))
+    out = [row[0] for row in cur.fetchall()]
+    cur.close()
+    return out
+
+
 def contains(bank, key):
     '''
     Checks if the specified bank contains the specified key.
@@ -104,6 +104,13 @@ unix_socket_path:
 
     Path to a UNIX socket for access. Overrides `host` / `port`.
 
+max_connections:
+
+    .. versionadded:: Fluorine
+
+    The maximum number of connections in the connection pool shared by all
+    the cache operations of a process. Unlimited by default.
+
 Configuration Example:
 
 .. code-block:: yaml
@@ -140,6 +147,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 # Import stdlib
 import logging
+import re
 
 # Import third party libs
 try:
@@ -157,6 +165,7 @@ except ImportError:
     HAS_REDIS_CLUSTER = False
 
 # Import salt
+import salt.utils.stringutils
 from salt.ext.six.moves import range
 from salt.exceptions import SaltCacheError
 
@@ -215,6 +224,7 @@ def _get_redis_cache_opts():
         'cluster_mode': __opts__.get('cache.redis.cluster_mode', False),
         'startup_nodes': __opts__.get('cache.redis.cluster.startup_nodes', {}),
         'skip_full_coverage_check': __opts__.get('cache.redis.cluster.skip_full_coverage_check', False),
+        'max_connections': __opts__.get('cache.redis.max_connections', None),
     }
 
 
@@ -232,16 +242,26 @@ def _get_redis_server(opts=None):
     if opts['cluster_mode']:
         REDIS_SERVER = StrictRedisCluster(startup_nodes=opts['startup_nodes'],
                                           skip_full_coverage_check=opts['skip_full_coverage_check'],
+                                          max_connections=opts['max_connections'],
                                           decode_responses=True)
     else:
         REDIS_SERVER = redis.StrictRedis(opts['host'],
                                    opts['port'],
                                    unix_socket_path=opts['unix_socket_path'],
                                    db=opts['db'],
-                                   password=opts['password'])
+                                   password=opts['password'],
+                                   max_connections=opts['max_connections'])
     return REDIS_SERVER
 
 
+def _get_redis_pipeline(redis_server):
+    '''
+    Return a pipeline sending its commands in a single request, without
+    wrapping them in a transaction as this is not supported in cluster mode.
+    '''
+    return redis_server.pipeline(transaction=False)
+
+
 def _get_redis_keys_opts():
     '''
     Build the key opts based on the user options.
@@ -313,21 +333,27 @@ def _build_bank_hier(bank, redis_pipe):
 
 def _get_banks_to_remove(redis_server, bank, path=''):
     '''
-    A simple tree tarversal algorithm that builds the list of banks to remove,
-    starting from an arbitrary node in the tree.
+    A breadth-first tree traversal that builds the list of banks to remove,
+    starting from an arbitrary node in the tree. The sub-banks of all the banks
+    of a level of the tree are fetched with a single pipelined request.
     '''
     current_path = bank if not path else '{path}/{bank}'.format(path=path, bank=bank)
     bank_paths_to_remove = [current_path]
     # as you got here, you'll be removed
-
-    bank_key = _get_bank_redis_key(current_path)
-    child_banks = redis_server.smembers(bank_key)
-    if not child_banks:
-        return bank_paths_to_remove  # this bank does not have any child banks so we stop here
-    for child_bank in child_banks:
-        bank_paths_to_remove.extend(_get_banks_to_remove(redis_server, child_bank, path=current_path))
+    level = [current_path]
+    while level:
+        redis_pipe = _get_redis_pipeline(redis_server)
+        for bank_path in level:
+            redis_pipe.smembers(_get_bank_redis_key(bank_path))
+        child_banks = redis_pipe.execute()
+        level = [
+            '{path}/{bank}'.format(path=bank_path,
+                                   bank=salt.utils.stringutils.to_unicode(child_bank))
+            for bank_path, children in zip(level, child_banks)
+            for child_bank in children
+        ]
         # go one more level deeper
-        # and also remove the children of this child bank (if any)
+        bank_paths_to_remove.extend(level)
     return bank_paths_to_remove
 
 # -----------------------------------------------------------------------------
@@ -340,7 +366,7 @@ def store(bank, key, data):
     Store the data in a Redis key.
     '''
     redis_server = _get_redis_server()
-    redis_pipe = redis_server.pipeline()
+    redis_pipe = _get_redis_pipeline(redis_server)
     redis_key = _get_key_redis_key(bank, key)
     redis_bank_keys = _get_bank_keys_redis_key(bank)
     try:
@@ -377,6 +403,62 @@ def fetch(bank, key):
     return __context__['serial'].loads(redis_value)
 
 
+def store_many(items):
+    '''
+    Store the data of several keys, in a single pipelined request.
+    '''
+    redis_server = _get_redis_server()
+    redis_pipe = _get_redis_pipeline(redis_server)
+    banks = set()
+    try:
+        for bank, key, data in items:
+            if bank not in banks:
+                _build_bank_hier(bank, redis_pipe)
+                banks.add(bank)
+            redis_pipe.set(_get_key_redis_key(bank, key),
+                           __context__['serial'].dumps(data))
+            redis_pipe.sadd(_get_bank_keys_redis_key(bank), key)
+        log.debug('Setting the value of %d keys', len(items))
+        redis_pipe.execute()
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = 'Cannot set {count} Redis cache keys: {rerr}'.format(count=len(items),
+                                                                  rerr=rerr)
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+
+
+def fetch_many(items):
+    '''
+    Fetch the data of several keys from the Redis cache, in a single MGET or
+    pipelined request.
+    '''
+    if not items:
+        return {}
+    redis_server = _get_redis_server()
+    redis_keys = [_get_key_redis_key(bank, key) for bank, key in items]
+    try:
+        if _get_redis_cache_opts()['cluster_mode']:
+            # The keys may be held by different nodes, MGET can't be used
+            redis_pipe = _get_redis_pipeline(redis_server)
+            for redis_key in redis_keys:
+                redis_pipe.get(redis_key)
+            redis_values = redis_pipe.execute()
+        else:
+            redis_values = redis_server.mget(redis_keys)
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = 'Cannot fetch {count} Redis cache keys: {rerr}'.format(count=len(items),
+                                                                    rerr=rerr)
+        log.error(mesg)
+        raise SaltCacheError(mesg)
+    ret = {}
+    for item, redis_value in zip(items, redis_values):
+        if redis_value is None:
+            ret[item] = {}
+        else:
+            ret[item] = __context__['serial'].loads(redis_value)
+    return ret
+
+
 def flush(bank, key=None):
     '''
     Remove the key from the cache bank with all the key content. If no key is specified, remove
@@ -385,20 +467,15 @@ def flush(bank, key=None):
     However, when removing a whole bank,
     in order to re-create the tree, there are a couple of requests made. In total:
 
-    - one for node in the hierarchy sub-tree, starting from the bank node
+    - one for each level of the hierarchy sub-tree, starting from the bank node
     - one pipelined request to get the keys under all banks in the sub-tree
     - one pipeline request to remove the corresponding keys
 
-    This is not quite optimal, as if we need to flush a bank having
-    a very long list of sub-banks, the number of requests to build the sub-tree may grow quite big.
-
-    An improvement for this would be loading a custom Lua script in the Redis instance of the user
-    (using the ``register_script`` feature) and call it whenever we flush.
-    This script would only need to build this sub-tree causing problems. It can be added later and the behaviour
-    should not change as the user needs to explicitly allow Salt inject scripts in their Redis instance.
+    The number of requests to build the sub-tree only depends on its depth, not on the number
+    of sub-banks.
     '''
     redis_server = _get_redis_server()
-    redis_pipe = redis_server.pipeline()
+    redis_pipe = _get_redis_pipeline(redis_server)
     if key is None:
         # will remove all bank keys
         bank_paths_to_remove = _get_banks_to_remove(redis_server, bank)
@@ -430,6 +507,7 @@ def flush(bank, key=None):
             bank_keys = subtree_keys[index]  # all the keys under this bank
             bank_path = bank_paths_to_remove[index]
             for key in bank_keys:
+                key = salt.utils.stringutils.to_unicode(key)
                 redis_key = _get_key_redis_key(bank_path, key)
                 redis_pipe.delete(redis_key)  # kill 'em all!
                 log.debug(
@@ -487,7 +565,26 @@ def list_(bank):
         raise SaltCacheError(mesg)
     if not banks:
         return []
-    return list(banks)
+    return [salt.utils.stringutils.to_unicode(bank) for bank in banks]
+
+
+def list_prefix(bank, prefix):
+    '''
+    Lists entries stored in the specified bank whose name starts with prefix,
+    filtered by the Redis server.
+    '''
+    redis_server = _get_redis_server()
+    bank_redis_key = _get_bank_redis_key(bank)
+    # Escape the glob characters of the prefix
+    match = re.sub(r'([\\*?\[\]])', r'\\\1', prefix) + '*'
+    try:
+        return [salt.utils.stringutils.to_unicode(entry)
+                for entry in redis_server.sscan_iter(bank_redis_key, match=match)]
+    except (RedisConnectionError, RedisResponseError) as rerr:
+        mesg = 'Cannot list the Redis cache key {rkey}: {rerr}'.format(rkey=bank_redis_key,
+                                                                       rerr=rerr)
+        log.error(mesg)
+        raise SaltCacheError(mesg)
 
 
 def contains(bank, key):
@@ -7,7 +7,7 @@ Execute batch runs
 from __future__ import absolute_import, print_function, unicode_literals
 import math
 import time
-import copy
+import collections
 from datetime import datetime, timedelta
 
 # Import salt libs
@@ -25,10 +25,24 @@ import logging
 
 log = logging.getLogger(__name__)
 
+# How long the minions which answered the ping wait for more minions, to fill
+# the free slots of the batch with a single job
+COALESCE_WAIT = 0.1
+
+# Weight of the last return in the moving averages of the return latency and
+# of the failure rate
+AVERAGE_WEIGHT = 0.2
+
 
 class Batch(object):
     '''
     Manage the execution of batch runs
+
+    The batch run is driven by the returns read from the master event bus. The
+    minions are run as they answer the ``test.ping``, as soon as a slot of the
+    window is free, and the minions filling the slots freed together are sent
+    a single job. A minion which no longer reports the job to
+    ``saltutil.find_job``, or to the job registry, frees its slot.
     '''
     def __init__(self, opts, eauth=None, quiet=False, parser=None):
         self.opts = opts
@@ -36,54 +50,49 @@ class Batch(object):
         self.pub_kwargs = eauth if eauth else {}
         self.quiet = quiet
         self.local = salt.client.get_local_client(opts['conf_file'])
-        self.minions, self.ping_gen, self.down_minions = self.__gather_minions()
+        self.minions, self.ping_jid = self.__gather_minions()
+        self.down_minions = set()
         self.options = parser
+        # Moving averages of the time taken by the minions to return and of
+        # the rate of failed returns, used by the adaptive batch_wait
+        self.latency = None
+        self.failure_rate = 0.0
 
     def __gather_minions(self):
         '''
-        Return a list of minions to use for the batch run
+        Publish the ``test.ping`` finding the minions to use for the batch run.
+        Return the list of targeted minions and the jid of the ping, the
+        minions are run as their answers come in.
         '''
-        args = [self.opts['tgt'],
-                'test.ping',
-                [],
-                self.opts['timeout'],
-                ]
-
         selected_target_option = self.opts.get('selected_target_option', None)
         if selected_target_option is not None:
-            args.append(selected_target_option)
+            tgt_type = selected_target_option
         else:
-            args.append(self.opts.get('tgt_type', 'glob'))
+            tgt_type = self.opts.get('tgt_type', 'glob')
 
-        self.pub_kwargs['yield_pub_data'] = True
-        ping_gen = self.local.cmd_iter(*args,
-                                       gather_job_timeout=self.opts['gather_job_timeout'],
-                                       **self.pub_kwargs)
-
-        # Broadcast to targets
-        fret = set()
-        nret = set()
-        for ret in ping_gen:
-            if ('minions' and 'jid') in ret:
-                for minion in ret['minions']:
-                    nret.add(minion)
-                continue
-            else:
-                try:
-                    m = next(six.iterkeys(ret))
-                except StopIteration:
-                    if not self.quiet:
-                        salt.utils.stringutils.print_cli('No minions matched the target.')
-                    break
-                if m is not None:
-                    fret.add(m)
-        return (list(fret), ping_gen, nret.difference(fret))
+        pub_data = self.local.run_job(self.opts['tgt'],
+                                      'test.ping',
+                                      [],
+                                      tgt_type=tgt_type,
+                                      timeout=self.opts['timeout'],
+                                      listen=True,
+                                      gather_job_timeout=self.opts['gather_job_timeout'],
+                                      **self.pub_kwargs)
+        if not pub_data or not pub_data.get('minions'):
+            if not self.quiet:
+                salt.utils.stringutils.print_cli('No minions matched the target.')
+            return [], None
+        return list(pub_data['minions']), pub_data['jid']
 
-    def get_bnum(self):
+    def get_bnum(self, count=None):
         '''
-        Return the active number of minions to maintain
+        Return the active number of minions to maintain. A percentage is
+        computed against ``count`` minions, all the targeted minions by
+        default.
         '''
-        partition = lambda x: float(x) / 100.0 * len(self.minions)
+        if count is None:
+            count = len(self.minions)
+        partition = lambda x: float(x) / 100.0 * count
         try:
             if '%' in self.opts['batch']:
                 res = partition(float(self.opts['batch'].strip('%')))
@@ -106,187 +115,267 @@ class Batch(object):
         if i:
             del wait[:i]
 
+    def __get_events(self, wait):
+        '''
+        Yield the job events of the master event bus, waiting at most ``wait``
+        seconds for the first one
+        '''
+        event = self.local.event
+        raw = event.get_event(wait=wait, tag='salt/job/', match_type='startswith',
+                              full=True, auto_reconnect=self.local.auto_reconnect)
+        while raw is not None:
+            yield raw
+            raw = event.get_event(tag='salt/job/', match_type='startswith', full=True,
+                                  no_block=True, auto_reconnect=self.local.auto_reconnect)
+
+    def __observe(self, latency, failed):
+        '''
+        Update the moving averages of the return latency and failure rate
+        '''
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += AVERAGE_WEIGHT * (latency - self.latency)
+        self.failure_rate += AVERAGE_WEIGHT * ((1.0 if failed else 0.0) - self.failure_rate)
+
+    def get_wait(self):
+        '''
+        Return the number of seconds to wait after a minion returns before
+        freeing its slot. With ``batch_wait_adaptive``, the wait grows with the
+        rate of failed returns, up to ``batch_wait`` plus the time taken by the
+        minions to return, slowing the run down while the minions fail.
+        '''
+        bwait = self.opts.get('batch_wait', 0)
+        if self.opts.get('batch_wait_adaptive') and self.latency is not None:
+            return bwait + self.failure_rate * self.latency
+        return bwait
+
+    def __check_jobs(self, jid, job, gather_job_timeout):
+        '''
+        Start checking which minions still run a job, with the job registry
+        or ``saltutil.find_job``
+        '''
+        job['running'] = set()
+        check = set(job['minions'])
+        if self.local.job_registry is not None:
+            # Only ask the minions which the job registry does not report
+            # as running the job, their job start event may be late
+            try:
+                job['running'] = check.intersection(self.local.job_registry.running(jid))
+                check -= job['running']
+            except salt.exceptions.SaltCacheError as exc:
+                log.warning('Job registry unavailable: %s', exc)
+        job['find_jid'] = None
+        if check:
+            pub_data = self.local.gather_job_info(jid, list(check), 'list',
+                                                  gather_job_timeout=gather_job_timeout,
+                                                  **self.eauth)
+            job['find_jid'] = pub_data.get('jid')
+        job['check_at'] = time.time() + (gather_job_timeout if job['find_jid'] else 0)
+
+    def __clean_up(self, jid, find_job=False):
+        '''
+        Drop the event subscriptions of a job
+        '''
+        if not jid:
+            return
+        if find_job:
+            # gather_job_info also subscribes to the bare jid
+            self.local.event.unsubscribe(jid)
+        self.local._clean_up_subscriptions(jid)
+
     def run(self):
         '''
         Execute the batch run
         '''
-        args = [[],
-                self.opts['fun'],
-                self.opts['arg'],
-                self.opts['timeout'],
-                'list',
-                ]
         bnum = self.get_bnum()
         # No targets to run
-        if not self.minions:
+        if not self.minions or bnum is None:
             return
-        to_run = copy.deepcopy(self.minions)
-        active = []
-        ret = {}
-        iters = []
-        # wait the specified time before decide a job is actually done
-        bwait = self.opts.get('batch_wait', 0)
-        wait = []
-
+        # A percentage is computed against the minions which answered the ping
+        percent = '%' in self.opts['batch']
         if self.options:
             show_jid = self.options.show_jid
             show_verbose = self.options.verbose
         else:
             show_jid = False
             show_verbose = False
+        timeout = self.opts['timeout']
+        gather_job_timeout = int(self.opts['gather_job_timeout'])
+        # the minions which have not answered the ping yet
+        pinging = set(self.minions)
+        ping_timeout_at = time.time() + timeout
+        # the minions which answered the ping, waiting for a free slot
+        to_run = collections.deque()
+        queued_at = None
+        # the start time of the minions running the batch job
+        active = {}
+        # the jobs running, by jid:
+        # - minions: the minions which have not returned yet
+        # - start: when the job was published
+        # - check_at: when to check which minions still run the job
+        # - find_jid: the jid of the saltutil.find_job checking it
+        # - running: the minions still running the job
+        jobs = {}
+        # the jobs checked by the saltutil.find_job jids
+        find_jids = {}
+        ret = {}
+        # wait the specified time before decide a job is actually done
+        wait = []
 
-        # the minion tracker keeps track of responses and iterators
-        # - it removes finished iterators from iters[]
-        # - if a previously detected minion does not respond, its
-        #   added with an empty answer to ret{} once the timeout is reached
-        # - unresponsive minions are removed from active[] to make
-        #   sure that the main while loop finishes even with unresp minions
-        minion_tracker = {}
-
-        if not self.quiet:
-            # We already know some minions didn't respond to the ping, so inform
-            # the user we won't be attempting to run a job on them
-            for down_minion in self.down_minions:
-                salt.utils.stringutils.print_cli('Minion {0} did not respond. No job will be sent.'.format(down_minion))
-
-        # Iterate while we still have things to execute
-        while len(ret) < len(self.minions):
-            next_ = []
-            if bwait and wait:
-                self.__update_wait(wait)
-            if len(to_run) <= bnum - len(wait) and not active:
-                # last bit of them, add them all to next iterator
-                while to_run:
-                    next_.append(to_run.pop())
-            else:
-                for i in range(bnum - len(active) - len(wait)):
-                    if to_run:
-                        minion_id = to_run.pop()
-                        if isinstance(minion_id, dict):
-                            next_.append(minion_id.keys()[0])
-                        else:
-                            next_.append(minion_id)
-
-            active += next_
-            args[0] = next_
-
-            if next_:
-                if not self.quiet:
-                    salt.utils.stringutils.print_cli('\nExecuting run on {0}\n'.format(sorted(next_)))
-                # create a new iterator for this batch of minions
-                new_iter = self.local.cmd_iter_no_block(
-                                *args,
-                                raw=self.opts.get('raw', False),
-                                ret=self.opts.get('return', ''),
-                                show_jid=show_jid,
-                                verbose=show_verbose,
-                                gather_job_timeout=self.opts['gather_job_timeout'],
-                                **self.eauth)
-                # add it to our iterators and to the minion_tracker
-                iters.append(new_iter)
-                minion_tracker[new_iter] = {}
-                # every iterator added is 'active' and has its set of minions
-                minion_tracker[new_iter]['minions'] = next_
-                minion_tracker[new_iter]['active'] = True
-
-            else:
-                time.sleep(0.02)
-            parts = {}
-
-            # see if we found more minions
-            for ping_ret in self.ping_gen:
-                if ping_ret is None:
-                    break
-                m = next(six.iterkeys(ping_ret))
-                if m not in self.minions:
-                    self.minions.append(m)
-                    to_run.append(m)
-
-            for queue in iters:
-                try:
-                    # Gather returns until we get to the bottom
-                    ncnt = 0
-                    while True:
-                        part = next(queue)
-                        if part is None:
-                            time.sleep(0.01)
-                            ncnt += 1
-                            if ncnt > 5:
-                                break
-                            continue
+        try:
+            while pinging or to_run or active:
+                parts = {}
+                for raw in self.__get_events(COALESCE_WAIT):
+                    data = raw['data']
+                    if 'return' not in data or 'id' not in data:
+                        continue
+                    jid = data.get('jid')
+                    minion = data['id']
+                    if jid == self.ping_jid:
+                        if minion in pinging or minion not in self.minions:
+                            # a minion answered, or we found more minions
+                            pinging.discard(minion)
+                            if minion not in self.minions:
+                                self.minions.append(minion)
+                            to_run.append(minion)
+                            if queued_at is None:
+                                queued_at = time.time()
+                    elif jid in find_jids:
+                        job = jobs.get(find_jids[jid])
+                        # an empty return means the job is not running anymore
+                        if job is not None and minion in job['minions'] and data['return']:
+                            job['running'].add(minion)
+                    elif jid in jobs and minion in jobs[jid]['minions']:
+                        jobs[jid]['minions'].discard(minion)
                         if self.opts.get('raw'):
-                            parts.update({part['data']['id']: part})
-                            if part['data']['id'] in minion_tracker[queue]['minions']:
-                                minion_tracker[queue]['minions'].remove(part['data']['id'])
-                            else:
-                                salt.utils.stringutils.print_cli('minion {0} was already deleted from tracker, probably a duplicate key'.format(part['id']))
+                            parts[minion] = raw
                         else:
-                            parts.update(part)
-                            for id in part:
-                                if id in minion_tracker[queue]['minions']:
-                                    minion_tracker[queue]['minions'].remove(id)
-                                else:
-                                    salt.utils.stringutils.print_cli('minion {0} was already deleted from tracker, probably a duplicate key'.format(id))
-                except StopIteration:
-                    # if a iterator is done:
-                    # - set it to inactive
-                    # - add minions that have not responded to parts{}
+                            parts[minion] = {'ret': data['return']}
+                            for key in ('out', 'retcode'):
+                                if key in data:
+                                    parts[minion][key] = data[key]
+                            if show_jid or show_verbose:
+                                parts[minion]['jid'] = jid
+                        self.__observe(time.time() - jobs[jid]['start'],
+                                       data.get('retcode', 0) or data.get('success') is False)
 
-                    # check if the tracker contains the iterator
-                    if queue in minion_tracker:
-                        minion_tracker[queue]['active'] = False
+                now = time.time()
+                if pinging and (now > ping_timeout_at or self.ping_jid is None):
+                    # We know these minions didn't respond to the ping, so
+                    # inform the user we won't be attempting to run a job on them
+                    for down_minion in sorted(pinging):
+                        if not self.quiet:
+                            salt.utils.stringutils.print_cli('Minion {0} did not respond. No job will be sent.'.format(down_minion))
+                    self.down_minions.update(pinging)
+                    pinging.clear()
+                if not pinging and self.ping_jid is not None:
+                    self.__clean_up(self.ping_jid)
+                    self.ping_jid = None
 
-                        # add all minions that belong to this iterator and
-                        # that have not responded to parts{} with an empty response
-                        for minion in minion_tracker[queue]['minions']:
-                            if minion not in parts:
-                                parts[minion] = {}
-                                parts[minion]['ret'] = {}
+                # find the minions which stopped running their job
+                for jid, job in list(six.iteritems(jobs)):
+                    if not job['minions'] or now < job['check_at']:
+                        continue
+                    if 'running' not in job:
+                        self.__check_jobs(jid, job, gather_job_timeout)
+                        if job['find_jid']:
+                            find_jids[job['find_jid']] = jid
+                        continue
+                    # the minions which did not report the job are done
+                    for minion in job['minions'] - job['running']:
+                        parts[minion] = {'ret': {}}
+                        self.__observe(now - job['start'], True)
+                    job['minions'] &= job.pop('running')
+                    find_jids.pop(job['find_jid'], None)
+                    self.__clean_up(job.pop('find_jid'), find_job=True)
+                    job['check_at'] = now + timeout
+                for jid in [jid for jid, job in six.iteritems(jobs) if not job['minions']]:
+                    job = jobs.pop(jid)
+                    find_jids.pop(job.get('find_jid'), None)
+                    self.__clean_up(job.get('find_jid'), find_job=True)
+                    self.__clean_up(jid)
 
-            for minion, data in six.iteritems(parts):
-                if minion in active:
-                    active.remove(minion)
-                    if bwait:
-                        wait.append(datetime.now() + timedelta(seconds=bwait))
-                # Munge retcode into return data
-                failhard = False
-                if 'retcode' in data and isinstance(data['ret'], dict) and 'retcode' not in data['ret']:
-                    data['ret']['retcode'] = data['retcode']
-                    if self.opts.get('failhard') and data['ret']['retcode'] > 0:
-                        failhard = True
+                for minion in parts:
+                    if active.pop(minion, None) is not None:
+                        bwait = self.get_wait()
+                        if bwait:
+                            wait.append(datetime.now() + timedelta(seconds=bwait))
+                            # the adaptive waits may end in another order
+                            wait.sort()
 
-                if self.opts.get('raw'):
-                    ret[minion] = data
-                    yield data
-                else:
-                    ret[minion] = data['ret']
-                    yield {minion: data['ret']}
-                if not self.quiet:
-                    ret[minion] = data['ret']
-                    data[minion] = data.pop('ret')
-                    if 'out' in data:
-                        out = data.pop('out')
+                # run the minions in the free slots, the slots freed together
+                # are filled with a single job
+                if wait:
+                    self.__update_wait(wait)
+                if percent:
+                    bnum = self.get_bnum(
+                        len(self.minions) - len(pinging) - len(self.down_minions))
+                free = bnum - len(active) - len(wait)
+                if to_run and free > 0 and (len(to_run) >= free or not pinging or
+                                            now - queued_at >= COALESCE_WAIT):
+                    next_ = [to_run.popleft() for _ in range(min(free, len(to_run)))]
+                    queued_at = now if to_run else None
+                    if not self.quiet:
+                        salt.utils.stringutils.print_cli('\nExecuting run on {0}\n'.format(sorted(next_)))
+                    pub_data = self.local.run_job(next_,
+                                                  self.opts['fun'],
+                                                  self.opts['arg'],
+                                                  tgt_type='list',
+                                                  ret=self.opts.get('return', ''),
+                                                  timeout=timeout,
+                                                  listen=True,
+                                                  gather_job_timeout=gather_job_timeout,
+                                                  **self.eauth)
+                    if pub_data and pub_data.get('jid'):
+                        if show_verbose and not self.quiet:
+                            msg = 'Executing job with jid {0}'.format(pub_data['jid'])
+                            salt.utils.stringutils.print_cli(msg)
+                            salt.utils.stringutils.print_cli('-' * len(msg) + '\n')
+                        elif show_jid and not self.quiet:
+                            salt.utils.stringutils.print_cli('jid: {0}'.format(pub_data['jid']))
+                        for minion in next_:
+                            active[minion] = now
+                        jobs[pub_data['jid']] = {'minions': set(next_),
+                                                 'start': now,
+                                                 'check_at': now + timeout}
                     else:
-                        out = None
-                    salt.output.display_output(
-                            data,
-                            out,
-                            self.opts)
-                if failhard:
-                    log.error(
-                        'Minion %s returned with non-zero exit code. '
-                        'Batch run stopped due to failhard', minion
-                    )
-                    raise StopIteration
+                        for minion in next_:
+                            parts[minion] = {'ret': {}}
+
+                for minion, data in six.iteritems(parts):
+                    # Munge retcode into return data
+                    failhard = False
+                    if 'retcode' in data and isinstance(data['ret'], dict) and 'retcode' not in data['ret']:
+                        data['ret']['retcode'] = data['retcode']
+                        if self.opts.get('failhard') and data['ret']['retcode'] > 0:
+                            failhard = True
 
-            # remove inactive iterators from the iters list
-            for queue in minion_tracker:
-                # only remove inactive queues
-                if not minion_tracker[queue]['active'] and queue in iters:
-                    iters.remove(queue)
-                    # also remove the iterator's minions from the active list
-                    for minion in minion_tracker[queue]['minions']:
-                        if minion in active:
-                            active.remove(minion)
-                            if bwait:
-                                wait.append(datetime.now() + timedelta(seconds=bwait))
+                    if self.opts.get('raw'):
+                        ret[minion] = data
+                        yield data
+                    else:
+                        ret[minion] = data['ret']
+                        yield {minion: data['ret']}
+                    if not self.quiet:
+                        ret[minion] = data['ret']
+                        data[minion] = data.pop('ret')
+                        if 'out' in data:
+                            out = data.pop('out')
+                        else:
+                            out = None
+                        salt.output.display_output(
+                                data,
+                                out,
+                                self.opts)
+                    if failhard:
+                        log.error(
+                            'Minion %s returned with non-zero exit code. '
+                            'Batch run stopped due to failhard', minion
+                        )
+                        return
+        finally:
+            for jid, job in six.iteritems(jobs):
+                self.__clean_up(job.get('find_jid'), find_job=True)
+                self.__clean_up(jid)
+            self.__clean_up(self.ping_jid)
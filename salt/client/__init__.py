@@ -36,6 +36,7 @@ import salt.utils.args
 import salt.utils.event
 import salt.utils.files
 import salt.utils.jid
+import salt.utils.job
 import salt.utils.minions
 import salt.utils.platform
 import salt.utils.stringutils
@@ -49,6 +50,7 @@ from salt.exceptions import (
     EauthAuthenticationError,
     PublishError,
     SaltInvocationError,
+    SaltCacheError,
     SaltReqTimeoutError,
     SaltClientError
 )
@@ -173,6 +175,10 @@ class LocalClient(object):
         self.utils = salt.loader.utils(self.opts)
         self.functions = salt.loader.minion_mods(self.opts, utils=self.utils)
         self.returners = salt.loader.returners(self.opts, self.functions)
+        if self.opts.get('job_registry'):
+            self.job_registry = salt.utils.job.JobRegistry(self.opts)
+        else:
+            self.job_registry = None
 
     def __read_master_key(self):
         '''
@@ -547,6 +553,8 @@ class LocalClient(object):
             opts['gather_job_timeout'] = kwargs['gather_job_timeout']
         if 'batch_wait' in kwargs:
             opts['batch_wait'] = int(kwargs['batch_wait'])
+        if 'batch_wait_adaptive' in kwargs:
+            opts['batch_wait_adaptive'] = kwargs['batch_wait_adaptive']
 
         eauth = {}
         if 'eauth' in kwargs:
@@ -1147,15 +1155,35 @@ class LocalClient(object):
             # re-do the ping
             if time.time() > timeout_at and minions_running:
                 # since this is a new ping, no one has responded yet
-                jinfo = self.gather_job_info(jid, list(minions - found), 'list', **kwargs)
                 minions_running = False
+                ping_minions = minions - found
+                if self.job_registry is not None:
+                    # Only ping the minions which the job registry does not
+                    # report as running the job, their job start event may
+                    # not have been received yet
+                    try:
+                        running = self.job_registry.running(jid)
+                        ping_minions = set()
+                        for id_ in minions - found:
+                            if id_ in running:
+                                minion_timeouts[id_] = time.time() + timeout
+                                minions_running = True
+                            else:
+                                ping_minions.add(id_)
+                    except SaltCacheError as exc:
+                        log.warning('Job registry unavailable: %s', exc)
+                if ping_minions:
+                    jinfo = self.gather_job_info(jid, list(ping_minions), 'list', **kwargs)
+                else:
+                    jinfo = {}
                 # if we weren't assigned any jid that means the master thinks
                 # we have nothing to send
                 if 'jid' not in jinfo:
                     jinfo_iter = []
                 else:
                     jinfo_iter = self.get_returns_no_block('salt/job/{0}'.format(jinfo['jid']))
-                timeout_at = time.time() + gather_job_timeout
+                if ping_minions or minions_running:
+                    timeout_at = time.time() + gather_job_timeout
                 # if you are a syndic, wait a little longer
                 if self.opts['order_masters']:
                     timeout_at += self.opts.get('syndic_wait', 1)
@@ -177,6 +177,13 @@ VALID_OPTS = {
     # what commands the master is processing and what the rates are of the executions
     'master_stats': bool,
     'master_stats_event_iter': int,
+
+    # The number of processes compiling the pillar data of the minions on the master, the
+    # MWorkers hand the pillar requests off to them. 0 compiles the pillar in the MWorkers.
+    'pillar_workers': int,
+
+    # The number of seconds an MWorker waits for a pillar worker to compile a pillar
+    'pillar_workers_timeout': int,
     # The key fingerprint of the higher-level master for the syndic to verify it is talking to the
     # intended master
     'syndic_finger': six.string_types,
@@ -379,6 +386,15 @@ VALID_OPTS = {
     # The chunk size to use when streaming files with the file server
     'file_buffer_size': int,
 
+    # The number of file server chunks a minion requests from the master per round trip
+    'file_transfer_window': int,
+
+    # The number of seconds the file hashes received in a file server manifest are used by a minion
+    'file_manifest_cache_time': int,
+
+    # The maximum number of chunks the master will send in reply to a single file request
+    'file_transfer_max_window': int,
+
     # The TCP port on which minion events should be published if ipc_mode is TCP
     'tcp_pub_port': int,
 
@@ -449,6 +465,10 @@ VALID_OPTS = {
     # Tell the loader to attempt to import *.zip archives
     'enable_zip_modules': bool,
 
+    # Have the loader keep an index of the module files and of the modules
+    # which failed to load in the cachedir, to skip them on the next start
+    'loader_index': bool,
+
     # Tell the client to show minions that have timed out
     'show_timeout': bool,
 
@@ -476,6 +496,38 @@ VALID_OPTS = {
     # Fire events as state chunks are processed by the state compiler
     'state_events': bool,
 
+    # How the state chunks are run, 'sequential' or 'dag' to run independent
+    # states at the same time
+    'state_executor': six.string_types,
+
+    # The number of states the dag state executor runs at the same time
+    'state_executor_workers': int,
+
+    # The state modules of which the dag state executor runs one state at a time
+    'state_executor_serial': list,
+
+    # Cache the rendered SLS files, keyed by their contents, the templates they
+    # pull in, the pillar and the grains
+    'state_render_cache': bool,
+
+    # The state functions, as fnmatch patterns, which are not run again while
+    # their low data and the files they manage did not change
+    'state_fingerprint': list,
+
+    # The number of seconds a state fingerprint is used for
+    'state_fingerprint_ttl': int,
+
+    # Run all states, ignoring the state fingerprints
+    'state_fingerprint_force': bool,
+
+    # The number of processes rendering the SLS files of a state run at the
+    # same time, 0 renders them one after the other
+    'state_render_workers': int,
+
+    # The number of seconds to wait for the render workers to render a level
+    # of SLS includes, the files not rendered then are rendered one at a time
+    'state_render_workers_timeout': int,
+
     # The number of seconds a minion should wait before retry when attempting authentication
     'acceptance_wait_time': float,
 
@@ -545,6 +597,17 @@ VALID_OPTS = {
     # returner specified by 'event_return'
     'event_return_queue': int,
 
+    # The maximum number of events queued for each event returner, beyond which the events are
+    # dropped or spilled to disk according to 'event_return_overflow'
+    'event_return_queue_max_size': int,
+
+    # What to do with the events exceeding 'event_return_queue_max_size': 'drop' the oldest ones
+    # or 'spill' the new ones to disk until the returner catches up
+    'event_return_overflow': six.string_types,
+
+    # The number of seconds the event returners are given to store the queued events on shutdown
+    'event_return_stop_timeout': int,
+
     # Only forward events to an event returner if it matches one of the tags in this list
     'event_return_whitelist': list,
 
@@ -650,6 +713,7 @@ VALID_OPTS = {
 
     # Update intervals
     'roots_update_interval': int,
+    'roots_update_inotify': bool,
     'azurefs_update_interval': int,
     'gitfs_update_interval': int,
     'hgfs_update_interval': int,
@@ -719,6 +783,10 @@ VALID_OPTS = {
     # Specify a list of external pillar systems to use
     'ext_pillar': list,
 
+    # The number of threads running the external pillar systems concurrently, 1 runs them
+    # one after the other
+    'ext_pillar_workers': int,
+
     # Reserved for future use to version the pillar structure
     'pillar_version': int,
 
@@ -734,6 +802,19 @@ VALID_OPTS = {
     # Pillar cache backend. Defaults to `disk` which stores caches in the master cache
     'pillar_cache_backend': six.string_types,
 
+    # Record the pillar SLS files, ext_pillar sources and grains each cached pillar was compiled
+    # from, and only recompile the pillar when one of them changed
+    'pillar_cache_track_deps': bool,
+
+    # The number of seconds during which a cached pillar is served without checking the pillar
+    # SLS files and ext_pillar sources it was compiled from again
+    'pillar_cache_check_interval': int,
+
+    # Globs of the pillar SLS files rendered once for all the minions reading the same grains and
+    # pillar values from them, and the number of SLS files kept
+    'pillar_sls_memo': list,
+    'pillar_sls_memo_size': int,
+
     'pillar_safe_render_error': bool,
 
     # When creating a pillar, there are several strategies to choose from when
@@ -841,6 +922,10 @@ VALID_OPTS = {
     # reply from executions.
     'minion_data_cache': bool,
 
+    # Maintain an inverted index of the grains and pillar in the minion data cache which is used
+    # for grain and pillar targeting instead of reading the cached data of every minion.
+    'minion_data_index': bool,
+
     # The number of seconds between AES key rotations on the master
     'publish_session': int,
 
@@ -1031,6 +1116,16 @@ VALID_OPTS = {
     # primarily as a mitigation technique against minion disconnects.
     'ping_interval': int,
 
+    # Have the minion fire events when it starts a job, and every
+    # job_registry_interval seconds while jobs are running, to feed the job
+    # registry of the master
+    'job_registry_events': bool,
+    'job_registry_interval': int,
+
+    # Track the jobs running on the minions from the job registry events,
+    # instead of asking the minions with saltutil.find_job
+    'job_registry': bool,
+
     # Instructs the salt CLI to print a summary of a minion responses before returning
     'cli_summary': bool,
 
@@ -1110,6 +1205,10 @@ VALID_OPTS = {
     'memcache_expire_seconds': int,
     # Set a memcache limit in items (bank + key) per cache storage (driver + driver_opts).
     'memcache_max_items': int,
+    # Set a memcache limit in bytes, estimated from the size of the cached objects, per cache storage.
+    'memcache_max_bytes': int,
+    # Per bank memcache expiration time and maximum item size, keyed by bank glob.
+    'memcache_bank_policy': dict,
     # Each time a cache storage got full cleanup all the expired items not just the oldest one.
     'memcache_full_cleanup': bool,
     # Enable collecting the memcache stats and log it on `debug` log level.
@@ -1264,6 +1363,10 @@ DEFAULT_MINION_OPTS = {
     'pillar_cache': False,
     'pillar_cache_ttl': 3600,
     'pillar_cache_backend': 'disk',
+    'pillar_cache_track_deps': False,
+    'pillar_cache_check_interval': 10,
+    'pillar_sls_memo': [],
+    'pillar_sls_memo_size': 1000,
     'extension_modules': os.path.join(salt.syspaths.CACHE_DIR, 'minion', 'extmods'),
     'state_top': 'top.sls',
     'state_top_saltenv': None,
@@ -1376,6 +1479,8 @@ DEFAULT_MINION_OPTS = {
     'ipc_write_buffer': _DFLT_IPC_WBUFFER,
     'ipv6': False,
     'file_buffer_size': 262144,
+    'file_transfer_window': 1,
+    'file_manifest_cache_time': 0,
     'tcp_pub_port': 4510,
     'tcp_pull_port': 4511,
     'tcp_authentication_retries': 5,
@@ -1396,12 +1501,22 @@ DEFAULT_MINION_OPTS = {
     'ext_job_cache': '',
     'cython_enable': False,
     'enable_zip_modules': False,
+    'loader_index': False,
     'state_verbose': True,
     'state_output': 'full',
     'state_output_diff': False,
     'state_auto_order': True,
     'state_events': False,
     'state_aggregate': False,
+    'state_executor': 'sequential',
+    'state_executor_workers': 4,
+    'state_executor_serial': ['pkg', 'pkgrepo'],
+    'state_render_cache': False,
+    'state_fingerprint': [],
+    'state_fingerprint_ttl': 3600,
+    'state_fingerprint_force': False,
+    'state_render_workers': 0,
+    'state_render_workers_timeout': 120,
     'snapper_states': False,
     'snapper_states_config': 'root',
     'acceptance_wait_time': 10,
@@ -1479,6 +1594,8 @@ DEFAULT_MINION_OPTS = {
     'cluster_masters': [],
     'restart_on_error': False,
     'ping_interval': 0,
+    'job_registry_events': False,
+    'job_registry_interval': 30,
     'username': None,
     'password': None,
     'zmq_filtering': False,
@@ -1567,6 +1684,7 @@ DEFAULT_MASTER_OPTS = {
 
     # Update intervals
     'roots_update_interval': DEFAULT_INTERVAL,
+    'roots_update_inotify': False,
     'azurefs_update_interval': DEFAULT_INTERVAL,
     'gitfs_update_interval': DEFAULT_INTERVAL,
     'hgfs_update_interval': DEFAULT_INTERVAL,
@@ -1634,11 +1752,14 @@ DEFAULT_MASTER_OPTS = {
     'max_event_size': 1048576,
     'master_stats': False,
     'master_stats_event_iter': 60,
+    'pillar_workers': 0,
+    'pillar_workers_timeout': 120,
     'minionfs_env': 'base',
     'minionfs_mountpoint': '',
     'minionfs_whitelist': [],
     'minionfs_blacklist': [],
     'ext_pillar': [],
+    'ext_pillar_workers': 1,
     'pillar_version': 2,
     'pillar_opts': False,
     'pillar_safe_render_error': True,
@@ -1648,6 +1769,10 @@ DEFAULT_MASTER_OPTS = {
     'pillar_cache': False,
     'pillar_cache_ttl': 3600,
     'pillar_cache_backend': 'disk',
+    'pillar_cache_track_deps': False,
+    'pillar_cache_check_interval': 10,
+    'pillar_sls_memo': [],
+    'pillar_sls_memo_size': 1000,
     'ping_on_rotate': False,
     'peer': {},
     'preserve_minion_cache': False,
@@ -1675,6 +1800,7 @@ DEFAULT_MASTER_OPTS = {
     'file_recv': False,
     'file_recv_max_size': 100,
     'file_buffer_size': 1048576,
+    'file_transfer_max_window': 16,
     'file_ignore_regex': [],
     'file_ignore_glob': [],
     'fileserver_backend': ['roots'],
@@ -1702,6 +1828,7 @@ DEFAULT_MASTER_OPTS = {
     'master_job_cache': 'local_cache',
     'job_cache_store_endtime': False,
     'minion_data_cache': True,
+    'minion_data_index': False,
     'enforce_mine_cache': False,
     'ipc_mode': _DFLT_IPC_MODE,
     'ipc_write_buffer': _DFLT_IPC_WBUFFER,
@@ -1731,6 +1858,9 @@ DEFAULT_MASTER_OPTS = {
     'engines': [],
     'event_return': '',
     'event_return_queue': 0,
+    'event_return_queue_max_size': 10000,
+    'event_return_overflow': 'drop',
+    'event_return_stop_timeout': 10,
     'event_return_whitelist': [],
     'event_return_blacklist': [],
     'event_match_type': 'startswith',
@@ -1743,12 +1873,22 @@ DEFAULT_MASTER_OPTS = {
     'state_auto_order': True,
     'state_events': False,
     'state_aggregate': False,
+    'state_executor': 'sequential',
+    'state_executor_workers': 4,
+    'state_executor_serial': ['pkg', 'pkgrepo'],
+    'state_render_cache': False,
+    'state_fingerprint': [],
+    'state_fingerprint_ttl': 3600,
+    'state_fingerprint_force': False,
+    'state_render_workers': 0,
+    'state_render_workers_timeout': 120,
     'search': '',
     'loop_interval': 60,
     'nodegroups': {},
     'ssh_list_nodegroups': {},
     'ssh_use_home_key': False,
     'cython_enable': False,
+    'loader_index': False,
     'enable_gpu_grains': False,
     # XXX: Remove 'key_logfile' support in 2014.1.0
     'key_logfile': os.path.join(salt.syspaths.LOGS_DIR, 'key'),
@@ -1784,6 +1924,8 @@ DEFAULT_MASTER_OPTS = {
     'keysize': 2048,
     'transport': 'zeromq',
     'gather_job_timeout': 10,
+    'job_registry': False,
+    'job_registry_interval': 30,
     'syndic_event_forward_timeout': 0.5,
     'syndic_jid_forward_cache_hwm': 100,
     'regen_thin': False,
@@ -1838,6 +1980,8 @@ DEFAULT_MASTER_OPTS = {
     'cache': 'localfs',
     'memcache_expire_seconds': 0,
     'memcache_max_items': 1024,
+    'memcache_max_bytes': 0,
+    'memcache_bank_policy': {},
     'memcache_full_cleanup': False,
     'memcache_debug': False,
     'thin_extra_mods': '',
@@ -427,6 +427,7 @@ class RemoteFuncs(object):
                 rend=False)
         self.__setup_fileserver()
         self.cache = salt.cache.factory(opts)
+        self.minion_index = salt.utils.minions.MinionDataIndex(opts)
 
     def __setup_fileserver(self):
         '''
@@ -436,6 +437,7 @@ class RemoteFuncs(object):
         self._serve_file = fs_.serve_file
         self._file_find = fs_._find_file
         self._file_hash = fs_.file_hash
+        self._file_manifest = fs_.file_manifest
         self._file_list = fs_.file_list
         self._file_list_emptydirs = fs_.file_list_emptydirs
         self._dir_list = fs_.dir_list
@@ -749,6 +751,8 @@ class RemoteFuncs(object):
             self.cache.store('minions/{0}'.format(load['id']),
                              'data',
                              {'grains': load['grains'], 'pillar': data})
+            if self.opts.get('minion_data_index', False):
+                self.minion_index.update(load['id'], load['grains'], data)
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'comment': 'Minion data cache refresh'}, salt.utils.event.tagify(load['id'], 'refresh', 'minion'))
         return data
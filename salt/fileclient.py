@@ -11,7 +11,9 @@ import logging
 import os
 import string
 import shutil
+import time
 import ftplib
+import hashlib
 from tornado.httputil import parse_response_start_line, HTTPHeaders, HTTPInputError
 import salt.utils.atomicfile
 
@@ -92,6 +94,8 @@ class Client(object):
         self.opts = opts
         self.utils = salt.loader.utils(self.opts)
         self.serial = salt.payload.Serial(self.opts)
+        # {<saltenv>: {<path>: (<expire time>, <manifest entry>)}}
+        self._manifests = {}
 
     # Add __setstate__ and __getstate__ so that the object may be
     # deep copied. It normally can't be deep copied because its
@@ -185,6 +189,28 @@ class Client(object):
         '''
         raise NotImplementedError
 
+    def file_manifest(self, saltenv='base', prefix=''):
+        '''
+        Return a dict of the files under ``prefix`` mapped to their hash and
+        stat result, or ``None`` if the file server can't provide it
+        '''
+        return None
+
+    def _manifest_entry(self, path, saltenv='base'):
+        '''
+        Return the entry for ``path`` from a recently fetched file manifest,
+        or ``None`` if there is none
+        '''
+        entries = self._manifests.get(saltenv, {})
+        try:
+            expire, entry = entries[path]
+        except KeyError:
+            return None
+        if expire < time.time():
+            entries.pop(path, None)
+            return None
+        return entry
+
     def cache_file(self, path, saltenv='base', cachedir=None, source_hash=None):
         '''
         Pull a file down from the file server and store it in the minion
@@ -235,8 +261,17 @@ class Client(object):
             'Caching directory \'%s\' for environment \'%s\'', path, saltenv
         )
         # go through the list of all files finding ones that are in
-        # the target directory and caching them
-        for fn_ in self.file_list(saltenv):
+        # the target directory and caching them. With the manifest cache, the
+        # file manifest gives the hash of all these files at once, so only
+        # the changed ones are actually fetched from the master.
+        manifest = None
+        if self.opts.get('file_manifest_cache_time', 0) > 0:
+            manifest = self.file_manifest(saltenv, path)
+        if manifest is not None:
+            file_list = sorted(manifest)
+        else:
+            file_list = self.file_list(saltenv)
+        for fn_ in file_list:
             fn_ = salt.utils.data.decode(fn_)
             if fn_.strip() and fn_.startswith(path):
                 if salt.utils.stringutils.check_include_exclude(
@@ -1062,6 +1097,21 @@ class RemoteClient(Client):
         self.channel = salt.transport.Channel.factory(self.opts)
         return self.channel
 
+    @staticmethod
+    def _hash_fileobj(fp_, hash_server):
+        '''
+        Return the hash of the data written to an open file, using the hash
+        type reported by the master
+        '''
+        hash_type = salt.utils.stringutils.to_str(
+            hash_server.get('hash_type', 'md5'))
+        hasher = hashlib.new(hash_type)
+        fp_.flush()
+        fp_.seek(0)
+        for chunk in iter(lambda: fp_.read(65536), b''):
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
     def get_file(self,
                  path,
                  dest='',
@@ -1154,6 +1204,11 @@ class RemoteClient(Client):
         if gzip:
             gzip = int(gzip)
             load['gzip'] = gzip
+        window = self.opts.get('file_transfer_window', 1)
+        if window > 1:
+            # Ask the master for several chunks per request, the whole file is
+            # verified against the hash reported by the master once received
+            load['window'] = window
 
         fn_ = None
         if dest:
@@ -1208,6 +1263,17 @@ class RemoteClient(Client):
                                 path, d_tries
                             )
                             continue
+                    if window > 1 and fn_ and isinstance(hash_server, dict) \
+                            and d_tries < 3:
+                        d_tries += 1
+                        if self._hash_fileobj(fn_, hash_server) != hash_server.get('hsum'):
+                            log.warning(
+                                'Bad download of file %s, attempt %d of 3',
+                                path, d_tries
+                            )
+                            fn_.seek(0)
+                            fn_.truncate()
+                            continue
                     break
                 if not fn_:
                     with self._cache_loc(
@@ -1302,6 +1368,33 @@ class RemoteClient(Client):
         return salt.utils.data.decode(self.channel.send(load)) if six.PY2 \
             else self.channel.send(load)
 
+    def file_manifest(self, saltenv='base', prefix=''):
+        '''
+        Return the hash and stat result of all the files under ``prefix`` on
+        the master in a single request, or ``None`` if the master doesn't
+        support it.
+
+        If ``file_manifest_cache_time`` is set, the manifest is kept for that
+        many seconds and used to answer ``hash_file`` and ``hash_and_stat_file`` for these files
+        without a round trip to the master.
+        '''
+        load = {'saltenv': saltenv,
+                'prefix': prefix,
+                'cmd': '_file_manifest'}
+        manifest = self.channel.send(load)
+        if six.PY2:
+            manifest = salt.utils.data.decode(manifest)
+        if not isinstance(manifest, dict) or 'files' not in manifest:
+            return None
+        files = manifest['files']
+        cache_time = self.opts.get('file_manifest_cache_time', 0)
+        if cache_time > 0:
+            expire = time.time() + cache_time
+            entries = self._manifests.setdefault(saltenv, {})
+            for path, entry in six.iteritems(files):
+                entries[path] = (expire, entry)
+        return files
+
     def __hash_and_stat_file(self, path, saltenv='base'):
         '''
         Common code for hashing and stating files
@@ -1321,6 +1414,9 @@ class RemoteClient(Client):
                 ret['hsum'] = salt.utils.hashutils.get_hash(path, form=hash_type)
                 ret['hash_type'] = hash_type
                 return ret
+        entry = self._manifest_entry(path, saltenv)
+        if entry is not None:
+            return {'hsum': entry['hsum'], 'hash_type': entry['hash_type']}
         load = {'path': path,
                 'saltenv': saltenv,
                 'cmd': '_file_hash'}
@@ -1350,6 +1446,9 @@ class RemoteClient(Client):
                     return hash_result, list(os.stat(path))
                 except Exception:
                     return hash_result, None
+        entry = self._manifest_entry(path, saltenv)
+        if entry is not None:
+            return hash_result, entry['stat']
         load = {'path': path,
                 'saltenv': saltenv,
                 'cmd': '_file_find'}
@@ -17,7 +17,9 @@ import time
 import salt.loader
 import salt.utils.data
 import salt.utils.files
+import salt.utils.gzip_util
 import salt.utils.path
+import salt.utils.stringutils
 import salt.utils.url
 import salt.utils.versions
 from salt.utils.args import get_function_argspec as _argspec
@@ -103,12 +105,17 @@ def wait_lock(lk_fn, dest, wait_timeout=0):
     return False
 
 
-def check_file_list_cache(opts, form, list_cache, w_lock):
+def check_file_list_cache(opts, form, list_cache, w_lock, cache_time=None):
     '''
     Checks the cache file to see if there is a new enough file list cache, and
     returns the match (if found, along with booleans used by the fileserver
     backend to determine if the cache needs to be refreshed/written).
+
+    ``cache_time`` overrides :conf_master:`fileserver_list_cache_time`, for
+    backends which keep their list caches current by other means.
     '''
+    if cache_time is None:
+        cache_time = opts.get('fileserver_list_cache_time', 20)
     refresh_cache = False
     save_cache = True
     serial = salt.payload.Serial(opts)
@@ -128,11 +135,11 @@ def check_file_list_cache(opts, form, list_cache, w_lock):
                     age = time.time() - cache_stat.st_mtime
                 else:
                     # if filelist does not exists yet, mark it as expired
-                    age = opts.get('fileserver_list_cache_time', 20) + 1
+                    age = cache_time + 1
                 if age < 0:
                     # Cache is from the future! Warn and mark cache invalid.
                     log.warning('The file list_cache was created in the future!')
-                if 0 <= age < opts.get('fileserver_list_cache_time', 20):
+                if 0 <= age < cache_time:
                     # Young enough! Load this sucker up!
                     with salt.utils.files.fopen(list_cache, 'rb') as fp_:
                         log.trace(
@@ -613,9 +620,42 @@ class Fileserver(object):
             return ret
         fstr = '{0}.serve_file'.format(fnd['back'])
         if fstr in self.servers:
+            try:
+                window = int(load.get('window', 1))
+            except (TypeError, ValueError):
+                window = 1
+            window = min(window, self.opts.get('file_transfer_max_window', 1))
+            if window > 1:
+                return self.__serve_window(self.servers[fstr], load, fnd, window)
             return self.servers[fstr](load, fnd)
         return ret
 
+    def __serve_window(self, serve, load, fnd, window):
+        '''
+        Serve up to ``window`` consecutive chunks of a file in one reply, so
+        that a client on a high latency link needs fewer round trips to fetch
+        it. The chunks are read through the backend's ``serve_file``, thus
+        every backend supports it.
+        '''
+        gzip = load.get('gzip', None)
+        chunk_load = dict(load)
+        chunk_load.pop('gzip', None)
+        chunk_load.pop('window', None)
+        data = []
+        for _ in range(window):
+            ret = serve(chunk_load, fnd)
+            chunk = ret.get('data')
+            if not chunk:
+                break
+            chunk = salt.utils.stringutils.to_bytes(chunk)
+            data.append(chunk)
+            chunk_load['loc'] += len(chunk)
+        ret['data'] = b''.join(data)
+        if gzip and ret['data']:
+            ret['data'] = salt.utils.gzip_util.compress(ret['data'], gzip)
+            ret['gzip'] = gzip
+        return ret
+
     def __file_hash_and_stat(self, load):
         '''
         Common code for hashing and stating files
@@ -657,6 +697,40 @@ class Fileserver(object):
         except (IndexError, TypeError):
             return '', None
 
+    def file_manifest(self, load):
+        '''
+        Return the hash and stat result of all the files under a prefix in
+        one reply, so a client can work out locally which files changed
+        instead of asking for the hash of each file.
+        '''
+        if 'env' in load:
+            # "env" is not supported; Use "saltenv".
+            load.pop('env')
+
+        if 'saltenv' not in load:
+            return {}
+        if not isinstance(load['saltenv'], six.string_types):
+            load['saltenv'] = six.text_type(load['saltenv'])
+
+        files = {}
+        list_load = {'saltenv': load['saltenv'],
+                     'prefix': load.get('prefix', '')}
+        for path in self.file_list(list_load):
+            fnd = self.find_file(path, load['saltenv'])
+            if not fnd.get('back'):
+                continue
+            fstr = '{0}.file_hash'.format(fnd['back'])
+            if fstr not in self.servers:
+                continue
+            hash_ = self.servers[fstr]({'path': path,
+                                        'saltenv': load['saltenv']}, fnd)
+            if not hash_:
+                continue
+            files[path] = {'hsum': hash_['hsum'],
+                           'hash_type': hash_['hash_type'],
+                           'stat': fnd.get('stat', None)}
+        return {'files': files}
+
     def clear_file_list_cache(self, load):
         '''
         Deletes the file_lists cache files
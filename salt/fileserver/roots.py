@@ -19,21 +19,40 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
 import os
-import errno
 import logging
+import stat
+import threading
+import time
 
 # Import salt libs
 import salt.fileserver
+import salt.payload
+import salt.utils.data
 import salt.utils.event
 import salt.utils.files
 import salt.utils.gzip_util
 import salt.utils.hashutils
+import salt.utils.odict
 import salt.utils.path
 import salt.utils.platform
+import salt.utils.process
 import salt.utils.stringutils
 import salt.utils.versions
 from salt.ext import six
 
+# Import 3rd-party libs
+try:
+    import pyinotify
+    HAS_PYINOTIFY = True
+except ImportError:
+    HAS_PYINOTIFY = False
+
+try:
+    import sqlite3
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
+
 log = logging.getLogger(__name__)
 
 
@@ -136,28 +155,207 @@ def serve_file(load, fnd):
     return ret
 
 
-def update():
+class _RootsWatcher(object):
     '''
-    When we are asked to update (regular interval) lets reap the cache
+    Track changes to the file_roots using inotify, so that update() only needs
+    to look at the paths which actually changed instead of walking every root.
     '''
-    try:
-        salt.fileserver.reap_fileserver_cache_dir(
-            os.path.join(__opts__['cachedir'], 'roots', 'hash'),
-            find_file
+    def __init__(self, opts):
+        self.opts = opts
+        # The mtime map as of the last update, None until the first full walk
+        self.mtime_map = None
+        # Paths which have seen events since the last update, mapped to
+        # whether or not they are directories
+        self.pending = {}
+        self.rescan = False
+        self.roots = set()
+        for roots in six.itervalues(opts['file_roots']):
+            self.roots.update(os.path.normpath(root) for root in roots)
+        self.watch_manager = pyinotify.WatchManager()
+        self.notifier = pyinotify.Notifier(self.watch_manager, self._enqueue)
+        self.add_watches()
+
+    def add_watches(self):
+        '''
+        Recursively watch all of the file_roots. New directories are picked up
+        automatically.
+        '''
+        mask = (pyinotify.IN_CREATE | pyinotify.IN_DELETE |
+                pyinotify.IN_CLOSE_WRITE | pyinotify.IN_ATTRIB |
+                pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO |
+                pyinotify.IN_DELETE_SELF | pyinotify.IN_MOVE_SELF)
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            wdd = self.watch_manager.add_watch(
+                root, mask, rec=True, auto_add=True, quiet=True)
+            failed = [path for path, wd in six.iteritems(wdd) if wd < 0]
+            if failed:
+                log.warning(
+                    'roots: Unable to watch %d directories under %s, changes '
+                    'to them will only be noticed on the next full update. '
+                    'Consider raising fs.inotify.max_user_watches.',
+                    len(failed), root
+                )
+                self.rescan = True
+
+    def _enqueue(self, event):
+        '''
+        Record the path of an inotify event
+        '''
+        if event.mask & pyinotify.IN_Q_OVERFLOW:
+            self.rescan = True
+            return
+        path = os.path.normpath(event.pathname)
+        if path in self.roots:
+            if event.mask & (pyinotify.IN_DELETE_SELF |
+                             pyinotify.IN_MOVE_SELF):
+                # A whole root went away, its watches are gone with it
+                self.rescan = True
+            return
+        self.pending[path] = self.pending.get(path, False) or event.dir
+
+    def read_events(self):
+        '''
+        Drain the inotify queue without blocking
+        '''
+        while self.notifier.check_events(0):
+            self.notifier.read_events()
+            self.notifier.process_events()
+
+    def is_ignored(self, path, is_dir=False):
+        '''
+        Mirror the directory pruning done by generate_mtime_map
+        '''
+        for saltenv, root, rel in _split_root(self.opts, path):
+            items = rel.split('/')
+            if not is_dir:
+                items = items[:-1]
+            if any(salt.fileserver.is_file_ignored(self.opts, item)
+                   for item in items):
+                return True
+        return False
+
+    def apply_events(self):
+        '''
+        Apply the queued events to the mtime map. Returns a tuple of the old
+        mtimes of every file which changed (None for new files) and the paths
+        which saw events, or None if a full walk is needed.
+        '''
+        self.read_events()
+        if self.rescan:
+            return None
+        pending, self.pending = self.pending, {}
+        old = {}
+
+        def _set(path, mtime):
+            if self.mtime_map.get(path) != mtime:
+                old.setdefault(path, self.mtime_map.get(path))
+                if mtime is None:
+                    self.mtime_map.pop(path, None)
+                else:
+                    self.mtime_map[path] = mtime
+
+        removed_dirs = set()
+        for path, is_dir in six.iteritems(pending):
+            if not is_dir:
+                try:
+                    mtime = os.path.getmtime(path)
+                except (OSError, IOError):
+                    mtime = None
+                if mtime is not None and self.is_ignored(path):
+                    mtime = None
+                _set(path, mtime)
+                continue
+            # Everything under a directory which was created, moved or
+            # removed needs to be rechecked
+            removed_dirs.add(path + os.sep)
+            if os.path.isdir(path) and not self.is_ignored(path, is_dir=True):
+                for saltenv, root, rel in _split_root(self.opts, path):
+                    new_map = salt.fileserver.generate_mtime_map(
+                        self.opts, {saltenv: [path]})
+                    for file_path, mtime in six.iteritems(new_map):
+                        _set(file_path, mtime)
+                    break
+        if removed_dirs:
+            prefixes = tuple(removed_dirs)
+            for file_path in [x for x in self.mtime_map
+                              if x.startswith(prefixes)]:
+                if not os.path.isfile(file_path):
+                    _set(file_path, None)
+        return old, pending
+
+
+_WATCHER = None
+
+
+def _get_watcher():
+    '''
+    Return the inotify watcher for this process, starting it if needed
+    '''
+    global _WATCHER
+    if not __opts__.get('roots_update_inotify', False):
+        return None
+    if not HAS_PYINOTIFY:
+        log.warning(
+            'roots_update_inotify is enabled, but pyinotify is not installed. '
+            'Falling back to walking the file_roots.'
         )
-    except (IOError, OSError):
-        # Hash file won't exist if no files have yet been served up
-        pass
+        return None
+    if _WATCHER is None:
+        _WATCHER = _RootsWatcher(__opts__)
+    return _WATCHER
 
-    mtime_map_path = os.path.join(__opts__['cachedir'], 'roots', 'mtime_map')
-    # data to send on event
-    data = {'changed': False,
-            'files': {'changed': []},
-            'backend': 'roots'}
 
-    # generate the new map
-    new_mtime_map = salt.fileserver.generate_mtime_map(__opts__, __opts__['file_roots'])
+def _split_root(opts, path):
+    '''
+    Yield the saltenv, root and relative path for each root containing the
+    given path
+    '''
+    for saltenv, roots in six.iteritems(opts['file_roots']):
+        for root in roots:
+            root = os.path.normpath(root)
+            if path.startswith(root + os.sep):
+                yield saltenv, root, os.path.relpath(path, root).replace('\\', '/')
+
+
+def _watcher_file():
+    return os.path.join(__opts__['cachedir'], 'roots', 'watcher')
+
+
+def _watcher_active():
+    '''
+    Check whether an inotify watcher is keeping the file list caches current.
+    The watcher writes its pid to a file which it touches on each update.
+    '''
+    if not HAS_PYINOTIFY or not __opts__.get('roots_update_inotify', False):
+        return False
+    path = _watcher_file()
+    try:
+        age = time.time() - os.path.getmtime(path)
+        with salt.utils.files.fopen(path, 'r') as fp_:
+            pid = int(fp_.read().strip())
+    except (IOError, OSError, ValueError):
+        return False
+    if age > 3 * __opts__['roots_update_interval']:
+        return False
+    return salt.utils.process.os_is_running(pid)
+
+
+def _touch_watcher_file():
+    path = _watcher_file()
+    try:
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write(str(os.getpid()))
+    except (IOError, OSError) as exc:
+        log.error('roots: Unable to write %s: %s', path, exc)
+
 
+def _read_mtime_map(mtime_map_path, new_mtime_map, data):
+    '''
+    Load the mtime map written by the previous update, noting any files whose
+    mtime differs from the new map
+    '''
     old_mtime_map = {}
     # if you have an old map, load that
     if os.path.exists(mtime_map_path):
@@ -175,28 +373,23 @@ def update():
                         'Skipped invalid cache mtime entry in %s: %s',
                         mtime_map_path, line
                     )
+    return old_mtime_map
 
-    # compare the maps, set changed to the return value
-    data['changed'] = salt.fileserver.diff_mtime_map(old_mtime_map, new_mtime_map)
-
-    # compute files that were removed and added
-    old_files = set(old_mtime_map.keys())
-    new_files = set(new_mtime_map.keys())
-    data['files']['removed'] = list(old_files - new_files)
-    data['files']['added'] = list(new_files - old_files)
 
-    # write out the new map
+def _write_mtime_map(mtime_map_path, mtime_map):
     mtime_map_path_dir = os.path.dirname(mtime_map_path)
     if not os.path.exists(mtime_map_path_dir):
         os.makedirs(mtime_map_path_dir)
     with salt.utils.files.fopen(mtime_map_path, 'w') as fp_:
-        for file_path, mtime in six.iteritems(new_mtime_map):
+        for file_path, mtime in six.iteritems(mtime_map):
             fp_.write(
                 salt.utils.stringutils.to_str(
                     '{0}:{1}\n'.format(file_path, mtime)
                 )
             )
 
+
+def _fire_update_event(data):
     if __opts__.get('fileserver_events', False):
         # if there is a change, fire an event
         event = salt.utils.event.get_event(
@@ -209,6 +402,389 @@ def update():
                          salt.utils.event.tagify(['roots', 'update'], prefix='fileserver'))
 
 
+def _clear_file_list_caches():
+    '''
+    Remove the file list caches so that they are rebuilt on the next request
+    '''
+    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists', 'roots')
+    for saltenv in __opts__['file_roots']:
+        try:
+            os.remove(os.path.join(list_cachedir, '{0}.p'.format(saltenv)))
+        except OSError:
+            pass
+
+
+def _update_file_list_caches(paths):
+    '''
+    Patch the file list caches for the environments containing the passed
+    paths, instead of rebuilding them. Returns the paths which could not be
+    applied because the cache was locked.
+    '''
+    by_env = {}
+    for path in paths:
+        for saltenv, root, rel in _split_root(__opts__, path):
+            by_env.setdefault(saltenv, set()).add(rel)
+
+    deferred = set()
+    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists', 'roots')
+    serial = salt.payload.Serial(__opts__)
+    for saltenv, rels in six.iteritems(by_env):
+        list_cache = os.path.join(list_cachedir, '{0}.p'.format(saltenv))
+        w_lock = os.path.join(list_cachedir, '.{0}.w'.format(saltenv))
+        if not os.path.isfile(list_cache):
+            # Nothing to patch, it will be built on the next request
+            continue
+        try:
+            locked = salt.fileserver._lock_cache(w_lock)
+        except OSError:
+            locked = False
+        if not locked:
+            # A worker is rebuilding this cache, try again on the next update
+            deferred.update(
+                os.path.join(root, rel)
+                for root in __opts__['file_roots'][saltenv]
+                for rel in rels
+            )
+            continue
+        try:
+            built = os.path.getmtime(list_cache)
+            with salt.utils.files.fopen(list_cache, 'rb') as fp_:
+                ret = salt.utils.data.decode(serial.load(fp_))
+        except Exception as exc:
+            log.debug('roots: Unable to load %s: %s', list_cache, exc)
+            try:
+                os.remove(list_cache)
+            except OSError:
+                pass
+            salt.fileserver._unlock_cache(w_lock)
+            continue
+        _patch_file_lists(ret, saltenv, rels)
+        salt.fileserver.write_file_list_cache(__opts__, ret, list_cache, w_lock)
+        try:
+            # The age of the cache counts from its last full walk, so that
+            # it still expires if the watcher missed some events
+            os.utime(list_cache, (built, built))
+        except OSError:
+            pass
+    return deferred
+
+
+def _patch_file_lists(ret, saltenv, rels):
+    '''
+    Replace the file list entries for the given relative paths (and anything
+    beneath them) with the current state of the file_roots
+    '''
+    def _affected(rel_path):
+        while rel_path:
+            if rel_path in rels:
+                return True
+            rel_path = rel_path.rpartition('/')[0]
+        return False
+
+    # The parent directories may have become empty or non-empty
+    parents = set(rel.rpartition('/')[0] for rel in rels) - set([''])
+    for form in ('files', 'dirs'):
+        ret[form] = set(x for x in ret.get(form, []) if not _affected(x))
+    ret['empty_dirs'] = set(x for x in ret.get('empty_dirs', [])
+                            if not _affected(x) and x not in parents)
+    ret['links'] = dict((key, val)
+                        for key, val in six.iteritems(ret.get('links', {}))
+                        if not _affected(key))
+
+    followlinks = __opts__['fileserver_followsymlinks']
+    for root in __opts__['file_roots'][saltenv]:
+        for rel in rels:
+            abs_path = os.path.join(root, rel)
+            if not os.path.lexists(abs_path):
+                continue
+            parent_dir, item = os.path.split(abs_path)
+            if not os.path.isdir(abs_path):
+                _add_to(ret, ret['files'], root, parent_dir, [item])
+                continue
+            _add_to(ret, ret['dirs'], root, parent_dir, [item])
+            if salt.utils.path.islink(abs_path) and not followlinks:
+                continue
+            for dir_root, dirs, files in salt.utils.path.os_walk(
+                    abs_path, followlinks=followlinks):
+                _add_to(ret, ret['dirs'], root, dir_root, dirs)
+                _add_to(ret, ret['files'], root, dir_root, files)
+        for rel in parents:
+            try:
+                if not os.listdir(os.path.join(root, rel)):
+                    ret['empty_dirs'].add(rel)
+            except OSError:
+                pass
+
+    ret['files'] = sorted(ret['files'])
+    ret['dirs'] = sorted(ret['dirs'])
+    ret['empty_dirs'] = sorted(ret['empty_dirs'])
+
+
+def _remove_hash_cache(paths):
+    '''
+    Remove the cached hashes of files which changed or were removed
+    '''
+    index = _get_hash_index()
+    for path in paths:
+        for saltenv, root, rel in _split_root(__opts__, path):
+            index.remove(saltenv, rel)
+
+
+def _update_from_watcher(watcher, mtime_map_path):
+    '''
+    Apply the changes seen by the inotify watcher since the last update.
+    Returns False if a full update is needed instead.
+    '''
+    result = watcher.apply_events()
+    if result is None:
+        return False
+    old, pending = result
+    if old:
+        data = {'changed': True,
+                'files': {'changed': [], 'added': [], 'removed': []},
+                'backend': 'roots'}
+        for file_path, mtime in six.iteritems(old):
+            if mtime is None:
+                data['files']['added'].append(file_path)
+            elif file_path not in watcher.mtime_map:
+                data['files']['removed'].append(file_path)
+            else:
+                data['files']['changed'].append(file_path)
+        _remove_hash_cache(old)
+        _write_mtime_map(mtime_map_path, watcher.mtime_map)
+        _fire_update_event(data)
+    if pending:
+        for path in _update_file_list_caches(pending):
+            watcher.pending.setdefault(path, os.path.isdir(path))
+    _touch_watcher_file()
+    return True
+
+
+def update():
+    '''
+    When we are asked to update (regular interval) lets reap the cache
+
+    If :conf_master:`roots_update_inotify` is enabled, only the paths which
+    inotify reported as changed are checked, after the first update.
+    '''
+    mtime_map_path = os.path.join(__opts__['cachedir'], 'roots', 'mtime_map')
+    watcher = _get_watcher()
+    if watcher is not None and watcher.mtime_map is not None:
+        if _update_from_watcher(watcher, mtime_map_path):
+            return
+        log.info('roots: inotify watcher lost events, walking file_roots')
+        watcher.rescan = False
+        watcher.pending = {}
+        watcher.add_watches()
+
+    _get_hash_index().prune(find_file)
+    # Hashes used to be cached in one file per served file
+    legacy_hash_dir = os.path.join(__opts__['cachedir'], 'roots', 'hash')
+    if os.path.isdir(legacy_hash_dir):
+        salt.utils.files.rm_rf(legacy_hash_dir)
+
+    # data to send on event
+    data = {'changed': False,
+            'files': {'changed': []},
+            'backend': 'roots'}
+
+    # generate the new map
+    new_mtime_map = salt.fileserver.generate_mtime_map(__opts__, __opts__['file_roots'])
+
+    old_mtime_map = _read_mtime_map(mtime_map_path, new_mtime_map, data)
+
+    # compare the maps, set changed to the return value
+    data['changed'] = salt.fileserver.diff_mtime_map(old_mtime_map, new_mtime_map)
+
+    # compute files that were removed and added
+    old_files = set(old_mtime_map.keys())
+    new_files = set(new_mtime_map.keys())
+    data['files']['removed'] = list(old_files - new_files)
+    data['files']['added'] = list(new_files - old_files)
+
+    # write out the new map
+    _write_mtime_map(mtime_map_path, new_mtime_map)
+
+    if watcher is not None:
+        # Events seen during the walk are already reflected in the new map,
+        # and list caches built before the watcher started may be stale.
+        watcher.read_events()
+        watcher.pending = {}
+        watcher.mtime_map = new_mtime_map
+        _clear_file_list_caches()
+        _touch_watcher_file()
+
+    _fire_update_event(data)
+
+
+class _HashIndex(object):
+    '''
+    Index of file hashes, shared by all of the master's worker processes
+    through a SQLite database and fronted by an in-memory dict in each of
+    them, holding the memo_size most recently used entries. Entries are keyed
+    on the saltenv, relative path and hash type, and are only used while the
+    path, mtime and size of the file still match.
+    '''
+    memo_size = 10000
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.memo = salt.utils.odict.OrderedDict()
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        '''
+        Return a connection to the database, opening a new one if this is a
+        new process. Returns None if the database cannot be used.
+        '''
+        if not HAS_SQLITE3:
+            return None
+        if self._pid == os.getpid():
+            return self._conn
+        self._conn = None
+        self._pid = os.getpid()
+        self.memo = salt.utils.odict.OrderedDict()
+        try:
+            db_dir = os.path.dirname(self.db_path)
+            if not os.path.isdir(db_dir):
+                os.makedirs(db_dir)
+            conn = sqlite3.connect(self.db_path,
+                                   timeout=5,
+                                   isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS hashes ('
+                'saltenv TEXT NOT NULL, rel TEXT NOT NULL, '
+                'hash_type TEXT NOT NULL, path TEXT NOT NULL, '
+                'mtime REAL NOT NULL, size INTEGER NOT NULL, '
+                'hsum TEXT NOT NULL, '
+                'PRIMARY KEY (saltenv, rel, hash_type))'
+            )
+        except (OSError, sqlite3.Error) as exc:
+            log.warning(
+                'roots: Unable to open hash index %s, hashes will only be '
+                'cached in memory: %s', self.db_path, exc
+            )
+            return None
+        self._conn = conn
+        return conn
+
+    def get(self, saltenv, rel, hash_type, path, mtime, size):
+        '''
+        Return the cached hash, or None if there is no valid entry
+        '''
+        key = (saltenv, rel, hash_type)
+        with self._lock:
+            conn = self._connect()
+            entry = self.memo.get(key)
+            if entry is not None and entry[:3] == (path, mtime, size):
+                self._remember(key, entry)
+                return entry[3]
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    'SELECT path, mtime, size, hsum FROM hashes '
+                    'WHERE saltenv = ? AND rel = ? AND hash_type = ?',
+                    key
+                ).fetchone()
+            except sqlite3.Error as exc:
+                log.debug('roots: Unable to read hash index: %s', exc)
+                return None
+            if row is None or tuple(row[:3]) != (path, mtime, size):
+                return None
+            self._remember(key, tuple(row))
+            return row[3]
+
+    def set(self, saltenv, rel, hash_type, path, mtime, size, hsum):
+        '''
+        Store a hash
+        '''
+        key = (saltenv, rel, hash_type)
+        with self._lock:
+            conn = self._connect()
+            self._remember(key, (path, mtime, size, hsum))
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    key + (path, mtime, size, hsum)
+                )
+            except sqlite3.Error as exc:
+                log.debug('roots: Unable to write hash index: %s', exc)
+
+    def _remember(self, key, entry):
+        '''
+        Put an entry in the memo as the most recently used one, dropping the
+        least recently used entries past memo_size
+        '''
+        self.memo.pop(key, None)
+        self.memo[key] = entry
+        while len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+
+    def remove(self, saltenv, rel):
+        '''
+        Remove the hashes of every hash type for a file
+        '''
+        with self._lock:
+            conn = self._connect()
+            for key in [x for x in self.memo if x[:2] == (saltenv, rel)]:
+                del self.memo[key]
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    'DELETE FROM hashes WHERE saltenv = ? AND rel = ?',
+                    (saltenv, rel)
+                )
+            except sqlite3.Error as exc:
+                log.debug('roots: Unable to write hash index: %s', exc)
+
+    def prune(self, find_func):
+        '''
+        Remove the entries for files which are no longer served from the
+        same path
+        '''
+        with self._lock:
+            conn = self._connect()
+            self.memo = salt.utils.odict.OrderedDict()
+            if conn is None:
+                return
+            try:
+                rows = conn.execute(
+                    'SELECT DISTINCT saltenv, rel, path FROM hashes'
+                ).fetchall()
+                stale = [(saltenv, rel) for saltenv, rel, path in rows
+                         if find_func(rel, saltenv)['path'] != path]
+                if stale:
+                    conn.executemany(
+                        'DELETE FROM hashes WHERE saltenv = ? AND rel = ?',
+                        stale
+                    )
+            except sqlite3.Error as exc:
+                log.debug('roots: Unable to prune hash index: %s', exc)
+
+
+_HASH_INDEX = None
+
+
+def _get_hash_index():
+    '''
+    Return the hash index for the configured cachedir
+    '''
+    global _HASH_INDEX
+    db_path = os.path.join(__opts__['cachedir'], 'roots', 'hash.db')
+    if _HASH_INDEX is None or _HASH_INDEX.db_path != db_path:
+        _HASH_INDEX = _HashIndex(db_path)
+    return _HASH_INDEX
+
+
 def file_hash(load, fnd):
     '''
     Return a file hash, the hash type is set in the master config file
@@ -223,66 +799,101 @@ def file_hash(load, fnd):
     ret = {}
 
     # if the file doesn't exist, we can't get a hash
-    if not path or not os.path.isfile(path):
+    if not path:
+        return ret
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return ret
+    if not stat.S_ISREG(st_.st_mode):
         return ret
 
     # set the hash_type as it is determined by config-- so mechanism won't change that
     ret['hash_type'] = __opts__['hash_type']
 
-    # check if the hash is cached
-    # cache file's contents should be "hash:mtime"
-    cache_path = os.path.join(__opts__['cachedir'],
-                              'roots',
-                              'hash',
-                              load['saltenv'],
-                              '{0}.hash.{1}'.format(fnd['rel'],
-                              __opts__['hash_type']))
-    # if we have a cache, serve that if the mtime hasn't changed
-    if os.path.exists(cache_path):
-        try:
-            with salt.utils.files.fopen(cache_path, 'r') as fp_:
-                try:
-                    hsum, mtime = salt.utils.stringutils.to_unicode(fp_.read()).split(':')
-                except ValueError:
-                    log.debug('Fileserver attempted to read incomplete cache file. Retrying.')
-                    # Delete the file since its incomplete (either corrupted or incomplete)
-                    try:
-                        os.unlink(cache_path)
-                    except OSError:
-                        pass
-                    return file_hash(load, fnd)
-                if str(os.path.getmtime(path)) == mtime:
-                    # check if mtime changed
-                    ret['hsum'] = hsum
-                    return ret
-        except (os.error, IOError):  # Can't use Python select() because we need Windows support
-            log.debug("Fileserver encountered lock when reading cache file. Retrying.")
-            # Delete the file since its incomplete (either corrupted or incomplete)
-            try:
-                os.unlink(cache_path)
-            except OSError:
-                pass
-            return file_hash(load, fnd)
+    # the cached hash is valid as long as the mtime and size haven't changed
+    index = _get_hash_index()
+    hsum = index.get(load['saltenv'], fnd['rel'], ret['hash_type'],
+                     path, st_.st_mtime, st_.st_size)
+    if hsum is None:
+        hsum = salt.utils.hashutils.get_hash(path, ret['hash_type'])
+        index.set(load['saltenv'], fnd['rel'], ret['hash_type'],
+                  path, st_.st_mtime, st_.st_size, hsum)
+    ret['hsum'] = hsum
+    return ret
 
-    # if we don't have a cache entry-- lets make one
-    ret['hsum'] = salt.utils.hashutils.get_hash(path, __opts__['hash_type'])
-    cache_dir = os.path.dirname(cache_path)
-    # make cache directory if it doesn't exist
-    if not os.path.exists(cache_dir):
+
+def _add_to(ret, tgt, fs_root, parent_dir, items):
+    '''
+    Add the files to the target set, and record empty dirs and links in the
+    file lists dict
+    '''
+    def _translate_sep(path):
+        '''
+        Translate path separators for Windows masterless minions
+        '''
+        return path.replace('\\', '/') if os.path.sep == '\\' else path
+
+    for item in items:
+        abs_path = os.path.join(parent_dir, item)
+        log.trace('roots: Processing %s', abs_path)
+        is_link = salt.utils.path.islink(abs_path)
+        log.trace(
+            'roots: %s is %sa link',
+            abs_path, 'not ' if not is_link else ''
+        )
+        if is_link and __opts__['fileserver_ignoresymlinks']:
+            continue
+        rel_path = _translate_sep(os.path.relpath(abs_path, fs_root))
+        log.trace('roots: %s relative path is %s', abs_path, rel_path)
+        if salt.fileserver.is_file_ignored(__opts__, rel_path):
+            continue
+        tgt.add(rel_path)
         try:
-            os.makedirs(cache_dir)
-        except OSError as err:
-            if err.errno == errno.EEXIST:
-                # rarely, the directory can be already concurrently created between
-                # the os.path.exists and the os.makedirs lines above
-                pass
+            if not os.listdir(abs_path):
+                ret['empty_dirs'].add(rel_path)
+        except Exception:
+            # Generic exception because running os.listdir() on a
+            # non-directory path raises an OSError on *NIX and a
+            # WindowsError on Windows.
+            pass
+        if is_link:
+            link_dest = salt.utils.path.readlink(abs_path)
+            log.trace(
+                'roots: %s symlink destination is %s',
+                abs_path, link_dest
+            )
+            if salt.utils.platform.is_windows() \
+                    and link_dest.startswith('\\\\'):
+                # Symlink points to a network path. Since you can't
+                # join UNC and non-UNC paths, just assume the original
+                # path.
+                log.trace(
+                    'roots: %s is a UNC path, using %s instead',
+                    link_dest, abs_path
+                )
+                link_dest = abs_path
+            if link_dest.startswith('..'):
+                joined = os.path.join(abs_path, link_dest)
             else:
-                raise
-    # save the cache object "hash:mtime"
-    cache_object = '{0}:{1}'.format(ret['hsum'], os.path.getmtime(path))
-    with salt.utils.files.flopen(cache_path, 'w') as fp_:
-        fp_.write(cache_object)
-    return ret
+                joined = os.path.join(
+                    os.path.dirname(abs_path), link_dest
+                )
+            rel_dest = _translate_sep(
+                os.path.relpath(
+                    os.path.realpath(os.path.normpath(joined)),
+                    fs_root
+                )
+            )
+            log.trace(
+                'roots: %s relative path is %s',
+                abs_path, rel_dest
+            )
+            if not rel_dest.startswith('..'):
+                # Only count the link if it does not point
+                # outside of the root dir of the fileserver
+                # (i.e. the "path" variable)
+                ret['links'][rel_path] = link_dest
 
 
 def _file_lists(load, form):
@@ -305,9 +916,16 @@ def _file_lists(load, form):
             return []
     list_cache = os.path.join(list_cachedir, '{0}.p'.format(load['saltenv']))
     w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
+    # When the inotify watcher is running it patches the list caches as files
+    # change, they are only walked again now and then in case the watcher
+    # missed some events.
+    cache_time = None
+    if _watcher_active():
+        cache_time = max(__opts__.get('fileserver_list_cache_time', 20),
+                         10 * __opts__['roots_update_interval'])
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
-            __opts__, form, list_cache, w_lock
+            __opts__, form, list_cache, w_lock, cache_time=cache_time
         )
     if cache_match is not None:
         return cache_match
@@ -319,83 +937,12 @@ def _file_lists(load, form):
             'links': {}
         }
 
-        def _add_to(tgt, fs_root, parent_dir, items):
-            '''
-            Add the files to the target set
-            '''
-            def _translate_sep(path):
-                '''
-                Translate path separators for Windows masterless minions
-                '''
-                return path.replace('\\', '/') if os.path.sep == '\\' else path
-
-            for item in items:
-                abs_path = os.path.join(parent_dir, item)
-                log.trace('roots: Processing %s', abs_path)
-                is_link = salt.utils.path.islink(abs_path)
-                log.trace(
-                    'roots: %s is %sa link',
-                    abs_path, 'not ' if not is_link else ''
-                )
-                if is_link and __opts__['fileserver_ignoresymlinks']:
-                    continue
-                rel_path = _translate_sep(os.path.relpath(abs_path, fs_root))
-                log.trace('roots: %s relative path is %s', abs_path, rel_path)
-                if salt.fileserver.is_file_ignored(__opts__, rel_path):
-                    continue
-                tgt.add(rel_path)
-                try:
-                    if not os.listdir(abs_path):
-                        ret['empty_dirs'].add(rel_path)
-                except Exception:
-                    # Generic exception because running os.listdir() on a
-                    # non-directory path raises an OSError on *NIX and a
-                    # WindowsError on Windows.
-                    pass
-                if is_link:
-                    link_dest = salt.utils.path.readlink(abs_path)
-                    log.trace(
-                        'roots: %s symlink destination is %s',
-                        abs_path, link_dest
-                    )
-                    if salt.utils.platform.is_windows() \
-                            and link_dest.startswith('\\\\'):
-                        # Symlink points to a network path. Since you can't
-                        # join UNC and non-UNC paths, just assume the original
-                        # path.
-                        log.trace(
-                            'roots: %s is a UNC path, using %s instead',
-                            link_dest, abs_path
-                        )
-                        link_dest = abs_path
-                    if link_dest.startswith('..'):
-                        joined = os.path.join(abs_path, link_dest)
-                    else:
-                        joined = os.path.join(
-                            os.path.dirname(abs_path), link_dest
-                        )
-                    rel_dest = _translate_sep(
-                        os.path.relpath(
-                            os.path.realpath(os.path.normpath(joined)),
-                            fs_root
-                        )
-                    )
-                    log.trace(
-                        'roots: %s relative path is %s',
-                        abs_path, rel_dest
-                    )
-                    if not rel_dest.startswith('..'):
-                        # Only count the link if it does not point
-                        # outside of the root dir of the fileserver
-                        # (i.e. the "path" variable)
-                        ret['links'][rel_path] = link_dest
-
         for path in __opts__['file_roots'][load['saltenv']]:
             for root, dirs, files in salt.utils.path.os_walk(
                     path,
                     followlinks=__opts__['fileserver_followsymlinks']):
-                _add_to(ret['dirs'], path, root, dirs)
-                _add_to(ret['files'], path, root, files)
+                _add_to(ret, ret['dirs'], path, root, dirs)
+                _add_to(ret, ret['files'], path, root, files)
 
         ret['files'] = sorted(ret['files'])
         ret['dirs'] = sorted(ret['dirs'])
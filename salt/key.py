@@ -29,6 +29,7 @@ import salt.utils.files
 import salt.utils.json
 import salt.utils.kinds
 import salt.utils.master
+import salt.utils.minions
 import salt.utils.sdb
 import salt.utils.stringutils
 import salt.utils.user
@@ -526,6 +527,8 @@ class Key(object):
                 for minion in clist:
                     if minion not in minions and minion not in preserve_minions:
                         cache.flush('{0}/{1}'.format(self.ACC, minion))
+                        if self.opts.get('minion_data_index', False):
+                            salt.utils.minions.MinionDataIndex(self.opts).remove(minion)
 
     def check_master(self):
         '''
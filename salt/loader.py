@@ -11,6 +11,7 @@ import os
 import re
 import sys
 import time
+import hashlib
 import logging
 import inspect
 import tempfile
@@ -24,16 +25,21 @@ from zipimport import zipimporter
 # Import salt libs
 import salt.config
 import salt.defaults.exitcodes
+import salt.payload
 import salt.syspaths
+import salt.version
 import salt.utils.args
+import salt.utils.atomicfile
 import salt.utils.context
 import salt.utils.data
 import salt.utils.dictupdate
 import salt.utils.event
 import salt.utils.files
+import salt.utils.json
 import salt.utils.lazy
 import salt.utils.odict
 import salt.utils.platform
+import salt.utils.stringutils
 import salt.utils.versions
 from salt.exceptions import LoaderError
 from salt.template import check_render_pipe_str
@@ -1002,6 +1008,33 @@ def cache(opts, serial):
     )
 
 
+def reset_index(opts):
+    '''
+    Forget the modules which failed to load in all the loader indexes, so the
+    loaders created after a module refresh import them again
+    '''
+    if not opts.get('loader_index', False) or not opts.get('cachedir'):
+        return
+    index_dir = os.path.join(opts['cachedir'], 'loader_index')
+    try:
+        index_files = os.listdir(index_dir)
+    except OSError:
+        return
+    serial = salt.payload.Serial('msgpack')
+    for index_file in index_files:
+        path = os.path.join(index_dir, index_file)
+        try:
+            with salt.utils.files.fopen(path, 'rb') as fp_:
+                index = serial.load(fp_)
+            if not isinstance(index, dict) or not index.get('missing'):
+                continue
+            index['missing'] = {}
+            with salt.utils.atomicfile.atomic_open(path, 'wb') as fp_:
+                serial.dump(index, fp_)
+        except Exception as exc:
+            log.debug('Unable to reset loader index %s: %s', path, exc)
+
+
 def _generate_module(name):
     if name in sys.modules:
         return
@@ -1150,9 +1183,17 @@ class LazyLoader(salt.utils.lazy.LazyDict):
             self.suffix_order.append(suffix)
 
         self._lock = threading.RLock()
+        # On disk index of the module files and of the modules which failed
+        # to load, see the loader_index option
+        self._index = None
+        self._index_dirty = False
+        if self.opts.get('loader_index', False) and self.opts.get('cachedir'):
+            self._read_index()
         self._refresh_file_mapping()
 
         super(LazyLoader, self).__init__()  # late init the lazy loader
+        if self._index is not None:
+            self._apply_index()
         # create all of the import namespaces
         _generate_module('{0}.int'.format(self.loaded_base_name))
         _generate_module('{0}.int.{1}'.format(self.loaded_base_name, tag))
@@ -1241,6 +1282,16 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         else:
             self.suffix_map[''] = ('', '', imp.PKG_DIRECTORY)
 
+        if self._index is not None and self._index['file_mapping'] is not None:
+            # Reuse the mapping if the module dirs did not change
+            paths = [path for path, _ in self._index['stamps']]
+            if self._index['stamps'] == self._index_stamps(paths):
+                self.file_mapping = salt.utils.odict.OrderedDict(
+                    (name, tuple(entry))
+                    for name, entry in self._index['file_mapping']
+                )
+                return
+
         # create mapping of filename (without suffix) to (path, suffix)
         # The files are added in order of priority, so order *must* be retained.
         self.file_mapping = salt.utils.odict.OrderedDict()
@@ -1371,6 +1422,214 @@ class LazyLoader(salt.utils.lazy.LazyDict):
             f_noext = smod.split('.')[-1]
             self.file_mapping[f_noext] = (smod, '.o', 0)
 
+        if self._index is not None:
+            self._index_file_mapping()
+
+    def _index_path(self):
+        '''
+        Return the path of the index of this loader. The loaders with the same
+        module dirs, settings and grains share the same index.
+        '''
+        key = repr((
+            sorted(six.iteritems(self._index_env)),
+            self.tag,
+            self.module_dirs,
+            self.static_modules,
+            sorted(self.disabled),
+            self.virtual_enable,
+            self.virtual_funcs,
+            self.opts.get('optimization_order'),
+            self.opts.get('cython_enable'),
+            self.opts.get('enable_zip_modules'),
+            self.opts.get('proxy', {}).get('proxytype')
+            if isinstance(self.opts.get('proxy'), dict) else None,
+        ))
+        return os.path.join(
+            self.opts['cachedir'],
+            'loader_index',
+            '{0}-{1}.p'.format(
+                self.tag,
+                hashlib.sha1(salt.utils.stringutils.to_bytes(key)).hexdigest()
+            )
+        )
+
+    def _get_index_env(self):
+        '''
+        Return what the results of __virtual__ depend on, if any of it
+        changes the index is discarded
+        '''
+        grains = dict(
+            (key, val) for key, val in six.iteritems(self.opts.get('grains', {}))
+            # Different in every process
+            if key != 'pid'
+        )
+        grains = salt.utils.json.dumps(grains, sort_keys=True, default=repr)
+        return {
+            'saltversion': salt.version.__version__,
+            'grains': hashlib.sha1(salt.utils.stringutils.to_bytes(grains)).hexdigest(),
+        }
+
+    def _read_index_file(self):
+        '''
+        Return the index of this loader stored on disk, or None if there is
+        none or it is outdated
+        '''
+        try:
+            with salt.utils.files.fopen(self._index_file, 'rb') as fp_:
+                index = self._index_serial.load(fp_)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            log.debug('Unable to read loader index %s', self._index_file,
+                      exc_info=True)
+            return None
+        if not isinstance(index, dict) or index.get('env') != self._index_env:
+            log.debug('Loader index %s is outdated', self._index_file)
+            return None
+        # msgpack turns the tuples into lists
+        index['stamps'] = [tuple(stamp) for stamp in index['stamps'] or []]
+        return index
+
+    def _read_index(self):
+        '''
+        Read the index of this loader
+        '''
+        self._index_serial = salt.payload.Serial('msgpack')
+        self._index_env = self._get_index_env()
+        self._index_file = self._index_path()
+        # Changes to the failed modules since the index was read, merged in
+        # the index on disk when saving it, as other loaders may have
+        # updated it meanwhile. None means the module loaded.
+        self._index_changes = {}
+        self._index_reset = False
+        self._index = self._read_index_file()
+        if self._index is None:
+            self._index = {'env': self._index_env,
+                           'stamps': None,
+                           'file_mapping': None,
+                           'missing': {}}
+            self._index_dirty = True
+
+    def _save_index(self):
+        '''
+        Write the index of this loader to disk, if it changed
+        '''
+        if self._index is None or not self._index_dirty:
+            return
+        self._index_dirty = False
+        index = self._read_index_file()
+        if index is None:
+            index = self._index
+        else:
+            if self._index_reset:
+                index['missing'] = {}
+            for name, entry in six.iteritems(self._index_changes):
+                if entry is None:
+                    index['missing'].pop(name, None)
+                else:
+                    index['missing'][name] = entry
+            index['stamps'] = self._index['stamps']
+            index['file_mapping'] = self._index['file_mapping']
+        self._index_changes = {}
+        self._index_reset = False
+        try:
+            cachedir = os.path.dirname(self._index_file)
+            if not os.path.isdir(cachedir):
+                os.makedirs(cachedir)
+            with salt.utils.atomicfile.atomic_open(self._index_file, 'wb') as fp_:
+                self._index_serial.dump(index, fp_)
+        except (IOError, OSError) as exc:
+            log.debug('Unable to write loader index %s: %s', self._index_file, exc)
+
+    @staticmethod
+    def _index_stamps(paths):
+        '''
+        Return the modification times of the passed paths
+        '''
+        stamps = []
+        for path in paths:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                mtime = None
+            stamps.append((path, mtime))
+        return stamps
+
+    def _index_file_mapping(self):
+        '''
+        Store the file mapping in the index, with the modification times of
+        the directories it was built from
+        '''
+        paths = []
+        for mod_dir in self.module_dirs:
+            paths.append(mod_dir)
+            if six.PY3:
+                paths.append(os.path.join(mod_dir, '__pycache__'))
+        for fpath, ext, _ in six.itervalues(self.file_mapping):
+            if ext == '':
+                # The __init__ of packages
+                paths.append(fpath)
+        stamps = self._index_stamps(paths)
+        now = time.time()
+        if any(mtime is not None and now - mtime < 2 for _, mtime in stamps):
+            # Files may be added to these dirs in the same second without
+            # changing their modification times
+            file_mapping = None
+        else:
+            file_mapping = [[name, list(entry)]
+                            for name, entry in six.iteritems(self.file_mapping)]
+        if file_mapping != self._index['file_mapping'] or stamps != self._index['stamps']:
+            self._index['file_mapping'] = file_mapping
+            self._index['stamps'] = stamps
+            self._index_dirty = True
+
+    def _apply_index(self):
+        '''
+        Skip the modules which failed to load last time, unless their file
+        changed
+        '''
+        for name, entry in six.iteritems(self._index['missing']):
+            if name not in self.file_mapping or name in self.loaded_files:
+                continue
+            fpath = self.file_mapping[name][0]
+            if fpath != entry['path']:
+                continue
+            try:
+                if os.stat(fpath).st_mtime != entry['mtime']:
+                    continue
+            except OSError:
+                continue
+            self.loaded_files.add(name)
+            self.missing_modules[name] = entry['reason']
+        self._save_index()
+
+    def _index_load_result(self, name, loaded):
+        '''
+        Record in the index if a module failed to load
+        '''
+        fpath, ext = self.file_mapping[name][:2]
+        if ext in ('', '.o'):
+            # The modification time of a package or a static module does not
+            # tell if it changed
+            return
+        if loaded:
+            if self._index['missing'].pop(name, None) is not None:
+                self._index_changes[name] = None
+                self._index_dirty = True
+            return
+        try:
+            mtime = os.stat(fpath).st_mtime
+        except OSError:
+            return
+        reason = self.missing_modules.get(name)
+        entry = {'path': fpath,
+                 'mtime': mtime,
+                 'reason': None if reason is None else six.text_type(reason)}
+        if self._index['missing'].get(name) != entry:
+            self._index['missing'][name] = entry
+            self._index_changes[name] = entry
+            self._index_dirty = True
+
     def clear(self):
         '''
         Clear the dict
@@ -1383,7 +1642,15 @@ class LazyLoader(salt.utils.lazy.LazyDict):
             # if we have been loaded before, lets clear the file mapping since
             # we obviously want a re-do
             if hasattr(self, 'opts'):
+                if self._index is not None and not self.initial_load:
+                    # Give the modules which failed to load another chance,
+                    # also in the other processes
+                    self._index['missing'] = {}
+                    self._index_changes = {}
+                    self._index_reset = True
+                    self._index_dirty = True
                 self._refresh_file_mapping()
+                self._save_index()
             self.initial_load = False
 
     def __prep_mod_opts(self, opts):
@@ -1437,6 +1704,16 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 self._reload_submodules(submodule)
 
     def _load_module(self, name):
+        '''
+        Load a module from the file mapping, and record the result in the
+        index
+        '''
+        ret = self._load_module_file(name)
+        if self._index is not None:
+            self._index_load_result(name, ret)
+        return ret
+
+    def _load_module_file(self, name):
         mod = None
         fpath, suffix = self.file_mapping[name][:2]
         self.loaded_files.add(name)
@@ -1738,6 +2015,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                         self._refresh_file_mapping()
                         reloaded = True
                     continue
+            self._save_index()
 
         return ret
 
@@ -1752,6 +2030,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 self._load_module(name)
 
             self.loaded = True
+            self._save_index()
 
     def reload_modules(self):
         with self._lock:
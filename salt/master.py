@@ -8,6 +8,7 @@ involves preparing the three listeners and the workers needed by the master.
 from __future__ import absolute_import, with_statement, print_function, unicode_literals
 import copy
 import ctypes
+import datetime
 import functools
 import os
 import re
@@ -26,17 +27,22 @@ import salt.serializers.msgpack
 from salt.ext import six
 from salt.ext.six.moves import range
 from salt.utils.zeromq import zmq, ZMQDefaultLoop, install_zmq, ZMQ_VERSION_INFO
+if zmq is not None:
+    import zmq.eventloop.zmqstream
 # pylint: enable=import-error,no-name-in-module,redefined-builtin
 
+import tornado.concurrent  # pylint: disable=F0401
 import tornado.gen  # pylint: disable=F0401
 
 # Import salt libs
+import salt.cache
 import salt.crypt
 import salt.client
 import salt.client.ssh.client
 import salt.exceptions
 import salt.payload
 import salt.pillar
+import salt.returners
 import salt.state
 import salt.runner
 import salt.auth
@@ -199,6 +205,11 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.event = salt.utils.event.get_master_event(self.opts, self.opts['sock_dir'], listen=False)
         # Init any values needed by the git ext pillar
         self.git_pillar = salt.daemons.masterapi.init_git_pillar(self.opts)
+        # Expire the jobs of the minions which went away
+        if self.opts['job_registry']:
+            self.job_registry = salt.utils.job.JobRegistry(self.opts)
+        else:
+            self.job_registry = None
 
         self.presence_events = False
         if self.opts.get('presence_events', False):
@@ -232,6 +243,8 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
             now = int(time.time())
             if (now - last) >= self.loop_interval:
                 salt.daemons.masterapi.clean_old_jobs(self.opts)
+                if self.job_registry is not None:
+                    self.job_registry.clean()
                 salt.daemons.masterapi.clean_expired_tokens(self.opts)
                 salt.daemons.masterapi.clean_pub_auth(self.opts)
             self.handle_git_pillar()
@@ -598,6 +611,17 @@ class Master(SMaster):
             except OSError:
                 pass
 
+        if not self.opts.get('minion_data_index', False) or \
+                not self.opts.get('minion_data_cache', False):
+            # A disabled minion data index is not kept up to date, drop it so
+            # that it does not answer with stale data once enabled again
+            try:
+                index = salt.utils.minions.MinionDataIndex(self.opts)
+                if index.indexed():
+                    index.drop()
+            except salt.exceptions.SaltCacheError as exc:
+                log.warning('Unable to drop the minion data index: %s', exc)
+
         if self.opts.get('git_pillar_verify_config', True):
             try:
                 git_pillars = [
@@ -928,6 +952,17 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
                                                        name),
                                                  kwargs=kwargs,
                                                  name=name)
+            if pillar_workers_enabled(self.opts):
+                self.process_manager.add_process(PillarQueue,
+                                                 args=(self.opts,),
+                                                 kwargs=kwargs,
+                                                 name='PillarQueue')
+                for ind in range(int(self.opts['pillar_workers'])):
+                    name = 'PillarWorker-{0}'.format(ind)
+                    self.process_manager.add_process(PillarWorker,
+                                                     args=(self.opts, name),
+                                                     kwargs=kwargs,
+                                                     name=name)
         self.process_manager.run()
 
     def run(self):
@@ -979,6 +1014,7 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.k_mtime = 0
         self.stats = collections.defaultdict(lambda: {'mean': 0, 'runs': 0})
         self.stat_clock = time.time()
+        self.pillar_client = None
 
     # We need __setstate__ and __getstate__ to also pickle 'SMaster.secrets'.
     # Otherwise, 'SMaster.secrets' won't be copied over to the spawned process
@@ -1023,6 +1059,8 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         install_zmq()
         self.io_loop = ZMQDefaultLoop()
         self.io_loop.make_current()
+        if pillar_workers_enabled(self.opts, warn=False):
+            self.pillar_client = PillarWorkerClient(self.opts, self.io_loop)
         for req_channel in self.req_channels:
             req_channel.post_fork(self._handle_payload, io_loop=self.io_loop)  # TODO: cleaner? Maybe lazily?
         try:
@@ -1055,10 +1093,45 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         '''
         key = payload['enc']
         load = payload['load']
+        if key == 'aes' and self.pillar_client is not None \
+                and load.get('cmd') == '_pillar':
+            ret = yield self._handle_pillar(load)
+            raise tornado.gen.Return(ret)
         ret = {'aes': self._handle_aes,
                'clear': self._handle_clear}[key](load)
         raise tornado.gen.Return(ret)
 
+    @tornado.gen.coroutine
+    def _handle_pillar(self, load):
+        '''
+        Hand a pillar request off to the pillar workers, the worker can
+        handle other requests while the pillar is compiled if the transport
+        allows it
+
+        :param dict load: The minion payload
+        :return: The pillar data, encrypted for the minion
+        '''
+        start = time.time()
+        ret = False
+        if self.aes_funcs._check_pillar_load(load):
+            try:
+                data = yield self.pillar_client.compile(load)
+                ret = self.aes_funcs._pillar_compiled(load, data)
+            except Exception as exc:
+                log.error('Error compiling the pillar of %s in the pillar workers',
+                          load['id'], exc_info=True)
+                # Report the error the way a failed pillar compilation does
+                ret = {'_errors': ['Failed to compile the pillar in the pillar '
+                                   'workers: {0}'.format(exc)]}
+        if self.opts['master_stats']:
+            # The stats may have been fired and reset by another request
+            # while the pillar was compiled, count the run with its duration
+            self.stats['_pillar']['runs'] += 1
+            self._post_stats(start, '_pillar')
+        if 'id' not in load:
+            raise tornado.gen.Return((ret, {'fun': 'send'}))
+        raise tornado.gen.Return((ret, self.aes_funcs._pillar_req_opts(load)))
+
     def _post_stats(self, start, cmd):
         '''
         Calculate the master stats and fire events with stat info
@@ -1068,7 +1141,13 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.stats[cmd]['mean'] = (self.stats[cmd]['mean'] * (self.stats[cmd]['runs'] - 1) + duration) / self.stats[cmd]['runs']
         if end - self.stat_clock > self.opts['master_stats_event_iter']:
             # Fire the event with the stats and wipe the tracker
-            self.aes_funcs.event.fire_event({'time': end - self.stat_clock, 'worker': self.name, 'stats': self.stats}, tagify(self.name, 'stats'))
+            data = {'time': end - self.stat_clock, 'worker': self.name, 'stats': self.stats}
+            if self.opts.get('memcache_expire_seconds', 0):
+                data['memcache'] = salt.cache.MemCache.stats()
+            return_buffers = salt.returners.get_return_buffer_stats()
+            if return_buffers:
+                data['return_buffers'] = return_buffers
+            self.aes_funcs.event.fire_event(data, tagify(self.name, 'stats'))
             self.stats = collections.defaultdict(lambda: {'mean': 0, 'runs': 0})
             self.stat_clock = end
 
@@ -1137,6 +1216,267 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.__bind()
 
 
+def compile_minion_pillar(opts, load):
+    '''
+    Compile the pillar data requested by a minion
+
+    :param dict opts: The salt options
+    :param dict load: Minion payload
+
+    :rtype: dict
+    :return: The pillar data for the minion
+    '''
+    pillar = salt.pillar.get_pillar(
+        opts,
+        load['grains'],
+        load['id'],
+        load.get('saltenv', load.get('env')),
+        ext=load.get('ext'),
+        pillar_override=load.get('pillar_override', {}),
+        pillarenv=load.get('pillarenv'),
+        extra_minion_data=load.get('extra_minion_data'))
+    return pillar.compile_pillar()
+
+
+def pillar_workers_enabled(opts, warn=True):
+    '''
+    Return whether the pillar requests are handed off to the pillar workers
+    '''
+    if not opts.get('pillar_workers'):
+        return False
+    if opts.get('transport') != 'tcp':
+        # A ZeroMQ worker can't answer another request before replying to the
+        # pillar request, handing the pillar off would not free it
+        if warn:
+            log.warning('The pillar workers are only used with the tcp '
+                        'transport, the pillar is compiled by the MWorkers')
+        return False
+    if zmq is None or opts.get('ipc_mode', '') == 'tcp':
+        if warn:
+            log.warning('The pillar workers need ZeroMQ and IPC sockets, '
+                        'the pillar is compiled by the MWorkers')
+        return False
+    return True
+
+
+def _pillar_workers_uris(opts):
+    '''
+    Return the URIs of the front and back sockets of the pillar queue
+    '''
+    return ('ipc://{0}'.format(os.path.join(opts['sock_dir'], 'pillar_req.ipc')),
+            'ipc://{0}'.format(os.path.join(opts['sock_dir'], 'pillar_workers.ipc')))
+
+
+class PillarQueue(salt.utils.process.SignalHandlingMultiprocessingProcess):
+    '''
+    Queue the pillar requests of the MWorkers to the pillar workers, and
+    fire the queue depth and compile times as stats events. A request is only
+    handed to an idle worker, and dropped once the MWorker stopped waiting
+    for it.
+    '''
+    def __init__(self, opts, **kwargs):
+        super(PillarQueue, self).__init__(**kwargs)
+        self.opts = opts
+        self.name = 'PillarQueue'
+
+    def run(self):
+        '''
+        Forward the requests and replies between the MWorkers and the pillar
+        workers
+        '''
+        salt.utils.process.appendproctitle(self.name)
+        context = zmq.Context(1)
+        front_uri, back_uri = _pillar_workers_uris(self.opts)
+        clients = context.socket(zmq.ROUTER)
+        clients.bind(front_uri)
+        workers = context.socket(zmq.ROUTER)
+        workers.bind(back_uri)
+        poller = zmq.Poller()
+        poller.register(clients, zmq.POLLIN)
+        poller.register(workers, zmq.POLLIN)
+        event = None
+        if self.opts['master_stats']:
+            event = salt.utils.event.get_master_event(
+                self.opts, self.opts['sock_dir'], listen=False)
+        stats = self._new_stats()
+        stat_clock = time.time()
+        # The identities of the workers waiting for a request, and the
+        # requests waiting for a worker with the time they were received
+        idle = collections.deque()
+        queue = collections.deque()
+        busy = 0
+        try:
+            while True:
+                try:
+                    socks = dict(poller.poll(1000))
+                except zmq.ZMQError as exc:
+                    if exc.errno == errno.EINTR:
+                        continue
+                    raise
+                now = time.time()
+                if socks.get(clients) == zmq.POLLIN:
+                    queue.append((now, clients.recv_multipart()))
+                    stats['requests'] += 1
+                if socks.get(workers) == zmq.POLLIN:
+                    frames = workers.recv_multipart()
+                    idle.append(frames[0])
+                    # Strip the identity of the worker and the REQ delimiter
+                    frames = frames[2:]
+                    if frames != [b'READY']:
+                        busy = max(0, busy - 1)
+                        clients.send_multipart(frames)
+                        try:
+                            compile_time = float(frames[-2])
+                        except (IndexError, ValueError):
+                            compile_time = None
+                        if compile_time is not None:
+                            stats['compiled'] += 1
+                            stats['compile_time_total'] += compile_time
+                            stats['compile_time_max'] = max(
+                                stats['compile_time_max'], compile_time)
+                while idle and queue:
+                    received, frames = queue.popleft()
+                    if now - received > self.opts['pillar_workers_timeout']:
+                        # The MWorker does not wait for this request anymore
+                        stats['expired'] += 1
+                        continue
+                    workers.send_multipart([idle.popleft(), b''] + frames)
+                    busy += 1
+                stats['max_queue_depth'] = max(stats['max_queue_depth'],
+                                               len(queue))
+                if event is not None and \
+                        now - stat_clock > self.opts['master_stats_event_iter']:
+                    stats['time'] = now - stat_clock
+                    stats['in_flight'] = busy + len(queue)
+                    stats['queue_depth'] = len(queue)
+                    if stats['compiled']:
+                        stats['compile_time_mean'] = \
+                            stats['compile_time_total'] / stats['compiled']
+                    event.fire_event(stats, tagify('pillar_workers', 'stats'))
+                    stats = self._new_stats()
+                    stat_clock = now
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            clients.close()
+            workers.close()
+            context.term()
+
+    @staticmethod
+    def _new_stats():
+        return {'requests': 0,
+                'compiled': 0,
+                'expired': 0,
+                'max_queue_depth': 0,
+                'compile_time_total': 0.0,
+                'compile_time_mean': 0.0,
+                'compile_time_max': 0.0}
+
+
+class PillarWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
+    '''
+    Compile the pillar data of the requests handed off by the MWorkers
+    '''
+    def __init__(self, opts, name, **kwargs):
+        kwargs['name'] = name
+        super(PillarWorker, self).__init__(**kwargs)
+        self.opts = opts
+        self.name = name
+
+    def run(self):
+        '''
+        Compile the pillar requests read from the pillar queue
+        '''
+        salt.utils.process.appendproctitle(self.name)
+        salt.utils.crypt.reinit_crypto()
+        serial = salt.payload.Serial(self.opts)
+        context = zmq.Context(1)
+        socket = context.socket(zmq.REQ)
+        socket.connect(_pillar_workers_uris(self.opts)[1])
+        try:
+            # Tell the pillar queue this worker can take a request
+            socket.send(b'READY')
+            while True:
+                try:
+                    frames = socket.recv_multipart()
+                except zmq.ZMQError as exc:
+                    if exc.errno == errno.EINTR:
+                        continue
+                    raise
+                # The envelope routes the reply back to the MWorker
+                envelope, (reqid, payload) = frames[:-2], frames[-2:]
+                start = time.time()
+                try:
+                    ret = {'pillar': compile_minion_pillar(
+                        self.opts, serial.loads(payload))}
+                except Exception as exc:
+                    log.error('Error compiling pillar data', exc_info=True)
+                    ret = {'error': '{0}: {1}'.format(type(exc).__name__, exc)}
+                socket.send_multipart(
+                    envelope +
+                    [reqid,
+                     salt.utils.stringutils.to_bytes(
+                         six.text_type(time.time() - start)),
+                     serial.dumps(ret)])
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            socket.close()
+            context.term()
+
+
+class PillarWorkerClient(object):
+    '''
+    Send the pillar requests of an MWorker to the pillar workers, without
+    blocking the IOLoop of the MWorker
+    '''
+    def __init__(self, opts, io_loop):
+        self.opts = opts
+        self.io_loop = io_loop
+        self.serial = salt.payload.Serial(opts)
+        self.context = zmq.Context(1)
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.connect(_pillar_workers_uris(opts)[0])
+        self.stream = zmq.eventloop.zmqstream.ZMQStream(self.socket, io_loop=io_loop)
+        self.stream.on_recv(self._handle_reply)
+        self.futures = {}
+        self.count = 0
+
+    @tornado.gen.coroutine
+    def compile(self, load):
+        '''
+        Compile the pillar data of a minion in the pillar workers
+
+        :param dict load: Minion payload
+        :return: The pillar data for the minion
+        '''
+        self.count += 1
+        reqid = salt.utils.stringutils.to_bytes(six.text_type(self.count))
+        future = tornado.concurrent.Future()
+        self.futures[reqid] = future
+        self.stream.send_multipart([b'', reqid, self.serial.dumps(load)])
+        try:
+            ret = yield tornado.gen.with_timeout(
+                datetime.timedelta(seconds=self.opts['pillar_workers_timeout']),
+                future,
+                io_loop=self.io_loop)
+        finally:
+            self.futures.pop(reqid, None)
+        raise tornado.gen.Return(ret)
+
+    def _handle_reply(self, frames):
+        reqid, _, payload = frames[-3:]
+        future = self.futures.pop(reqid, None)
+        if future is None:
+            # The request timed out
+            return
+        ret = self.serial.loads(payload)
+        if 'error' in ret:
+            future.set_exception(salt.exceptions.SaltMasterError(ret['error']))
+        else:
+            future.set_result(ret['pillar'])
+
+
 # TODO: rename? No longer tied to "AES", just "encrypted" or "private" requests
 class AESFuncs(object):
     '''
@@ -1168,6 +1508,10 @@ class AESFuncs(object):
         )
         self.__setup_fileserver()
         self.masterapi = salt.daemons.masterapi.RemoteFuncs(opts)
+        if self.opts['job_registry']:
+            self.job_registry = salt.utils.job.JobRegistry(self.opts)
+        else:
+            self.job_registry = None
 
     def __setup_fileserver(self):
         '''
@@ -1180,6 +1524,7 @@ class AESFuncs(object):
         self._file_find = self.fs_._find_file
         self._file_hash = self.fs_.file_hash
         self._file_hash_and_stat = self.fs_.file_hash_and_stat
+        self._file_manifest = self.fs_.file_manifest
         self._file_list = self.fs_.file_list
         self._file_list_emptydirs = self.fs_.file_list_emptydirs
         self._dir_list = self.fs_.dir_list
@@ -1520,28 +1865,55 @@ class AESFuncs(object):
         :rtype: dict
         :return: The pillar data for the minion
         '''
+        if not self._check_pillar_load(load):
+            return False
+        return self._pillar_compiled(load, compile_minion_pillar(self.opts, load))
+
+    def _check_pillar_load(self, load):
+        '''
+        Verify a pillar request, and add the minion id to its grains
+
+        :param dict load: Minion payload
+
+        :rtype: bool
+        :return: Whether the pillar can be compiled
+        '''
         if any(key not in load for key in ('id', 'grains')):
             return False
         if not salt.utils.verify.valid_id(self.opts, load['id']):
             return False
         load['grains']['id'] = load['id']
+        return True
 
-        pillar = salt.pillar.get_pillar(
-            self.opts,
-            load['grains'],
-            load['id'],
-            load.get('saltenv', load.get('env')),
-            ext=load.get('ext'),
-            pillar_override=load.get('pillar_override', {}),
-            pillarenv=load.get('pillarenv'),
-            extra_minion_data=load.get('extra_minion_data'))
-        data = pillar.compile_pillar()
+    def _pillar_req_opts(self, load):
+        '''
+        Return how the pillar data is sent back to the minion
+        '''
+        if load.get('ver') != '2' and self.opts['pillar_version'] == 1:
+            # Authorized to return old pillar proto
+            return {'fun': 'send'}
+        return {'fun': 'send_private', 'key': 'pillar', 'tgt': load['id']}
+
+    def _pillar_compiled(self, load, data):
+        '''
+        Update the minion data cache with freshly compiled pillar data
+
+        :param dict load: Minion payload
+        :param dict data: The pillar data of the minion
+
+        :rtype: dict
+        :return: The pillar data for the minion
+        '''
         self.fs_.update_opts()
         if self.opts.get('minion_data_cache', False):
             self.masterapi.cache.store('minions/{0}'.format(load['id']),
                                        'data',
                                        {'grains': load['grains'],
                                         'pillar': data})
+            if self.opts.get('minion_data_index', False):
+                self.masterapi.minion_index.update(load['id'],
+                                                   load['grains'],
+                                                   data)
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'Minion data cache refresh': load['id']}, tagify(load['id'], 'refresh', 'minion'))
         return data
@@ -1572,6 +1944,15 @@ class AESFuncs(object):
                 id_, load['data']['message']
             )
 
+        if self.job_registry is not None:
+            if 'tag' in load:
+                self._handle_job_registry_event(load['tag'], load['data'], id_)
+            for event in load.get('events', []):
+                # Forwarded by a syndic, the minion ID is taken from the tag
+                if 'tag' in event:
+                    self._handle_job_registry_event(
+                        event['tag'], event.get('data', {}))
+
         for event in load.get('events', []):
             event_data = event.get('data', {})
             if 'minions' in event_data:
@@ -1592,6 +1973,42 @@ class AESFuncs(object):
                         minions, jid, exc
                     )
 
+    def _handle_job_registry_event(self, tag, data, id_=None):
+        '''
+        Update the job registry from the job start events and running jobs
+        heartbeats of the minions
+
+        :param str tag: The event tag
+        :param dict data: The event data
+        :param str id_: The ID of the minion which sent the event. If not
+                        passed, the ID in the tag is used.
+        '''
+        parts = tag.split('/')
+        if not isinstance(data, dict) or parts[0] != 'salt':
+            return
+        if len(parts) == 5 and parts[1] == 'job' and parts[3] == 'start':
+            if id_ is None:
+                id_ = parts[4]
+            elif id_ != parts[4]:
+                return
+            try:
+                self.job_registry.start(
+                    parts[2], id_, data,
+                    data.get('interval', self.opts['job_registry_interval']))
+            except salt.exceptions.SaltCacheError as exc:
+                log.error('Could not update the job registry: %s', exc)
+        elif len(parts) == 4 and parts[1] == 'minion' and parts[3] == 'jobs':
+            if id_ is None:
+                id_ = parts[2]
+            elif id_ != parts[2]:
+                return
+            try:
+                self.job_registry.heartbeat(
+                    id_, data.get('jobs', []),
+                    data.get('interval', self.opts['job_registry_interval']))
+            except salt.exceptions.SaltCacheError as exc:
+                log.error('Could not update the job registry: %s', exc)
+
     def _return(self, load):
         '''
         Handle the return data sent from the minions.
@@ -1629,7 +2046,8 @@ class AESFuncs(object):
 
         try:
             salt.utils.job.store_job(
-                self.opts, load, event=self.event, mminion=self.mminion)
+                self.opts, load, event=self.event, mminion=self.mminion,
+                job_registry=self.job_registry)
         except salt.exceptions.SaltCacheError:
             log.error('Could not store job information for load: %s', load)
 
@@ -1849,10 +2267,7 @@ class AESFuncs(object):
         if func == '_return':
             return ret, {'fun': 'send'}
         if func == '_pillar' and 'id' in load:
-            if load.get('ver') != '2' and self.opts['pillar_version'] == 1:
-                # Authorized to return old pillar proto
-                return ret, {'fun': 'send'}
-            return ret, {'fun': 'send_private', 'key': 'pillar', 'tgt': load['id']}
+            return ret, self._pillar_req_opts(load)
         # Encrypt the return
         return ret, {'fun': 'send'}
 
@@ -1581,6 +1581,8 @@ class Minion(MinionBase):
         log.info('Starting a new job with PID %s', sdata['pid'])
         with salt.utils.files.fopen(fn_, 'w+b') as fp_:
             fp_.write(minion_instance.serial.dumps(sdata))
+        if opts['job_registry_events']:
+            minion_instance._fire_master_job_start(sdata)
         ret = {'success': False}
         function_name = data['fun']
         executors = data.get('module_executors') or \
@@ -1804,6 +1806,8 @@ class Minion(MinionBase):
         log.info('Starting a new job with PID %s', sdata['pid'])
         with salt.utils.files.fopen(fn_, 'w+b') as fp_:
             fp_.write(minion_instance.serial.dumps(sdata))
+        if opts['job_registry_events']:
+            minion_instance._fire_master_job_start(sdata)
 
         multifunc_ordered = opts.get('multifunc_ordered', False)
         num_funcs = len(data['fun'])
@@ -2114,6 +2118,41 @@ class Minion(MinionBase):
                     }
             })
 
+    def _job_registry_data(self, job):
+        '''
+        Return the job data reported to the job registry of the master
+        '''
+        return dict((key, job[key])
+                    for key in ('jid', 'fun', 'arg', 'tgt', 'tgt_type', 'user', 'pid')
+                    if key in job)
+
+    def _fire_master_job_start(self, job):
+        '''
+        Tell the master that a job was started
+        '''
+        data = self._job_registry_data(job)
+        data['interval'] = self.opts['job_registry_interval']
+        # The event only spares the master a saltutil.find_job, do not hold
+        # the job up while the master is slow to answer
+        thread = threading.Thread(
+            target=self._fire_master,
+            args=(data, tagify([job['jid'], 'start', self.opts['id']], 'job')),
+            kwargs={'timeout': 5})
+        thread.daemon = True
+        thread.start()
+
+    def _fire_master_running_jobs(self):
+        '''
+        Send the list of the running jobs to the master, so that it knows they
+        are still running
+        '''
+        jobs = salt.utils.minion.running(self.opts)
+        if not jobs:
+            return
+        data = {'jobs': [self._job_registry_data(job) for job in jobs],
+                'interval': self.opts['job_registry_interval']}
+        self._fire_master(data, tagify([self.opts['id'], 'jobs'], 'minion'), sync=False)
+
     def _fire_master_minion_start(self):
         # Send an event to the master that the minion is live
         if self.opts['enable_legacy_startup_events']:
@@ -2139,6 +2178,7 @@ class Minion(MinionBase):
         Refresh the functions and returners.
         '''
         log.debug('Refreshing modules. Notify=%s', notify)
+        salt.loader.reset_index(self.opts)
         self.functions, self.returners, _, self.executors = self._load_modules(force_refresh, notify=notify)
 
         self.schedule.functions = self.functions
@@ -2683,6 +2723,11 @@ class Minion(MinionBase):
             self.periodic_callbacks['ping'] = tornado.ioloop.PeriodicCallback(ping_master, ping_interval * 1000)
             self.periodic_callbacks['ping'].start()
 
+        if self.opts['job_registry_events'] and self.connected:
+            self.periodic_callbacks['job_registry'] = tornado.ioloop.PeriodicCallback(
+                self._fire_master_running_jobs, self.opts['job_registry_interval'] * 1000)
+            self.periodic_callbacks['job_registry'].start()
+
         # add handler to subscriber
         if hasattr(self, 'pub_channel') and self.pub_channel is not None:
             self.pub_channel.on_recv(self._handle_payload)
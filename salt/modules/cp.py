@@ -679,6 +679,28 @@ def list_master_symlinks(saltenv='base', prefix=''):
     return _client().symlink_list(saltenv, prefix)
 
 
+def list_master_manifest(saltenv='base', prefix=''):
+    '''
+    .. versionadded:: Fluorine
+
+    List all of the files stored on the master along with their hash and
+    stat result, retrieved in a single request. Returns ``None`` if the file
+    server doesn't support it.
+
+    If :conf_minion:`file_manifest_cache_time` is set, the hashes are kept
+    for that many seconds and used by :py:func:`cp.hash_file
+    <salt.modules.cp.hash_file>` and when caching these files, instead of
+    asking the master for each file.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' cp.list_master_manifest prefix=files/
+    '''
+    return _client().file_manifest(saltenv, prefix)
+
+
 def list_minion(saltenv='base'):
     '''
     List all of the files cached on the minion
@@ -405,6 +405,29 @@ def document_create(index, doc_type, body=None, id=None, hosts=None, profile=Non
         raise CommandExecutionError("Cannot create document in index {0}, server returned code {1} with message {2}".format(index, e.status_code, e.error))
 
 
+def document_bulk(body, hosts=None, profile=None):
+    '''
+    .. versionadded:: Fluorine
+
+    Index, create, update or delete several documents in a single request to
+    the bulk API
+
+    body
+        List of the actions and of their documents, as expected by the bulk
+        API, i.e. each action followed by its document if any
+
+    CLI example::
+
+        salt myminion elasticsearch.document_bulk '[{"index": {"_index": "testindex", "_type": "doctype1"}}, {"foo": "bar"}]'
+    '''
+    es = _get_instance(hosts, profile)
+
+    try:
+        return es.bulk(body=body)
+    except elasticsearch.TransportError as e:
+        raise CommandExecutionError("Cannot run the bulk request, server returned code {0} with message {1}".format(e.status_code, e.error))
+
+
 def document_delete(index, doc_type, id, hosts=None, profile=None):
     '''
     Delete a document from an index
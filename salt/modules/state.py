@@ -1323,7 +1323,7 @@ def sls(mods, test=None, exclude=None, queue=False, sync_mods=None, **kwargs):
             else:
                 high_['__exclude__'] = exclude
         snapper_pre = _snapper_pre(opts, kwargs.get('__pub_jid', 'called localy'))
-        ret = st_.state.call_high(high_, orchestration_jid)
+        ret = st_.render_cache_ret(st_.state.call_high(high_, orchestration_jid))
     finally:
         st_.pop_active()
     if __salt__['config.option']('state_data', '') == 'terse' or kwargs.get('terse'):
@@ -10,8 +10,11 @@ import fnmatch
 import os
 import collections
 import logging
+import multiprocessing.pool
 import tornado.gen
 import sys
+import threading
+import time
 import traceback
 import inspect
 
@@ -26,6 +29,10 @@ import salt.utils.cache
 import salt.utils.crypt
 import salt.utils.data
 import salt.utils.dictupdate
+import salt.utils.files
+import salt.utils.hashutils
+import salt.utils.json
+import salt.utils.stringutils
 import salt.utils.url
 from salt.exceptions import SaltClientError
 from salt.template import compile_template
@@ -41,6 +48,14 @@ from salt.ext import six
 
 log = logging.getLogger(__name__)
 
+# The pillar SLS data rendered in this process, shared between the minions,
+# keyed by the SLS and its files. Each key holds the variants rendered from
+# different grains and pillar values.
+_PSTATE_MEMO = OrderedDict()
+_PSTATE_MEMO_LOCK = threading.Lock()
+# The number of variants kept for each SLS
+PSTATE_MEMO_VARIANTS = 100
+
 
 def get_pillar(opts, grains, minion_id, saltenv=None, ext=None, funcs=None,
                pillar_override=None, pillarenv=None, extra_minion_data=None):
@@ -245,6 +260,194 @@ class RemotePillar(RemotePillarMixin):
         return ret_pillar
 
 
+def _digest(data):
+    '''
+    Return a digest of data, used to find out if a pillar input changed
+    '''
+    return salt.utils.hashutils.sha256_digest(
+        salt.utils.json.dumps(data, sort_keys=True, default=repr))
+
+
+def _template_digests(client, files, strict=False):
+    '''
+    Return the digests of template files, and of the templates pulled in by
+    them. ``files`` is a list of ``(path, saltenv)`` tuples.
+
+    The templates pulled in by an expression or a relative path can not be
+    found without rendering the files. With ``strict``, None is returned when
+    a file pulls in such a template, otherwise they are not tracked.
+    '''
+    # Avoid circular import
+    from salt.state import template_refs
+    digests = {}
+    files = list(files)
+    while files:
+        path, saltenv = files.pop(0)
+        if not path or path in digests:
+            continue
+        try:
+            with salt.utils.files.fopen(path, 'rb') as fp_:
+                data = fp_.read()
+        except (IOError, OSError):
+            digests[path] = None
+            continue
+        digests[path] = salt.utils.hashutils.sha256_digest(data)
+        refs = template_refs(
+            salt.utils.stringutils.to_unicode(data, errors='replace'))
+        if refs is None:
+            if strict:
+                return None
+            continue
+        for ref in refs:
+            if ref.startswith('.'):
+                # Relative imports can not be resolved here
+                if strict:
+                    return None
+                continue
+            files.append((client.cache_file(
+                salt.utils.url.create(ref.lstrip('/')), saltenv), saltenv))
+    return digests
+
+
+def _reads_match(data, reads):
+    '''
+    Return whether data holds the values recorded by TrackedDict.digests,
+    without recording the keys read
+    '''
+    if data is None:
+        return not reads.get('keys') and 'all' not in reads
+    if 'all' in reads:
+        return reads['all'] == _digest(dict(dict.items(data)))
+    for key, digest in six.iteritems(reads.get('keys', {})):
+        current = _digest(dict.__getitem__(data, key)) \
+            if dict.__contains__(data, key) else None
+        if current != digest:
+            return False
+    return True
+
+
+class TrackedDict(dict):
+    '''
+    Dictionary recording the keys read, used for the grains and pillar data
+    a pillar is compiled with. The pillar cache and the pillar SLS memo only
+    consider the values read. Iterating over the dictionary marks all the
+    keys as read. Copies share the record of the original, as the grains
+    are copied into the options of the ext_pillar modules.
+
+    Scopes record the keys read over a part of the compilation, e.g. the
+    render of a single SLS file.
+    '''
+    def __init__(self, *args, **kwargs):
+        super(TrackedDict, self).__init__(*args, **kwargs)
+        self.accessed = {'keys': set(), 'all': False, 'scopes': []}
+
+    def _copy(self, data):
+        ret = TrackedDict(data)
+        ret.accessed = self.accessed
+        return ret
+
+    def _read(self, key):
+        self.accessed['keys'].add(key)
+        for scope in self.accessed['scopes']:
+            scope['keys'].add(key)
+
+    def _read_all(self):
+        self.accessed['all'] = True
+        for scope in self.accessed['scopes']:
+            scope['all'] = True
+
+    def push_scope(self):
+        '''
+        Start recording the keys read in a new scope, and return it
+        '''
+        scope = {'keys': set(), 'all': False}
+        self.accessed['scopes'].append(scope)
+        return scope
+
+    def pop_scope(self, scope):
+        '''
+        Stop recording the keys read in a scope
+        '''
+        self.accessed['scopes'].remove(scope)
+
+    def replay(self, reads):
+        '''
+        Record the keys of the digests of a scope as read
+        '''
+        if 'all' in reads:
+            self._read_all()
+        for key in reads.get('keys', {}):
+            self._read(key)
+
+    def __copy__(self):
+        return self._copy(dict.items(self))
+
+    def __deepcopy__(self, memo):
+        return self._copy(copy.deepcopy(dict(dict.items(self)), memo))
+
+    def __getitem__(self, key):
+        self._read(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self._read(key)
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        self._read(key)
+        return dict.get(self, key, default)
+
+    def has_key(self, key):
+        return self.__contains__(key)
+
+    def __iter__(self):
+        self._read_all()
+        return dict.__iter__(self)
+
+    def copy(self):
+        self._read_all()
+        return dict(dict.items(self))
+
+    def keys(self):
+        self._read_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._read_all()
+        return dict.values(self)
+
+    def items(self):
+        self._read_all()
+        return dict.items(self)
+
+    if six.PY2:
+        def iterkeys(self):
+            self._read_all()
+            return dict.iterkeys(self)  # pylint: disable=no-member
+
+        def itervalues(self):
+            self._read_all()
+            return dict.itervalues(self)  # pylint: disable=no-member
+
+        def iteritems(self):
+            self._read_all()
+            return dict.iteritems(self)  # pylint: disable=no-member
+
+    def digests(self, scope=None):
+        '''
+        Return the digests of the values read, or of all the values if the
+        dictionary was iterated over
+        '''
+        if scope is None:
+            scope = self.accessed
+        data = dict(dict.items(self))
+        if scope['all']:
+            return {'all': _digest(data)}
+        return {'keys': dict(
+            (key, _digest(data[key]) if key in data else None)
+            for key in scope['keys'])}
+
+
 class PillarCache(object):
     '''
     Return a cached pillar if it exists, otherwise cache it.
@@ -309,7 +512,199 @@ class PillarCache(object):
                               pillarenv=self.pillarenv)
         return fresh_pillar.compile_pillar()
 
+    def fetch_tracked_pillar(self):
+        '''
+        Compile a fresh pillar, and return it in a cache entry recording the
+        pillar SLS files, ext_pillar sources and grains it depends on
+        '''
+        grains = TrackedDict(self.grains or {})
+        fresh_pillar = Pillar(self.opts,
+                              grains,
+                              self.minion_id,
+                              self.saltenv,
+                              ext=self.ext,
+                              functions=self.functions,
+                              pillar_override=self.pillar_override,
+                              pillarenv=self.pillarenv)
+        pillar = fresh_pillar.compile_pillar()
+        sls = collections.defaultdict(list)
+        for saltenv, name in fresh_pillar.rendered_sls:
+            sls[saltenv].append(name)
+        now = time.time()
+        return {'pillar': pillar,
+                'time': now,
+                'checked': now,
+                'deps': {'files': _template_digests(
+                             fresh_pillar.client,
+                             six.iteritems(fresh_pillar.rendered_files)),
+                         'sls': dict(sls),
+                         'sls_globs': [
+                             [saltenv, pattern, matched]
+                             for (saltenv, pattern), matched
+                             in six.iteritems(fresh_pillar.sls_globs)],
+                         'ext_pillar': self._ext_pillar_digests(
+                             fresh_pillar.ext_pillar_sources),
+                         'grains': grains.digests()}}
+
+    def _ext_pillar_digests(self, sources):
+        '''
+        Return the digests of the ext_pillar sources a pillar was compiled
+        from. A source is fingerprinted by the ``fingerprint`` function of its
+        ext_pillar module, sources without one are only expired by
+        ``pillar_cache_ttl``.
+        '''
+        if not sources:
+            return []
+        opts = copy.copy(self.opts)
+        opts['pillarenv'] = self.pillarenv or opts.get('pillarenv')
+        opts['saltenv'] = self.saltenv
+        loader = salt.loader.pillars(opts, self.functions or {})._dict
+        ret = []
+        for key, val in sources:
+            fun = '{0}.fingerprint'.format(key)
+            digest = None
+            if fun in loader:
+                try:
+                    if isinstance(val, dict):
+                        fingerprint = loader[fun](self.minion_id, {}, **val)
+                    elif isinstance(val, list):
+                        fingerprint = loader[fun](self.minion_id, {}, *val)
+                    else:
+                        fingerprint = loader[fun](self.minion_id, {}, val)
+                    digest = _digest(fingerprint)
+                except Exception as exc:
+                    log.error('Failed to fingerprint ext_pillar %s: %s', key, exc)
+            ret.append([key, val, digest])
+        return ret
+
+    def _avail_sls(self, saltenvs):
+        '''
+        Return the SLS files available in the pillar_roots of saltenvs
+        '''
+        opts = copy.copy(self.opts)
+        opts['file_roots'] = dict(opts['pillar_roots'])
+        opts['file_client'] = 'local'
+        if '__env__' in opts['file_roots']:
+            env_roots = opts['file_roots'].pop('__env__')
+            for saltenv in saltenvs:
+                opts['file_roots'].setdefault(saltenv, env_roots)
+        client = salt.fileclient.get_file_client(opts, True)
+        return dict((saltenv, client.list_states(saltenv))
+                    for saltenv in saltenvs)
+
+    def check_entry(self, entry):
+        '''
+        Return why a tracked cache entry is stale, or None if it can be served.
+        The files and ext_pillar sources are only checked every
+        ``pillar_cache_check_interval`` seconds, the time of the last check is
+        recorded in the entry.
+        '''
+        if not isinstance(entry, dict) or \
+                not isinstance(entry.get('deps'), dict) or 'pillar' not in entry:
+            return 'not cached'
+        if time.time() - entry.get('time', 0) > self.opts['pillar_cache_ttl']:
+            return 'expired'
+        deps = entry['deps']
+        grains = self.grains or {}
+        tracked = deps.get('grains', {})
+        if 'all' in tracked:
+            if tracked['all'] != _digest(grains):
+                return 'grains changed'
+        else:
+            for key, digest in six.iteritems(tracked.get('keys', {})):
+                current = _digest(grains[key]) if key in grains else None
+                if current != digest:
+                    return 'grain {0} changed'.format(key)
+        now = time.time()
+        if now - entry.get('checked', entry.get('time', 0)) < \
+                self.opts.get('pillar_cache_check_interval', 10):
+            return None
+        for path, digest in six.iteritems(deps.get('files', {})):
+            try:
+                with salt.utils.files.fopen(path, 'rb') as fp_:
+                    current = salt.utils.hashutils.sha256_digest(fp_.read())
+            except (IOError, OSError):
+                current = None
+            if current != digest:
+                return 'file {0} changed'.format(path)
+        fingerprinted = [source for source in deps.get('ext_pillar', [])
+                         if source[2] is not None]
+        current = self._ext_pillar_digests(
+            [(key, val) for key, val, _ in fingerprinted])
+        for (key, _, cached), (_, _, digest) in zip(fingerprinted, current):
+            if digest != cached:
+                return 'ext_pillar {0} changed'.format(key)
+        globs = deps.get('sls_globs', [])
+        if globs:
+            avail = self._avail_sls(set(saltenv for saltenv, _, _ in globs))
+            for saltenv, pattern, matched in globs:
+                if sorted(fnmatch.filter(avail.get(saltenv) or [], pattern)) != matched:
+                    return 'SLS files matching {0} changed'.format(pattern)
+        entry['checked'] = now
+        return None
+
+    @staticmethod
+    def depends_on(entry, sls=None, ext_pillar=None, grain=None):
+        '''
+        Return whether a tracked cache entry was compiled from a pillar SLS
+        file, ext_pillar source or grain. ``sls`` is a glob.
+        '''
+        if not isinstance(entry, dict) or not isinstance(entry.get('deps'), dict):
+            return True
+        deps = entry['deps']
+        if sls is not None:
+            for names in six.itervalues(deps.get('sls', {})):
+                if fnmatch.filter(names, sls):
+                    return True
+        if ext_pillar is not None:
+            if ext_pillar in [source[0] for source in deps.get('ext_pillar', [])]:
+                return True
+        if grain is not None:
+            tracked = deps.get('grains', {})
+            if 'all' in tracked or grain in tracked.get('keys', {}):
+                return True
+        return False
+
+    def compile_tracked_pillar(self):
+        '''
+        Return the cached pillar of the minion if none of the pillar SLS files,
+        ext_pillar sources and grains it was compiled from changed, otherwise
+        compile and cache it again
+        '''
+        if self.pillar_override or self.ext:
+            # The pillar of this request is not the cached one
+            return self.fetch_pillar()
+        if self.minion_id in self.cache:
+            minion_cache = dict(self.cache[self.minion_id])
+        else:
+            minion_cache = {}
+        stats = dict(minion_cache.get('__stats__') or
+                     {'hits': 0, 'misses': 0, 'invalidations': 0})
+        entry = minion_cache.get(self.pillarenv)
+        reason = self.check_entry(entry)
+        if reason is None:
+            stats['hits'] += 1
+        else:
+            if reason != 'not cached':
+                stats['invalidations'] += 1
+            stats['misses'] += 1
+            entry = self.fetch_tracked_pillar()
+            minion_cache[self.pillarenv] = entry
+        minion_cache['__stats__'] = stats
+        self.cache[self.minion_id] = minion_cache
+        log.debug(
+            'Pillar cache %s for minion %s and pillarenv %s%s, hit rate %d%%',
+            'hit' if reason is None else 'miss',
+            self.minion_id,
+            self.pillarenv,
+            '' if reason is None else ' ({0})'.format(reason),
+            100 * stats['hits'] // (stats['hits'] + stats['misses'])
+        )
+        return entry['pillar']
+
     def compile_pillar(self, *args, **kwargs):  # Will likely just be pillar_dirs
+        if self.opts.get('pillar_cache_track_deps', False):
+            return self.compile_tracked_pillar()
         log.debug('Scanning pillar cache for information about minion %s and pillarenv %s', self.minion_id, self.pillarenv)
         log.debug('Scanning cache: %s', self.cache._dict)
         # Check the cache!
@@ -349,6 +744,14 @@ class Pillar(object):
         self.actual_file_roots = opts['file_roots']
         # use the local file client
         self.opts = self.__gen_opts(opts, grains, saltenv=saltenv, pillarenv=pillarenv)
+        self.sls_memo_stats = {'hits': 0, 'misses': 0}
+        if self.opts.get('pillar_sls_memo'):
+            # Record the grains and pillar values the SLS files read
+            if not isinstance(self.opts['grains'], TrackedDict):
+                self.opts['grains'] = TrackedDict(self.opts['grains'])
+            if isinstance(self.opts.get('pillar'), dict) and \
+                    not isinstance(self.opts['pillar'], TrackedDict):
+                self.opts['pillar'] = TrackedDict(self.opts['pillar'])
         self.saltenv = saltenv
         self.client = salt.fileclient.get_file_client(self.opts, True)
         self.avail = self.__gather_avail()
@@ -381,6 +784,13 @@ class Pillar(object):
 
         self.ext_pillars = salt.loader.pillars(ext_pillar_opts, self.functions)
         self.ignored_pillars = {}
+        # The inputs of the pillar, tracked by the pillar cache
+        self.rendered_files = {}
+        self.rendered_sls = set()
+        self.sls_globs = {}
+        self.ext_pillar_sources = []
+        # How long each ext_pillar source took, in configured order
+        self.ext_pillar_times = []
         self.pillar_override = pillar_override or {}
         if not isinstance(self.pillar_override, dict):
             self.pillar_override = {}
@@ -433,6 +843,15 @@ class Pillar(object):
             avail[saltenv] = self.client.list_states(saltenv)
         return avail
 
+    def _match_sls(self, saltenv, pattern):
+        '''
+        Return the available SLS files of a saltenv matching a glob, and
+        record them for the pillar cache
+        '''
+        matched = fnmatch.filter(self.avail[saltenv], pattern)
+        self.sls_globs[(saltenv, pattern)] = sorted(matched)
+        return matched
+
     def __gen_opts(self, opts_in, grains, saltenv=None, ext=None, pillarenv=None):
         '''
         The options need to be altered to conform to the file client
@@ -510,6 +929,7 @@ class Pillar(object):
             for saltenv in saltenvs:
                 top = self.client.cache_file(self.opts['state_top'], saltenv)
                 if top:
+                    self.rendered_files[top] = saltenv
                     tops[saltenv].append(compile_template(
                         top,
                         self.rend,
@@ -544,12 +964,12 @@ class Pillar(object):
                     if sls in done[saltenv]:
                         continue
                     try:
+                        top = self.client.get_state(sls, saltenv).get('dest', False)
+                        if top:
+                            self.rendered_files[top] = saltenv
                         tops[saltenv].append(
                                 compile_template(
-                                    self.client.get_state(
-                                        sls,
-                                        saltenv
-                                        ).get('dest', False),
+                                    top,
                                     self.rend,
                                     self.opts['renderer'],
                                     self.opts['renderer_blacklist'],
@@ -703,17 +1123,11 @@ class Pillar(object):
                 log.debug(msg)
                 # return state, mods, errors
                 return None, mods, errors
+        self.rendered_files[fn_] = saltenv
+        self.rendered_sls.add((saltenv, sls))
         state = None
         try:
-            state = compile_template(fn_,
-                                     self.rend,
-                                     self.opts['renderer'],
-                                     self.opts['renderer_blacklist'],
-                                     self.opts['renderer_whitelist'],
-                                     saltenv,
-                                     sls,
-                                     _pillar_rend=True,
-                                     **defaults)
+            state = self._compile_pstate(fn_, saltenv, sls, defaults)
         except Exception as exc:
             msg = 'Rendering SLS \'{0}\' failed, render error:\n{1}'.format(
                 sls, exc
@@ -754,7 +1168,7 @@ class Pillar(object):
                                 key = None
 
                             try:
-                                matched_pstates += fnmatch.filter(self.avail[saltenv], sub_sls)
+                                matched_pstates += self._match_sls(saltenv, sub_sls)
                             except KeyError:
                                 errors.extend(
                                     ['No matching pillar environment for environment '
@@ -806,6 +1220,101 @@ class Pillar(object):
                                         self.opts.get('pillar_merge_lists', False))
         return state, mods, errors
 
+    def _compile_pstate(self, fn_, saltenv, sls, defaults):
+        '''
+        Render a pillar SLS file. The SLS files matching
+        ``pillar_sls_memo`` are rendered once for every combination of their
+        files and of the grains and pillar values they read, and the data is
+        shared between the minions.
+        '''
+        grains = self.opts['grains']
+        pillar = self.opts.get('pillar')
+        if not isinstance(pillar, TrackedDict):
+            pillar = None
+        if not isinstance(grains, TrackedDict) or not any(
+                fnmatch.fnmatch(sls, pattern)
+                for pattern in self.opts.get('pillar_sls_memo') or []):
+            return compile_template(fn_,
+                                    self.rend,
+                                    self.opts['renderer'],
+                                    self.opts['renderer_blacklist'],
+                                    self.opts['renderer_whitelist'],
+                                    saltenv,
+                                    sls,
+                                    _pillar_rend=True,
+                                    **defaults)
+
+        digests = _template_digests(self.client, [(fn_, saltenv)], strict=True)
+        if digests is None:
+            log.debug('Pillar SLS \'%s\' in environment \'%s\' pulls in a '
+                      'template which can not be tracked, not using the SLS '
+                      'memo', sls, saltenv)
+            return compile_template(fn_,
+                                    self.rend,
+                                    self.opts['renderer'],
+                                    self.opts['renderer_blacklist'],
+                                    self.opts['renderer_whitelist'],
+                                    saltenv,
+                                    sls,
+                                    _pillar_rend=True,
+                                    **defaults)
+        key = _digest([saltenv,
+                       sls,
+                       digests,
+                       defaults,
+                       self.opts['renderer'],
+                       self.opts['renderer_blacklist'],
+                       self.opts['renderer_whitelist']])
+        # The rendered data is kept as long as the pillar cache
+        expires = time.time() - self.opts.get('pillar_cache_ttl', 3600)
+        with _PSTATE_MEMO_LOCK:
+            variants = list(_PSTATE_MEMO.get(key, []))
+        for grains_reads, pillar_reads, state, rendered in variants:
+            if rendered > expires and \
+                    _reads_match(grains, grains_reads) and \
+                    _reads_match(pillar, pillar_reads):
+                # The values read count for the pillar cache as well
+                grains.replay(grains_reads)
+                if pillar is not None:
+                    pillar.replay(pillar_reads)
+                self.sls_memo_stats['hits'] += 1
+                with _PSTATE_MEMO_LOCK:
+                    if key in _PSTATE_MEMO:
+                        _PSTATE_MEMO[key] = _PSTATE_MEMO.pop(key)
+                log.debug('Pillar SLS \'%s\' in environment \'%s\' served '
+                          'from the SLS memo', sls, saltenv)
+                return copy.deepcopy(state)
+
+        self.sls_memo_stats['misses'] += 1
+        grains_scope = grains.push_scope()
+        pillar_scope = pillar.push_scope() if pillar is not None else None
+        try:
+            state = compile_template(fn_,
+                                     self.rend,
+                                     self.opts['renderer'],
+                                     self.opts['renderer_blacklist'],
+                                     self.opts['renderer_whitelist'],
+                                     saltenv,
+                                     sls,
+                                     _pillar_rend=True,
+                                     **defaults)
+        finally:
+            grains.pop_scope(grains_scope)
+            if pillar is not None:
+                pillar.pop_scope(pillar_scope)
+        variant = (grains.digests(grains_scope),
+                   pillar.digests(pillar_scope) if pillar is not None else {},
+                   copy.deepcopy(state),
+                   time.time())
+        with _PSTATE_MEMO_LOCK:
+            variants = [old for old in _PSTATE_MEMO.pop(key, [])
+                        if old[3] > expires]
+            variants.append(variant)
+            _PSTATE_MEMO[key] = variants[-PSTATE_MEMO_VARIANTS:]
+            while len(_PSTATE_MEMO) > self.opts.get('pillar_sls_memo_size', 1000):
+                _PSTATE_MEMO.popitem(last=False)
+        return state
+
     def render_pillar(self, matches, errors=None):
         '''
         Extract the sls pillar files from the matches and render them into the
@@ -820,7 +1329,7 @@ class Pillar(object):
             for sls_match in pstates:
                 matched_pstates = []
                 try:
-                    matched_pstates = fnmatch.filter(self.avail[saltenv], sls_match)
+                    matched_pstates = self._match_sls(saltenv, sls_match)
                 except KeyError:
                     errors.extend(
                         ['No matching pillar environment for environment '
@@ -934,6 +1443,9 @@ class Pillar(object):
                 self.opts.get('renderer', 'yaml'),
                 self.opts.get('pillar_merge_lists', False))
 
+        if self.opts.get('ext_pillar_workers', 1) > 1:
+            return self._ext_pillar_concurrent(pillar, errors)
+
         for run in self.opts['ext_pillar']:
             if not isinstance(run, dict):
                 errors.append('The "ext_pillar" option is malformed')
@@ -948,21 +1460,13 @@ class Pillar(object):
                         key
                     )
                     continue
-                try:
-                    ext = self._external_pillar_data(pillar,
-                                                     val,
-                                                     key)
-                except Exception as exc:
-                    errors.append(
-                        'Failed to load ext_pillar {0}: {1}'.format(
-                            key,
-                            exc.__str__(),
-                        )
-                    )
-                    log.error(
-                        'Exception caught loading ext_pillar \'%s\':\n%s',
-                        key, ''.join(traceback.format_tb(sys.exc_info()[2]))
-                    )
+                self.ext_pillar_sources.append((key, val))
+                data, error, elapsed = self._run_ext_pillar(pillar, key, val)
+                self.ext_pillar_times.append((key, elapsed))
+                if error is None:
+                    ext = data
+                else:
+                    errors.append(error)
             if ext:
                 pillar = merge(
                     pillar,
@@ -973,6 +1477,82 @@ class Pillar(object):
                 ext = None
         return pillar, errors
 
+    def _run_ext_pillar(self, pillar, key, val):
+        '''
+        Run a single ext_pillar source
+
+        Returns the data of the source, the error message if it failed and
+        how long it took
+        '''
+        start = time.time()
+        data = error = None
+        try:
+            data = self._external_pillar_data(pillar, val, key)
+        except Exception as exc:
+            error = 'Failed to load ext_pillar {0}: {1}'.format(
+                key,
+                exc.__str__(),
+            )
+            log.error(
+                'Exception caught loading ext_pillar \'%s\':\n%s',
+                key, ''.join(traceback.format_tb(sys.exc_info()[2]))
+            )
+        elapsed = time.time() - start
+        log.debug('ext_pillar %s for minion %s took %.3f seconds',
+                  key, self.minion_id, elapsed)
+        return data, error, elapsed
+
+    def _ext_pillar_concurrent(self, pillar, errors):
+        '''
+        Run the ext_pillar sources in a pool of ``ext_pillar_workers`` threads,
+        and merge their data in the configured order. Each source gets the
+        pillar data compiled before the ext_pillar sources, not the data of
+        the sources configured before it.
+        '''
+        sources = []
+        for run in self.opts['ext_pillar']:
+            if not isinstance(run, dict):
+                errors.append('The "ext_pillar" option is malformed')
+                log.critical(errors[-1])
+                return {}, errors
+            if next(six.iterkeys(run)) in self.opts.get('exclude_ext_pillar', []):
+                continue
+            for key, val in six.iteritems(run):
+                if key not in self.ext_pillars:
+                    log.critical(
+                        'Specified ext_pillar interface %s is unavailable',
+                        key
+                    )
+                    continue
+                self.ext_pillar_sources.append((key, val))
+                sources.append((key, val))
+        if not sources:
+            return pillar, errors
+
+        def _run(source):
+            # Sources may modify the pillar data they are given
+            return self._run_ext_pillar(copy.deepcopy(pillar), *source)
+
+        pool = multiprocessing.pool.ThreadPool(
+            min(self.opts['ext_pillar_workers'], len(sources)))
+        try:
+            results = pool.map(_run, sources)
+        finally:
+            pool.close()
+            pool.join()
+        for (key, _), (ext, error, elapsed) in zip(sources, results):
+            self.ext_pillar_times.append((key, elapsed))
+            if error is not None:
+                errors.append(error)
+            elif ext:
+                pillar = merge(
+                    pillar,
+                    ext,
+                    self.merge_strategy,
+                    self.opts.get('renderer', 'yaml'),
+                    self.opts.get('pillar_merge_lists', False))
+        return pillar, errors
+
     def compile_pillar(self, ext=True):
         '''
         Render the pillar data and return
@@ -981,6 +1561,8 @@ class Pillar(object):
         if ext:
             if self.opts.get('ext_pillar_first', False):
                 self.opts['pillar'], errors = self.ext_pillar(self.pillar_override)
+                if self.opts.get('pillar_sls_memo'):
+                    self.opts['pillar'] = TrackedDict(self.opts['pillar'])
                 self.rend = salt.loader.render(self.opts, self.functions)
                 matches = self.top_matches(top)
                 pillar, errors = self.render_pillar(matches, errors=errors)
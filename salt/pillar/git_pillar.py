@@ -455,6 +455,23 @@ def ext_pillar(minion_id, pillar, *repos):  # pylint: disable=unused-argument
     return ret
 
 
+def fingerprint(minion_id, pillar, *repos):  # pylint: disable=unused-argument
+    '''
+    Return the revisions of the git_pillar remotes, used by the pillar cache
+    to find out if the pillar data compiled from them is stale
+    '''
+    opts = copy.deepcopy(__opts__)
+    opts['pillar_roots'] = {}
+    opts['__git_pillar'] = True
+    git_pillar = salt.utils.gitfs.GitPillar(
+        opts,
+        repos,
+        per_remote_overrides=PER_REMOTE_OVERRIDES,
+        per_remote_only=PER_REMOTE_ONLY,
+        global_only=GLOBAL_ONLY)
+    return git_pillar.revisions()
+
+
 def _extract_key_val(kv, delimiter='='):
     '''Extract key and value from key=val string.
 
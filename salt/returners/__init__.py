@@ -4,14 +4,29 @@ Returners Directory
 
 :func:`get_returner_options` is a general purpose function that returners may
 use to fetch their configuration options.
+
+:func:`get_return_buffer` gives the returners writing to a database a
+:class:`ReturnBuffer` that writes the rows in batches, the stats of these
+buffers are returned by :func:`get_return_buffer_stats`.
 '''
 from __future__ import absolute_import, print_function, unicode_literals
 
+import atexit
+import collections
+import io
 import logging
+import multiprocessing.util
+import os
+import threading
+import time
 from salt.ext import six
 
 log = logging.getLogger(__name__)
 
+# {<buffer id>: ReturnBuffer, ...}
+_RETURN_BUFFERS = {}
+_RETURN_BUFFERS_LOCK = threading.Lock()
+
 
 def get_returner_options(virtualname=None,
                          ret=None,
@@ -230,3 +245,209 @@ def _fetch_profile_opts(
         )
         for pattr in profile_attrs
         )
+
+
+class ReturnBuffer(object):
+    '''
+    Gather the rows written by a returner and write them in batches over a
+    connection kept open between the batches.
+
+    A batch is written when ``batch_size`` rows are buffered, by the thread
+    adding the last row, or when the oldest row has been buffered for
+    ``interval`` seconds, by a background thread. The rows are also written
+    when the process exits.
+
+    When the rows can't be written, they are kept to be written with the
+    next batch, and the batches are retried at most every ``interval``
+    seconds. At most ``max_rows`` rows are kept, the oldest ones are dropped
+    once this limit is reached.
+
+    The number of batches and rows written, of batches retried and of rows
+    dropped or rejected by the server are counted in ``stats``.
+
+    :param connect: function returning a new connection to the database, or
+        None if ``write`` doesn't need one
+    :param write: function writing a list of rows with a connection, and
+        committing them. It may return the number of rows rejected by the
+        server, which are not retried.
+    '''
+    def __init__(self, connect, write, batch_size=100, interval=1.0, max_rows=10000):
+        self.connect = connect
+        self.write = write
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_rows = max(max_rows, batch_size)
+        self.dropped = 0
+        self.stats = {'batches': 0, 'rows': 0, 'retried': 0, 'dropped': 0,
+                      'rejected': 0}
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.rows = collections.deque()
+        self.first_time = None
+        self.retry_time = 0
+        self.conn = None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.thread = None
+        # The atexit handlers are not run by the processes started by
+        # multiprocessing, their finalizers are
+        multiprocessing.util.Finalize(self, self.flush, exitpriority=10)
+
+    def add(self, row):
+        '''
+        Buffer a row, and write the buffered rows if a batch is complete
+        '''
+        if self.pid != os.getpid():
+            # The buffer was inherited from the parent process, which is
+            # responsible for the rows it buffered
+            self._reset()
+        with self.lock:
+            if len(self.rows) >= self.max_rows:
+                self.rows.popleft()
+                self._dropped(1)
+            self.rows.append(row)
+            if self.first_time is None:
+                self.first_time = time.time()
+            full = len(self.rows) >= self.batch_size
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._flush_loop)
+                self.thread.daemon = True
+                self.thread.start()
+        if full and time.time() >= self.retry_time:
+            self.flush()
+
+    def _dropped(self, count):
+        if not self.dropped:
+            log.error(
+                'The return buffer is full, dropping the oldest rows until '
+                'they can be written'
+            )
+        self.dropped += count
+        self.stats['dropped'] += count
+
+    def _flush_loop(self):
+        while True:
+            with self.lock:
+                first_time = self.first_time
+            now = time.time()
+            if first_time is not None and now - first_time >= self.interval \
+                    and now >= self.retry_time:
+                self.flush()
+            time.sleep(self.interval / 4.0)
+
+    def flush(self):
+        '''
+        Write all the buffered rows
+        '''
+        if self.pid != os.getpid():
+            return
+        with self.flush_lock:
+            with self.lock:
+                rows = list(self.rows)
+                self.rows.clear()
+                self.first_time = None
+            if not rows:
+                return
+            try:
+                if self.conn is None and self.connect is not None:
+                    self.conn = self.connect()
+                rejected = self.write(self.conn, rows)
+            except Exception as exc:  # pylint: disable=broad-except
+                log.error(
+                    'Could not write %s returner rows, retrying in %s seconds: %s',
+                    len(rows), self.interval, exc
+                )
+                self.stats['retried'] += 1
+                self.close()
+                with self.lock:
+                    # Keep the rows to write them with the next batch
+                    self.rows.extendleft(reversed(rows))
+                    overflow = len(self.rows) - self.max_rows
+                    for _ in range(overflow):
+                        self.rows.popleft()
+                    if overflow > 0:
+                        self._dropped(overflow)
+                    self.first_time = time.time()
+                    self.retry_time = self.first_time + self.interval
+            else:
+                self.stats['batches'] += 1
+                self.stats['rows'] += len(rows)
+                if rejected:
+                    log.error('%s returner rows were rejected', rejected)
+                    self.stats['rejected'] += rejected
+                if self.dropped:
+                    log.warning('%s returner rows were dropped', self.dropped)
+                    self.dropped = 0
+
+    def close(self):
+        '''
+        Close the connection to the database, a new one is opened for the next
+        batch
+        '''
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:  # pylint: disable=broad-except
+                pass
+            self.conn = None
+
+
+def get_return_buffer(buffer_id, connect, write, batch_size=100, interval=1.0, max_rows=10000):
+    '''
+    Return the :class:`ReturnBuffer` of a returner and database, creating it
+    on the first call.
+
+    :param buffer_id: string identifying the returner and the database, e.g.
+        the returner name and its connection options
+    '''
+    with _RETURN_BUFFERS_LOCK:
+        if buffer_id not in _RETURN_BUFFERS:
+            _RETURN_BUFFERS[buffer_id] = ReturnBuffer(
+                connect, write,
+                batch_size=int(batch_size),
+                interval=float(interval),
+                max_rows=int(max_rows))
+        return _RETURN_BUFFERS[buffer_id]
+
+
+def get_return_buffer_stats():
+    '''
+    Return the stats of the :class:`ReturnBuffer` objects of this process,
+    added up for each returner. The buffer ids are left out since they may
+    contain the connection options of the returners, e.g. their passwords.
+    '''
+    ret = {}
+    with _RETURN_BUFFERS_LOCK:
+        for buffer_id, buf in six.iteritems(_RETURN_BUFFERS):
+            stats = ret.setdefault(buffer_id.split(':', 1)[0], {})
+            for key, value in six.iteritems(buf.stats):
+                stats[key] = stats.get(key, 0) + value
+    return ret
+
+
+def copy_rows(cursor, table, columns, rows):
+    '''
+    Write rows to a PostgreSQL table in a single ``COPY`` command.
+
+    The values of the rows are written as text, ``None`` is written as
+    ``NULL`` and booleans are written as ``true`` or ``false``.
+    '''
+    def _field(value):
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        return '"{0}"'.format(six.text_type(value).replace('"', '""'))
+
+    data = io.StringIO()
+    for row in rows:
+        data.write(','.join([_field(value) for value in row]))
+        data.write('\n')
+    data.seek(0)
+    cursor.copy_expert(
+        'COPY {0} ({1}) FROM STDIN WITH CSV'.format(table, ', '.join(columns)),
+        data
+    )
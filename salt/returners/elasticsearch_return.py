@@ -32,6 +32,26 @@ In order to have the returner apply to all minions:
     ext_job_cache: elasticsearch
 
 Minion configuration:
+    batch_size: 1
+        Number of returns indexed together with the bulk API. The returns are
+        buffered until the batch is complete or until the oldest one has been
+        buffered for ``batch_interval`` seconds. The returns are indexed one by
+        one when ``batch_size`` is 1, the default.
+
+        .. versionadded:: Fluorine
+
+    batch_interval: 1
+        Maximum number of seconds a return is buffered, and minimum number of
+        seconds between the retries of a batch that failed.
+
+        .. versionadded:: Fluorine
+
+    batch_max_rows: 10000
+        Maximum number of returns kept while Elasticsearch is unavailable, the
+        oldest ones are dropped beyond this limit.
+
+        .. versionadded:: Fluorine
+
     debug_returner_payload': False
         Output the payload being posted to the log file in debug mode
 
@@ -92,6 +112,25 @@ Minion configuration:
         functions_blacklist:
           - test.ping
           - saltutil.find_job
+
+The returns are only indexed in batches by long running processes, i.e. on the
+master when this returner is the :conf_master:`master_job_cache`, or on the
+minions running their jobs in threads (``multiprocessing: False``). Otherwise
+each job runs in its own process, which indexes its return when it exits. In
+the master config:
+
+.. code-block:: yaml
+
+    master_job_cache: elasticsearch
+    elasticsearch:
+        hosts:
+          - "10.10.10.10:9200"
+        batch_size: 500
+        batch_interval: 1
+
+The number of batches indexed, of batches retried, and of returns dropped or
+rejected by Elasticsearch are reported in the master stats events, see
+:conf_master:`master_stats`.
 '''
 
 # Import Python libs
@@ -113,6 +152,9 @@ __virtualname__ = 'elasticsearch'
 
 log = logging.getLogger(__name__)
 
+# The indexes which are known to exist
+_INDEXES = set()
+
 STATE_FUNCTIONS = {
     'state.apply':     'state_apply',
     'state.highstate': 'state_apply',
@@ -130,6 +172,9 @@ def _get_options(ret=None):
     '''
 
     defaults = {
+        'batch_size': 1,
+        'batch_interval': 1,
+        'batch_max_rows': 10000,
         'debug_returner_payload': False,
         'doc_type': 'default',
         'functions_blacklist': [],
@@ -146,6 +191,9 @@ def _get_options(ret=None):
     }
 
     attrs = {
+        'batch_size': 'batch_size',
+        'batch_interval': 'batch_interval',
+        'batch_max_rows': 'batch_max_rows',
         'debug_returner_payload': 'debug_returner_payload',
         'doc_type': 'doc_type',
         'functions_blacklist': 'functions_blacklist',
@@ -172,6 +220,8 @@ def _get_options(ret=None):
 
 
 def _ensure_index(index):
+    if index in _INDEXES:
+        return
     index_exists = __salt__['elasticsearch.index_exists'](index)
     if not index_exists:
         options = _get_options()
@@ -185,6 +235,7 @@ def _ensure_index(index):
         __salt__['elasticsearch.index_create']('{0}-v1'.format(index),
                                                index_definition)
         __salt__['elasticsearch.alias_create']('{0}-v1'.format(index), index)
+    _INDEXES.add(index)
 
 
 def _convert_keys(data):
@@ -205,6 +256,50 @@ def _convert_keys(data):
     return new_data
 
 
+def _bulk(rows):
+    '''
+    Send pairs of actions and documents to the bulk API and return the number
+    of actions which failed
+    '''
+    body = []
+    for action, document in rows:
+        body.append(action)
+        body.append(document)
+    ret = __salt__['elasticsearch.document_bulk'](body)
+    if not ret or not ret.get('errors'):
+        return 0
+    errors = [result['error']
+              for item in ret.get('items', [])
+              for result in item.values()
+              if result.get('error')]
+    if errors:
+        log.error(
+            'Elasticsearch rejected %s documents, the first error is: %s',
+            len(errors), errors[0]
+        )
+    return len(errors)
+
+
+def _write_documents(conn, rows):  # pylint: disable=unused-argument
+    '''
+    Index a batch of returns
+    '''
+    return _bulk(rows)
+
+
+def _get_buffer(options):
+    '''
+    Return the buffer of the returns indexed in batches
+    '''
+    return salt.returners.get_return_buffer(
+        '{0}:{1}'.format(__virtualname__, salt.utils.json.dumps(options, sort_keys=True)),
+        None,
+        _write_documents,
+        batch_size=options['batch_size'],
+        interval=options['batch_interval'],
+        max_rows=options['batch_max_rows'])
+
+
 def returner(ret):
     '''
     Process the return from Salt
@@ -326,6 +421,12 @@ def returner(ret):
     if options['debug_returner_payload']:
         log.debug('elasicsearch payload: %s', data)
 
+    if int(options['batch_size']) > 1:
+        _get_buffer(options).add(
+            ({'index': {'_index': index, '_type': options['doc_type']}},
+             salt.utils.json.dumps(data)))
+        return
+
     # Post the payload
     ret = __salt__['elasticsearch.document_create'](index=index,
                                                     doc_type=options['doc_type'],
@@ -349,16 +450,19 @@ def event_return(events):
 
     _ensure_index(index)
 
+    # Index all the events with a single bulk request
+    rows = []
     for event in events:
         data = {
             'tag': event.get('tag', ''),
             'data': event.get('data', '')
         }
-
-    ret = __salt__['elasticsearch.document_create'](index=index,
-                                                    doc_type=doc_type,
-                                                    id=uuid.uuid4(),
-                                                    body=salt.utils.json.dumps(data))
+        rows.append(({'index': {'_index': index,
+                                '_type': doc_type,
+                                '_id': six.text_type(uuid.uuid4())}},
+                     salt.utils.json.dumps(data)))
+    if rows:
+        _bulk(rows)
 
 
 def prep_jid(nocache=False, passed_jid=None):  # pylint: disable=unused-argument
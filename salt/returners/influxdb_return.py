@@ -49,15 +49,39 @@ To override individual configuration items, append --return_kwargs '{"key:": "va
 
     salt '*' test.ping --return influxdb --return_kwargs '{"db": "another-salt"}'
 
+The returns can be written in batches, with a single request per batch:
+
+.. versionadded:: Fluorine
+
+.. code-block:: yaml
+
+    influxdb.batch_size: 100
+    influxdb.batch_interval: 1
+    influxdb.batch_max_rows: 10000
+
+The returns are buffered until ``batch_size`` returns are available or until
+the oldest one has been buffered for ``batch_interval`` seconds. At most
+``batch_max_rows`` returns are kept while InfluxDB is unavailable. The returns
+are written one by one when ``batch_size`` is 1, the default.
+
+The returns are only written in batches by long running processes, i.e. on the
+master when this returner is the :conf_master:`master_job_cache`, or on the
+minions running their jobs in threads (``multiprocessing: False``). Otherwise
+each job runs in its own process, which writes its return when it exits. The
+number of batches written, of batches retried, and of returns dropped are
+reported in the master stats events, see :conf_master:`master_stats`.
+
 '''
 from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
+import functools
 import logging
 import requests
 
 # Import Salt libs
 import salt.utils.jid
+import salt.utils.json
 import salt.returners
 from salt.utils.decorators import memoize
 
@@ -93,13 +117,21 @@ def _get_options(ret=None):
              'port': 'port',
              'db': 'db',
              'user': 'user',
-             'password': 'password'}
+             'password': 'password',
+             'batch_size': 'batch_size',
+             'batch_interval': 'batch_interval',
+             'batch_max_rows': 'batch_max_rows'}
+
+    defaults = {'batch_size': 1,
+                'batch_interval': 1,
+                'batch_max_rows': 10000}
 
     _options = salt.returners.get_returner_options(__virtualname__,
                                                    ret,
                                                    attrs,
                                                    __salt__=__salt__,
-                                                   __opts__=__opts__)
+                                                   __opts__=__opts__,
+                                                   defaults=defaults)
     return _options
 
 
@@ -119,11 +151,12 @@ def _get_version(host, port, user, password):
     return version
 
 
-def _get_serv(ret=None):
+def _get_serv(ret=None, _options=None):
     '''
     Return an influxdb client object
     '''
-    _options = _get_options(ret)
+    if _options is None:
+        _options = _get_options(ret)
     host = _options.get('host')
     port = _options.get('port')
     database = _options.get('db')
@@ -147,47 +180,77 @@ def _get_serv(ret=None):
         )
 
 
-def returner(ret):
+def _returns_request(serv, rows):
     '''
-    Return data to a influxdb data store
+    Return the request writing rows of fun, id, jid, return and full_ret
     '''
-    serv = _get_serv(ret)
-
-    # strip the 'return' key to avoid data duplication in the database
-    json_return = salt.utils.json.dumps(ret['return'])
-    del ret['return']
-    json_full_ret = salt.utils.json.dumps(ret)
-
-    # create legacy request in case an InfluxDB 0.8.x version is used
+    # create legacy request in case an InfluxDB 0.8.x version is used, all the
+    # returns are points of the same series
     if "influxdb08" in serv.__module__:
-        req = [
+        return [
             {
                 'name': 'returns',
                 'columns': ['fun', 'id', 'jid', 'return', 'full_ret'],
-                'points': [
-                    [ret['fun'], ret['id'], ret['jid'], json_return, json_full_ret]
-                ],
+                'points': [list(row) for row in rows],
             }
         ]
     # create InfluxDB 0.9+ version request
-    else:
-        req = [
-            {
-                'measurement': 'returns',
-                'tags': {
-                    'fun': ret['fun'],
-                    'id': ret['id'],
-                    'jid': ret['jid']
-                },
-                'fields': {
-                    'return': json_return,
-                    'full_ret': json_full_ret
-                }
+    return [
+        {
+            'measurement': 'returns',
+            'tags': {
+                'fun': fun,
+                'id': minion_id,
+                'jid': jid
+            },
+            'fields': {
+                'return': json_return,
+                'full_ret': json_full_ret
             }
-        ]
+        }
+        for fun, minion_id, jid, json_return, json_full_ret in rows
+    ]
+
+
+def _write_returns(serv, rows):
+    '''
+    Write a batch of returns with a single request
+    '''
+    serv.write_points(_returns_request(serv, rows))
 
+
+def _get_buffer(_options):
+    '''
+    Return the buffer of the returns written in batches
+    '''
+    return salt.returners.get_return_buffer(
+        '{0}:{1}'.format(__virtualname__, salt.utils.json.dumps(_options, sort_keys=True)),
+        functools.partial(_get_serv, _options=_options),
+        _write_returns,
+        batch_size=_options['batch_size'],
+        interval=_options['batch_interval'],
+        max_rows=_options['batch_max_rows'])
+
+
+def returner(ret):
+    '''
+    Return data to a influxdb data store
+    '''
+    _options = _get_options(ret)
+
+    # strip the 'return' key to avoid data duplication in the database
+    json_return = salt.utils.json.dumps(ret['return'])
+    del ret['return']
+    json_full_ret = salt.utils.json.dumps(ret)
+    row = (ret['fun'], ret['id'], ret['jid'], json_return, json_full_ret)
+
+    if int(_options['batch_size']) > 1:
+        _get_buffer(_options).add(row)
+        return
+
+    serv = _get_serv(_options=_options)
     try:
-        serv.write_points(req)
+        _write_returns(serv, [row])
     except Exception as ex:
         log.critical('Failed to store return with InfluxDB returner: %s', ex)
 
@@ -18,6 +18,22 @@ in the minion config:
 
     returner.kafka.topic: 'topic'
 
+The returns can be sent in batches, with a single produce request per batch
+and a connection kept open between the batches:
+
+    returner.kafka.batch_size: 100
+    returner.kafka.batch_interval: 1
+    returner.kafka.batch_max_rows: 10000
+
+The returns are buffered until ``batch_size`` returns are available or until
+the oldest one has been buffered for ``batch_interval`` seconds. At most
+``batch_max_rows`` returns are kept while Kafka is unavailable. The returns are
+sent one by one when ``batch_size`` is 1, the default.
+
+The returns are only sent in batches by the minions running their jobs in
+threads (``multiprocessing: False``), each job otherwise runs in its own
+process, which sends its return when it exits.
+
 To use the kafka returner, append '--return kafka' to the Salt command, eg;
 
     salt '*' test.ping --return kafka
@@ -26,7 +42,11 @@ To use the kafka returner, append '--return kafka' to the Salt command, eg;
 
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import functools
 import logging
+
+# Import Salt libs
+import salt.returners
 import salt.utils.json
 
 # Import third-party libs
@@ -65,6 +85,39 @@ def _close_conn(conn):
     conn.close()
 
 
+def _connect():
+    '''
+    Return a kafka connection, raising an error when it can't be opened
+    '''
+    conn = _get_conn()
+    if conn is None:
+        raise Exception('Unable to find kafka returner config option: hostnames')
+    return conn
+
+
+def _send_messages(topic, conn, rows):
+    '''
+    Send a batch of returns with a single produce request
+    '''
+    producer = SimpleProducer(conn)
+    producer.send_messages(topic, *rows)
+
+
+def _get_buffer(topic, batch_size):
+    '''
+    Return the buffer of the returns sent in batches to a topic
+    '''
+    return salt.returners.get_return_buffer(
+        '{0}:{1}:{2}'.format(__virtualname__,
+                             salt.utils.json.dumps(__salt__['config.option']('returner.kafka.hostnames')),
+                             topic),
+        _connect,
+        functools.partial(_send_messages, topic),
+        batch_size=batch_size,
+        interval=float(__salt__['config.option']('returner.kafka.batch_interval') or 1),
+        max_rows=int(__salt__['config.option']('returner.kafka.batch_max_rows') or 10000))
+
+
 def returner(ret):
     '''
     Return information to a Kafka server
@@ -72,6 +125,11 @@ def returner(ret):
     if __salt__['config.option']('returner.kafka.topic'):
         topic = __salt__['config.option']('returner.kafka.topic')
 
+        batch_size = int(__salt__['config.option']('returner.kafka.batch_size') or 1)
+        if batch_size > 1:
+            _get_buffer(topic, batch_size).add(salt.utils.json.dumps(ret))
+            return
+
         conn = _get_conn(ret)
         producer = SimpleProducer(conn)
         producer.send_messages(topic, salt.utils.json.dumps(ret))
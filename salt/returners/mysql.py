@@ -28,6 +28,21 @@ either exclude these options or set them to None.
     mysql.ssl_cert: None
     mysql.ssl_key: None
 
+.. versionadded:: Fluorine
+
+The returns can be buffered and inserted in batches, which is recommended when
+this returner is used as the master job cache. A batch is inserted when
+``batch_size`` returns are buffered or when the oldest one has been buffered
+for ``batch_interval`` seconds. At most ``batch_max_rows`` returns are kept
+while the server is unavailable. The returns are inserted one by one when
+``batch_size`` is 1, the default.
+
+.. code-block:: yaml
+
+    mysql.batch_size: 500
+    mysql.batch_interval: 1
+    mysql.batch_max_rows: 10000
+
 Alternative configuration values can be used by prefacing the configuration
 with `alternative.`. Any values not found in the alternative configuration will
 be pulled from the default location. As stated above, SSL configuration is
@@ -144,6 +159,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
 from contextlib import contextmanager
+import functools
 import sys
 import logging
 
@@ -198,7 +214,10 @@ def _get_options(ret=None):
                 'port': 3306,
                 'ssl_ca': None,
                 'ssl_cert': None,
-                'ssl_key': None}
+                'ssl_key': None,
+                'batch_size': 1,
+                'batch_interval': 1,
+                'batch_max_rows': 10000}
 
     attrs = {'host': 'host',
              'user': 'user',
@@ -207,7 +226,10 @@ def _get_options(ret=None):
              'port': 'port',
              'ssl_ca': 'ssl_ca',
              'ssl_cert': 'ssl_cert',
-             'ssl_key': 'ssl_key'}
+             'ssl_key': 'ssl_key',
+             'batch_size': 'batch_size',
+             'batch_interval': 'batch_interval',
+             'batch_max_rows': 'batch_max_rows'}
 
     _options = salt.returners.get_returner_options(__virtualname__,
                                                    ret,
@@ -220,13 +242,34 @@ def _get_options(ret=None):
         if isinstance(v, six.string_types) and v.lower() == 'none':
             # Ensure 'None' is rendered as None
             _options[k] = None
-        if k == 'port':
-            # Ensure port is an int
+        if k in ('port', 'batch_size', 'batch_max_rows'):
+            # Ensure port and batch sizes are ints
             _options[k] = int(v)
 
     return _options
 
 
+def _connect(_options):
+    '''
+    Return a new mysql connection
+    '''
+    # An empty ssl_options dictionary passed to MySQLdb.connect will
+    # effectively connect w/o SSL.
+    ssl_options = {}
+    if _options.get('ssl_ca'):
+        ssl_options['ca'] = _options.get('ssl_ca')
+    if _options.get('ssl_cert'):
+        ssl_options['cert'] = _options.get('ssl_cert')
+    if _options.get('ssl_key'):
+        ssl_options['key'] = _options.get('ssl_key')
+    return MySQLdb.connect(host=_options.get('host'),
+                           user=_options.get('user'),
+                           passwd=_options.get('pass'),
+                           db=_options.get('db'),
+                           port=_options.get('port'),
+                           ssl=ssl_options)
+
+
 @contextmanager
 def _get_serv(ret=None, commit=False):
     '''
@@ -247,21 +290,7 @@ def _get_serv(ret=None, commit=False):
     if connect:
         log.debug('Generating new MySQL connection pool')
         try:
-            # An empty ssl_options dictionary passed to MySQLdb.connect will
-            # effectively connect w/o SSL.
-            ssl_options = {}
-            if _options.get('ssl_ca'):
-                ssl_options['ca'] = _options.get('ssl_ca')
-            if _options.get('ssl_cert'):
-                ssl_options['cert'] = _options.get('ssl_cert')
-            if _options.get('ssl_key'):
-                ssl_options['key'] = _options.get('ssl_key')
-            conn = MySQLdb.connect(host=_options.get('host'),
-                                   user=_options.get('user'),
-                                   passwd=_options.get('pass'),
-                                   db=_options.get('db'),
-                                   port=_options.get('port'),
-                                   ssl=ssl_options)
+            conn = _connect(_options)
 
             try:
                 __context__['mysql_returner_conn'] = conn
@@ -286,6 +315,37 @@ def _get_serv(ret=None, commit=False):
             cursor.execute("ROLLBACK")
 
 
+_RETURNS_SQL = '''INSERT INTO `salt_returns`
+                  (`fun`, `jid`, `return`, `id`, `success`, `full_ret`)
+                  VALUES (%s, %s, %s, %s, %s, %s)'''
+
+
+def _write_returns(conn, rows):
+    '''
+    Insert a batch of returns, MySQLdb sends them in multi-row INSERTs
+    '''
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(_RETURNS_SQL, rows)
+    except MySQLdb.DatabaseError:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _get_buffer(_options):
+    '''
+    Return the buffer of the returns inserted in batches
+    '''
+    return salt.returners.get_return_buffer(
+        '{0}:{1}'.format(__virtualname__, salt.utils.json.dumps(_options, sort_keys=True)),
+        functools.partial(_connect, _options),
+        _write_returns,
+        batch_size=_options['batch_size'],
+        interval=_options['batch_interval'],
+        max_rows=_options['batch_max_rows'])
+
+
 def returner(ret):
     '''
     Return data to a mysql server
@@ -295,17 +355,19 @@ def returner(ret):
         ret['jid'] = prep_jid(nocache=ret.get('nocache', False))
         save_load(ret['jid'], ret)
 
+    row = (ret['fun'], ret['jid'],
+           salt.utils.json.dumps(ret['return']),
+           ret['id'],
+           ret.get('success', False),
+           salt.utils.json.dumps(ret))
+    _options = _get_options(ret)
+    if _options.get('batch_size', 1) > 1:
+        _get_buffer(_options).add(row)
+        return
+
     try:
         with _get_serv(ret, commit=True) as cur:
-            sql = '''INSERT INTO `salt_returns`
-                     (`fun`, `jid`, `return`, `id`, `success`, `full_ret`)
-                     VALUES (%s, %s, %s, %s, %s, %s)'''
-
-            cur.execute(sql, (ret['fun'], ret['jid'],
-                              salt.utils.json.dumps(ret['return']),
-                              ret['id'],
-                              ret.get('success', False),
-                              salt.utils.json.dumps(ret)))
+            cur.execute(_RETURNS_SQL, row)
     except salt.exceptions.SaltMasterError as exc:
         log.critical(exc)
         log.critical('Could not store return with MySQL returner. MySQL server unavailable.')
@@ -319,12 +381,12 @@ def event_return(events):
     option in master config.
     '''
     with _get_serv(events, commit=True) as cur:
-        for event in events:
-            tag = event.get('tag', '')
-            data = event.get('data', '')
-            sql = '''INSERT INTO `salt_events` (`tag`, `data`, `master_id`)
-                     VALUES (%s, %s, %s)'''
-            cur.execute(sql, (tag, salt.utils.json.dumps(data), __opts__['id']))
+        sql = '''INSERT INTO `salt_events` (`tag`, `data`, `master_id`)
+                 VALUES (%s, %s, %s)'''
+        cur.executemany(sql, [(event.get('tag', ''),
+                               salt.utils.json.dumps(event.get('data', '')),
+                               __opts__['id'])
+                              for event in events])
 
 
 def save_load(jid, load, minions=None):
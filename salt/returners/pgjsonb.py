@@ -43,6 +43,21 @@ either exclude these options or set them to None.
 
 .. versionadded:: 2017.5.0
 
+The returns can be buffered and copied to the database in batches, which is
+recommended when this returner is used as the master job cache. A batch is
+written with ``COPY`` when ``batch_size`` returns are buffered or when the
+oldest one has been buffered for ``batch_interval`` seconds. At most
+``batch_max_rows`` returns are kept while the server is unavailable. The
+returns are inserted one by one when ``batch_size`` is 1, the default.
+
+.. code-block:: yaml
+
+    returner.pgjsonb.batch_size: 500
+    returner.pgjsonb.batch_interval: 1
+    returner.pgjsonb.batch_max_rows: 10000
+
+.. versionadded:: Fluorine
+
 Alternative configuration values can be used by prefacing the configuration
 with `alternative.`. Any values not found in the alternative configuration will
 be pulled from the default location. As stated above, SSL configuration is
@@ -166,6 +181,8 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
 from contextlib import contextmanager
+import datetime
+import functools
 import sys
 import time
 import logging
@@ -173,6 +190,7 @@ import logging
 # Import salt libs
 import salt.returners
 import salt.utils.jid
+import salt.utils.json
 import salt.exceptions
 from salt.ext import six
 
@@ -207,7 +225,10 @@ def _get_options(ret=None):
         'user': 'salt',
         'pass': 'salt',
         'db': 'salt',
-        'port': 5432
+        'port': 5432,
+        'batch_size': 1,
+        'batch_interval': 1,
+        'batch_max_rows': 10000,
     }
 
     attrs = {
@@ -221,6 +242,9 @@ def _get_options(ret=None):
         'sslkey': 'sslkey',
         'sslrootcert': 'sslrootcert',
         'sslcrl': 'sslcrl',
+        'batch_size': 'batch_size',
+        'batch_interval': 'batch_interval',
+        'batch_max_rows': 'batch_max_rows',
     }
 
     _options = salt.returners.get_returner_options('returner.{0}'.format(__virtualname__),
@@ -229,12 +253,33 @@ def _get_options(ret=None):
                                                    __salt__=__salt__,
                                                    __opts__=__opts__,
                                                    defaults=defaults)
-    # Ensure port is an int
-    if 'port' in _options:
-        _options['port'] = int(_options['port'])
+    # Ensure port and batch sizes are ints
+    for k in ('port', 'batch_size', 'batch_max_rows'):
+        if k in _options:
+            _options[k] = int(_options[k])
     return _options
 
 
+def _connect(_options):
+    '''
+    Return a new Pg connection
+    '''
+    # An empty ssl_options dictionary passed to MySQLdb.connect will
+    # effectively connect w/o SSL.
+    ssl_options = {
+        k: v for k, v in six.iteritems(_options)
+        if k in ['sslmode', 'sslcert', 'sslkey', 'sslrootcert', 'sslcrl']
+    }
+    return psycopg2.connect(
+        host=_options.get('host'),
+        port=_options.get('port'),
+        dbname=_options.get('db'),
+        user=_options.get('user'),
+        password=_options.get('pass'),
+        **ssl_options
+    )
+
+
 @contextmanager
 def _get_serv(ret=None, commit=False):
     '''
@@ -242,20 +287,7 @@ def _get_serv(ret=None, commit=False):
     '''
     _options = _get_options(ret)
     try:
-        # An empty ssl_options dictionary passed to MySQLdb.connect will
-        # effectively connect w/o SSL.
-        ssl_options = {
-            k: v for k, v in six.iteritems(_options)
-            if k in ['sslmode', 'sslcert', 'sslkey', 'sslrootcert', 'sslcrl']
-        }
-        conn = psycopg2.connect(
-            host=_options.get('host'),
-            port=_options.get('port'),
-            dbname=_options.get('db'),
-            user=_options.get('user'),
-            password=_options.get('pass'),
-            **ssl_options
-        )
+        conn = _connect(_options)
     except psycopg2.OperationalError as exc:
         raise salt.exceptions.SaltMasterError('pgjsonb returner could not connect to database: {exc}'.format(exc=exc))
 
@@ -285,10 +317,56 @@ def _get_serv(ret=None, commit=False):
         conn.close()
 
 
+_RETURNS_COLUMNS = ('fun', 'jid', 'return', 'id', 'success', 'full_ret', 'alter_time')
+
+
+def _write_returns(conn, rows):
+    '''
+    Copy a batch of returns to the salt_returns table
+    '''
+    cursor = conn.cursor()
+    try:
+        salt.returners.copy_rows(cursor, 'salt_returns', _RETURNS_COLUMNS, rows)
+    except psycopg2.DatabaseError:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _get_buffer(_options):
+    '''
+    Return the buffer of the returns copied in batches
+    '''
+    return salt.returners.get_return_buffer(
+        '{0}:{1}'.format(__virtualname__, salt.utils.json.dumps(_options, sort_keys=True)),
+        functools.partial(_connect, _options),
+        _write_returns,
+        batch_size=_options['batch_size'],
+        interval=_options['batch_interval'],
+        max_rows=_options['batch_max_rows'])
+
+
+def _timestamp():
+    '''
+    Return the current time as a PostgreSQL timestamp with time zone
+    '''
+    return '{0}+00:00'.format(datetime.datetime.utcnow().isoformat())
+
+
 def returner(ret):
     '''
     Return data to a Pg server
     '''
+    _options = _get_options(ret)
+    if _options.get('batch_size', 1) > 1:
+        _get_buffer(_options).add((ret['fun'], ret['jid'],
+                                   salt.utils.json.dumps(ret['return']),
+                                   ret['id'],
+                                   ret.get('success', False),
+                                   salt.utils.json.dumps(ret),
+                                   _timestamp()))
+        return
+
     try:
         with _get_serv(ret, commit=True) as cur:
             sql = '''INSERT INTO salt_returns
@@ -312,14 +390,15 @@ def event_return(events):
     Requires that configuration be enabled via 'event_return'
     option in master config.
     '''
+    alter_time = _timestamp()
     with _get_serv(events, commit=True) as cur:
-        for event in events:
-            tag = event.get('tag', '')
-            data = event.get('data', '')
-            sql = '''INSERT INTO salt_events (tag, data, master_id, alter_time)
-                     VALUES (%s, %s, %s, to_timestamp(%s))'''
-            cur.execute(sql, (tag, psycopg2.extras.Json(data),
-                              __opts__['id'], time.time()))
+        salt.returners.copy_rows(
+            cur, 'salt_events', ('tag', 'data', 'master_id', 'alter_time'),
+            [(event.get('tag', ''),
+              salt.utils.json.dumps(event.get('data', '')),
+              __opts__['id'],
+              alter_time)
+             for event in events])
 
 
 def save_load(jid, load, minions=None):
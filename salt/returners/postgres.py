@@ -29,6 +29,21 @@ the following values configured in the minion or master config:
     returner.postgres.db: 'salt'
     returner.postgres.port: 5432
 
+.. versionadded:: Fluorine
+
+The returns can be buffered and copied to the database in batches, which is
+recommended when this returner is used as the master job cache. A batch is
+written with ``COPY`` when ``batch_size`` returns are buffered or when the
+oldest one has been buffered for ``batch_interval`` seconds. At most
+``batch_max_rows`` returns are kept while the server is unavailable. The
+returns are inserted one by one when ``batch_size`` is 1, the default.
+
+.. code-block:: yaml
+
+    returner.postgres.batch_size: 500
+    returner.postgres.batch_interval: 1
+    returner.postgres.batch_max_rows: 10000
+
 Alternative configuration values can be used by prefacing the configuration.
 Any values not found in the alternative configuration will be pulled from
 the default location:
@@ -129,6 +144,7 @@ To override individual configuration items, append --return_kwargs '{"key:": "va
 from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
+import functools
 import sys
 import logging
 from contextlib import contextmanager
@@ -166,13 +182,19 @@ def _get_options(ret=None):
                 'user': 'salt',
                 'passwd': 'salt',
                 'db': 'salt',
-                'port': 5432}
+                'port': 5432,
+                'batch_size': 1,
+                'batch_interval': 1,
+                'batch_max_rows': 10000}
 
     attrs = {'host': 'host',
              'user': 'user',
              'passwd': 'passwd',
              'db': 'db',
-             'port': 'port'}
+             'port': 'port',
+             'batch_size': 'batch_size',
+             'batch_interval': 'batch_interval',
+             'batch_max_rows': 'batch_max_rows'}
 
     _options = salt.returners.get_returner_options('returner.{0}'.format(__virtualname__),
                                                    ret,
@@ -180,12 +202,24 @@ def _get_options(ret=None):
                                                    __salt__=__salt__,
                                                    __opts__=__opts__,
                                                    defaults=defaults)
-    # Ensure port is an int
-    if 'port' in _options:
-        _options['port'] = int(_options['port'])
+    # Ensure port and batch sizes are ints
+    for k in ('port', 'batch_size', 'batch_max_rows'):
+        if k in _options:
+            _options[k] = int(_options[k])
     return _options
 
 
+def _connect(_options):
+    '''
+    Return a new Pg connection
+    '''
+    return psycopg2.connect(host=_options.get('host'),
+                            user=_options.get('user'),
+                            password=_options.get('passwd'),
+                            database=_options.get('db'),
+                            port=_options.get('port'))
+
+
 @contextmanager
 def _get_serv(ret=None, commit=False):
     '''
@@ -193,12 +227,7 @@ def _get_serv(ret=None, commit=False):
     '''
     _options = _get_options(ret)
     try:
-        conn = psycopg2.connect(host=_options.get('host'),
-                                user=_options.get('user'),
-                                password=_options.get('passwd'),
-                                database=_options.get('db'),
-                                port=_options.get('port'))
-
+        conn = _connect(_options)
     except psycopg2.OperationalError as exc:
         raise salt.exceptions.SaltMasterError('postgres returner could not connect to database: {exc}'.format(exc=exc))
 
@@ -220,23 +249,56 @@ def _get_serv(ret=None, commit=False):
         conn.close()
 
 
+_RETURNS_COLUMNS = ('fun', 'jid', 'return', 'id', 'success', 'full_ret')
+
+
+def _write_returns(conn, rows):
+    '''
+    Copy a batch of returns to the salt_returns table
+    '''
+    cursor = conn.cursor()
+    try:
+        salt.returners.copy_rows(cursor, 'salt_returns', _RETURNS_COLUMNS, rows)
+    except psycopg2.DatabaseError:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _get_buffer(_options):
+    '''
+    Return the buffer of the returns copied in batches
+    '''
+    return salt.returners.get_return_buffer(
+        '{0}:{1}'.format(__virtualname__, salt.utils.json.dumps(_options, sort_keys=True)),
+        functools.partial(_connect, _options),
+        _write_returns,
+        batch_size=_options['batch_size'],
+        interval=_options['batch_interval'],
+        max_rows=_options['batch_max_rows'])
+
+
 def returner(ret):
     '''
     Return data to a postgres server
     '''
+    row = (ret['fun'],
+           ret['jid'],
+           salt.utils.json.dumps(ret['return']),
+           ret['id'],
+           ret.get('success', False),
+           salt.utils.json.dumps(ret))
+    _options = _get_options(ret)
+    if _options.get('batch_size', 1) > 1:
+        _get_buffer(_options).add(row)
+        return
+
     try:
         with _get_serv(ret, commit=True) as cur:
             sql = '''INSERT INTO salt_returns
                     (fun, jid, return, id, success, full_ret)
                     VALUES (%s, %s, %s, %s, %s, %s)'''
-            cur.execute(
-                sql, (
-                    ret['fun'],
-                    ret['jid'],
-                    salt.utils.json.dumps(ret['return']),
-                    ret['id'],
-                    ret.get('success', False),
-                    salt.utils.json.dumps(ret)))
+            cur.execute(sql, row)
     except salt.exceptions.SaltMasterError:
         log.critical('Could not store return with postgres returner. PostgreSQL server unavailable.')
 
@@ -249,14 +311,12 @@ def event_return(events):
     option in master config.
     '''
     with _get_serv(events, commit=True) as cur:
-        for event in events:
-            tag = event.get('tag', '')
-            data = event.get('data', '')
-            sql = '''INSERT INTO salt_events (tag, data, master_id)
-                     VALUES (%s, %s, %s)'''
-            cur.execute(sql, (tag,
-                              salt.utils.json.dumps(data),
-                              __opts__['id']))
+        salt.returners.copy_rows(
+            cur, 'salt_events', ('tag', 'data', 'master_id'),
+            [(event.get('tag', ''),
+              salt.utils.json.dumps(event.get('data', '')),
+              __opts__['id'])
+             for event in events])
 
 
 def save_load(jid, load, minions=None):  # pylint: disable=unused-argument
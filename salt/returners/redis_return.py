@@ -22,6 +22,15 @@ config, these are the defaults:
     redis.db: '0'
     redis.unix_socket_path: /var/run/redis/redis.sock
 
+.. versionadded:: Fluorine
+
+    The returns using the same connection options share a pool of connections,
+    its size can be limited by `max_connections`:
+
+.. code-block:: yaml
+
+    redis.max_connections: 10
+
 Cluster Mode Example:
 
 .. code-block:: yaml
@@ -104,6 +113,7 @@ import salt.returners
 import salt.utils.jid
 import salt.utils.json
 import salt.utils.platform
+import salt.utils.stringutils
 
 # Import 3rd-party libs
 from salt.ext import six
@@ -121,7 +131,8 @@ try:
 except ImportError:
     HAS_REDIS_CLUSTER = False
 
-REDIS_POOL = None
+# {<connection options>: <redis server object>, ...}
+REDIS_POOL = {}
 
 # Define the module's virtual name
 __virtualname__ = 'redis'
@@ -154,6 +165,7 @@ def _get_options(ret=None):
              'cluster_mode': 'cluster_mode',
              'startup_nodes': 'cluster.startup_nodes',
              'skip_full_coverage_check': 'cluster.skip_full_coverage_check',
+             'max_connections': 'max_connections',
              }
 
     if salt.utils.platform.is_proxy():
@@ -165,7 +177,8 @@ def _get_options(ret=None):
             'password': __opts__.get('redis.password', ''),
             'cluster_mode': __opts__.get('redis.cluster_mode', False),
             'startup_nodes': __opts__.get('redis.cluster.startup_nodes', {}),
-            'skip_full_coverage_check': __opts__.get('redis.cluster.skip_full_coverage_check', False)
+            'skip_full_coverage_check': __opts__.get('redis.cluster.skip_full_coverage_check', False),
+            'max_connections': __opts__.get('redis.max_connections', None),
         }
 
     _options = salt.returners.get_returner_options(__virtualname__,
@@ -178,23 +191,27 @@ def _get_options(ret=None):
 
 def _get_serv(ret=None):
     '''
-    Return a redis server object
+    Return a redis server object, shared by the returns using the same
+    connection options
     '''
     _options = _get_options(ret)
-    global REDIS_POOL
-    if REDIS_POOL:
-        return REDIS_POOL
+    pool_id = salt.utils.json.dumps(_options, sort_keys=True)
+    if pool_id in REDIS_POOL:
+        return REDIS_POOL[pool_id]
     elif _options.get('cluster_mode'):
-        REDIS_POOL = StrictRedisCluster(startup_nodes=_options.get('startup_nodes'),
-                                        skip_full_coverage_check=_options.get('skip_full_coverage_check'),
-                                        decode_responses=True)
+        serv = StrictRedisCluster(startup_nodes=_options.get('startup_nodes'),
+                                  skip_full_coverage_check=_options.get('skip_full_coverage_check'),
+                                  max_connections=_options.get('max_connections'),
+                                  decode_responses=True)
     else:
-        REDIS_POOL = redis.StrictRedis(host=_options.get('host'),
-                                       port=_options.get('port'),
-                                       unix_socket_path=_options.get('unix_socket_path', None),
-                                       db=_options.get('db'),
-                                       password=_options.get('password'))
-    return REDIS_POOL
+        serv = redis.StrictRedis(host=_options.get('host'),
+                                 port=_options.get('port'),
+                                 unix_socket_path=_options.get('unix_socket_path', None),
+                                 db=_options.get('db'),
+                                 password=_options.get('password'),
+                                 max_connections=_options.get('max_connections'))
+    REDIS_POOL[pool_id] = serv
+    return serv
 
 
 def _get_ttl():
@@ -259,16 +276,22 @@ def get_fun(fun):
     '''
     serv = _get_serv(ret=None)
     ret = {}
-    for minion in serv.smembers('minions'):
-        ind_str = '{0}:{1}'.format(minion, fun)
-        try:
-            jid = serv.get(ind_str)
-        except Exception:
-            continue
-        if not jid:
+    minions = [salt.utils.stringutils.to_unicode(minion)
+               for minion in serv.smembers('minions')]
+    # Get the last jid of all the minions at once, then all their returns
+    pipeline = serv.pipeline(transaction=False)
+    for minion in minions:
+        pipeline.get('{0}:{1}'.format(minion, fun))
+    jids = pipeline.execute(raise_on_error=False)
+    pipeline = serv.pipeline(transaction=False)
+    found = []
+    for minion, jid in zip(minions, jids):
+        if not jid or isinstance(jid, Exception):
             continue
-        data = serv.get('{0}:{1}'.format(minion, jid))
-        if data:
+        pipeline.hget('ret:{0}'.format(salt.utils.stringutils.to_unicode(jid)), minion)
+        found.append(minion)
+    for minion, data in zip(found, pipeline.execute(raise_on_error=False)):
+        if data and not isinstance(data, Exception):
             ret[minion] = salt.utils.json.loads(data)
     return ret
 
@@ -279,7 +302,10 @@ def get_jids():
     '''
     serv = _get_serv(ret=None)
     ret = {}
-    for s in serv.mget(serv.keys('load:*')):
+    load_keys = serv.keys('load:*')
+    if not load_keys:
+        return ret
+    for s in serv.mget(load_keys):
         if s is None:
             continue
         load = salt.utils.json.loads(s)
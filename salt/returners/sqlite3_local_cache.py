@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+'''
+Use a SQLite database on the master as the master job cache. This is a drop-in
+replacement for :mod:`local_cache <salt.returners.local_cache>` which keeps
+job loads, minion lists and returns in indexed tables instead of one directory
+tree per job, so that listing and expiring jobs does not need to walk the
+whole cache.
+
+.. versionadded:: Fluorine
+
+:maintainer:    SaltStack
+:maturity:      New
+:depends:       sqlite3
+:platform:      all
+
+To use this module as the master job cache, set the following in the master
+config:
+
+.. code-block:: yaml
+
+    master_job_cache: sqlite3_local_cache
+
+The database is created automatically. Its location and the time to wait for
+a lock held by another master process can be changed:
+
+.. code-block:: yaml
+
+    master_job_cache.sqlite3.database: /var/cache/salt/master/jobs.sqlite
+    master_job_cache.sqlite3.timeout: 5.0
+
+Jobs are removed by the master's maintenance process once they are older than
+:conf_master:`keep_jobs` hours, the same as with ``local_cache``.
+
+.. note::
+    Jobs already in ``local_cache`` are not migrated.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import logging
+import os
+import threading
+import time
+
+# Import salt libs
+import salt.exceptions
+import salt.payload
+import salt.utils.jid
+import salt.utils.minions
+import salt.utils.stringutils
+
+# Better safe than sorry here. Even though sqlite3 is included in python
+try:
+    import sqlite3
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
+
+log = logging.getLogger(__name__)
+
+# Define the module's virtual name
+__virtualname__ = 'sqlite3_local_cache'
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS jids (
+        jid TEXT PRIMARY KEY,
+        started REAL NOT NULL,
+        fun TEXT,
+        load BLOB,
+        nocache INTEGER NOT NULL DEFAULT 0,
+        endtime TEXT)''',
+    'CREATE INDEX IF NOT EXISTS jids_started ON jids (started)',
+    'CREATE INDEX IF NOT EXISTS jids_fun ON jids (fun)',
+    '''CREATE TABLE IF NOT EXISTS minions (
+        jid TEXT NOT NULL,
+        syndic_id TEXT NOT NULL,
+        minions BLOB NOT NULL,
+        PRIMARY KEY (jid, syndic_id))''',
+    '''CREATE TABLE IF NOT EXISTS returns (
+        jid TEXT NOT NULL,
+        id TEXT NOT NULL,
+        fun TEXT,
+        ret BLOB NOT NULL,
+        out BLOB,
+        PRIMARY KEY (jid, id))''',
+    'CREATE INDEX IF NOT EXISTS returns_fun ON returns (fun, id, jid)',
+)
+
+_CONN = {}
+_LOCK = threading.Lock()
+
+
+def __virtual__():
+    if not HAS_SQLITE3:
+        return False, 'Could not import sqlite3_local_cache returner; sqlite3 is not installed.'
+    return __virtualname__
+
+
+def _get_conn():
+    '''
+    Return the connection to the job cache database for this process,
+    creating the schema the first time
+    '''
+    pid = os.getpid()
+    conn = _CONN.get(pid)
+    if conn is not None:
+        return conn
+    database = __opts__.get(
+        'master_job_cache.sqlite3.database',
+        os.path.join(__opts__['cachedir'], 'jobs.sqlite')
+    )
+    db_dir = os.path.dirname(database)
+    if not os.path.isdir(db_dir):
+        os.makedirs(db_dir)
+    conn = sqlite3.connect(
+        database,
+        timeout=float(__opts__.get('master_job_cache.sqlite3.timeout', 5.0)),
+        isolation_level=None,
+        check_same_thread=False
+    )
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    # Don't hand a connection inherited over fork() to the child
+    _CONN.clear()
+    _CONN[pid] = conn
+    return conn
+
+
+def _execute(sql, params=()):
+    '''
+    Run a single statement and return all of the rows
+    '''
+    with _LOCK:
+        try:
+            return _get_conn().execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            raise salt.exceptions.SaltCacheError(
+                'sqlite3_local_cache: {0}'.format(exc)
+            )
+
+
+def _dumps(data):
+    return sqlite3.Binary(salt.payload.Serial(__opts__).dumps(data))
+
+
+def _loads(data):
+    return salt.payload.Serial(__opts__).loads(bytes(data))
+
+
+def prep_jid(nocache=False, passed_jid=None, recurse_count=0):
+    '''
+    Return a job id and record it in the job cache.
+
+    This is the function responsible for making sure jids don't collide (unless
+    it is passed a jid).
+    '''
+    if recurse_count >= 5:
+        err = 'prep_jid could not store a jid after {0} tries.'.format(recurse_count)
+        log.error(err)
+        raise salt.exceptions.SaltCacheError(err)
+    if passed_jid is None:  # this can be a None or an empty string.
+        jid = salt.utils.jid.gen_jid(__opts__)
+    else:
+        jid = passed_jid
+
+    with _LOCK:
+        try:
+            cur = _get_conn().execute(
+                'INSERT OR IGNORE INTO jids (jid, started, nocache) VALUES (?, ?, ?)',
+                (jid, time.time(), int(bool(nocache)))
+            )
+            if cur.rowcount == 0:
+                if passed_jid is None:
+                    # Someone else is using this jid, we need a new one
+                    collision = True
+                else:
+                    collision = False
+                    if nocache:
+                        _get_conn().execute(
+                            'UPDATE jids SET nocache = 1 WHERE jid = ?', (jid,)
+                        )
+            else:
+                collision = False
+        except sqlite3.Error as exc:
+            log.warning('Could not store jid %s: %s. Retrying.', jid, exc)
+            collision = True
+    if collision:
+        time.sleep(0.1)
+        return prep_jid(nocache=nocache, passed_jid=passed_jid,
+                        recurse_count=recurse_count+1)
+    return jid
+
+
+def returner(load):
+    '''
+    Return data to the job cache
+    '''
+    # if a minion is returning a standalone job, get a jobid
+    if load['jid'] == 'req':
+        load['jid'] = prep_jid(nocache=load.get('nocache', False))
+
+    rows = _execute('SELECT nocache FROM jids WHERE jid = ?', (load['jid'],))
+    if rows and rows[0][0]:
+        return
+
+    ret = dict((key, load[key]) for key in ['return', 'retcode', 'success'] if key in load)
+    with _LOCK:
+        try:
+            _get_conn().execute(
+                'INSERT INTO returns (jid, id, fun, ret, out) VALUES (?, ?, ?, ?, ?)',
+                (load['jid'],
+                 load['id'],
+                 load.get('fun'),
+                 _dumps(ret),
+                 _dumps(load['out']) if 'out' in load else None)
+            )
+        except sqlite3.IntegrityError:
+            # Minion has already returned this jid and it should be dropped
+            log.error(
+                'An extra return was detected from minion %s, please verify '
+                'the minion, this could be a replay attack', load['id']
+            )
+            return False
+        except sqlite3.Error as exc:
+            raise salt.exceptions.SaltCacheError(
+                'sqlite3_local_cache: {0}'.format(exc)
+            )
+
+
+def save_load(jid, clear_load, minions=None):
+    '''
+    Save the load to the specified jid
+
+    minions argument is to provide a pre-computed list of matched minions for
+    the job, for cases when this function can't compute that list itself (such
+    as for salt-ssh)
+    '''
+    with _LOCK:
+        try:
+            conn = _get_conn()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(
+                    'INSERT OR IGNORE INTO jids (jid, started) VALUES (?, ?)',
+                    (jid, time.time())
+                )
+                conn.execute(
+                    'UPDATE jids SET fun = ?, load = ? WHERE jid = ?',
+                    (clear_load.get('fun'), _dumps(clear_load), jid)
+                )
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        except sqlite3.Error as exc:
+            raise salt.exceptions.SaltCacheError(
+                'sqlite3_local_cache: {0}'.format(exc)
+            )
+
+    # if you have a tgt, save that for the UI etc
+    if 'tgt' in clear_load and clear_load['tgt'] != '':
+        if minions is None:
+            ckminions = salt.utils.minions.CkMinions(__opts__)
+            # Retrieve the minions list
+            _res = ckminions.check_minions(
+                    clear_load['tgt'],
+                    clear_load.get('tgt_type', 'glob')
+                    )
+            minions = _res['minions']
+        # save the minions to a cache so we can see in the UI
+        save_minions(jid, minions)
+
+
+def save_minions(jid, minions, syndic_id=None):
+    '''
+    Save/update the list of minions for a given job
+    '''
+    # Ensure we have a list for Python 3 compatability
+    minions = list(minions)
+
+    log.debug(
+        'Adding minions for job %s%s: %s',
+        jid,
+        ' from syndic master \'{0}\''.format(syndic_id) if syndic_id else '',
+        minions
+    )
+    _execute(
+        'INSERT OR REPLACE INTO minions (jid, syndic_id, minions) VALUES (?, ?, ?)',
+        (jid, syndic_id or '', _dumps(minions))
+    )
+
+
+def get_load(jid):
+    '''
+    Return the load data that marks a specified jid
+    '''
+    rows = _execute('SELECT load FROM jids WHERE jid = ?', (jid,))
+    if not rows or rows[0][0] is None:
+        return {}
+    ret = _loads(rows[0][0]) or {}
+    all_minions = set()
+    for minions, in _execute('SELECT minions FROM minions WHERE jid = ?', (jid,)):
+        all_minions.update(_loads(minions))
+    if all_minions:
+        ret['Minions'] = sorted(all_minions)
+    return ret
+
+
+def get_jid(jid):
+    '''
+    Return the information returned when the specified job id was executed
+    '''
+    ret = {}
+    for minion, ret_data, out in _execute(
+            'SELECT id, ret, out FROM returns WHERE jid = ?', (jid,)):
+        ret[minion] = _loads(ret_data)
+        if out is not None:
+            ret[minion]['out'] = _loads(out)
+    return ret
+
+
+def get_fun(fun):
+    '''
+    Return a dict of the last function called for all minions
+    '''
+    return dict(_execute(
+        'SELECT id, MAX(jid) FROM returns WHERE fun = ? GROUP BY id', (fun,)
+    ))
+
+
+def get_minions():
+    '''
+    Return a list of minions which have returned data
+    '''
+    return [row[0] for row in _execute('SELECT DISTINCT id FROM returns')]
+
+
+def get_jids():
+    '''
+    Return a dict mapping all job ids to job information
+    '''
+    ret = {}
+    store_endtime = __opts__.get('job_cache_store_endtime')
+    for jid, load, endtime in _execute(
+            'SELECT jid, load, endtime FROM jids WHERE load IS NOT NULL'):
+        ret[jid] = salt.utils.jid.format_jid_instance(jid, _loads(load))
+        if store_endtime and endtime:
+            ret[jid]['EndTime'] = endtime
+    return ret
+
+
+def get_jids_filter(count, filter_find_job=True):
+    '''
+    Return a list of all jobs information filtered by the given criteria.
+    :param int count: show not more than the count of most recent jobs
+    :param bool filter_find_jobs: filter out 'saltutil.find_job' jobs
+    '''
+    sql = 'SELECT jid, load FROM jids WHERE load IS NOT NULL'
+    params = []
+    if filter_find_job:
+        sql += ' AND (fun IS NULL OR fun != ?)'
+        params.append('saltutil.find_job')
+    sql += ' ORDER BY jid DESC LIMIT ?'
+    params.append(int(count))
+    return [salt.utils.jid.format_jid_instance_ext(jid, _loads(load))
+            for jid, load in reversed(_execute(sql, params))]
+
+
+def clean_old_jobs():
+    '''
+    Clean out the old jobs from the job cache
+    '''
+    if __opts__['keep_jobs'] == 0:
+        return
+    cutoff = time.time() - __opts__['keep_jobs'] * 3600.0
+    with _LOCK:
+        try:
+            conn = _get_conn()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for table in ('returns', 'minions'):
+                    conn.execute(
+                        'DELETE FROM {0} WHERE jid IN '
+                        '(SELECT jid FROM jids WHERE started < ?)'.format(table),
+                        (cutoff,)
+                    )
+                cur = conn.execute('DELETE FROM jids WHERE started < ?', (cutoff,))
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        except sqlite3.Error as exc:
+            log.error('sqlite3_local_cache: Unable to clean old jobs: %s', exc)
+            return
+    if cur.rowcount > 0:
+        log.debug('sqlite3_local_cache: Removed %d old jobs', cur.rowcount)
+
+
+def update_endtime(jid, time):
+    '''
+    Update (or store) the end time for a given job
+    '''
+    _execute(
+        'UPDATE jids SET endtime = ? WHERE jid = ?',
+        (salt.utils.stringutils.to_unicode(time), jid)
+    )
+
+
+def get_endtime(jid):
+    '''
+    Retrieve the stored endtime for a given job
+
+    Returns False if no endtime is present
+    '''
+    rows = _execute('SELECT endtime FROM jids WHERE jid = ?', (jid,))
+    if not rows or not rows[0][0]:
+        return False
+    return rows[0][0]
@@ -19,6 +19,20 @@ minion config:
     sqlite3.database: /usr/lib/salt/salt.db
     sqlite3.timeout: 5.0
 
+.. versionadded:: Fluorine
+
+The returns can be buffered and inserted in batches, in a single transaction.
+A batch is inserted when ``batch_size`` returns are buffered or when the oldest
+one has been buffered for ``batch_interval`` seconds. At most
+``batch_max_rows`` returns are kept while the database is unavailable. The
+returns are inserted one by one when ``batch_size`` is 1, the default.
+
+.. code-block:: yaml
+
+    sqlite3.batch_size: 500
+    sqlite3.batch_interval: 1
+    sqlite3.batch_max_rows: 10000
+
 Alternative configuration values can be used by prefacing the configuration.
 Any values not found in the alternative configuration will be pulled from
 the default location:
@@ -83,6 +97,7 @@ To override individual configuration items, append --return_kwargs '{"key:": "va
 from __future__ import absolute_import, print_function, unicode_literals
 
 # Import python libs
+import functools
 import logging
 import datetime
 
@@ -117,24 +132,36 @@ def _get_options(ret=None):
     '''
     Get the SQLite3 options from salt.
     '''
+    defaults = {'batch_size': 1,
+                'batch_interval': 1,
+                'batch_max_rows': 10000}
+
     attrs = {'database': 'database',
-             'timeout': 'timeout'}
+             'timeout': 'timeout',
+             'batch_size': 'batch_size',
+             'batch_interval': 'batch_interval',
+             'batch_max_rows': 'batch_max_rows'}
 
     _options = salt.returners.get_returner_options(__virtualname__,
                                                    ret,
                                                    attrs,
                                                    __salt__=__salt__,
-                                                   __opts__=__opts__)
+                                                   __opts__=__opts__,
+                                                   defaults=defaults)
+    # Ensure batch sizes are ints
+    for k in ('batch_size', 'batch_max_rows'):
+        _options[k] = int(_options[k])
     return _options
 
 
-def _get_conn(ret=None):
+def _get_conn(ret=None, _options=None):
     '''
     Return a sqlite3 database connection
     '''
-    # Possible todo: support detect_types, isolation_level, check_same_thread,
+    # Possible todo: support detect_types, isolation_level,
     # factory, cached_statements. Do we really need to though?
-    _options = _get_options(ret)
+    if _options is None:
+        _options = _get_options(ret)
     database = _options.get('database')
     timeout = _options.get('timeout')
 
@@ -145,7 +172,10 @@ def _get_conn(ret=None):
         raise Exception(
                 'sqlite3 config option "sqlite3.timeout" is missing')
     log.debug('Connecting the sqlite3 database: %s timeout: %s', database, timeout)
-    conn = sqlite3.connect(database, timeout=float(timeout))
+    # The connection of a return buffer is used by the thread writing the
+    # batches, one thread at a time
+    conn = sqlite3.connect(database, timeout=float(timeout),
+                           check_same_thread=False)
     return conn
 
 
@@ -158,24 +188,55 @@ def _close_conn(conn):
     conn.close()
 
 
+_RETURNS_SQL = '''INSERT INTO salt_returns
+                  (fun, jid, id, fun_args, date, full_ret, success)
+                  VALUES (:fun, :jid, :id, :fun_args, :date, :full_ret, :success)'''
+
+
+def _write_returns(conn, rows):
+    '''
+    Insert a batch of returns in a single transaction
+    '''
+    try:
+        conn.executemany(_RETURNS_SQL, rows)
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _get_buffer(_options):
+    '''
+    Return the buffer of the returns inserted in batches
+    '''
+    return salt.returners.get_return_buffer(
+        '{0}:{1}'.format(__virtualname__, salt.utils.json.dumps(_options, sort_keys=True)),
+        functools.partial(_get_conn, _options=_options),
+        _write_returns,
+        batch_size=_options['batch_size'],
+        interval=_options['batch_interval'],
+        max_rows=_options['batch_max_rows'])
+
+
 def returner(ret):
     '''
     Insert minion return data into the sqlite3 database
     '''
     log.debug('sqlite3 returner <returner> called with data: %s', ret)
-    conn = _get_conn(ret)
+    row = {'fun': ret['fun'],
+           'jid': ret['jid'],
+           'id': ret['id'],
+           'fun_args': six.text_type(ret['fun_args']) if ret.get('fun_args') else None,
+           'date': six.text_type(datetime.datetime.now()),
+           'full_ret': salt.utils.json.dumps(ret['return']),
+           'success': ret.get('success', '')}
+    _options = _get_options(ret)
+    if _options['batch_size'] > 1:
+        _get_buffer(_options).add(row)
+        return
+    conn = _get_conn(ret, _options=_options)
     cur = conn.cursor()
-    sql = '''INSERT INTO salt_returns
-             (fun, jid, id, fun_args, date, full_ret, success)
-             VALUES (:fun, :jid, :id, :fun_args, :date, :full_ret, :success)'''
-    cur.execute(sql,
-                {'fun': ret['fun'],
-                 'jid': ret['jid'],
-                 'id': ret['id'],
-                 'fun_args': six.text_type(ret['fun_args']) if ret.get('fun_args') else None,
-                 'date': six.text_type(datetime.datetime.now()),
-                 'full_ret': salt.utils.json.dumps(ret['return']),
-                 'success': ret.get('success', '')})
+    cur.execute(_RETURNS_SQL, row)
     _close_conn(conn)
 
 
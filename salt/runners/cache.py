@@ -9,10 +9,13 @@ import logging
 import os
 
 # Import salt libs
+import salt.client
 import salt.config
 from salt.ext import six
 import salt.log
+import salt.pillar
 import salt.utils.args
+import salt.utils.cache
 import salt.utils.gitfs
 import salt.utils.master
 import salt.payload
@@ -214,6 +217,112 @@ def clear_all(tgt=None, tgt_type='glob'):
                         clear_mine_flag=True)
 
 
+def _compiled_pillar_caches(tgt=None):
+    '''
+    Yield the id and the compiled pillar cache of the minions matching the
+    tgt glob. Only the disk backend can be read outside of the master workers.
+    '''
+    backend = __opts__.get('pillar_cache_backend', 'disk')
+    if backend != 'disk':
+        raise SaltInvocationError(
+            'The compiled pillar cache can only be read with the disk '
+            'pillar_cache_backend, not with the {0} backend'.format(backend))
+    cachedir = os.path.join(__opts__['cachedir'], 'pillar_cache')
+    if not os.path.isdir(cachedir):
+        return
+    for minion_id in sorted(os.listdir(cachedir)):
+        if not fnmatch.fnmatch(minion_id, tgt or '*'):
+            continue
+        cache = salt.utils.cache.CacheDisk(__opts__['pillar_cache_ttl'],
+                                           os.path.join(cachedir, minion_id))
+        if minion_id in cache:
+            yield minion_id, cache
+
+
+def pillar_cache_stats(tgt=None):
+    '''
+    .. versionadded:: Fluorine
+
+    Return the hits, misses and invalidations of the compiled pillar cache for
+    the minions matching the ``tgt`` glob. The counts are only kept when
+    :conf_master:`pillar_cache_track_deps` is set, and can only be read with
+    the ``disk`` :conf_master:`pillar_cache_backend`.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt-run cache.pillar_cache_stats
+        salt-run cache.pillar_cache_stats 'web*'
+    '''
+    ret = {}
+    for minion_id, cache in _compiled_pillar_caches(tgt):
+        stats = cache[minion_id].get('__stats__')
+        if not stats:
+            continue
+        stats = dict(stats)
+        runs = stats['hits'] + stats['misses']
+        stats['hit_rate'] = float(stats['hits']) / runs if runs else 0.0
+        ret[minion_id] = stats
+    return ret
+
+
+def invalidate_pillar_cache(tgt=None, sls=None, ext_pillar=None, grain=None,
+                            refresh=False):
+    '''
+    .. versionadded:: Fluorine
+
+    Drop the compiled pillars cached for the minions matching the ``tgt`` glob
+    which were compiled from the given pillar SLS files, ext_pillar source or
+    grain. All the cached pillars of the minions are dropped if none of them
+    is given. Stale pillars are found when the minions request them when
+    :conf_master:`pillar_cache_track_deps` is set, this pushes the change to
+    the cache right away. This needs the ``disk``
+    :conf_master:`pillar_cache_backend`, the ``memory`` backend is kept in
+    each master worker and can not be reached by the runner.
+
+    sls
+        Glob matching the names of the pillar SLS files
+
+    ext_pillar
+        Name of an ext_pillar source, e.g. ``git``
+
+    grain
+        Name of a grain
+
+    refresh : False
+        Refresh the pillar of the minions whose cached pillar was dropped
+
+    Returns the pillarenvs dropped for each minion.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt-run cache.invalidate_pillar_cache sls='users.*' refresh=True
+        salt-run cache.invalidate_pillar_cache 'web*' ext_pillar=git
+    '''
+    ret = {}
+    for minion_id, cache in _compiled_pillar_caches(tgt):
+        minion_cache = dict(cache[minion_id])
+        dropped = [
+            pillarenv for pillarenv, entry in six.iteritems(minion_cache)
+            if pillarenv != '__stats__' and (
+                (sls, ext_pillar, grain) == (None, None, None) or
+                salt.pillar.PillarCache.depends_on(entry, sls, ext_pillar, grain))
+        ]
+        if not dropped:
+            continue
+        for pillarenv in dropped:
+            minion_cache.pop(pillarenv)
+        cache[minion_id] = minion_cache
+        ret[minion_id] = dropped
+    if refresh and ret:
+        client = salt.client.get_local_client(__opts__['conf_file'])
+        client.cmd_async(list(ret), 'saltutil.refresh_pillar', tgt_type='list')
+    return ret
+
+
 def clear_git_lock(role, remote=None, **kwargs):
     '''
     .. versionadded:: 2015.8.2
@@ -15,6 +15,7 @@ import salt.payload
 import salt.utils.args
 import salt.utils.files
 import salt.utils.jid
+import salt.utils.job
 import salt.minion
 import salt.returners
 
@@ -41,14 +42,24 @@ def active(display_progress=False):
     .. code-block:: bash
 
         salt-run jobs.active
+
+    If :conf_master:`job_registry` is enabled, the running jobs are looked up
+    in the job registry instead of asking the minions.
     '''
     ret = {}
-    client = salt.client.get_local_client(__opts__['conf_file'])
-    try:
-        active_ = client.cmd('*', 'saltutil.running', timeout=__opts__['timeout'])
-    except SaltClientError as client_error:
-        print(client_error)
-        return ret
+    if __opts__.get('job_registry'):
+        active_ = {}
+        registry = salt.utils.job.JobRegistry(__opts__)
+        for running in six.itervalues(registry.jobs()):
+            for minion, job in six.iteritems(running):
+                active_.setdefault(minion, []).append(job)
+    else:
+        client = salt.client.get_local_client(__opts__['conf_file'])
+        try:
+            active_ = client.cmd('*', 'saltutil.running', timeout=__opts__['timeout'])
+        except SaltClientError as client_error:
+            print(client_error)
+            return ret
 
     if display_progress:
         __jid_event__.fire_event({
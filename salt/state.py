@@ -25,6 +25,7 @@ import traceback
 import re
 import time
 import random
+import multiprocessing
 
 # Import salt libs
 import salt.loader
@@ -32,17 +33,22 @@ import salt.minion
 import salt.pillar
 import salt.fileclient
 import salt.utils.args
+import salt.utils.atomicfile
 import salt.utils.crypt
 import salt.utils.data
 import salt.utils.decorators.state
 import salt.utils.dictupdate
 import salt.utils.event
 import salt.utils.files
+import salt.utils.hashutils
 import salt.utils.immutabletypes as immutabletypes
+import salt.utils.json
 import salt.utils.platform
 import salt.utils.process
+import salt.utils.stringutils
 import salt.utils.url
 import salt.syspaths as syspaths
+import salt.version
 from salt.serializers.msgpack import serialize as msgpack_serialize, deserialize as msgpack_deserialize
 from salt.template import compile_template, compile_template_str
 from salt.exceptions import (
@@ -58,10 +64,14 @@ import msgpack
 # pylint: disable=import-error,no-name-in-module,redefined-builtin
 from salt.ext import six
 from salt.ext.six.moves import map, range, reload_module
+from salt.ext.six.moves import cPickle as pickle
 # pylint: enable=import-error,no-name-in-module,redefined-builtin
 
 log = logging.getLogger(__name__)
 
+# The HighState object used by the state_render_workers processes
+_RENDER_WORKER_HIGHSTATE = None
+
 
 # These are keywords passed to state module functions which are to be used
 # by salt in this state module and not on the actual state module function
@@ -122,10 +132,80 @@ STATE_RUNTIME_KEYWORDS = frozenset([
     '__pub_pid',
     '__pub_tgt_type',
     '__prereq__',
+    '__auto_order__',
     ])
 
 STATE_INTERNAL_KEYWORDS = STATE_REQUISITE_KEYWORDS.union(STATE_REQUISITE_IN_KEYWORDS).union(STATE_RUNTIME_KEYWORDS)
 
+# The files which change when the states of these modules change the system,
+# their status is part of the fingerprint of a state
+STATE_FINGERPRINT_FILES = {
+    'pkg': ['/var/lib/dpkg/status',
+            '/var/lib/rpm/Packages',
+            '/var/lib/rpm/rpmdb.sqlite',
+            '/var/lib/pacman/local',
+            '/var/lib/apk/installed',
+            '/var/db/pkg',
+            '/usr/local/Cellar'],
+    'user': ['/etc/passwd', '/etc/shadow', '/etc/group'],
+    'group': ['/etc/group', '/etc/gshadow'],
+    }
+
+# The states managing a whole tree of files, of which the status of the top
+# directory tells nothing
+STATE_FINGERPRINT_EXCLUDE = frozenset([
+    'file.recurse',
+    'file.directory',
+    ])
+
+# The arguments naming the pillar or grains keys the data of a state is read
+# from, the values of these keys are part of the fingerprint of the state,
+# along with the argument setting their delimiter
+STATE_FINGERPRINT_DATA_ARGS = {
+    'contents_pillar': ('pillar', 'contents_delimiter'),
+    'contents_grains': ('grains', 'contents_delimiter'),
+    'dataset_pillar': ('pillar', None),
+    }
+
+# Jinja statements pulling in another template, and the ones among them
+# naming the template with a string literal
+TEMPLATE_STMT_RE = re.compile(
+    r'''\{%[-+]?\s*(?:extends|include|import|from|import_yaml|import_json|import_text)\s+(.*?)\s*[-+]?%\}''',
+    re.S)
+TEMPLATE_LITERAL_RE = re.compile(
+    r'''^(['"])([^'"]+)\1(?:\s+(?:import|as|with|without|ignore)\b.*)?$''',
+    re.S)
+
+
+def template_refs(data):
+    '''
+    Return the templates a template pulls in with Jinja ``extends``,
+    ``include``, ``import`` and ``from`` statements, or None if one of these statements
+    does not name its template with a string literal, e.g.
+    ``{% from tpldir ~ '/map.jinja' import map %}``, as the templates it pulls
+    in can not be known without rendering it.
+    '''
+    refs = []
+    for target in TEMPLATE_STMT_RE.findall(data):
+        match = TEMPLATE_LITERAL_RE.match(target)
+        if not match:
+            return None
+        refs.append(match.group(2))
+    return refs
+
+# The requisites a state has to wait for when the chunks are run by the dag
+# state executor, prereq is handled by running the chunk on its own
+STATE_DAG_REQUISITES = (
+    'onchanges',
+    'onchanges_any',
+    'onfail',
+    'onfail_any',
+    'watch',
+    'watch_any',
+    'require',
+    'require_any',
+    )
+
 
 def _odict_hashable(self):
     return id(self)
@@ -356,6 +436,120 @@ def mock_ret(cdata):
             'result': True}
 
 
+class ChunkIndex(object):
+    '''
+    Index a list of low chunks by state id, name and sls so that requisites
+    can be resolved with lookups instead of scanning every chunk. Requisite
+    values containing glob characters fall back to the fnmatch scan.
+    '''
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.size = len(chunks)
+        self.ids = {}
+        self.names = {}
+        self.sls = {}
+        for pos, chunk in enumerate(chunks):
+            self._add(self.ids, chunk.get('__id__'), pos)
+            self._add(self.names, chunk.get('name'), pos)
+            self._add(self.sls, chunk.get('__sls__'), pos)
+
+    @staticmethod
+    def _key(value):
+        if isinstance(value, six.string_types):
+            # fnmatch normalizes the case of both sides, do the same here
+            return os.path.normcase(value)
+        return value
+
+    def _add(self, index, value, pos):
+        try:
+            index.setdefault(self._key(value), []).append(pos)
+        except TypeError:
+            # Unhashable values can only be matched by the fnmatch scan
+            pass
+
+    def _get(self, index, value):
+        try:
+            return index.get(self._key(value), [])
+        except TypeError:
+            return []
+
+    def current(self, chunks):
+        '''
+        Return True if this index was built for the passed chunks
+        '''
+        return chunks is self.chunks and len(chunks) == self.size
+
+    def find(self, req_key, req_val):
+        '''
+        Return the chunks matched by a single requisite, in chunk order
+        '''
+        if req_val is None:
+            return []
+        scan = (not isinstance(req_val, six.string_types) or
+                any(char in req_val for char in '*?['))
+        if req_key == 'sls':
+            # Allow requisite tracking of entire sls files
+            if scan:
+                return [chunk for chunk in self.chunks
+                        if fnmatch.fnmatch(chunk['__sls__'], req_val)]
+            return [self.chunks[pos] for pos in self._get(self.sls, req_val)]
+        if scan:
+            found = [chunk for chunk in self.chunks
+                     if fnmatch.fnmatch(chunk['name'], req_val) or
+                     fnmatch.fnmatch(chunk['__id__'], req_val)]
+        else:
+            positions = set(self._get(self.names, req_val))
+            positions.update(self._get(self.ids, req_val))
+            found = [self.chunks[pos] for pos in sorted(positions)]
+        if req_key != 'id':
+            found = [chunk for chunk in found if chunk['state'] == req_key]
+        return found
+
+    def find_id_or_name(self, value):
+        '''
+        Return the chunks whose id or name is exactly the passed value
+        '''
+        positions = set(self._get(self.names, value))
+        positions.update(self._get(self.ids, value))
+        return [self.chunks[pos] for pos in sorted(positions)
+                if self.chunks[pos]['__id__'] == value or
+                self.chunks[pos]['name'] == value]
+
+
+def _render_worker_init(high_state):
+    '''
+    Keep the HighState object forked into a state_render_workers process
+    '''
+    global _RENDER_WORKER_HIGHSTATE  # pylint: disable=global-statement
+    _RENDER_WORKER_HIGHSTATE = high_state
+
+
+def _render_worker(args):
+    '''
+    Render an SLS file in a state_render_workers process, return whether the
+    file rendered and the rendered data. Files which fail to render, or do
+    not render to picklable data, are rendered again by render_state.
+    '''
+    fn_, saltenv, sls, mods = args
+    state_obj = _RENDER_WORKER_HIGHSTATE.state
+    try:
+        state = compile_template(fn_,
+                                 state_obj.rend,
+                                 state_obj.opts['renderer'],
+                                 state_obj.opts['renderer_blacklist'],
+                                 state_obj.opts['renderer_whitelist'],
+                                 saltenv,
+                                 sls,
+                                 rendered_sls=mods
+                                 )
+        pickle.dumps(state)
+    except Exception as exc:
+        log.debug('Unable to render SLS %s:%s in a render worker: %s',
+                  saltenv, sls, exc)
+        return False, None
+    return True, state
+
+
 class StateError(Exception):
     '''
     Custom exception class.
@@ -750,6 +944,8 @@ class State(object):
         self.mod_init = set()
         self.pre = {}
         self.__run_num = 0
+        self.chunk_index = None
+        self.fingerprints = None
         self.jid = jid
         self.instance_id = six.text_type(id(self))
         self.inject_globals = {}
@@ -798,6 +994,144 @@ class State(object):
                 pillarenv=self.opts.get('pillarenv'))
         return pillar.compile_pillar()
 
+    def _fingerprint(self, low):
+        '''
+        Return the fingerprint of a low chunk, made of its low data and of
+        the status of the files the state manages, or None if the state can
+        not be fingerprinted
+        '''
+        patterns = self.opts.get('state_fingerprint') or []
+        state_func = '{0[state]}.{0[fun]}'.format(low)
+        if state_func in STATE_FINGERPRINT_EXCLUDE or \
+                not any(fnmatch.fnmatch(state_func, pat) for pat in patterns):
+            return None
+        if low['state'] == 'file':
+            paths = [low['name']]
+        elif low['state'] in STATE_FINGERPRINT_FILES:
+            paths = STATE_FINGERPRINT_FILES[low['state']]
+        else:
+            return None
+        probes = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                probes.append([path, stat.st_mtime, stat.st_size,
+                               stat.st_mode, stat.st_uid, stat.st_gid])
+            except (OSError, TypeError):
+                probes.append([path])
+        sources = low.get('source')
+        if isinstance(sources, six.string_types):
+            sources = [sources]
+        for source in sources or ():
+            if isinstance(source, six.string_types) and source.startswith('salt://'):
+                # The source can change on the fileserver
+                probes.append(self.functions['cp.hash_file'](
+                    source, low.get('saltenv', low.get('__env__', 'base'))))
+            else:
+                # Sources from other places can not be checked cheaply
+                return None
+        if low.get('template'):
+            probes.append(self.opts.get('grains', {}))
+            probes.append(self.opts.get('pillar', {}))
+        for arg, (source, delim_arg) in sorted(
+                six.iteritems(STATE_FINGERPRINT_DATA_ARGS)):
+            keys = low.get(arg)
+            if not keys:
+                continue
+            if not isinstance(keys, list):
+                keys = [keys]
+            delimiter = low.get(delim_arg) or ':'
+            for key in keys:
+                if not isinstance(key, six.string_types):
+                    return None
+                probes.append(salt.utils.data.traverse_dict_and_list(
+                    self.opts.get(source, {}), key, delimiter=delimiter))
+        data = dict((key, val) for key, val in six.iteritems(low)
+                    if not key.startswith('__')
+                    and key not in ('order', 'parallel'))
+        try:
+            return salt.utils.hashutils.sha256_digest(
+                salt.utils.json.dumps([data, probes], sort_keys=True, default=repr))
+        except (TypeError, ValueError):
+            return None
+
+    def _fingerprint_file(self):
+        return os.path.join(self.opts['cachedir'], 'state_fingerprints.p')
+
+    def _load_fingerprints(self):
+        if self.fingerprints is not None:
+            return
+        self.fingerprints = {}
+        try:
+            with salt.utils.files.fopen(self._fingerprint_file(), 'rb') as fp_:
+                self.fingerprints = msgpack_deserialize(fp_.read())
+        except (IOError, OSError):
+            pass
+        except Exception as exc:
+            log.debug('Unable to read the state fingerprints: %s', exc)
+
+    def check_fingerprint(self, low):
+        '''
+        Return a result for a low chunk which did not change since its last
+        successful run, or None if the state has to be run
+        '''
+        if not self.opts.get('state_fingerprint') or self.opts.get('test') \
+                or self.opts.get('state_fingerprint_force') \
+                or low.get('__prereq__'):
+            return None
+        self._load_fingerprints()
+        tag = _gen_tag(low)
+        last = self.fingerprints.get(tag)
+        if not last:
+            return None
+        ttl = self.opts.get('state_fingerprint_ttl', 3600)
+        if time.time() - last['time'] > ttl:
+            return None
+        if last['fingerprint'] != self._fingerprint(low):
+            return None
+        # The entry goes along with the result, so that it is kept as it is
+        # when the chunk was skipped in another process
+        return {'name': low['name'],
+                'result': True,
+                'changes': {},
+                'comment': 'State was not run, it did not change since its '
+                           'last successful run',
+                '__fingerprint__': last}
+
+    def save_fingerprints(self, chunks, running):
+        '''
+        Record the fingerprints of the chunks which ran successfully, the
+        fingerprints of skipped chunks are kept until their TTL expires. The
+        fingerprints returned along with the results of the chunks, for the
+        chunks skipped or run in separate processes, are used as they are.
+        '''
+        if not self.opts.get('state_fingerprint') or self.opts.get('test'):
+            return
+        self._load_fingerprints()
+        now = time.time()
+        for low in chunks:
+            tag = _gen_tag(low)
+            ret = running.get(tag)
+            entry = ret.pop('__fingerprint__', None) if ret else None
+            if not ret or ret.get('result') is not True \
+                    or not ret.get('__state_ran__', True):
+                self.fingerprints.pop(tag, None)
+                continue
+            if entry:
+                self.fingerprints[tag] = entry
+                continue
+            fingerprint = self._fingerprint(low)
+            if fingerprint:
+                self.fingerprints[tag] = {'fingerprint': fingerprint,
+                                          'time': now}
+        with salt.utils.files.set_umask(0o077):
+            try:
+                with salt.utils.files.fopen(self._fingerprint_file(), 'w+b') as fp_:
+                    fp_.write(msgpack_serialize(self.fingerprints))
+            except (IOError, OSError):
+                log.error('Unable to write the state fingerprints to %s',
+                          self._fingerprint_file())
+
     def _mod_init(self, low):
         '''
         Check the module initialization function, if this is the first run
@@ -945,6 +1279,15 @@ class State(object):
         '''
         self.__run_num = 0
 
+    def get_chunk_index(self, chunks):
+        '''
+        Return the requisite index for the passed chunks, the index is only
+        rebuilt when a different or modified list of chunks is passed in
+        '''
+        if self.chunk_index is None or not self.chunk_index.current(chunks):
+            self.chunk_index = ChunkIndex(chunks)
+        return self.chunk_index
+
     def _load_states(self):
         '''
         Read the state loader value and loadup the correct states subsystem
@@ -1004,6 +1347,7 @@ class State(object):
                 log.error('Error encountered during module reload. Modules were not reloaded.')
             except TypeError:
                 log.error('Error encountered during module reload. Modules were not reloaded.')
+        salt.loader.reset_index(self.opts)
         self.load_modules()
         if not self.opts.get('local', False) and self.opts.get('multiprocessing', True):
             self.functions['saltutil.refresh_modules']()
@@ -1761,6 +2105,14 @@ class State(object):
         # duration in milliseconds.microseconds
         duration = (delta.seconds * 1000000 + delta.microseconds) / 1000.0
         ret['duration'] = duration
+        if ret.get('result') is True and self.opts.get('state_fingerprint') \
+                and not self.opts.get('test'):
+            # The parent process only sees the files once all the parallel
+            # states are done, fingerprint them as this state left them
+            fingerprint = self._fingerprint(low)
+            if fingerprint:
+                ret['__fingerprint__'] = {'fingerprint': fingerprint,
+                                          'time': time.time()}
 
         troot = os.path.join(self.opts['cachedir'], self.jid)
         tfile = os.path.join(troot, _clean_tag(tag))
@@ -1913,8 +2265,11 @@ class State(object):
 
             if 'result' not in ret or ret['result'] is False:
                 self.states.inject_globals = inject_globals
+                fingerprint_ret = self.check_fingerprint(low)
                 if self.mocked:
                     ret = mock_ret(cdata)
+                elif fingerprint_ret:
+                    ret = fingerprint_ret
                 else:
                     # Execute the state function
                     if not low.get('__prereq__') and low.get('parallel'):
@@ -2129,10 +2484,15 @@ class State(object):
                         self.__run_num += 1
                         chunks.remove(low)
                         break
+        if self.opts.get('state_executor', 'sequential') == 'dag' and self.jid:
+            running = self.call_chunks_dag(chunks)
+            self.save_fingerprints(chunks, running)
+            return dict(list(disabled.items()) + list(running.items()))
         running = {}
         for low in chunks:
             if '__FAILHARD__' in running:
                 running.pop('__FAILHARD__')
+                self.save_fingerprints(chunks, running)
                 return running
             tag = _gen_tag(low)
             if tag not in running:
@@ -2142,15 +2502,155 @@ class State(object):
                     break
                 running = self.call_chunk(low, running, chunks)
                 if self.check_failhard(low, running):
+                    self.save_fingerprints(chunks, running)
                     return running
             self.active = set()
         while True:
             if self.reconcile_procs(running):
                 break
             time.sleep(0.01)
+        self.save_fingerprints(chunks, running)
         ret = dict(list(disabled.items()) + list(running.items()))
         return ret
 
+    def _chunk_deps(self, low, index):
+        '''
+        Return the tags of the chunks the passed chunk has to wait for
+        '''
+        deps = set()
+        for requisite in STATE_DAG_REQUISITES:
+            for req in low.get(requisite) or ():
+                if isinstance(req, six.string_types):
+                    req = {'id': req}
+                try:
+                    req = trim_req(req)
+                    req_key = next(iter(req))
+                    found = index.find(req_key, req[req_key])
+                except (KeyError, TypeError, StopIteration):
+                    # Invalid requisites are reported by call_chunk
+                    continue
+                deps.update(_gen_tag(chunk) for chunk in found)
+        deps.discard(_gen_tag(low))
+        return deps
+
+    def _chunk_order_deps(self, chunks):
+        '''
+        Return the tags of the chunks each chunk has to wait for because of
+        its order, the chunks of the previous order. The orders assigned by
+        state_auto_order are not explicit, these chunks all share the level of
+        the first of them.
+        '''
+        def _auto(low):
+            # The names of a state only add a fraction to its order, and an
+            # extend may have replaced the auto order with an explicit one
+            return '__auto_order__' in low and \
+                int(low.get('order', 0)) == low['__auto_order__']
+
+        auto = [int(low['order']) for low in chunks if _auto(low)]
+        default = min(auto) if auto else None
+
+        def _level(low):
+            return default if _auto(low) else int(low.get('order', 0))
+
+        levels = {}
+        for low in chunks:
+            levels.setdefault(_level(low), set()).add(_gen_tag(low))
+        previous = {}
+        last = set()
+        for level in sorted(levels):
+            previous[level] = last
+            last = levels[level]
+        return dict((_gen_tag(low), previous[_level(low)]) for low in chunks)
+
+    def call_chunks_dag(self, chunks):
+        '''
+        Run the chunks as soon as the states they depend on have finished,
+        running up to state_executor_workers states at the same time in
+        separate processes. Ready states are started in the order of the
+        chunks, and a state waits for the states with a lower explicit order.
+        '''
+        index = self.get_chunk_index(chunks)
+        workers = max(1, int(self.opts.get('state_executor_workers', 4)))
+        serial = set(self.opts.get('state_executor_serial') or ())
+        order_deps = self._chunk_order_deps(chunks)
+        deps = dict((_gen_tag(low),
+                     self._chunk_deps(low, index) | order_deps[_gen_tag(low)])
+                    for low in chunks)
+        running = {}
+        pending = list(chunks)
+        inflight = {}
+        stop = False
+        while pending and not stop:
+            self.reconcile_procs(running)
+            for tag in list(inflight):
+                if 'proc' not in running[tag]:
+                    if self.check_failhard(inflight.pop(tag), running):
+                        stop = True
+            if stop:
+                break
+            started = False
+            waiting = []
+            for low in pending:
+                tag = _gen_tag(low)
+                if tag in running:
+                    # Already run as the requisite of another chunk
+                    continue
+                if stop or any(dep not in running or 'proc' in running[dep]
+                               for dep in deps[tag]):
+                    waiting.append(low)
+                    continue
+                solo = ('prereq' in low or 'prerequired' in low or
+                        low.get('__prereq__'))
+                inline = solo or 'watch' in low or 'watch_any' in low
+                same_state = low['state'] in serial and any(
+                    ilow['state'] == low['state']
+                    for ilow in six.itervalues(inflight))
+                if (solo and inflight) or same_state or \
+                        (not inline and len(inflight) >= workers):
+                    waiting.append(low)
+                    continue
+                if self.check_pause(low) == 'kill':
+                    stop = True
+                    continue
+                self.active = set()
+                if inline:
+                    # prereq needs the state to be run in this process,
+                    # and mod_watch needs the result of the state call
+                    running = self.call_chunk(low, running, chunks)
+                    if '__FAILHARD__' in running or \
+                            self.check_failhard(low, running):
+                        stop = True
+                else:
+                    running = self.call_chunk(
+                        dict(low, parallel=True), running, chunks)
+                    if 'proc' in running.get(tag, {}):
+                        inflight[tag] = low
+                    elif '__FAILHARD__' in running or \
+                            self.check_failhard(low, running):
+                        stop = True
+                started = True
+            pending = waiting
+            if not started and pending and not stop:
+                if inflight:
+                    time.sleep(0.01)
+                else:
+                    # Nothing can be started, this is a requisite loop or a
+                    # requisite which will never run, let call_chunk deal
+                    # with it
+                    low = pending.pop(0)
+                    self.active = set()
+                    running = self.call_chunk(low, running, chunks)
+                    if '__FAILHARD__' in running or \
+                            self.check_failhard(low, running):
+                        stop = True
+        self.active = set()
+        while True:
+            if self.reconcile_procs(running):
+                break
+            time.sleep(0.01)
+        running.pop('__FAILHARD__', None)
+        return running
+
     def check_failhard(self, low, running):
         '''
         Check if the low data chunk should send a failhard signal
@@ -2292,46 +2792,34 @@ class State(object):
                 'onchanges_any': []}
         if pre:
             reqs['prerequired'] = []
+        index = self.get_chunk_index(chunks)
         for r_state in reqs:
             if r_state in low and low[r_state] is not None:
                 for req in low[r_state]:
                     if isinstance(req, six.string_types):
                         req = {'id': req}
                     req = trim_req(req)
-                    found = False
-                    for chunk in chunks:
-                        req_key = next(iter(req))
-                        req_val = req[req_key]
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                found = True
-                                reqs[r_state].append(chunk)
-                            continue
+                    req_key = next(iter(req))
+                    req_val = req[req_key]
+                    if req_val is None:
+                        return 'unmet', ()
+                    if req_key != 'sls' and chunks:
                         try:
-                            if isinstance(req_val, six.string_types):
-                                if (fnmatch.fnmatch(chunk['name'], req_val) or
-                                    fnmatch.fnmatch(chunk['__id__'], req_val)):
-                                    if req_key == 'id' or chunk['state'] == req_key:
-                                        found = True
-                                        reqs[r_state].append(chunk)
-                            else:
+                            if not isinstance(req_val, six.string_types):
                                 raise KeyError
-                        except KeyError as exc:
-                            raise SaltRenderError(
-                                'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk['name']))
-                        except TypeError:
-                            # On Python 2, the above req_val, being an OrderedDict, will raise a KeyError,
+                            found = index.find(req_key, req_val)
+                        except (KeyError, TypeError):
+                            # On Python 2, an OrderedDict req_val will raise a KeyError,
                             # however on Python 3 it will raise a TypeError
                             # This was found when running tests.unit.test_state.StateCompilerTestCase.test_render_error_on_invalid_requisite
                             raise SaltRenderError(
                                 'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk['name']))
+                                    req_key, chunks[0]['name']))
+                    else:
+                        found = index.find(req_key, req_val)
                     if not found:
                         return 'unmet', ()
+                    reqs[r_state].extend(found)
         fun_stats = set()
         for r_state, chunks in six.iteritems(reqs):
             req_stats = set()
@@ -2340,10 +2828,19 @@ class State(object):
             else:
                 run_dict = running
 
-            while True:
-                if self.reconcile_procs(run_dict):
-                    break
-                time.sleep(0.01)
+            if self.opts.get('state_executor', 'sequential') == 'dag' \
+                    and self.jid:
+                # Only wait for the parallel states which are requisites of
+                # this state, the dag executor keeps the others running
+                while any('proc' in run_dict.get(_gen_tag(chunk), {})
+                          for chunk in chunks):
+                    self.reconcile_procs(run_dict)
+                    time.sleep(0.01)
+            else:
+                while True:
+                    if self.reconcile_procs(run_dict):
+                        break
+                    time.sleep(0.01)
 
             for chunk in chunks:
                 tag = _gen_tag(chunk)
@@ -2474,6 +2971,7 @@ class State(object):
         else:
             status, reqs = self.check_requisite(low, running, chunks)
         if status == 'unmet':
+            index = self.get_chunk_index(chunks)
             lost = {}
             reqs = []
             for requisite in requisites:
@@ -2484,29 +2982,15 @@ class State(object):
                     if isinstance(req, six.string_types):
                         req = {'id': req}
                     req = trim_req(req)
-                    found = False
                     req_key = next(iter(req))
                     req_val = req[req_key]
-                    for chunk in chunks:
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                reqs.append(chunk)
-                                found = True
-                            continue
-                        if (fnmatch.fnmatch(chunk['name'], req_val) or
-                            fnmatch.fnmatch(chunk['__id__'], req_val)):
-                            if req_key == 'id' or chunk['state'] == req_key:
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                elif requisite == 'prerequired':
-                                    chunk['__prerequired__'] = True
-                                reqs.append(chunk)
-                                found = True
+                    found = index.find(req_key, req_val)
+                    for chunk in found:
+                        if requisite == 'prereq':
+                            chunk['__prereq__'] = True
+                        elif requisite == 'prerequired' and req_key != 'sls':
+                            chunk['__prerequired__'] = True
+                        reqs.append(chunk)
                     if not found:
                         lost[requisite].append(req)
             if lost['require'] or lost['watch'] or lost['prereq'] \
@@ -2682,6 +3166,7 @@ class State(object):
         '''
         Find all of the listen routines and call the associated mod_watch runs
         '''
+        index = self.get_chunk_index(chunks)
         listeners = []
         crefs = {}
         for chunk in chunks:
@@ -2698,14 +3183,10 @@ class State(object):
             for key, val in six.iteritems(l_dict):
                 for listen_to in val:
                     if not isinstance(listen_to, dict):
-                        found = False
-                        for chunk in chunks:
-                            if chunk['__id__'] == listen_to or \
-                               chunk['name'] == listen_to:
-                                listen_to = {chunk['state']: chunk['__id__']}
-                                found = True
+                        found = index.find_id_or_name(listen_to)
                         if not found:
                             continue
+                        listen_to = {found[-1]['state']: found[-1]['__id__']}
                     for lkey, lval in six.iteritems(listen_to):
                         if not any(lkey == cref[0] and lval in cref for cref in crefs):
                             rerror = {_l_tag(lkey, lval):
@@ -2770,6 +3251,7 @@ class State(object):
             return errors
         # Compile and verify the raw chunks
         chunks = self.compile_high_data(high, orchestration_jid)
+        self.get_chunk_index(chunks)
 
         # If there are extensions in the highstate, process them and update
         # the low data chunks
@@ -2926,6 +3408,9 @@ class BaseHighState(object):
         self.avail = self.__gather_avail()
         self.serial = salt.payload.Serial(self.opts)
         self.building_highstate = OrderedDict()
+        self.render_cache_stats = {'hits': 0, 'misses': 0}
+        self._render_cache_context = None
+        self.prerendered = {}
 
     def __gather_avail(self):
         '''
@@ -3442,7 +3927,11 @@ class BaseHighState(object):
         '''
         errors = []
         if not local:
-            state_data = self.client.get_state(sls, saltenv)
+            prerendered = self.prerendered.get('{0}:{1}'.format(saltenv, sls))
+            if prerendered:
+                state_data = prerendered['data']
+            else:
+                state_data = self.client.get_state(sls, saltenv)
             fn_ = state_data.get('dest', False)
         else:
             fn_ = sls
@@ -3460,15 +3949,12 @@ class BaseHighState(object):
             )
         else:
             try:
-                state = compile_template(fn_,
-                                         self.state.rend,
-                                         self.state.opts['renderer'],
-                                         self.state.opts['renderer_blacklist'],
-                                         self.state.opts['renderer_whitelist'],
-                                         saltenv,
-                                         sls,
-                                         rendered_sls=mods
-                                         )
+                state = self._render_sls(
+                    fn_,
+                    saltenv,
+                    sls,
+                    mods,
+                    None if local else state_data.get('source'))
             except SaltRenderError as exc:
                 msg = 'Rendering SLS \'{0}:{1}\' failed: {2}'.format(
                     saltenv, sls, exc
@@ -3621,6 +4107,157 @@ class BaseHighState(object):
             state = {}
         return state, errors
 
+    def _render_sls(self, fn_, saltenv, sls, mods, source=None):
+        '''
+        Render an SLS file, when state_render_cache is enabled the rendered
+        data is reused as long as the file, the templates it pulls in, the
+        pillar and the grains did not change
+        '''
+        key, cache_fn, state = self._read_render_cache(fn_, saltenv, sls, source)
+        if state is not None:
+            self.render_cache_stats['hits'] += 1
+            log.debug('Using the render cache for SLS %s:%s', saltenv, sls)
+            return state
+        if key:
+            self.render_cache_stats['misses'] += 1
+        prerendered = self.prerendered.pop('{0}:{1}'.format(saltenv, sls), {})
+        if 'state' in prerendered and prerendered['data'].get('dest') == fn_:
+            state = prerendered['state']
+        else:
+            state = compile_template(fn_,
+                                     self.state.rend,
+                                     self.state.opts['renderer'],
+                                     self.state.opts['renderer_blacklist'],
+                                     self.state.opts['renderer_whitelist'],
+                                     saltenv,
+                                     sls,
+                                     rendered_sls=mods
+                                     )
+        if cache_fn:
+            try:
+                data = msgpack_serialize({'key': key, 'state': state})
+            except TypeError:
+                # Renderers like pydsl do not return serializable data
+                return state
+            try:
+                cache_dir = os.path.dirname(cache_fn)
+                if not os.path.isdir(cache_dir):
+                    os.makedirs(cache_dir)
+                with salt.utils.files.set_umask(0o077):
+                    # Replace the file at once, for the state runs reading it
+                    with salt.utils.atomicfile.atomic_open(cache_fn, 'w+b') as fp_:
+                        fp_.write(data)
+            except (IOError, OSError) as exc:
+                log.error('Unable to write render cache file %s: %s', cache_fn, exc)
+        return state
+
+    def _read_render_cache(self, fn_, saltenv, sls, source=None):
+        '''
+        Return the render cache key and file of an SLS file, and its cached
+        rendered data if the cache is current
+        '''
+        if not self.opts.get('state_render_cache'):
+            return None, None, None
+        key = self._render_cache_key(fn_, saltenv, sls, source)
+        if not key:
+            return None, None, None
+        cache_fn = os.path.join(
+            self.opts['cachedir'],
+            'render_cache',
+            salt.utils.hashutils.sha256_digest(
+                '{0}:{1}'.format(saltenv, sls)) + '.p')
+        try:
+            with salt.utils.files.fopen(cache_fn, 'rb') as fp_:
+                cached = msgpack_deserialize(
+                    fp_.read(), object_pairs_hook=OrderedDict)
+            if cached.get('key') == key:
+                return key, cache_fn, cached['state']
+        except (IOError, OSError):
+            pass
+        except Exception as exc:
+            log.debug('Unable to read render cache file %s: %s', cache_fn, exc)
+        return key, cache_fn, None
+
+    def _render_cache_key(self, fn_, saltenv, sls, source=None):
+        '''
+        Return the render cache key of an SLS file, or None if the file can
+        not be cached
+        '''
+        if self._render_cache_context is None:
+            try:
+                self._render_cache_context = salt.utils.hashutils.sha256_digest(
+                    salt.utils.json.dumps(
+                        [salt.version.__version__,
+                         self.opts.get('id'),
+                         self.state.opts['renderer'],
+                         self.state.opts.get('renderer_blacklist'),
+                         self.state.opts.get('renderer_whitelist'),
+                         self.opts.get('jinja_env', {}),
+                         self.opts.get('jinja_sls_env', {}),
+                         self.opts.get('jinja_lstrip_blocks', False),
+                         self.opts.get('jinja_trim_blocks', False),
+                         self.state.opts.get('grains', {}),
+                         self.state.opts.get('pillar', {})],
+                        sort_keys=True))
+            except (TypeError, ValueError) as exc:
+                log.debug('Disabling the render cache, the pillar or grains '
+                          'can not be hashed: %s', exc)
+                self._render_cache_context = ''
+        if not self._render_cache_context:
+            return None
+        if source and source.startswith('salt://'):
+            base = os.path.dirname(source[7:])
+        else:
+            base = os.path.dirname(sls.replace('.', '/'))
+        hashes = []
+        seen = set()
+        files = [(fn_, base)]
+        while files:
+            path, base = files.pop(0)
+            try:
+                with salt.utils.files.fopen(path, 'rb') as fp_:
+                    data = fp_.read()
+            except (IOError, OSError, TypeError):
+                hashes.append('')
+                continue
+            hashes.append(salt.utils.hashutils.sha256_digest(data))
+            refs = template_refs(
+                salt.utils.stringutils.to_unicode(data, errors='replace'))
+            if refs is None:
+                log.debug('Not using the render cache for SLS %s:%s, %s pulls '
+                          'in a template named by an expression', saltenv, sls, path)
+                return None
+            for ref in refs:
+                if ref.startswith('.'):
+                    ref = os.path.normpath(os.path.join(base, ref))
+                ref = ref.lstrip('/').replace(os.sep, '/')
+                if ref in seen:
+                    continue
+                seen.add(ref)
+                hashes.append(ref)
+                files.append((self.client.cache_file(
+                    salt.utils.url.create(ref), saltenv), os.path.dirname(ref)))
+        return salt.utils.hashutils.sha256_digest(
+            ':'.join([self._render_cache_context, saltenv, sls] + hashes))
+
+    def render_cache_ret(self, ret):
+        '''
+        Add the render cache hit and miss counts to a state run return
+        '''
+        if not self.opts.get('state_render_cache') or not isinstance(ret, dict):
+            return ret
+        stats = dict(self.render_cache_stats)
+        ret['render_cache_|-stats_|-stats_|-None'] = {
+            'result': True,
+            'name': 'Render cache',
+            'changes': {},
+            'comment': '{0} SLS files served from the render cache, '
+                       '{1} rendered'.format(stats['hits'], stats['misses']),
+            'render_cache': stats,
+            '__run_num__': len(ret),
+        }
+        return ret
+
     def _handle_iorder(self, state):
         '''
         Take a state and apply the iorder system
@@ -3655,6 +4292,11 @@ class BaseHighState(object):
                         state[name][s_dec].append(
                                 {'order': self.iorder}
                                 )
+                        # Record the order was not set by the user, the dag
+                        # executor does not wait on these
+                        state[name][s_dec].append(
+                                {'__auto_order__': self.iorder}
+                                )
                         self.iorder += 1
         return state
 
@@ -3760,6 +4402,116 @@ class BaseHighState(object):
                 errors.append(err)
             state.setdefault('__exclude__', []).extend(exc)
 
+    def _include_targets(self, state, sls, saltenv, source):
+        '''
+        Return the saltenv and sls pairs most likely included by a rendered
+        SLS file, render_state does the actual include resolution
+        '''
+        targets = []
+        if not isinstance(state, dict) or \
+                not isinstance(state.get('include'), list):
+            return targets
+        for inc_sls in state['include']:
+            env_key = saltenv
+            if isinstance(inc_sls, dict):
+                if len(inc_sls) != 1:
+                    continue
+                env_key, inc_sls = next(six.iteritems(inc_sls))
+            if not isinstance(inc_sls, six.string_types) or \
+                    env_key not in self.avail:
+                continue
+            if inc_sls.startswith('.'):
+                levels, include = re.match(r'^(\.+)(.*)$', inc_sls).groups()
+                p_comps = sls.split('.')
+                if source.endswith('/init.sls'):
+                    p_comps.append('init')
+                if len(levels) > len(p_comps):
+                    continue
+                inc_sls = '.'.join(p_comps[:-len(levels)] + [include])
+            for target in fnmatch.filter(self.avail[env_key], inc_sls) or [inc_sls]:
+                targets.append((env_key, target))
+        return targets
+
+    def prerender(self, matches):
+        '''
+        Render the matched SLS files and the SLS files they include in a pool
+        of state_render_workers processes, one level of includes at a time.
+        The rendered data is then picked up by render_state, which merges it
+        and reports errors as if the files had been rendered serially.
+        '''
+        workers = self.opts.get('state_render_workers') or 0
+        if workers < 2:
+            return
+        # The workers need to be forked to inherit the renderers, whatever
+        # the default start method is
+        if hasattr(multiprocessing, 'get_context'):
+            try:
+                context = multiprocessing.get_context('fork')
+            except ValueError:
+                return
+        elif salt.utils.platform.is_windows():
+            return
+        else:
+            context = multiprocessing
+        frontier = []
+        for saltenv, states in six.iteritems(matches):
+            for sls_match in states:
+                statefiles = fnmatch.filter(self.avail.get(saltenv, []), sls_match)
+                frontier.extend((saltenv, sls) for sls in statefiles or [sls_match])
+        seen = set()
+        timeout = self.opts.get('state_render_workers_timeout') or 120
+        pool = context.Pool(workers, _render_worker_init, (self,))
+        try:
+            while frontier:
+                jobs = []
+                nxt = []
+                for saltenv, sls in frontier:
+                    r_env = '{0}:{1}'.format(saltenv, sls)
+                    if r_env in seen:
+                        continue
+                    seen.add(r_env)
+                    # The SLS files are fetched by this process, the workers
+                    # only fetch the templates these files import, through
+                    # a file client of their own
+                    state_data = self.client.get_state(sls, saltenv)
+                    self.prerendered[r_env] = {'data': state_data}
+                    fn_ = state_data.get('dest')
+                    if not fn_:
+                        continue
+                    cached = self._read_render_cache(
+                        fn_, saltenv, sls, state_data.get('source'))[2]
+                    if cached is not None:
+                        nxt.extend(self._include_targets(
+                            cached, sls, saltenv, state_data.get('source', '')))
+                        continue
+                    # The SLS files rendered before this one, as the serial
+                    # rendering passes them
+                    jobs.append((r_env, fn_, saltenv, sls, set(seen)))
+                try:
+                    results = pool.map_async(
+                        _render_worker, [job[1:] for job in jobs],
+                        chunksize=1).get(timeout)
+                except multiprocessing.TimeoutError:
+                    # A worker may hang on the master, the files without
+                    # rendered data are rendered by render_state
+                    log.warning('The render workers did not render the SLS '
+                                'files within %s seconds, rendering them '
+                                'one after the other', timeout)
+                    break
+                for (r_env, _, saltenv, sls, _), (rendered, state) in zip(jobs, results):
+                    if not rendered:
+                        continue
+                    self.prerendered[r_env]['state'] = state
+                    nxt.extend(self._include_targets(
+                        state,
+                        sls,
+                        saltenv,
+                        self.prerendered[r_env]['data'].get('source', '')))
+                frontier = nxt
+        finally:
+            pool.terminate()
+            pool.join()
+
     def render_highstate(self, matches):
         '''
         Gather the state files and render them into a single unified salt
@@ -3769,6 +4521,7 @@ class BaseHighState(object):
         all_errors = []
         mods = set()
         statefiles = []
+        self.prerender(matches)
         for saltenv, states in six.iteritems(matches):
             for sls_match in states:
                 try:
@@ -3804,6 +4557,7 @@ class BaseHighState(object):
                                     'in env \'{1}\''.format(sls_match, saltenv))
                     all_errors.extend(errors)
 
+        self.prerendered = {}
         self.clean_duplicate_extends(highstate)
         return highstate, all_errors
 
@@ -3952,7 +4706,7 @@ class BaseHighState(object):
             except (IOError, OSError):
                 log.error('Unable to write to "state.highstate" cache file %s', cfn)
 
-        return self.state.call_high(high, orchestration_jid)
+        return self.render_cache_ret(self.state.call_high(high, orchestration_jid))
 
     def compile_highstate(self):
         '''
@@ -468,7 +468,16 @@ def _gen_recurse_managed_files(
     if not srcpath.endswith(posixpath.sep):
         # we're searching for things that start with this *directory*.
         srcpath = srcpath + posixpath.sep
-    fns_ = __salt__['cp.list_master'](senv, srcpath)
+    # The manifest also primes the hashes of the files, so the file.managed
+    # calls below don't need to ask the master for the hash of each file.
+    # Without the manifest cache these hashes would not be kept.
+    manifest = None
+    if __opts__.get('file_manifest_cache_time', 0) > 0:
+        manifest = __salt__['cp.list_master_manifest'](senv, srcpath)
+    if manifest is not None:
+        fns_ = sorted(manifest)
+    else:
+        fns_ = __salt__['cp.list_master'](senv, srcpath)
 
     # If we are instructed to keep symlinks, then process them.
     if keep_symlinks:
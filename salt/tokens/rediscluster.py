@@ -37,6 +37,9 @@ log = logging.getLogger(__name__)
 
 __virtualname__ = 'rediscluster'
 
+# {(<host>, <port>): <StrictRedisCluster client>, ...}
+REDIS_CLIENTS = {}
+
 
 def __virtual__():
     if not HAS_REDIS:
@@ -48,12 +51,17 @@ def __virtual__():
 def _redis_client(opts):
     '''
     Connect to the redis host and return a StrictRedisCluster client object.
+    The client and its connection pool are reused by the next calls.
     If connection fails then return None.
     '''
     redis_host = opts.get("eauth_redis_host", "localhost")
     redis_port = opts.get("eauth_redis_port", 6379)
+    if (redis_host, redis_port) in REDIS_CLIENTS:
+        return REDIS_CLIENTS[(redis_host, redis_port)]
     try:
-        return rediscluster.StrictRedisCluster(host=redis_host, port=redis_port)
+        client = rediscluster.StrictRedisCluster(host=redis_host, port=redis_port)
+        REDIS_CLIENTS[(redis_host, redis_port)] = client
+        return client
     except rediscluster.exceptions.RedisClusterException as err:
         log.warning(
             'Failed to connect to redis at %s:%s - %s',
@@ -76,26 +84,21 @@ def mk_token(opts, tdata):
     if not redis_client:
         return {}
     hash_type = getattr(hashlib, opts.get('hash_type', 'md5'))
-    tok = six.text_type(hash_type(os.urandom(512)).hexdigest())
-    try:
-        while redis_client.get(tok) is not None:
-            tok = six.text_type(hash_type(os.urandom(512)).hexdigest())
-    except Exception as err:
-        log.warning(
-            'Authentication failure: cannot get token %s from redis: %s',
-            tok, err
-        )
-        return {}
-    tdata['token'] = tok
     serial = salt.payload.Serial(opts)
-    try:
-        redis_client.set(tok, serial.dumps(tdata))
-    except Exception as err:
-        log.warning(
-            'Authentication failure: cannot save token %s to redis: %s',
-            tok, err
-        )
-        return {}
+    stored = False
+    while not stored:
+        tok = six.text_type(hash_type(os.urandom(512)).hexdigest())
+        tdata['token'] = tok
+        # Only set the token if it doesn't exist yet, checking and saving it
+        # in a single request
+        try:
+            stored = redis_client.set(tok, serial.dumps(tdata), nx=True)
+        except Exception as err:
+            log.warning(
+                'Authentication failure: cannot save token %s to redis: %s',
+                tok, err
+            )
+            return {}
     return tdata
 
 
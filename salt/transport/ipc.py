@@ -468,7 +468,7 @@ class IPCMessagePublisher(object):
     A Tornado IPC Publisher similar to Tornado's TCPServer class
     but using either UNIX domain sockets or TCP sockets
     '''
-    def __init__(self, opts, socket_path, io_loop=None):
+    def __init__(self, opts, socket_path, io_loop=None, filter_func=None):
         '''
         Create a new Tornado IPC server
         :param dict opts: Salt options
@@ -481,16 +481,25 @@ class IPCMessagePublisher(object):
                                     which case it is used as the port
                                     for a tcp localhost connection.
         :param IOLoop io_loop: A Tornado ioloop to handle scheduling
+        :param func filter_func: A function taking the tag passed to
+                                 publish() and a tag filter registered by a
+                                 subscriber, returning True if the message
+                                 should be sent to that subscriber. If not
+                                 set, tag filters from subscribers are
+                                 ignored.
         '''
         self.opts = opts
         self.socket_path = socket_path
         self._started = False
+        self.filter_func = filter_func
 
         # Placeholders for attributes to be populated by method calls
         self.sock = None
         self.io_loop = io_loop or IOLoop.current()
         self._closing = False
         self.streams = set()
+        # stream -> tag filter registered by the subscriber
+        self.tag_filters = {}
 
     def start(self):
         '''
@@ -524,15 +533,49 @@ class IPCMessagePublisher(object):
         except tornado.iostream.StreamClosedError:
             log.trace('Client disconnected from IPC %s', self.socket_path)
             self.streams.discard(stream)
+            self.tag_filters.pop(stream, None)
         except Exception as exc:
             log.error('Exception occurred while handling stream: %s', exc)
             if not stream.closed():
                 stream.close()
             self.streams.discard(stream)
+            self.tag_filters.pop(stream, None)
 
-    def publish(self, msg):
+    @tornado.gen.coroutine
+    def _read_tag_filters(self, stream):
+        '''
+        Read the tag filters sent by a subscriber. A message of
+        ``{'tag_filter': None}`` removes the filter.
+        '''
+        if six.PY2:
+            encoding = None
+        else:
+            encoding = 'utf-8'
+        unpacker = msgpack.Unpacker(encoding=encoding)
+        while not stream.closed():
+            try:
+                wire_bytes = yield stream.read_bytes(4096, partial=True)
+                unpacker.feed(wire_bytes)
+                for framed_msg in unpacker:
+                    body = framed_msg['body']
+                    if not isinstance(body, dict) or 'tag_filter' not in body:
+                        continue
+                    if body['tag_filter'] is None:
+                        self.tag_filters.pop(stream, None)
+                    else:
+                        self.tag_filters[stream] = body['tag_filter']
+            except tornado.iostream.StreamClosedError:
+                break
+            except Exception as exc:
+                log.error('Exception occurred while reading tag filter: %s', exc)
+                break
+
+    def publish(self, msg, tag=None):
         '''
         Send message to all connected sockets
+
+        If a ``tag`` is passed, subscribers which registered a tag filter only
+        get the message if the tag matches it.
         '''
         if not len(self.streams):
             return
@@ -540,6 +583,14 @@ class IPCMessagePublisher(object):
         pack = salt.transport.frame.frame_msg_ipc(msg, raw_body=True)
 
         for stream in self.streams:
+            if tag is not None and stream in self.tag_filters:
+                try:
+                    if not self.filter_func(tag, self.tag_filters[stream]):
+                        continue
+                except Exception as exc:
+                    log.error('Invalid tag filter %s: %s',
+                              self.tag_filters[stream], exc)
+                    del self.tag_filters[stream]
             self.io_loop.spawn_callback(self._write, stream, pack)
 
     def handle_connection(self, connection, address):
@@ -558,8 +609,11 @@ class IPCMessagePublisher(object):
 
             def discard_after_closed():
                 self.streams.discard(stream)
+                self.tag_filters.pop(stream, None)
 
             stream.set_close_callback(discard_after_closed)
+            if self.filter_func is not None:
+                self.io_loop.spawn_callback(self._read_tag_filters, stream)
         except Exception as exc:
             log.error('IPC streaming error: %s', exc)
 
@@ -575,6 +629,7 @@ class IPCMessagePublisher(object):
         for stream in self.streams:
             stream.close()
         self.streams.clear()
+        self.tag_filters.clear()
         if hasattr(self.sock, 'close'):
             self.sock.close()
 
@@ -623,6 +678,30 @@ class IPCMessageSubscriber(IPCClient):
         self._sync_ioloop_running = False
         self.saved_data = []
         self._sync_read_in_progress = Semaphore()
+        self.tag_filter = None
+
+    @tornado.gen.coroutine
+    def set_tag_filter(self, tag_filter):
+        '''
+        Ask the publisher to only send messages whose tag matches
+        ``tag_filter``. Pass ``None`` to receive all messages again. The
+        filter is sent again whenever the subscriber reconnects.
+
+        Publishers which do not support tag filters ignore it, so the
+        subscriber must still check the tags of the messages it receives.
+        '''
+        self.tag_filter = tag_filter
+        if self.connected():
+            yield self._send_tag_filter()
+
+    @tornado.gen.coroutine
+    def _send_tag_filter(self):
+        pack = salt.transport.frame.frame_msg_ipc(
+            {'tag_filter': self.tag_filter}, raw_body=True)
+        try:
+            yield self.stream.write(pack)
+        except tornado.iostream.StreamClosedError:
+            log.trace('Subscriber disconnected from IPC %s', self.socket_path)
 
     @tornado.gen.coroutine
     def _read_sync(self, timeout):
@@ -738,6 +817,8 @@ class IPCMessageSubscriber(IPCClient):
             except Exception as exc:
                 log.error('Exception occurred while Subscriber connecting: %s', exc)
                 yield tornado.gen.sleep(1)
+        if self.tag_filter is not None:
+            yield self._send_tag_filter()
         yield self._read_async(callback)
 
     def close(self):
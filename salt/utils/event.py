@@ -60,6 +60,8 @@ import hashlib
 import logging
 import datetime
 import sys
+import threading
+import collections
 from collections import MutableMapping
 from multiprocessing.util import Finalize
 from salt.ext.six.moves import range
@@ -72,6 +74,7 @@ import tornado.iostream
 # Import salt libs
 import salt.config
 import salt.payload
+import salt.returners
 import salt.utils.asynchronous
 import salt.utils.cache
 import salt.utils.dicttrim
@@ -207,6 +210,47 @@ def tagify(suffix='', prefix='', base=SALT):
     return TAGPARTER.join([part for part in parts if part])
 
 
+_TAG_FILTER_REGEX = salt.utils.cache.CacheRegex(prepend='^')
+
+
+def _match_tag_filter(tag, tag_filter):
+    '''
+    Return True if the tag matches any of the ``[search_tag, match_type]``
+    pairs in a tag filter registered by a subscriber of an event publisher.
+    Unknown match types match every tag, so that a subscriber never misses
+    an event it is waiting for.
+    '''
+    for search_tag, match_type in tag_filter:
+        if match_type == 'startswith':
+            if tag.startswith(search_tag):
+                return True
+        elif match_type == 'endswith':
+            if tag.endswith(search_tag):
+                return True
+        elif match_type == 'find':
+            if tag.find(search_tag) >= 0:
+                return True
+        elif match_type == 'regex':
+            if _TAG_FILTER_REGEX.get(search_tag).search(tag) is not None:
+                return True
+        elif match_type == 'fnmatch':
+            if fnmatch.fnmatch(tag, search_tag):
+                return True
+        else:
+            return True
+    return False
+
+
+def _package_tag(package):
+    '''
+    Return the tag of a packed event, as built by SaltEvent.pack
+    '''
+    if isinstance(package, six.binary_type):
+        mtag = package.partition(salt.utils.stringutils.to_bytes(TAGEND))[0]
+        return salt.utils.stringutils.to_str(mtag)
+    return package.partition(TAGEND)[0]
+
+
 class SaltEvent(object):
     '''
     Warning! Use the get_event function or the code will not be
@@ -259,6 +303,7 @@ class SaltEvent(object):
         self.puburi, self.pulluri = self.__load_uri(sock_dir, node)
         self.pending_tags = []
         self.pending_events = []
+        self.tag_filter = None
         self.__load_cache_regex()
         if listen and not self.cpub:
             # Only connect to the publisher at initialization time if
@@ -353,6 +398,52 @@ class SaltEvent(object):
             if any(pmatch_func(evt['tag'], ptag) for ptag, pmatch_func in self.pending_tags):
                 self.pending_events.append(evt)
 
+    def set_tag_filter(self, tags, match_type=None):
+        '''
+        Ask the event publisher to only send the events whose tag matches one
+        of the passed tags, instead of every event on the bus. This saves the
+        publisher from sending, and this handle from unpacking, events which
+        would be discarded anyway. Pass ``None`` to receive all events again.
+
+        Only set a filter on event handles which are not shared with code
+        waiting for other tags. Events are still checked against the tag
+        passed to get_event, as the filter is only a hint to the publisher.
+
+        tags
+            A list of tags, or of ``(tag, match_type)`` pairs
+
+        match_type
+            The match type used for tags passed without one. Defaults to the
+            ``event_match_type`` option.
+        '''
+        if tags is None:
+            tag_filter = None
+        else:
+            if match_type is None:
+                match_type = self.opts['event_match_type']
+            tag_filter = []
+            for tag in tags:
+                if isinstance(tag, (list, tuple)):
+                    tag_filter.append([tag[0], tag[1]])
+                else:
+                    tag_filter.append([tag, match_type])
+        if tag_filter == self.tag_filter:
+            return
+        self.tag_filter = tag_filter
+        if self.subscriber is None:
+            # Sent by connect_pub
+            return
+        if self._run_io_loop_sync:
+            with salt.utils.asynchronous.current_ioloop(self.io_loop):
+                try:
+                    self.io_loop.run_sync(
+                        lambda: self.subscriber.set_tag_filter(tag_filter))
+                except Exception:
+                    log.debug('Failed to send the event tag filter', exc_info=True)
+        else:
+            self.io_loop.spawn_callback(
+                self.subscriber.set_tag_filter, tag_filter)
+
     def connect_pub(self, timeout=None):
         '''
         Establish the publish connection
@@ -367,9 +458,13 @@ class SaltEvent(object):
                     self.puburi,
                     io_loop=self.io_loop
                 )
+                self.subscriber.tag_filter = self.tag_filter
                 try:
                     self.io_loop.run_sync(
                         lambda: self.subscriber.connect(timeout=timeout))
+                    if self.tag_filter is not None:
+                        self.io_loop.run_sync(
+                            lambda: self.subscriber.set_tag_filter(self.tag_filter))
                     self.cpub = True
                 except Exception:
                     pass
@@ -379,6 +474,8 @@ class SaltEvent(object):
                 self.puburi,
                 io_loop=self.io_loop
             )
+            # The tag filter is sent by read_async() once connected
+            self.subscriber.tag_filter = self.tag_filter
 
             # For the asynchronous case, the connect will be defered to when
             # set_event_handler() is invoked.
@@ -1012,7 +1109,8 @@ class AsyncEventPublisher(object):
         self.publisher = salt.transport.ipc.IPCMessagePublisher(
             self.opts,
             epub_uri,
-            io_loop=self.io_loop
+            io_loop=self.io_loop,
+            filter_func=_match_tag_filter
         )
 
         self.puller = salt.transport.ipc.IPCMessageServer(
@@ -1031,7 +1129,8 @@ class AsyncEventPublisher(object):
         Get something from epull, publish it out epub, and return the package (or None)
         '''
         try:
-            self.publisher.publish(package)
+            tag = _package_tag(package) if self.publisher.tag_filters else None
+            self.publisher.publish(package, tag=tag)
             return package
         # Add an extra fallback in case a forked process leeks through
         except Exception:
@@ -1104,7 +1203,8 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
             self.publisher = salt.transport.ipc.IPCMessagePublisher(
                 self.opts,
                 epub_uri,
-                io_loop=self.io_loop
+                io_loop=self.io_loop,
+                filter_func=_match_tag_filter
             )
 
             self.puller = salt.transport.ipc.IPCMessageServer(
@@ -1134,7 +1234,8 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
         Get something from epull, publish it out epub, and return the package (or None)
         '''
         try:
-            self.publisher.publish(package)
+            tag = _package_tag(package) if self.publisher.tag_filters else None
+            self.publisher.publish(package, tag=tag)
             return package
         # Add an extra fallback in case a forked process leeks through
         except Exception:
@@ -1161,10 +1262,211 @@ class EventPublisher(salt.utils.process.SignalHandlingMultiprocessingProcess):
         self.close()
 
 
+class EventReturnQueue(object):
+    '''
+    The events waiting to be stored by one event returner. A thread passes
+    them to the returner in batches, so that a slow returner does not delay
+    the others nor the reading of the event bus.
+
+    At most ``max_size`` events are queued. With the ``drop`` overflow policy
+    the oldest events are dropped beyond this limit, with the ``spill`` policy
+    the new events are written to files in ``spill_dir`` and read back once
+    the queue is empty. Spilled events left when the process stops are stored
+    when the queue is created again.
+    '''
+    def __init__(self, name, returner, max_size=10000, overflow='drop', spill_dir=None):
+        self.name = name
+        self.returner = returner
+        self.max_size = max(int(max_size), 1)
+        self.overflow = overflow
+        self.spill_dir = spill_dir if overflow == 'spill' else None
+        self.serial = salt.payload.Serial('msgpack')
+        self.queue = collections.deque()
+        self.cond = threading.Condition()
+        self.stopping = False
+        self.stats = {'events': 0, 'batches': 0, 'errors': 0, 'dropped': 0,
+                      'spilled': 0, 'flush_time_last': 0.0,
+                      'flush_time_mean': 0.0, 'flush_time_max': 0.0}
+        self.spill_files = []
+        self.spill_seq = 0
+        if self.spill_dir:
+            if not os.path.isdir(self.spill_dir):
+                os.makedirs(self.spill_dir)
+            self.spill_files = sorted(
+                (os.path.join(self.spill_dir, fn)
+                 for fn in os.listdir(self.spill_dir)
+                 if fn.endswith('.p')),
+                key=self._spill_seq)
+            if self.spill_files:
+                log.info('Loading %s files of events spilled by event returner %s',
+                         len(self.spill_files), self.name)
+                self.spill_seq = self._spill_seq(self.spill_files[-1]) + 1
+        self.thread = threading.Thread(target=self._run,
+                                       name='EventReturnQueue-{0}'.format(name))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def put(self, events):
+        '''
+        Queue a list of events
+        '''
+        with self.cond:
+            if self.spill_dir and (
+                    self.spill_files or
+                    len(self.queue) + len(events) > self.max_size):
+                # Once events were spilled, the next ones are spilled as well
+                # to be stored in order
+                room = 0 if self.spill_files else self.max_size - len(self.queue)
+                self.queue.extend(events[:room])
+                if events[room:]:
+                    self._spill(events[room:])
+            else:
+                self.queue.extend(events)
+                dropped = len(self.queue) - self.max_size
+                if dropped > 0:
+                    for _ in range(dropped):
+                        self.queue.popleft()
+                    if not self.stats['dropped']:
+                        log.warning('The event returner %s does not keep up, '
+                                    'the oldest queued events are dropped', self.name)
+                    self.stats['dropped'] += dropped
+            self.cond.notify()
+
+    @staticmethod
+    def _spill_seq(path):
+        return int(os.path.basename(path)[:-2])
+
+    def _spill(self, events, first=False):
+        '''
+        Write events to a new spill file, stored after the other spill files
+        or, when ``first`` is set, before them
+        '''
+        if first and self.spill_files:
+            seq = self._spill_seq(self.spill_files[0]) - 1
+        else:
+            seq = self.spill_seq
+            self.spill_seq += 1
+        path = os.path.join(self.spill_dir, '{0:020d}.p'.format(seq))
+        try:
+            with salt.utils.files.fopen(path + '.tmp', 'wb') as fp_:
+                fp_.write(self.serial.dumps(events))
+            os.rename(path + '.tmp', path)
+        except (IOError, OSError) as exc:
+            log.error('Could not spill %s events of event returner %s to %s: %s',
+                      len(events), self.name, path, exc)
+            self.stats['dropped'] += len(events)
+            return
+        if first:
+            self.spill_files.insert(0, path)
+        else:
+            self.spill_files.append(path)
+        self.stats['spilled'] += len(events)
+
+    def _load(self, path):
+        try:
+            with salt.utils.files.fopen(path, 'rb') as fp_:
+                return self.serial.loads(fp_.read())
+        except (IOError, OSError, ValueError) as exc:
+            log.error('Could not read the events spilled by event returner %s '
+                      'to %s: %s', self.name, path, exc)
+            return []
+
+    def _next_spill_file(self):
+        with self.cond:
+            if self.spill_files and not self.stopping:
+                return self.spill_files.pop(0)
+
+    def _run(self):
+        while True:
+            events = []
+            with self.cond:
+                while not self.queue and not self.stopping and not self.spill_files:
+                    self.cond.wait()
+                if self.queue:
+                    events = list(self.queue)
+                    self.queue.clear()
+                elif not self.spill_files or self.stopping:
+                    return
+            paths = []
+            if not events:
+                # Each spill file holds the events of a single put, read
+                # several of them to store the events in batches again
+                while len(events) < self.max_size:
+                    path = self._next_spill_file()
+                    if path is None:
+                        break
+                    paths.append(path)
+                    events.extend(self._load(path))
+            if events:
+                self._send(events)
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _send(self, events):
+        start = time.time()
+        try:
+            self.returner(events)
+        except Exception as exc:
+            self.stats['errors'] += 1
+            log.error('Could not store events - returner \'%s\' raised '
+                      'exception: %s', self.name, exc)
+            # don't waste processing power unnecessarily on converting a
+            # potentially huge dataset to a string
+            if log.level <= logging.DEBUG:
+                log.debug('Event data that caused an exception: %s', events)
+        duration = time.time() - start
+        stats = self.stats
+        stats['batches'] += 1
+        stats['events'] += len(events)
+        stats['flush_time_last'] = duration
+        stats['flush_time_mean'] += (duration - stats['flush_time_mean']) / stats['batches']
+        stats['flush_time_max'] = max(stats['flush_time_max'], duration)
+
+    def get_stats(self):
+        '''
+        Return the queue depth and the statistics of the stored batches
+        '''
+        with self.cond:
+            stats = dict(self.stats, queued=len(self.queue),
+                         spill_files=len(self.spill_files))
+        return stats
+
+    def stop_soon(self):
+        '''
+        Tell the thread to stop once the queued events are stored, without
+        waiting for it
+        '''
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+
+    def stop(self, timeout=None):
+        '''
+        Store the queued events and stop the thread. The events which could
+        not be stored within ``timeout`` seconds are spilled when a spill
+        directory is set.
+        '''
+        self.stop_soon()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            with self.cond:
+                if self.spill_dir and self.queue:
+                    # The queued events are older than the spilled ones
+                    self._spill(list(self.queue), first=True)
+                    self.queue.clear()
+                elif self.queue:
+                    log.warning('Dropping %s events not stored by event returner %s',
+                                len(self.queue), self.name)
+
+
 class EventReturn(salt.utils.process.SignalHandlingMultiprocessingProcess):
     '''
     A dedicated process which listens to the master event bus and queues
-    and forwards events to the specified returner.
+    and forwards events to the specified returners. Each returner stores its
+    events from its own queue, in parallel with the other returners.
     '''
     def __new__(cls, *args, **kwargs):
         if sys.platform.startswith('win'):
@@ -1190,6 +1492,8 @@ class EventReturn(salt.utils.process.SignalHandlingMultiprocessingProcess):
         local_minion_opts['file_client'] = 'local'
         self.minion = salt.minion.MasterMinion(local_minion_opts)
         self.event_queue = []
+        self.returner_queues = None
+        self.stat_clock = time.time()
         self.stop = False
 
     # __setstate__ and __getstate__ are only used on Windows.
@@ -1214,41 +1518,78 @@ class EventReturn(salt.utils.process.SignalHandlingMultiprocessingProcess):
         # Flush and terminate
         if self.event_queue:
             self.flush_events()
+        self.stop_returners()
         self.stop = True
         super(EventReturn, self)._handle_signals(signum, sigframe)
 
+    def _get_returner_queues(self):
+        '''
+        Return the queues of the event returners, creating them on the first
+        call. The returner functions are loaded here, the threads of the queues
+        only call them.
+        '''
+        if self.returner_queues is None:
+            self.returner_queues = {}
+            if isinstance(self.opts['event_return'], list):
+                returners = self.opts['event_return']
+            else:
+                returners = [self.opts['event_return']]
+            for returner in returners:
+                event_return = '{0}.event_return'.format(returner)
+                if event_return not in self.minion.returners:
+                    log.error('Could not store return for event(s) - returner '
+                              '\'%s\' not found.', event_return)
+                    continue
+                self.returner_queues[event_return] = EventReturnQueue(
+                    event_return,
+                    self.minion.returners[event_return],
+                    max_size=self.opts['event_return_queue_max_size'],
+                    overflow=self.opts['event_return_overflow'],
+                    spill_dir=os.path.join(self.opts['cachedir'],
+                                           'event_return_spill',
+                                           returner))
+        return self.returner_queues
+
     def flush_events(self):
-        if isinstance(self.opts['event_return'], list):
-            # Multiple event returners
-            for r in self.opts['event_return']:
-                log.debug('Calling event returner {0}, one of many.'.format(r))
-                event_return = '{0}.event_return'.format(r)
-                self._flush_event_single(event_return)
-        else:
-            # Only a single event returner
-            log.debug('Calling event returner {0}, only one '
-                      'configured.'.format(self.opts['event_return']))
-            event_return = '{0}.event_return'.format(
-                self.opts['event_return']
-                )
-            self._flush_event_single(event_return)
+        '''
+        Pass the queued events to the queue of each event returner
+        '''
+        for event_return, queue in six.iteritems(self._get_returner_queues()):
+            log.debug('Queueing %s events for event returner %s',
+                      len(self.event_queue), event_return)
+            queue.put(self.event_queue)
         del self.event_queue[:]
 
-    def _flush_event_single(self, event_return):
-        if event_return in self.minion.returners:
-            try:
-                self.minion.returners[event_return](self.event_queue)
-            except Exception as exc:
-                log.error('Could not store events - returner \'{0}\' raised '
-                          'exception: {1}'.format(event_return, exc))
-                # don't waste processing power unnecessarily on converting a
-                # potentially huge dataset to a string
-                if log.level <= logging.DEBUG:
-                    log.debug('Event data that caused an exception: {0}'.format(
-                        self.event_queue))
-        else:
-            log.error('Could not store return for event(s) - returner '
-                      '\'%s\' not found.', event_return)
+    def stop_returners(self):
+        '''
+        Wait for the event returners to store the queued events
+        '''
+        if self.returner_queues:
+            # The returners store their events at the same time, they all
+            # get the same deadline
+            for queue in six.itervalues(self.returner_queues):
+                queue.stop_soon()
+            deadline = time.time() + self.opts['event_return_stop_timeout']
+            for queue in six.itervalues(self.returner_queues):
+                queue.stop(max(deadline - time.time(), 0))
+            self.returner_queues = None
+
+    def _post_stats(self):
+        '''
+        Fire an event with the queue depths and flush latencies of the event
+        returners
+        '''
+        now = time.time()
+        if now - self.stat_clock > self.opts['master_stats_event_iter']:
+            data = {'time': now - self.stat_clock,
+                    'returners': dict(
+                        (event_return, queue.get_stats())
+                        for event_return, queue in six.iteritems(self._get_returner_queues()))}
+            return_buffers = salt.returners.get_return_buffer_stats()
+            if return_buffers:
+                data['return_buffers'] = return_buffers
+            self.event.fire_event(data, tagify('EventReturn', 'stats'))
+            self.stat_clock = now
 
     def run(self):
         '''
@@ -1256,6 +1597,11 @@ class EventReturn(salt.utils.process.SignalHandlingMultiprocessingProcess):
         '''
         salt.utils.process.appendproctitle(self.__class__.__name__)
         self.event = get_event('master', opts=self.opts, listen=True)
+        if self.opts['event_return_whitelist']:
+            # Have the publisher drop the events we would not store
+            self.event.set_tag_filter(
+                ['salt/event/exit'] + list(self.opts['event_return_whitelist']),
+                match_type='fnmatch')
         events = self.event.iter_events(full=True)
         self.event.fire_event({}, 'salt/event_listen/start')
         try:
@@ -1266,11 +1612,14 @@ class EventReturn(salt.utils.process.SignalHandlingMultiprocessingProcess):
                     self.event_queue.append(event)
                 if len(self.event_queue) >= self.event_return_queue:
                     self.flush_events()
+                if self.opts['master_stats']:
+                    self._post_stats()
                 if self.stop:
                     break
         finally:  # flush all we have at this moment
             if self.event_queue:
                 self.flush_events()
+            self.stop_returners()
 
     def _filter(self, event):
         '''
@@ -992,6 +992,21 @@ class GitProvider(object):
                 else six.text_type(target)
         return self.branch
 
+    def get_revision(self):
+        '''
+        Return the SHA of the tree checked out for this remote, or None if the
+        checkout target could not be found
+        '''
+        target = self.get_checkout_target()
+        for ref_type in self.ref_types:
+            func = getattr(self, 'get_tree_from_{0}'.format(ref_type), None)
+            if func is None:
+                continue
+            tree = func(target)
+            if tree is not None:
+                return six.text_type(getattr(tree, 'hexsha', None) or tree.id)
+        return None
+
     def get_tree(self, tgt_env):
         '''
         Return a tree object for the specified environment
@@ -2988,6 +3003,12 @@ class GitPillar(GitBase):
                 else:
                     self.pillar_dirs[cachedir] = env
 
+    def revisions(self):
+        '''
+        Return the SHA of the tree checked out for each git_pillar remote
+        '''
+        return dict((repo.id, repo.get_revision()) for repo in self.remotes)
+
     def link_mountpoint(self, repo):
         '''
         Ensure that the mountpoint is present in the correct location and
@@ -6,19 +6,25 @@ Functions for interacting with the job cache
 # Import Python libs
 from __future__ import absolute_import, unicode_literals
 import logging
+import time
 
 # Import Salt libs
+import salt.cache
 import salt.minion
 import salt.utils.jid
 import salt.utils.event
 import salt.utils.verify
+from salt.exceptions import SaltCacheError
 
 log = logging.getLogger(__name__)
 
 
-def store_job(opts, load, event=None, mminion=None):
+def store_job(opts, load, event=None, mminion=None, job_registry=None):
     '''
     Store job information using the configured master_job_cache
+
+    If a :py:class:`JobRegistry` is passed, the job is marked as finished on
+    the returning minion.
     '''
     # Generate EndTime
     endtime = salt.utils.jid.jid_to_time(salt.utils.jid.gen_jid(opts))
@@ -70,6 +76,12 @@ def store_job(opts, load, event=None, mminion=None):
                          salt.utils.event.tagify([load['jid'], 'ret', load['id']], 'job'))
         event.fire_ret_load(load)
 
+    if job_registry is not None:
+        try:
+            job_registry.finish(load['jid'], load['id'])
+        except SaltCacheError as exc:
+            log.error('Could not update the job registry: %s', exc)
+
     # if you have a job_cache, or an ext_job_cache, don't write to
     # the regular master cache
     if not opts['job_cache'] or opts.get('ext_job_cache'):
@@ -134,6 +146,113 @@ def store_minions(opts, jid, minions, mminion=None, syndic_id=None):
         )
 
 
+class JobRegistry(object):
+    '''
+    Track the jobs running on the minions, without having to ask them with
+    ``saltutil.find_job``.
+
+    Minions with ``job_registry_events`` enabled fire a
+    ``salt/job/<jid>/start/<minion_id>`` event when they start a job, and a
+    ``salt/minion/<minion_id>/jobs`` heartbeat listing their running jobs
+    every ``job_registry_interval`` seconds. The job is removed from the
+    registry when the minion returns, and the start events and heartbeats of
+    the job arriving after the return are ignored. An entry which is not
+    refreshed by a heartbeat expires, so jobs of minions which went away are
+    not reported forever.
+
+    The registry is kept in the ``job_registry`` bank of the master cache, so
+    it is shared by the master workers updating it and the clients reading it.
+    '''
+    bank = 'job_registry'
+    # Kept from the job data in the registry, for jobs.active
+    job_keys = ('jid', 'fun', 'arg', 'tgt', 'tgt_type', 'user', 'pid')
+
+    def __init__(self, opts):
+        self.opts = opts
+        # Not salt.cache.factory, the in-memory cache would hide the updates
+        # made by the other processes
+        self.cache = salt.cache.Cache(opts)
+
+    def _jid_bank(self, jid):
+        return '{0}/jobs/{1}'.format(self.bank, jid)
+
+    def _store(self, jid, minion_id, job, interval):
+        bank = self._jid_bank(jid)
+        current = self.cache.fetch(bank, minion_id)
+        if current and current.get('returned'):
+            # The start event is fired in the background, it can arrive
+            # after the return of the job
+            return
+        data = dict((key, job[key]) for key in self.job_keys if key in job)
+        data['jid'] = jid
+        # Give the minion a couple of heartbeats to refresh the entry
+        data['expires'] = time.time() + 3 * interval
+        self.cache.store(bank, minion_id, data)
+
+    def start(self, jid, minion_id, job, interval):
+        '''
+        Record a job started on a minion
+        '''
+        self._store(jid, minion_id, job, interval)
+
+    def heartbeat(self, minion_id, jobs, interval):
+        '''
+        Refresh the jobs still running on a minion
+        '''
+        for job in jobs:
+            if job.get('jid'):
+                self._store(job['jid'], minion_id, job, interval)
+
+    def finish(self, jid, minion_id):
+        '''
+        Mark a job which returned in the registry, until the entry expires
+        '''
+        interval = self.opts.get('job_registry_interval', 30)
+        self.cache.store(self._jid_bank(jid), minion_id,
+                         {'jid': jid,
+                          'returned': True,
+                          'expires': time.time() + 3 * interval})
+
+    def running(self, jid):
+        '''
+        Return a dict of the minions running the job, with the job data
+        '''
+        ret = {}
+        now = time.time()
+        bank = self._jid_bank(jid)
+        for minion_id in self.cache.list(bank):
+            data = self.cache.fetch(bank, minion_id)
+            if data and not data.get('returned') and data.get('expires', 0) > now:
+                ret[minion_id] = data
+        return ret
+
+    def jobs(self):
+        '''
+        Return a dict of all the running jobs, with the minions running them
+        '''
+        ret = {}
+        for jid in self.cache.list('{0}/jobs'.format(self.bank)):
+            running = self.running(jid)
+            if running:
+                ret[jid] = running
+        return ret
+
+    def clean(self):
+        '''
+        Remove the expired entries from the registry
+        '''
+        now = time.time()
+        for jid in self.cache.list('{0}/jobs'.format(self.bank)):
+            bank = self._jid_bank(jid)
+            minions = self.cache.list(bank)
+            for minion_id in minions:
+                data = self.cache.fetch(bank, minion_id)
+                if not data or data.get('expires', 0) <= now:
+                    self.cache.flush(bank, minion_id)
+            if not self.cache.list(bank):
+                self.cache.flush(bank)
+
+
 def get_retcode(ret):
     '''
     Determine a retcode for a given return
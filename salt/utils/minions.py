@@ -6,8 +6,10 @@ expected to return
 
 # Import python libs
 from __future__ import absolute_import, unicode_literals
+import contextlib
 import os
 import fnmatch
+import hashlib
 import re
 import logging
 
@@ -16,6 +18,7 @@ import salt.payload
 import salt.roster
 import salt.utils.data
 import salt.utils.files
+import salt.utils.json
 import salt.utils.network
 import salt.utils.stringutils
 import salt.utils.versions
@@ -91,6 +94,280 @@ def get_minion_data(minion, opts):
     return minion if minion else None, grains, pillar
 
 
+class MinionDataIndex(object):
+    '''
+    Inverted index of the grains and pillar kept in the minion data cache.
+
+    The index is stored in the cache subsystem next to the minion data. For
+    every top-level grain/pillar key there is one document in the
+    ``minions_index/<search_type>`` bank which maps the (lowercased) scalar
+    values and list members of that key to the minions holding them. Values
+    which are nested structures are kept verbatim per minion and matched with
+    :py:func:`salt.utils.data.subdict_match`, so targeting results are the
+    same as when scanning the whole minion data cache.
+
+    A per-minion record of the digest of each indexed top-level value is kept
+    in ``minions_index/minions`` so that only changed keys are rewritten when
+    the minion data is refreshed.
+
+    Keys holding the target delimiter are not indexed, as the expressions
+    addressing them also address nested values of other keys. The document of
+    the part of such a key before the delimiter lists the minions having one,
+    and the nested expressions on it are matched by scanning the minion data
+    cache.
+
+    The index assumes a single master updates it. The read-modify-write
+    cycles on its documents are serialized with a lock file local to the
+    master, masters sharing a cache backend would lose each other's updates.
+
+    .. versionadded:: Fluorine
+    '''
+    BANK = 'minions_index'
+    SEARCH_TYPES = ('grains', 'pillar')
+
+    def __init__(self, opts, cache=None):
+        self.opts = opts
+        # The index is updated with read-modify-write cycles, it must not be
+        # served from a possibly stale in-process MemCache.
+        self.cache = salt.cache.Cache(opts)
+        self.read_cache = cache if cache is not None else self.cache
+        self.lock_fn = os.path.join(self.cache.cachedir, '.minions_index.lock')
+
+    @staticmethod
+    def _indexable_key(key):
+        '''
+        Only keys which can safely be used as a cache key, and which can not
+        be confused with nested keys, are indexed. Others are always matched
+        by scanning the minion data cache.
+        '''
+        return isinstance(key, six.string_types) \
+            and bool(key) \
+            and not key.startswith('.') \
+            and '/' not in key \
+            and '\\' not in key \
+            and DEFAULT_TARGET_DELIM not in key
+
+    @staticmethod
+    def _digest(value):
+        try:
+            serialized = salt.utils.json.dumps(value,
+                                               sort_keys=True,
+                                               default=six.text_type)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.md5(salt.utils.stringutils.to_bytes(serialized)).hexdigest()
+
+    @staticmethod
+    def _is_scalar(value):
+        return not isinstance(value, (dict, list, tuple))
+
+    def _bank(self, search_type):
+        return '{0}/{1}'.format(self.BANK, search_type)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        # Only serializes the updates made by the processes of this master
+        with salt.utils.files.flopen(self.lock_fn, 'a'):
+            yield
+
+    def _fetch_column(self, bank, key):
+        '''
+        Return the index document of ``key``. The values map to dicts of
+        minions, and ``members`` lists the values of each minion, so that the
+        entries of a minion are replaced without scanning the whole document.
+        '''
+        column = self.cache.fetch(bank, key) or {}
+        values = column.setdefault('values', {})
+        column.setdefault('complex', {})
+        column.setdefault('delimited', {})
+        if 'members' not in column:
+            members = column['members'] = {}
+            for val, ids in six.iteritems(values):
+                values[val] = dict.fromkeys(ids, True)
+                for id_ in ids:
+                    members.setdefault(id_, []).append(val)
+        return column
+
+    def _store_column(self, bank, key, column):
+        if column['values'] or column['complex'] or column['delimited']:
+            self.cache.store(bank, key, column)
+        else:
+            self.cache.flush(bank, key)
+
+    def _update_delimited(self, search_type, key, minion_id, present):
+        '''
+        Record whether ``minion_id`` has keys starting with ``key`` and the
+        target delimiter
+        '''
+        bank = self._bank(search_type)
+        column = self._fetch_column(bank, key)
+        if present:
+            column['delimited'][minion_id] = True
+        else:
+            column['delimited'].pop(minion_id, None)
+        self._store_column(bank, key, column)
+
+    def _update_column(self, search_type, key, minion_id, value, present):
+        '''
+        Replace the entries of ``minion_id`` in the index document of ``key``
+        '''
+        bank = self._bank(search_type)
+        column = self._fetch_column(bank, key)
+        values = column['values']
+        complex_ = column['complex']
+        for val in column['members'].pop(minion_id, []):
+            ids = values.get(val)
+            if ids is not None:
+                ids.pop(minion_id, None)
+                if not ids:
+                    del values[val]
+        complex_.pop(minion_id, None)
+        if present:
+            if self._is_scalar(value):
+                members = [value]
+            else:
+                # Lists of scalars are indexed by member, anything nested is
+                # kept as is and matched with subdict_match
+                complex_[minion_id] = value
+                if isinstance(value, (list, tuple)) \
+                        and all(self._is_scalar(x) for x in value):
+                    members = value
+                else:
+                    members = []
+            members = set(six.text_type(x).lower() for x in members)
+            for member in members:
+                values.setdefault(member, {})[minion_id] = True
+            if members:
+                column['members'][minion_id] = list(members)
+        self._store_column(bank, key, column)
+
+    def update(self, minion_id, grains, pillar):
+        '''
+        Refresh the index entries of a minion from its grains and pillar
+        '''
+        new_record = {'delimited': {}}
+        with self._lock():
+            record = self.cache.fetch(self._bank('minions'), minion_id) or {}
+            for search_type, data in zip(self.SEARCH_TYPES, (grains, pillar)):
+                if not isinstance(data, dict):
+                    data = {}
+                old = record.get(search_type, {})
+                new = {}
+                delimited = set()
+                for key, value in six.iteritems(data):
+                    if self._indexable_key(key):
+                        new[key] = self._digest(value)
+                    elif isinstance(key, six.string_types):
+                        head = key.split(DEFAULT_TARGET_DELIM, 1)[0]
+                        if head != key and self._indexable_key(head):
+                            delimited.add(head)
+                old_delimited = set(record.get('delimited', {}).get(search_type, []))
+                for key in delimited ^ old_delimited:
+                    self._update_delimited(search_type, key, minion_id, key in delimited)
+                new_record['delimited'][search_type] = sorted(delimited)
+                for key in set(old) | set(new):
+                    if key in old and key in new \
+                            and new[key] is not None and old[key] == new[key]:
+                        continue
+                    self._update_column(search_type,
+                                        key,
+                                        minion_id,
+                                        data.get(key),
+                                        key in new)
+                new_record[search_type] = new
+            self.cache.store(self._bank('minions'), minion_id, new_record)
+
+    def remove(self, minion_id):
+        '''
+        Drop a minion from the index
+        '''
+        with self._lock():
+            record = self.cache.fetch(self._bank('minions'), minion_id)
+            if not record:
+                return
+            for search_type in self.SEARCH_TYPES:
+                for key in record.get(search_type, {}):
+                    self._update_column(search_type, key, minion_id, None, False)
+                for key in record.get('delimited', {}).get(search_type, []):
+                    self._update_delimited(search_type, key, minion_id, False)
+            self.cache.flush(self._bank('minions'), minion_id)
+
+    def drop(self):
+        '''
+        Drop the whole index
+        '''
+        with self._lock():
+            self.cache.flush(self.BANK)
+
+    def indexed(self):
+        '''
+        Return the set of minions which are present in the index
+        '''
+        return set(self.read_cache.list(self._bank('minions')) or [])
+
+    def match(self,
+              search_type,
+              expr,
+              delimiter=DEFAULT_TARGET_DELIM,
+              regex_match=False,
+              exact_match=False):
+        '''
+        Return the set of indexed minions matching ``expr``, or ``None`` if
+        the expression can not be answered from the index.
+        '''
+        if delimiter not in expr:
+            # subdict_match never matches an expression without a delimiter
+            return set()
+        if delimiter != DEFAULT_TARGET_DELIM:
+            # The indexed keys may hold this delimiter
+            return None
+        key, pattern = expr.split(delimiter, 1)
+        if not self._indexable_key(key):
+            return None
+        column = self.read_cache.fetch(self._bank(search_type), key) or {}
+        if column.get('delimited') and delimiter in pattern:
+            # The expression may address keys holding the delimiter, which
+            # are not indexed
+            return None
+        lpattern = pattern.lower()
+        if regex_match:
+            try:
+                regex = re.compile(lpattern)
+            except re.error:
+                log.error('Invalid regex \'%s\' in match', pattern)
+                return set()
+            matcher = regex.match
+        elif exact_match:
+            matcher = lambda val: val == lpattern
+        else:
+            matcher = lambda val: fnmatch.fnmatch(val, lpattern)
+
+        complex_ = column.get('complex', {})
+        nested_pattern = delimiter in pattern
+        matched = set()
+        for val, ids in six.iteritems(column.get('values', {})):
+            if matcher(val):
+                if nested_pattern:
+                    # List members may be addressed by position, those are
+                    # matched against the stored list below
+                    matched.update(x for x in ids if x not in complex_)
+                else:
+                    matched.update(ids)
+        for minion_id, value in six.iteritems(complex_):
+            if minion_id in matched:
+                continue
+            if not nested_pattern and isinstance(value, (list, tuple)) \
+                    and all(self._is_scalar(x) for x in value):
+                continue
+            if salt.utils.data.subdict_match({key: value},
+                                             expr,
+                                             delimiter=delimiter,
+                                             regex_match=regex_match,
+                                             exact_match=exact_match):
+                matched.add(minion_id)
+        return matched
+
+
 def nodegroup_comp(nodegroup, nodegroups, skip=None, first_call=True):
     '''
     Recursively expand ``nodegroup`` from ``nodegroups``; ignore nodegroups in ``skip``
@@ -195,6 +472,7 @@ class CkMinions(object):
         self.opts = opts
         self.serial = salt.payload.Serial(opts)
         self.cache = salt.cache.factory(opts)
+        self.index = MinionDataIndex(opts, self.cache)
         # TODO: this is actually an *auth* check
         if self.opts.get('transport', 'zeromq') in ('zeromq', 'tcp'):
             self.acc = 'minions'
@@ -299,10 +577,26 @@ class CkMinions(object):
                 return {'minions': minions,
                         'missing': []}
             minions = set(minions)
+            if self.opts.get('minion_data_index', False):
+                matched = self.index.match(search_type,
+                                      expr,
+                                      delimiter=delimiter,
+                                      regex_match=regex_match,
+                                      exact_match=exact_match)
+                if matched is not None:
+                    indexed = self.index.indexed()
+                    minions.difference_update(
+                        [x for x in cminions if x in indexed and x not in matched]
+                    )
+                    # Minions which were not indexed yet are checked against
+                    # their cached data below
+                    cminions = [x for x in cminions if x not in indexed]
+            if greedy:
+                cminions = [x for x in cminions if x in minions]
+            cdata = self.cache.fetch_many(
+                ('minions/{0}'.format(id_), 'data') for id_ in cminions)
             for id_ in cminions:
-                if greedy and id_ not in minions:
-                    continue
-                mdata = self.cache.fetch('minions/{0}'.format(id_), 'data')
+                mdata = cdata[('minions/{0}'.format(id_), 'data')]
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -398,8 +692,10 @@ class CkMinions(object):
             proto = 'ipv{0}'.format(tgt.version)
 
             minions = set(minions)
+            cdata = self.cache.fetch_many(
+                ('minions/{0}'.format(id_), 'data') for id_ in cminions)
             for id_ in cminions:
-                mdata = self.cache.fetch('minions/{0}'.format(id_), 'data')
+                mdata = cdata[('minions/{0}'.format(id_), 'data')]
                 if mdata is None:
                     if not greedy:
                         minions.remove(id_)
@@ -2001,6 +2001,14 @@ class SaltCMDOptionParser(six.with_metaclass(OptionParserMeta,
             help=('Wait the specified time in seconds after each job is done '
                   'before freeing the slot in the batch for the next one.')
         )
+        self.add_option(
+            '--batch-wait-adaptive',
+            default=False,
+            dest='batch_wait_adaptive',
+            action='store_true',
+            help=('Lengthen the batch wait according to the rate of failed '
+                  'returns, up to the time taken by the minions to return.')
+        )
         self.add_option(
             '--batch-safe-limit',
             default=0,
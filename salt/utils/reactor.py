@@ -184,6 +184,21 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
 
         return {'status': False, 'comment': 'Reactor does not exists.'}
 
+    def update_tag_filter(self):
+        '''
+        Only have the event publisher send us the events we react to. This
+        is not possible when the reactor map is read from a file, as the file
+        may change without notice.
+        '''
+        if not isinstance(self.minion.opts['reactor'], list):
+            return
+        tags = [('salt/reactors/manage/', 'find')]
+        for ropt in self.minion.opts['reactor']:
+            if not isinstance(ropt, dict) or len(ropt) != 1:
+                continue
+            tags.append((next(six.iterkeys(ropt)), 'fnmatch'))
+        self.event.set_tag_filter(tags)
+
     def resolve_aliases(self, chunks):
         '''
         Preserve backward compatibility by rewriting the 'state' key in the low
@@ -240,6 +255,7 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
                 self.opts['transport'],
                 opts=self.opts,
                 listen=True)
+        self.update_tag_filter()
         self.wrap = ReactWrap(self.opts)
 
         for data in self.event.iter_events(full=True):
@@ -249,12 +265,14 @@ class Reactor(salt.utils.process.SignalHandlingMultiprocessingProcess, salt.stat
             if data['tag'].endswith('salt/reactors/manage/add'):
                 _data = data['data']
                 res = self.add_reactor(_data['event'], _data['reactors'])
+                self.update_tag_filter()
                 self.event.fire_event({'reactors': self.list_all(),
                                        'result': res},
                                       'salt/reactors/manage/add-complete')
             elif data['tag'].endswith('salt/reactors/manage/delete'):
                 _data = data['data']
                 res = self.delete_reactor(_data['event'])
+                self.update_tag_filter()
                 self.event.fire_event({'reactors': self.list_all(),
                                        'result': res},
                                       'salt/reactors/manage/delete-complete')
@@ -246,4 +246,7 @@ def get_sls_opts(opts, **kwargs):
         else:
             opts['pillarenv'] = pillarenv
 
+    if kwargs.get('fingerprint_force'):
+        opts['state_fingerprint_force'] = True
+
     return opts
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark requisite resolution on a synthetic highstate
+
+Compares the fnmatch scan of every low chunk against the lookups done
+through ``salt.state.ChunkIndex``. Resolving every requisite of a large
+highstate with the scan is quadratic, so the scan is only timed on a sample
+of the states and extrapolated.
+
+    python tests/perf/requisite_index.py --states 20000 --sample 200
+'''
+
+from __future__ import absolute_import, print_function, unicode_literals
+# Import system libs
+import argparse
+import fnmatch
+import time
+
+# Import salt libs
+import salt.state
+
+
+def make_chunks(states, per_sls):
+    '''
+    Build low chunks where each state requires the previous state, by id, and
+    the first state of every sls requires the whole previous sls
+    '''
+    chunks = []
+    for num in range(states):
+        sls = 'bench.sls{0}'.format(num // per_sls)
+        chunk = {'state': 'file' if num % 2 else 'pkg',
+                 '__id__': 'state{0}'.format(num),
+                 'name': '/srv/bench/{0}'.format(num),
+                 '__sls__': sls,
+                 '__env__': 'base',
+                 'fun': 'managed' if num % 2 else 'installed',
+                 'order': num}
+        if num:
+            chunk['require'] = [{'id': 'state{0}'.format(num - 1)}]
+        if num and num % per_sls == 0:
+            chunk['require'].append(
+                {'sls': 'bench.sls{0}'.format(num // per_sls - 1)})
+        chunks.append(chunk)
+    return chunks
+
+
+def scan(chunks, req_key, req_val):
+    '''
+    Resolve a requisite the way State.check_requisite did before the index
+    '''
+    found = []
+    for chunk in chunks:
+        if req_key == 'sls':
+            if fnmatch.fnmatch(chunk['__sls__'], req_val):
+                found.append(chunk)
+            continue
+        if (fnmatch.fnmatch(chunk['name'], req_val) or
+                fnmatch.fnmatch(chunk['__id__'], req_val)):
+            if req_key == 'id' or chunk['state'] == req_key:
+                found.append(chunk)
+    return found
+
+
+def resolve(chunks, find):
+    '''
+    Resolve all requisites of the passed chunks and return the match count
+    '''
+    count = 0
+    for chunk in chunks:
+        for req in chunk.get('require', ()):
+            req_key = next(iter(req))
+            count += len(find(req_key, req[req_key]))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--states', type=int, default=20000)
+    parser.add_argument('--per-sls', type=int, default=50)
+    parser.add_argument('--sample', type=int, default=200)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.states, args.per_sls)
+    sample = chunks[::max(1, len(chunks) // args.sample)]
+
+    start = time.time()
+    index = salt.state.ChunkIndex(chunks)
+    build = time.time() - start
+    start = time.time()
+    resolve(chunks, index.find)
+    lookup = time.time() - start
+
+    start = time.time()
+    resolve(sample, lambda req_key, req_val: scan(chunks, req_key, req_val))
+    sampled = time.time() - start
+    estimate = sampled * len(chunks) / len(sample)
+
+    matched = resolve(sample, index.find) == resolve(
+        sample, lambda req_key, req_val: scan(chunks, req_key, req_val))
+
+    print('states:              {0}'.format(len(chunks)))
+    print('index build:         {0:.3f}s'.format(build))
+    print('index resolve (all): {0:.3f}s'.format(lookup))
+    print('scan resolve ({0}):  {1:.3f}s'.format(len(sample), sampled))
+    print('scan resolve (est):  {0:.1f}s'.format(estimate))
+    print('results match:       {0}'.format(matched))
+
+
+if __name__ == '__main__':
+    main()
@@ -91,6 +91,30 @@ class MemCacheTest(TestCase):
         cache_fetch_mock.assert_called_once_with('bank', 'key')
         cache_fetch_mock.reset_mock()
 
+    @patch('salt.cache.Cache.fetch', return_value='fake_data')
+    @patch('salt.loader.cache', return_value={})
+    def test_fetch_many(self, loader_mock, cache_fetch_mock):
+        # Fetch values without a driver bulk function, they are fetched one
+        # by one and kept in cache.
+        with patch('time.time', return_value=0):
+            ret = self.cache.fetch_many([('bank', 'key1'), ('bank', 'key2')])
+        self.assertEqual(ret, {('bank', 'key1'): 'fake_data',
+                               ('bank', 'key2'): 'fake_data'})
+        self.assertDictEqual(salt.cache.MemCache.data, {
+            'fake_driver': {
+                ('bank', 'key1'): [0, 'fake_data'],
+                ('bank', 'key2'): [0, 'fake_data'],
+                }})
+        self.assertEqual(cache_fetch_mock.call_count, 2)
+        cache_fetch_mock.reset_mock()
+
+        # Fetch again with a new key, only the new key is fetched.
+        with patch('time.time', return_value=1):
+            ret = self.cache.fetch_many([('bank', 'key1'), ('bank', 'key3')])
+        self.assertEqual(ret, {('bank', 'key1'): 'fake_data',
+                               ('bank', 'key3'): 'fake_data'})
+        cache_fetch_mock.assert_called_once_with('bank', 'key3')
+
     @patch('salt.cache.Cache.store')
     @patch('salt.loader.cache', return_value={})
     def test_store(self, loader_mock, cache_store_mock):
@@ -217,3 +241,53 @@ class MemCacheTest(TestCase):
         # Check debug data
         self.assertEqual(self.cache.call, 6)
         self.assertEqual(self.cache.hit, 3)
+
+    @patch('salt.cache._sizeof', return_value=100)
+    @patch('salt.cache.Cache.fetch', return_value='fake_data')
+    @patch('salt.cache.Cache.store')
+    @patch('salt.loader.cache', return_value={})
+    def test_max_bytes(self, loader_mock, cache_store_mock, cache_fetch_mock, sizeof_mock):
+        # Recreate cache with a size limit of 2 values
+        self.opts['memcache_max_items'] = 0
+        self.opts['memcache_max_bytes'] = 250
+        self.cache = salt.cache.factory(self.opts)
+        with patch('time.time', return_value=0):
+            self.cache.store('bank1', 'key1', 'fake_data11')
+        with patch('time.time', return_value=1):
+            self.cache.store('bank1', 'key2', 'fake_data12')
+        # Use the first value, the second one is now the least recently used
+        with patch('time.time', return_value=2):
+            self.cache.fetch('bank1', 'key1')
+        with patch('time.time', return_value=3):
+            self.cache.store('bank2', 'key1', 'fake_data21')
+        self.assertDictEqual(salt.cache.MemCache.data['fake_driver'], {
+            ('bank1', 'key1'): [2, 'fake_data11'],
+            ('bank2', 'key1'): [3, 'fake_data21'],
+            })
+        # Fetch the evicted value
+        with patch('time.time', return_value=4):
+            self.cache.fetch('bank1', 'key2')
+        self.assertEqual(salt.cache.MemCache.stats(), {
+            'fake_driver': {'items': 2, 'bytes': 200, 'hits': 1,
+                            'misses': 1, 'evictions': 2}})
+
+    @patch('salt.cache.Cache.store')
+    @patch('salt.loader.cache', return_value={})
+    def test_bank_policy(self, loader_mock, cache_store_mock):
+        # Recreate cache with a policy per bank
+        self.opts['memcache_bank_policy'] = {
+            'tokens': {'expire': 0},
+            'minions/*': {'expire': 60},
+            'minions/big': {'max_item_bytes': 10},
+        }
+        self.cache = salt.cache.factory(self.opts)
+        with patch('time.time', return_value=0):
+            self.cache.store('tokens', 'key', 'fake_data')
+            self.cache.store('minions/big', 'key', 'fake_data' * 10)
+            self.cache.store('minions/small', 'key', 'fake_data')
+        self.assertDictEqual(salt.cache.MemCache.data['fake_driver'], {
+            ('minions/small', 'key'): [0, 'fake_data'],
+            })
+        # The bank expiration time is used instead of the default one
+        with patch('time.time', return_value=30):
+            self.assertEqual(self.cache.fetch('minions/small', 'key'), 'fake_data')
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+'''
+unit tests for the redis cache
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import Salt Testing libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.unit import skipIf, TestCase
+from tests.support.mock import (
+    MagicMock,
+    NO_MOCK,
+    NO_MOCK_REASON,
+    patch
+)
+
+# Import Salt libs
+import salt.payload
+import salt.cache.redis_cache as redis_cache
+
+try:
+    import redis
+    HAS_REDIS_SERVER = redis.StrictRedis(socket_connect_timeout=1).ping()
+except Exception:  # pylint: disable=broad-except
+    HAS_REDIS_SERVER = False
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RedisCacheTest(TestCase, LoaderModuleMockMixin):
+    '''
+    Validate the requests made by the redis cache
+    '''
+
+    def setup_loader_modules(self):
+        return {redis_cache: {'__context__': {'serial': salt.payload.Serial('msgpack')}}}
+
+    def setUp(self):
+        self.server = MagicMock()
+        patcher = patch.object(redis_cache, 'REDIS_SERVER', self.server)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fetch_many(self):
+        '''
+        Tests that the keys are fetched with a single MGET
+        '''
+        serial = redis_cache.__context__['serial']
+        self.server.mget.return_value = [serial.dumps({'foo': 'bar'}), None]
+        ret = redis_cache.fetch_many([('minions/a', 'data'), ('minions/b', 'data')])
+        self.assertEqual(ret, {('minions/a', 'data'): {'foo': 'bar'},
+                               ('minions/b', 'data'): {}})
+        self.server.mget.assert_called_once_with(['$KEY_minions/a/data',
+                                                  '$KEY_minions/b/data'])
+        self.server.get.assert_not_called()
+
+    def test_flush_bank(self):
+        '''
+        Tests that the sub-banks are listed with a request per tree level
+        '''
+        tree = {
+            '$BANK_minions': set(['a', 'b']),
+            '$BANK_minions/a': set(['c']),
+        }
+        pipes = []
+
+        def pipeline(transaction=True):
+            pipe = MagicMock()
+            commands = []
+            pipe.smembers.side_effect = lambda key: commands.append(tree.get(key, set()))
+            pipe.execute.side_effect = lambda: commands
+            pipes.append(pipe)
+            return pipe
+
+        self.server.pipeline.side_effect = pipeline
+        ret = redis_cache._get_banks_to_remove(self.server, 'minions')
+        self.assertEqual(sorted(ret), ['minions', 'minions/a', 'minions/a/c',
+                                       'minions/b'])
+        # One request per level, plus the last one finding no sub-banks
+        self.assertEqual(len(pipes), 3)
+
+
+@skipIf(not HAS_REDIS_SERVER, 'No redis-server running on localhost')
+class RedisCacheServerTest(TestCase, LoaderModuleMockMixin):
+    '''
+    Validate the redis cache against a local redis-server
+    '''
+
+    def setup_loader_modules(self):
+        return {redis_cache: {
+            '__opts__': {'cache.redis.db': '15',
+                         'cache.redis.bank_prefix': 'salt-test-bank',
+                         'cache.redis.bank_keys_prefix': 'salt-test-bankeys',
+                         'cache.redis.key_prefix': 'salt-test-key'},
+            '__context__': {'serial': salt.payload.Serial('msgpack')}}}
+
+    def setUp(self):
+        patcher = patch.object(redis_cache, 'REDIS_SERVER', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(redis_cache.flush, 'minions')
+
+    def test_store_fetch_flush(self):
+        items = [('minions/{0}'.format(idx), 'data', {'id': idx})
+                 for idx in range(20)]
+        redis_cache.store_many(items)
+        self.assertEqual(sorted(redis_cache.list_('minions'), key=int),
+                         [str(idx) for idx in range(20)])
+        ret = redis_cache.fetch_many([(bank, key) for bank, key, _ in items])
+        self.assertEqual(ret[('minions/3', 'data')], {'id': 3})
+        redis_cache.flush('minions')
+        self.assertEqual(redis_cache.fetch('minions/3', 'data'), {})
@@ -5,6 +5,7 @@
 
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import collections
 
 # Import Salt Libs
 from salt.cli.batch import Batch
@@ -59,9 +60,63 @@ class BatchTestCase(TestCase):
         self.batch.minions = ['foo', 'bar', 'baz']
         self.assertEqual(Batch.get_bnum(self.batch), 4)
 
+    def test_get_bnum_percentage_count(self):
+        '''
+        Tests passing batch value as percentage of the minions which answered
+        '''
+        self.batch.opts = {'batch': '50%', 'timeout': 5}
+        self.batch.minions = ['foo', 'bar', 'baz', 'qux']
+        self.assertEqual(Batch.get_bnum(self.batch, 2), 1)
+        self.assertEqual(Batch.get_bnum(self.batch, 0), 0)
+
     def test_get_bnum_invalid_batch_data(self):
         '''
         Tests when an invalid batch value is passed
         '''
         ret = Batch.get_bnum(self.batch)
         self.assertEqual(ret, None)
+
+    # run tests
+
+    def test_run_sliding_window(self):
+        '''
+        Tests that the minions are run as the slots are freed, the slots freed
+        together being filled with a single job
+        '''
+        events = collections.deque()
+        jobs = []
+
+        def run_job(tgt, fun, arg=(), **kwargs):
+            jid = '2018010100000000000{0}'.format(len(jobs))
+            jobs.append((tgt, fun))
+            minions = ['foo', 'bar', 'baz', 'qux'] if fun == 'test.ping' else tgt
+            for minion in minions:
+                events.append({'tag': 'salt/job/{0}/ret/{1}'.format(jid, minion),
+                               'data': {'id': minion, 'jid': jid, 'return': True,
+                                        'retcode': 0}})
+            return {'jid': jid, 'minions': minions}
+
+        def get_event(**kwargs):
+            return events.popleft() if events else None
+
+        opts = {'batch': '2',
+                'conf_file': {},
+                'tgt': '*',
+                'fun': 'test.echo',
+                'arg': ['hello'],
+                'timeout': 5,
+                'gather_job_timeout': 5}
+        mock_client = MagicMock(job_registry=None)
+        mock_client.run_job.side_effect = run_job
+        mock_client.event.get_event.side_effect = get_event
+        with patch('salt.client.get_local_client', MagicMock(return_value=mock_client)):
+            batch = Batch(opts, quiet=True)
+        ret = {}
+        for part in batch.run():
+            ret.update(part)
+
+        self.assertEqual(ret, {'foo': True, 'bar': True, 'baz': True, 'qux': True})
+        self.assertEqual(jobs, [('*', 'test.ping'),
+                                (['foo', 'bar'], 'test.echo'),
+                                (['baz', 'qux'], 'test.echo')])
+        mock_client.gather_job_info.assert_not_called()
@@ -8,6 +8,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 import copy
 import os
 import tempfile
+import time
 
 # Import Salt Testing libs
 from tests.integration import AdaptedConfigurationTestCaseMixin
@@ -149,6 +150,55 @@ class RootsTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderModuleMockMix
             }
         )
 
+    def test_file_hash_index(self):
+        '''
+        Hashes are served from the index until the file changes, without
+        writing a cache file per served file
+        '''
+        root_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(salt.utils.files.rm_rf, root_dir)
+        path = os.path.join(root_dir, 'foo')
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('foo')
+        load = {'saltenv': 'base', 'path': path}
+        fnd = {'path': path, 'rel': 'foo'}
+        get_hash = salt.utils.hashutils.get_hash
+
+        with patch('salt.utils.hashutils.get_hash', side_effect=get_hash) as mock_hash:
+            first = roots.file_hash(load, fnd)
+            self.assertEqual(roots.file_hash(load, fnd), first)
+            self.assertEqual(mock_hash.call_count, 1)
+
+            # A fresh index, as used by another worker, reads the database
+            with patch.object(roots, '_HASH_INDEX', None):
+                self.assertEqual(roots.file_hash(load, fnd), first)
+            self.assertEqual(mock_hash.call_count, 1)
+
+            with salt.utils.files.fopen(path, 'w') as fp_:
+                fp_.write('foobar')
+            changed = roots.file_hash(load, fnd)
+            self.assertEqual(mock_hash.call_count, 2)
+            self.assertNotEqual(changed['hsum'], first['hsum'])
+
+        self.assertFalse(
+            os.path.exists(os.path.join(self.tmp_cachedir, 'roots', 'hash')))
+
+    def test_file_hash_index_memo_size(self):
+        '''
+        The in-memory entries of the hash index are bounded, the least
+        recently used ones are dropped first
+        '''
+        index = roots._HashIndex(os.path.join(self.tmp_cachedir, 'roots', 'memo.db'))
+        index.memo_size = 2
+        for rel in ('a', 'b'):
+            index.set('base', rel, 'sha256', '/srv/' + rel, 1.0, 1, rel)
+        self.assertEqual(index.get('base', 'a', 'sha256', '/srv/a', 1.0, 1), 'a')
+        index.set('base', 'c', 'sha256', '/srv/c', 1.0, 1, 'c')
+        self.assertEqual(list(index.memo),
+                         [('base', 'a', 'sha256'), ('base', 'c', 'sha256')])
+        # The dropped entry is still read from the database
+        self.assertEqual(index.get('base', 'b', 'sha256', '/srv/b', 1.0, 1), 'b')
+
     def test_file_list_emptydirs(self):
         ret = roots.file_list_emptydirs({'saltenv': 'base'})
         self.assertIn('empty_dir', ret)
@@ -170,6 +220,85 @@ class RootsTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderModuleMockMix
                 self.opts['file_roots'] = orig_file_roots
 
 
+    @skipIf(not roots.HAS_PYINOTIFY, 'pyinotify is not installed')
+    def test_update_inotify(self):
+        '''
+        Changes seen by the inotify watcher are applied to the mtime map and
+        file list cache without walking the file_roots again
+        '''
+        root_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(salt.utils.files.rm_rf, root_dir)
+        os.makedirs(os.path.join(root_dir, 'sub'))
+        for name in ('old', 'sub/removed'):
+            with salt.utils.files.fopen(os.path.join(root_dir, name), 'w') as fp_:
+                fp_.write('foo')
+        opts = {'file_roots': {'base': [root_dir]},
+                'roots_update_inotify': True,
+                'fileserver_events': False}
+        with patch.dict(roots.__opts__, opts), \
+                patch.object(roots, '_WATCHER', None):
+            roots.update()
+            self.assertTrue(roots._watcher_active())
+            self.assertEqual(
+                roots.file_list({'saltenv': 'base'}), ['old', 'sub/removed'])
+
+            with salt.utils.files.fopen(os.path.join(root_dir, 'sub', 'new'), 'w') as fp_:
+                fp_.write('bar')
+            os.remove(os.path.join(root_dir, 'sub', 'removed'))
+            with patch('salt.fileserver.generate_mtime_map',
+                       side_effect=AssertionError('file_roots walked')):
+                roots.update()
+
+            self.assertEqual(
+                roots.file_list({'saltenv': 'base'}), ['old', 'sub/new'])
+            self.assertEqual(
+                sorted(roots._WATCHER.mtime_map),
+                [os.path.join(root_dir, 'old'),
+                 os.path.join(root_dir, 'sub', 'new')])
+            self.assertEqual(roots.file_list_emptydirs({'saltenv': 'base'}), [])
+
+    @skipIf(not roots.HAS_PYINOTIFY, 'pyinotify is not installed')
+    def test_update_inotify_list_cache_expires(self):
+        '''
+        Patching the file list cache does not refresh its age, so a change
+        missed by the watcher is still picked up once the cache is too old
+        '''
+        root_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(salt.utils.files.rm_rf, root_dir)
+        with salt.utils.files.fopen(os.path.join(root_dir, 'old'), 'w') as fp_:
+            fp_.write('foo')
+        opts = {'file_roots': {'base': [root_dir]},
+                'roots_update_inotify': True,
+                'roots_update_interval': 60,
+                'fileserver_events': False}
+        list_cache = os.path.join(
+            roots.__opts__['cachedir'], 'file_lists', 'roots', 'base.p')
+        with patch.dict(roots.__opts__, opts), \
+                patch.object(roots, '_WATCHER', None):
+            roots.update()
+            self.assertEqual(roots.file_list({'saltenv': 'base'}), ['old'])
+            built = time.time() - 300
+            os.utime(list_cache, (built, built))
+
+            with salt.utils.files.fopen(os.path.join(root_dir, 'seen'), 'w') as fp_:
+                fp_.write('bar')
+            roots.update()
+            self.assertEqual(os.path.getmtime(list_cache), built)
+
+            # Missed by the watcher
+            with salt.utils.files.fopen(os.path.join(root_dir, 'missed'), 'w') as fp_:
+                fp_.write('baz')
+            roots._WATCHER.read_events()
+            roots._WATCHER.pending.clear()
+            self.assertEqual(
+                roots.file_list({'saltenv': 'base'}), ['old', 'seen'])
+
+            built = time.time() - 601
+            os.utime(list_cache, (built, built))
+            self.assertEqual(
+                roots.file_list({'saltenv': 'base'}), ['missed', 'old', 'seen'])
+
+
 class RootsLimitTraversalTest(TestCase, AdaptedConfigurationTestCaseMixin):
 
     def test_limit_traversal(self):
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the elasticsearch returner and its bulk requests.
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import Salt Testing libs
+from tests.support.helpers import Webserver
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import MagicMock, NO_MOCK, NO_MOCK_REASON, patch
+
+# Import Salt libs
+import salt.modules.elasticsearch
+import salt.returners
+import salt.returners.elasticsearch_return as elasticsearch_return
+import salt.utils.json
+
+# Import 3rd-party libs
+import tornado.web
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ElasticsearchReturnTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the bulk requests of the elasticsearch returner
+    '''
+    def setup_loader_modules(self):
+        self.bulk = MagicMock(return_value={'errors': False, 'items': []})
+        self.addCleanup(salt.returners._RETURN_BUFFERS.clear)
+        return {elasticsearch_return: {
+            '__opts__': {'elasticsearch.batch_size': 2,
+                         'elasticsearch.batch_interval': 3600,
+                         'id': 'master'},
+            '__salt__': {'elasticsearch.index_exists': MagicMock(return_value=True),
+                         'elasticsearch.document_bulk': self.bulk,
+                         'elasticsearch.document_create': MagicMock()}}}
+
+    def setUp(self):
+        patcher = patch.object(elasticsearch_return, '_INDEXES', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _ret(self, minion):
+        return {'fun': 'test.ping', 'jid': '20180101000000000000',
+                'id': minion, 'return': True, 'success': True,
+                'fun_args': []}
+
+    def test_returner_batch(self):
+        '''
+        Tests that the returns are indexed with a single bulk request
+        '''
+        elasticsearch_return.returner(self._ret('minion1'))
+        self.bulk.assert_not_called()
+        elasticsearch_return.returner(self._ret('minion2'))
+        self.assertEqual(self.bulk.call_count, 1)
+        body = self.bulk.call_args[0][0]
+        self.assertEqual(len(body), 4)
+        self.assertEqual(body[0], {'index': {'_index': 'salt-test_ping',
+                                             '_type': 'default'}})
+        self.assertIn('minion2', body[3])
+        elasticsearch_return.__salt__['elasticsearch.document_create'].assert_not_called()
+        # The index is only checked once
+        self.assertEqual(
+            elasticsearch_return.__salt__['elasticsearch.index_exists'].call_count, 1)
+
+    def test_event_return(self):
+        '''
+        Tests that all the events are indexed
+        '''
+        events = [{'tag': 'salt/test/{0}'.format(idx), 'data': {'id': idx}}
+                  for idx in range(3)]
+        elasticsearch_return.event_return(events)
+        body = self.bulk.call_args[0][0]
+        self.assertEqual(len(body), 6)
+        self.assertEqual([body[idx]['index']['_index'] for idx in (0, 2, 4)],
+                         ['salt-master-event-cache'] * 3)
+        self.assertIn('salt/test/2', body[5])
+
+    def test_rejected_documents(self):
+        '''
+        Tests that the number of rejected documents is returned
+        '''
+        self.bulk.return_value = {
+            'errors': True,
+            'items': [{'index': {'status': 201}},
+                      {'index': {'status': 400, 'error': 'mapper_parsing_exception'}}]}
+        self.assertEqual(elasticsearch_return._bulk([({}, '{}'), ({}, '{}')]), 1)
+
+
+class StandInElasticsearchHandler(tornado.web.RequestHandler):
+    '''
+    Answer the requests of the Elasticsearch client like a cluster would,
+    keeping the documents sent to the bulk API
+    '''
+    # The documents of each bulk request
+    requests = []
+    # Status of the bulk requests, and errors of their documents
+    status = 200
+    errors = []
+
+    def initialize(self, path):  # pylint: disable=arguments-differ
+        pass
+
+    def _json(self, data):
+        self.set_header('Content-Type', 'application/json')
+        self.set_header('X-Elastic-Product', 'Elasticsearch')
+        self.finish(salt.utils.json.dumps(data))
+
+    def get(self, path):  # pylint: disable=arguments-differ
+        self._json({'name': 'stand-in', 'cluster_name': 'salt',
+                    'version': {'number': '6.8.0'},
+                    'tagline': 'You Know, for Search'})
+
+    def post(self, path):  # pylint: disable=arguments-differ
+        if path != '_bulk':
+            self.send_error(404)
+            return
+        lines = [salt.utils.json.loads(line)
+                 for line in self.request.body.decode('utf-8').splitlines()
+                 if line.strip()]
+        if self.status != 200:
+            self.set_status(self.status)
+            self._json({'error': 'unavailable', 'status': self.status})
+            return
+        documents = lines[1::2]
+        self.requests.append(documents)
+        items = []
+        for idx in range(len(documents)):
+            if idx < len(self.errors):
+                items.append({'index': {'status': 400, 'error': self.errors[idx]}})
+            else:
+                items.append({'index': {'status': 201}})
+        self._json({'took': 1, 'errors': bool(self.errors), 'items': items})
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not salt.modules.elasticsearch.HAS_ELASTICSEARCH,
+        'elasticsearch-py is not installed')
+class ElasticsearchStandInTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the batches of the elasticsearch returner against a stand-in
+    Elasticsearch server
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.webserver = Webserver(handler=StandInElasticsearchHandler)
+        cls.webserver.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.webserver.stop()
+        del cls.webserver
+
+    def setup_loader_modules(self):
+        self.addCleanup(salt.returners._RETURN_BUFFERS.clear)
+        profile = {'hosts': ['127.0.0.1:{0}'.format(self.webserver.port)]}
+        config = {'elasticsearch': profile}
+        return {
+            elasticsearch_return: {
+                '__opts__': {'elasticsearch.batch_size': 2,
+                             'elasticsearch.batch_interval': 3600,
+                             'id': 'master'},
+                '__salt__': {'elasticsearch.index_exists': MagicMock(return_value=True),
+                             'elasticsearch.document_bulk': salt.modules.elasticsearch.document_bulk,
+                             'elasticsearch.document_create': MagicMock()}},
+            salt.modules.elasticsearch: {
+                '__salt__': {'config.option': lambda key, default=None: config.get(key, default)}}}
+
+    def setUp(self):
+        StandInElasticsearchHandler.requests = []
+        StandInElasticsearchHandler.status = 200
+        StandInElasticsearchHandler.errors = []
+        patcher = patch.object(elasticsearch_return, '_INDEXES', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _ret(self, minion):
+        return {'fun': 'test.ping', 'jid': '20180101000000000000',
+                'id': minion, 'return': True, 'success': True,
+                'fun_args': []}
+
+    def _stats(self):
+        return salt.returners.get_return_buffer_stats()['elasticsearch']
+
+    def test_returner_batch(self):
+        '''
+        Tests that the returns are indexed with a single bulk request, and
+        that the failed batches are retried
+        '''
+        elasticsearch_return.returner(self._ret('minion1'))
+        self.assertEqual(StandInElasticsearchHandler.requests, [])
+        elasticsearch_return.returner(self._ret('minion2'))
+        self.assertEqual(
+            [[doc['minion'] for doc in docs]
+             for docs in StandInElasticsearchHandler.requests],
+            [['minion1', 'minion2']])
+
+        StandInElasticsearchHandler.status = 500
+        elasticsearch_return.returner(self._ret('minion3'))
+        elasticsearch_return.returner(self._ret('minion4'))
+        self.assertEqual(len(StandInElasticsearchHandler.requests), 1)
+        self.assertEqual(self._stats()['retried'], 1)
+
+        StandInElasticsearchHandler.status = 200
+        for buf in salt.returners._RETURN_BUFFERS.values():
+            buf.flush()
+        self.assertEqual(
+            [doc['minion'] for doc in StandInElasticsearchHandler.requests[-1]],
+            ['minion3', 'minion4'])
+        self.assertEqual(self._stats(),
+                         {'batches': 2, 'rows': 4, 'retried': 1,
+                          'dropped': 0, 'rejected': 0})
+
+    def test_rejected_documents(self):
+        '''
+        Tests that the documents rejected by the server are counted and not
+        retried
+        '''
+        StandInElasticsearchHandler.errors = ['mapper_parsing_exception']
+        elasticsearch_return.returner(self._ret('minion1'))
+        elasticsearch_return.returner(self._ret('minion2'))
+        self.assertEqual(len(StandInElasticsearchHandler.requests), 1)
+        self.assertEqual(self._stats(),
+                         {'batches': 1, 'rows': 2, 'retried': 0,
+                          'dropped': 0, 'rejected': 1})
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the influxdb returner and its batches of returns.
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import Salt Testing libs
+from tests.support.helpers import Webserver
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import NO_MOCK, NO_MOCK_REASON
+
+# Import Salt libs
+import salt.returners
+import salt.returners.influxdb_return as influxdb_return
+
+# Import 3rd-party libs
+import tornado.web
+
+
+class StandInInfluxDBHandler(tornado.web.RequestHandler):
+    '''
+    Answer the requests of the InfluxDB client like a server would, keeping
+    the points of each write request
+    '''
+    # The lines of each write request
+    requests = []
+    # Status of the write requests
+    status = 204
+
+    def initialize(self, path):  # pylint: disable=arguments-differ
+        pass
+
+    def get(self, path):  # pylint: disable=arguments-differ
+        self.set_header('X-Influxdb-Version', '1.7.0')
+        self.set_status(204)
+        self.finish()
+
+    def post(self, path):  # pylint: disable=arguments-differ
+        if path != 'write':
+            self.send_error(404)
+            return
+        self.set_header('X-Influxdb-Version', '1.7.0')
+        if self.status != 204:
+            self.set_header('Content-Type', 'application/json')
+            self.set_status(self.status)
+            self.finish('{"error": "unavailable"}')
+            return
+        self.requests.append(
+            [line for line in self.request.body.decode('utf-8').splitlines()
+             if line.strip()])
+        self.set_status(204)
+        self.finish()
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not influxdb_return.HAS_INFLUXDB, 'influxdb is not installed')
+class InfluxDBReturnTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the batches of the influxdb returner against a stand-in InfluxDB
+    server
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.webserver = Webserver(handler=StandInInfluxDBHandler)
+        cls.webserver.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.webserver.stop()
+        del cls.webserver
+
+    def setup_loader_modules(self):
+        self.addCleanup(salt.returners._RETURN_BUFFERS.clear)
+        return {influxdb_return: {
+            '__opts__': {'influxdb.host': '127.0.0.1',
+                         'influxdb.port': self.webserver.port,
+                         'influxdb.db': 'salt',
+                         'influxdb.user': 'salt',
+                         'influxdb.password': 'salt',
+                         'influxdb.batch_size': 2,
+                         'influxdb.batch_interval': 3600},
+            '__salt__': {}}}
+
+    def setUp(self):
+        StandInInfluxDBHandler.requests = []
+        StandInInfluxDBHandler.status = 204
+
+    def _ret(self, minion):
+        return {'fun': 'test.ping', 'jid': '20180101000000000000',
+                'id': minion, 'return': True, 'success': True}
+
+    def _minions(self, request):
+        return [minion for minion in ('minion1', 'minion2', 'minion3')
+                for line in request if 'id={0}'.format(minion) in line]
+
+    def test_returner_batch(self):
+        '''
+        Tests that the returns are written with a single request, and that
+        the failed batches are retried
+        '''
+        influxdb_return.returner(self._ret('minion1'))
+        self.assertEqual(StandInInfluxDBHandler.requests, [])
+        influxdb_return.returner(self._ret('minion2'))
+        self.assertEqual(
+            [self._minions(request) for request in StandInInfluxDBHandler.requests],
+            [['minion1', 'minion2']])
+
+        StandInInfluxDBHandler.status = 500
+        influxdb_return.returner(self._ret('minion3'))
+        for buf in salt.returners._RETURN_BUFFERS.values():
+            buf.flush()
+        self.assertEqual(len(StandInInfluxDBHandler.requests), 1)
+
+        StandInInfluxDBHandler.status = 204
+        for buf in salt.returners._RETURN_BUFFERS.values():
+            buf.flush()
+        self.assertEqual(
+            [self._minions(request) for request in StandInInfluxDBHandler.requests],
+            [['minion1', 'minion2'], ['minion3']])
+        self.assertEqual(
+            salt.returners.get_return_buffer_stats(),
+            {'influxdb': {'batches': 2, 'rows': 3, 'retried': 1, 'dropped': 0,
+                          'rejected': 0}})
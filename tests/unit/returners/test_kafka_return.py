@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the kafka returner and its batches of returns.
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import Salt Testing libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import NO_MOCK, NO_MOCK_REASON, patch
+
+# Import Salt libs
+import salt.returners
+import salt.returners.kafka_return as kafka_return
+import salt.utils.json
+
+
+class StandInKafka(object):
+    '''
+    Stand-in for a Kafka cluster, keeping the messages of each produce request
+    '''
+    def __init__(self):
+        self.requests = []
+        self.clients = []
+        self.available = True
+
+    def client(self, hostnames):
+        '''
+        Stand-in for ``kafka.KafkaClient``
+        '''
+        return StandInKafkaClient(self, hostnames)
+
+    def producer(self, client):
+        '''
+        Stand-in for ``kafka.SimpleProducer``
+        '''
+        return StandInKafkaProducer(self, client)
+
+
+class StandInKafkaClient(object):
+    def __init__(self, cluster, hostnames):
+        self.cluster = cluster
+        self.hostnames = hostnames
+        self.closed = False
+        cluster.clients.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+class StandInKafkaProducer(object):
+    def __init__(self, cluster, client):
+        self.cluster = cluster
+        self.client = client
+
+    def send_messages(self, topic, *msgs):
+        if self.client.closed or not self.cluster.available:
+            raise Exception('no broker available')
+        self.cluster.requests.append((topic, list(msgs)))
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class KafkaReturnTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the batches of the kafka returner against a stand-in Kafka
+    cluster
+    '''
+    def setup_loader_modules(self):
+        self.addCleanup(salt.returners._RETURN_BUFFERS.clear)
+        config = {'returner.kafka.hostnames': ['127.0.0.1:9092'],
+                  'returner.kafka.topic': 'salt',
+                  'returner.kafka.batch_size': 2,
+                  'returner.kafka.batch_interval': 3600}
+        return {kafka_return: {
+            '__salt__': {'config.option': lambda key, default=None: config.get(key, default)}}}
+
+    def setUp(self):
+        self.cluster = StandInKafka()
+        for name, stand_in in (('KafkaClient', self.cluster.client),
+                               ('SimpleProducer', self.cluster.producer)):
+            patcher = patch.object(kafka_return, name, stand_in, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _ret(self, minion):
+        return {'fun': 'test.ping', 'jid': '20180101000000000000',
+                'id': minion, 'return': True, 'success': True}
+
+    def _minions(self, request):
+        topic, msgs = request
+        return topic, [salt.utils.json.loads(msg)['id'] for msg in msgs]
+
+    def test_returner_batch(self):
+        '''
+        Tests that the returns are sent with a single produce request over a
+        connection kept open between the batches
+        '''
+        for minion in ('minion1', 'minion2', 'minion3', 'minion4'):
+            kafka_return.returner(self._ret(minion))
+        self.assertEqual(
+            [self._minions(request) for request in self.cluster.requests],
+            [('salt', ['minion1', 'minion2']), ('salt', ['minion3', 'minion4'])])
+        self.assertEqual(len(self.cluster.clients), 1)
+        self.assertFalse(self.cluster.clients[0].closed)
+
+    def test_returner_retry(self):
+        '''
+        Tests that the failed batches are retried with a new connection, and
+        counted in the stats of the buffer
+        '''
+        self.cluster.available = False
+        kafka_return.returner(self._ret('minion1'))
+        kafka_return.returner(self._ret('minion2'))
+        self.assertEqual(self.cluster.requests, [])
+        self.assertTrue(self.cluster.clients[0].closed)
+
+        self.cluster.available = True
+        kafka_return.returner(self._ret('minion3'))
+        for buf in salt.returners._RETURN_BUFFERS.values():
+            buf.flush()
+        self.assertEqual(
+            [self._minions(request) for request in self.cluster.requests],
+            [('salt', ['minion1', 'minion2', 'minion3'])])
+        self.assertEqual(len(self.cluster.clients), 2)
+        self.assertEqual(
+            salt.returners.get_return_buffer_stats(),
+            {'kafka': {'batches': 1, 'rows': 3, 'retried': 1, 'dropped': 0,
+                       'rejected': 0}})
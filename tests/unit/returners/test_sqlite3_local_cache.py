@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the SQLite master job cache (sqlite3_local_cache).
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import tempfile
+import time
+
+# Import Salt Testing libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.paths import TMP
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import NO_MOCK, NO_MOCK_REASON, patch
+
+# Import Salt libs
+import salt.utils.files
+import salt.returners.sqlite3_local_cache as sqlite3_local_cache
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not sqlite3_local_cache.HAS_SQLITE3, 'sqlite3 is not available')
+class SQLite3LocalCacheTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the sqlite3_local_cache returner
+    '''
+    def setup_loader_modules(self):
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(salt.utils.files.rm_rf, self.cachedir)
+        self.addCleanup(sqlite3_local_cache._CONN.clear)
+        sqlite3_local_cache._CONN.clear()
+        return {sqlite3_local_cache: {
+            '__opts__': {'cachedir': self.cachedir,
+                         'keep_jobs': 24,
+                         'hash_type': 'sha256',
+                         'job_cache_store_endtime': True,
+                         'serial': 'msgpack',
+                         'unique_jid': False}}}
+
+    def _run_job(self, fun='test.ping', minions=('minion1', 'minion2')):
+        jid = sqlite3_local_cache.prep_jid()
+        load = {'fun': fun, 'arg': [], 'tgt': 'minion*', 'tgt_type': 'glob',
+                'user': 'root', 'jid': jid}
+        sqlite3_local_cache.save_load(jid, load, minions=list(minions))
+        for minion in minions:
+            sqlite3_local_cache.returner(
+                {'jid': jid, 'id': minion, 'fun': fun, 'return': True,
+                 'retcode': 0, 'success': True, 'out': 'nested'})
+        return jid
+
+    def test_job_roundtrip(self):
+        '''
+        A job's load, minion list and returns can be read back
+        '''
+        jid = self._run_job()
+        load = sqlite3_local_cache.get_load(jid)
+        self.assertEqual(load['fun'], 'test.ping')
+        self.assertEqual(load['Minions'], ['minion1', 'minion2'])
+
+        ret = sqlite3_local_cache.get_jid(jid)
+        self.assertEqual(
+            ret['minion1'],
+            {'return': True, 'retcode': 0, 'success': True, 'out': 'nested'})
+        self.assertEqual(sorted(ret), ['minion1', 'minion2'])
+
+        self.assertEqual(
+            sqlite3_local_cache.get_fun('test.ping'),
+            {'minion1': jid, 'minion2': jid})
+
+        sqlite3_local_cache.update_endtime(jid, 'then')
+        self.assertEqual(sqlite3_local_cache.get_endtime(jid), 'then')
+        jids = sqlite3_local_cache.get_jids()
+        self.assertEqual(jids[jid]['Function'], 'test.ping')
+        self.assertEqual(jids[jid]['EndTime'], 'then')
+
+    def test_duplicate_return(self):
+        '''
+        A second return from the same minion for a jid is dropped
+        '''
+        jid = self._run_job(minions=['minion1'])
+        self.assertFalse(sqlite3_local_cache.returner(
+            {'jid': jid, 'id': 'minion1', 'fun': 'test.ping', 'return': False}))
+        self.assertTrue(sqlite3_local_cache.get_jid(jid)['minion1']['return'])
+
+    def test_nocache(self):
+        '''
+        Returns for a nocache job are not stored
+        '''
+        jid = sqlite3_local_cache.prep_jid(nocache=True)
+        sqlite3_local_cache.returner(
+            {'jid': jid, 'id': 'minion1', 'fun': 'test.ping', 'return': True})
+        self.assertEqual(sqlite3_local_cache.get_jid(jid), {})
+
+    def test_get_jids_filter(self):
+        '''
+        Only the most recent jobs are returned, oldest first
+        '''
+        jids = []
+        for idx in range(4):
+            jids.append(self._run_job(
+                fun='saltutil.find_job' if idx == 3 else 'test.ping'))
+        ret = sqlite3_local_cache.get_jids_filter(2)
+        self.assertEqual([job['JID'] for job in ret], jids[1:3])
+        ret = sqlite3_local_cache.get_jids_filter(2, filter_find_job=False)
+        self.assertEqual([job['JID'] for job in ret], jids[2:])
+
+    def test_clean_old_jobs(self):
+        '''
+        Jobs older than keep_jobs are removed along with their returns
+        '''
+        with patch('time.time', return_value=time.time() - 25 * 3600):
+            old_jid = self._run_job()
+        new_jid = self._run_job()
+        sqlite3_local_cache.clean_old_jobs()
+        self.assertEqual(sqlite3_local_cache.get_load(old_jid), {})
+        self.assertEqual(sqlite3_local_cache.get_jid(old_jid), {})
+        self.assertEqual(list(sqlite3_local_cache.get_jids()), [new_jid])
+        self.assertEqual(sorted(sqlite3_local_cache.get_jid(new_jid)),
+                         ['minion1', 'minion2'])
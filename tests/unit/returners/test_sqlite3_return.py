@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+'''
+Unit tests for the sqlite3 returner and the batches of returns.
+'''
+
+# Import Python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import os
+import sqlite3
+import tempfile
+
+# Import Salt Testing libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.paths import TMP
+from tests.support.unit import TestCase, skipIf
+from tests.support.mock import MagicMock, NO_MOCK, NO_MOCK_REASON
+
+# Import Salt libs
+import salt.returners
+import salt.utils.files
+import salt.returners.sqlite3_return as sqlite3_return
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class SQLite3ReturnTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the batches of the sqlite3 returner
+    '''
+    def setup_loader_modules(self):
+        tmpdir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(salt.utils.files.rm_rf, tmpdir)
+        self.database = os.path.join(tmpdir, 'salt.db')
+        conn = sqlite3.connect(self.database)
+        conn.execute('''CREATE TABLE salt_returns (
+                        fun TEXT KEY, jid TEXT KEY, id TEXT KEY,
+                        fun_args TEXT, date TEXT NOT NULL,
+                        full_ret TEXT NOT NULL, success TEXT NOT NULL)''')
+        conn.close()
+        self.addCleanup(salt.returners._RETURN_BUFFERS.clear)
+        return {sqlite3_return: {
+            '__opts__': {'sqlite3.database': self.database,
+                         'sqlite3.timeout': 5.0,
+                         'sqlite3.batch_size': 3,
+                         'sqlite3.batch_interval': 3600}}}
+
+    def _count(self):
+        conn = sqlite3.connect(self.database)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM salt_returns').fetchone()[0]
+        finally:
+            conn.close()
+
+    def _ret(self, minion):
+        return {'fun': 'test.ping', 'jid': '20180101000000000000',
+                'id': minion, 'return': True, 'success': True}
+
+    def test_returner_batch(self):
+        '''
+        Tests that the returns are inserted once a batch is complete
+        '''
+        sqlite3_return.returner(self._ret('minion1'))
+        sqlite3_return.returner(self._ret('minion2'))
+        self.assertEqual(self._count(), 0)
+        sqlite3_return.returner(self._ret('minion3'))
+        self.assertEqual(self._count(), 3)
+        sqlite3_return.returner(self._ret('minion4'))
+        for buf in salt.returners._RETURN_BUFFERS.values():
+            buf.flush()
+            buf.close()
+        self.assertEqual(self._count(), 4)
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ReturnBufferTestCase(TestCase):
+    '''
+    Tests for the return buffers
+    '''
+    def test_write_error(self):
+        '''
+        Tests that the rows are kept when they can't be written, up to the
+        maximum number of rows
+        '''
+        connect = MagicMock()
+        write = MagicMock(side_effect=Exception('database unavailable'))
+        buf = salt.returners.ReturnBuffer(connect, write, batch_size=2,
+                                          interval=3600, max_rows=3)
+        for row in range(2):
+            buf.add(row)
+        write.assert_called_once_with(connect.return_value, [0, 1])
+        for row in range(2, 5):
+            buf.add(row)
+        # The batches are not retried before the interval
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(list(buf.rows), [2, 3, 4])
+        self.assertEqual(buf.dropped, 2)
+
+        write.side_effect = None
+        buf.flush()
+        write.assert_called_with(connect.return_value, [2, 3, 4])
+        self.assertEqual(list(buf.rows), [])
+        self.assertEqual(buf.dropped, 0)
+
+    def test_stats(self):
+        '''
+        Tests that the stats of the buffers are added up for each returner,
+        without the buffer ids
+        '''
+        self.addCleanup(salt.returners._RETURN_BUFFERS.clear)
+        write = MagicMock(side_effect=[Exception('database unavailable'), None, 1])
+        for buffer_id in ('mysql:{"pass": "secret"}', 'mysql:{"pass": "other"}'):
+            buf = salt.returners.get_return_buffer(
+                buffer_id, MagicMock(), write, batch_size=2, interval=3600)
+            buf.add(0)
+            buf.add(1)
+        buf.flush()
+        buf.add(2)
+        buf.flush()
+        self.assertEqual(
+            salt.returners.get_return_buffer_stats(),
+            {'mysql': {'batches': 2, 'rows': 3, 'retried': 1, 'dropped': 0,
+                       'rejected': 1}})
@@ -19,6 +19,7 @@ from tests.support.mock import (
 # Import Salt Libs
 import salt.runners.cache as cache
 import salt.utils.master
+from salt.exceptions import SaltInvocationError
 
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
@@ -48,3 +49,13 @@ class CacheTest(TestCase, LoaderModuleMockMixin):
 
         with patch.object(salt.utils.master, 'MasterPillarUtil', MockMaster):
             self.assertEqual(cache.grains(), mock_data)
+
+    def test_pillar_cache_memory_backend(self):
+        '''
+        test the compiled pillar cache runners with the memory backend
+        '''
+        with patch.dict(cache.__opts__, {'pillar_cache_backend': 'memory',
+                                         'cachedir': TMP}):
+            self.assertRaises(SaltInvocationError, cache.pillar_cache_stats)
+            self.assertRaises(SaltInvocationError,
+                              cache.invalidate_pillar_cache, sls='users')
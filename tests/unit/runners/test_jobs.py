@@ -78,3 +78,36 @@ class JobsTest(TestCase, LoaderModuleMockMixin):
 
             self.assertEqual(jobs.list_jobs(search_target='non-existant'),
                              returns['non-existant'])
+
+    def test_active_job_registry(self):
+        '''
+        test jobs.active runner reading the job registry
+        '''
+        registry_jobs = {
+            '20160524035503086853': {
+                'node-1-1.com': {'jid': '20160524035503086853',
+                                 'fun': 'test.sleep',
+                                 'arg': [60],
+                                 'tgt': '*',
+                                 'tgt_type': 'glob',
+                                 'user': 'root',
+                                 'pid': 1234}}}
+
+        class MockMasterMinion(object):
+
+            returners = {'local_cache.get_jid': lambda jid: {'node-1-2.com': {}}}
+
+            def __init__(self, *args, **kwargs):
+                pass
+
+        opts = {'ext_job_cache': None, 'master_job_cache': 'local_cache',
+                'job_registry': True}
+        with patch.dict(jobs.__opts__, opts), \
+                patch.object(salt.minion, 'MasterMinion', MockMasterMinion), \
+                patch('salt.utils.job.JobRegistry.jobs', return_value=registry_jobs), \
+                patch('salt.client.get_local_client') as local_client:
+            ret = jobs.active()
+            local_client.assert_not_called()
+        self.assertEqual(ret['20160524035503086853']['Running'], [{'node-1-1.com': 1234}])
+        self.assertEqual(ret['20160524035503086853']['Returned'], ['node-1-2.com'])
+        self.assertEqual(ret['20160524035503086853']['Function'], 'test.sleep')
@@ -982,6 +982,7 @@ class TestFileState(TestCase, LoaderModuleMockMixin):
         mock_uid = MagicMock(return_value='')
         mock_gid = MagicMock(return_value='')
         mock_l = MagicMock(return_value=[])
+        mock_n = MagicMock(return_value=None)
         mock_emt = MagicMock(side_effect=[[], ['code/flask'], ['code/flask']])
         mock_lst = MagicMock(side_effect=[CommandExecutionError, (source, ''),
                                           (source, ''), (source, '')])
@@ -990,6 +991,7 @@ class TestFileState(TestCase, LoaderModuleMockMixin):
                                              'file.group_to_gid': mock_gid,
                                              'file.source_list': mock_lst,
                                              'cp.list_master_dirs': mock_emt,
+                                             'cp.list_master_manifest': mock_n,
                                              'cp.list_master': mock_l}):
 
             # Group argument is ignored on Windows systems. Group is set to user
@@ -231,6 +231,48 @@ class FileclientCacheTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderMod
                     self.assertTrue(SUBDIR in content)
                     self.assertTrue(saltenv in content)
 
+    def test_cache_dir_uses_manifest(self):
+        '''
+        Ensure the file manifest fetched by cache_dir is used to answer hash
+        requests without asking the file server again
+        '''
+        patched_opts = dict((x, y) for x, y in six.iteritems(self.minion_opts))
+        patched_opts.update(MOCKED_OPTS)
+        patched_opts['file_manifest_cache_time'] = 60
+
+        with patch.dict(fileclient.__opts__, patched_opts):
+            client = fileclient.get_file_client(fileclient.__opts__, pillar=False)
+            manifest = client.file_manifest('base', SUBDIR)
+            self.assertEqual(
+                sorted(manifest),
+                sorted('{0}/{1}'.format(SUBDIR, x) for x in SUBDIR_FILES)
+            )
+            path = 'salt://{0}/{1}'.format(SUBDIR, SUBDIR_FILES[0])
+            expected = client.hash_file(path, 'base')
+            cached = client.cache_dir('salt://{0}'.format(SUBDIR), 'base')
+            self.assertEqual(len(cached), len(SUBDIR_FILES))
+            with patch.object(client.channel, 'send',
+                              MagicMock(side_effect=Exception('no request expected'))):
+                self.assertEqual(client.hash_file(path, 'base'), expected)
+                # Only the manifest is requested when all files are cached
+                with patch.object(client, 'file_manifest',
+                                  MagicMock(return_value=manifest)):
+                    self.assertEqual(
+                        client.cache_dir('salt://{0}'.format(SUBDIR), 'base'),
+                        cached
+                    )
+
+        # Without the manifest cache the manifest is not requested at all
+        patched_opts['file_manifest_cache_time'] = 0
+        with patch.dict(fileclient.__opts__, patched_opts):
+            client = fileclient.get_file_client(fileclient.__opts__, pillar=False)
+            with patch.object(client, 'file_manifest', MagicMock()) as file_manifest:
+                self.assertEqual(
+                    client.cache_dir('salt://{0}'.format(SUBDIR), 'base'),
+                    cached
+                )
+            file_manifest.assert_not_called()
+
     def test_cache_dir_with_alternate_cachedir_and_absolute_path(self):
         '''
         Ensure entire directory is cached to correct location when an alternate
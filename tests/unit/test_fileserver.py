@@ -8,6 +8,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 # Import Salt Testing libs
 from tests.support.unit import TestCase
+from tests.support.mock import patch, MagicMock
 
 from salt import fileserver
 
@@ -28,3 +29,44 @@ class MapDiffTestCase(TestCase):
         map1 = {'file1': 12345}
         map2 = {'file1': 1234}
         assert fileserver.diff_mtime_map(map1, map2) is True
+
+
+class ServeFileWindowTestCase(TestCase):
+    DATA = b'0123456789' * 10
+
+    def _serve_file(self, load, fnd):
+        '''
+        Fake backend serving 16 bytes chunks
+        '''
+        return {'data': self.DATA[load['loc']:load['loc'] + 16],
+                'dest': fnd['rel']}
+
+    def _fileserver(self, max_window):
+        with patch('salt.loader.fileserver',
+                   MagicMock(return_value={'fake.serve_file': self._serve_file})):
+            fs_ = fileserver.Fileserver({'fileserver_backend': ['fake'],
+                                         'file_transfer_max_window': max_window})
+        fs_.find_file = MagicMock(return_value={'back': 'fake',
+                                                'path': '/srv/salt/foo',
+                                                'rel': 'foo'})
+        return fs_
+
+    def test_serve_file_window(self):
+        '''
+        Test that several chunks are served in one reply
+        '''
+        fs_ = self._fileserver(16)
+        load = {'path': 'foo', 'saltenv': 'base', 'loc': 0, 'window': 4}
+        ret = fs_.serve_file(dict(load))
+        self.assertEqual(ret['data'], self.DATA[:64])
+        load['loc'] = 64
+        ret = fs_.serve_file(dict(load))
+        self.assertEqual(ret['data'], self.DATA[64:])
+
+    def test_serve_file_window_capped(self):
+        '''
+        Test that the window is capped by file_transfer_max_window
+        '''
+        fs_ = self._fileserver(2)
+        load = {'path': 'foo', 'saltenv': 'base', 'loc': 0, 'window': 4}
+        self.assertEqual(fs_.serve_file(load)['data'], self.DATA[:32])
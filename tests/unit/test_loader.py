@@ -19,6 +19,7 @@ import shutil
 import sys
 import tempfile
 import textwrap
+import time
 
 # Import Salt Testing libs
 from tests.support.case import ModuleCase
@@ -1246,3 +1247,108 @@ class LazyLoaderOptimizationOrderTest(TestCase):
         basename = os.path.basename(filename)
         expected = 'lazyloadertest.py' if six.PY3 else 'lazyloadertest.pyc'
         assert basename == expected, basename
+
+
+index_virtual_template = '''
+def __virtual__():
+    with open({marker!r}, 'a') as fp_:
+        fp_.write('x')
+    return (False, 'not here')
+
+
+def test():
+    return True
+'''
+
+index_module_template = '''
+def test():
+    return True
+'''
+
+
+class LazyLoaderIndexTest(TestCase):
+    '''
+    Test the loader_index option
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.opts = salt.config.minion_config(None)
+        cls.opts['grains'] = {'os': 'Linux'}
+        if not os.path.isdir(TMP):
+            os.makedirs(TMP)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.opts
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=TMP)
+        self.module_dir = os.path.join(self.tmp_dir, 'modules')
+        os.makedirs(self.module_dir)
+        self.marker = os.path.join(self.tmp_dir, 'marker')
+        self.bad_module = os.path.join(self.module_dir, 'indexbad.py')
+        with salt.utils.files.fopen(self.bad_module, 'w') as fh:
+            fh.write(index_virtual_template.format(marker=self.marker))
+        with salt.utils.files.fopen(os.path.join(self.module_dir, 'indexgood.py'), 'w') as fh:
+            fh.write(index_module_template)
+        # Old enough for the file mapping to be indexed
+        mtime = time.time() - 10
+        os.utime(self.module_dir, (mtime, mtime))
+        self.loader_opts = copy.deepcopy(self.opts)
+        self.loader_opts['cachedir'] = os.path.join(self.tmp_dir, 'cache')
+        self.loader_opts['loader_index'] = True
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _get_loader(self):
+        return salt.loader.LazyLoader([self.module_dir], self.loader_opts, tag='module')
+
+    def _virtual_calls(self):
+        if not os.path.exists(self.marker):
+            return 0
+        with salt.utils.files.fopen(self.marker) as fh:
+            return len(fh.read())
+
+    def test_index(self):
+        loader = self._get_loader()
+        loader._load_all()
+        self.assertIn('indexgood.test', loader)
+        self.assertNotIn('indexbad.test', loader)
+        self.assertEqual(self._virtual_calls(), 1)
+
+        # The module dir is not scanned again and the failed module is skipped
+        with patch('os.listdir', side_effect=OSError):
+            loader = self._get_loader()
+        self.assertIn('indexgood.test', loader)
+        self.assertNotIn('indexbad.test', loader)
+        self.assertEqual(self._virtual_calls(), 1)
+        self.assertIn('not here', loader.missing_fun_string('indexbad.test'))
+
+        # Changing the module evaluates it again
+        mtime = os.stat(self.bad_module).st_mtime + 1
+        os.utime(self.bad_module, (mtime, mtime))
+        loader = self._get_loader()
+        self.assertNotIn('indexbad.test', loader)
+        self.assertEqual(self._virtual_calls(), 2)
+
+        # As does a change of the grains
+        self.loader_opts['grains'] = {'os': 'Windows'}
+        loader = self._get_loader()
+        self.assertNotIn('indexbad.test', loader)
+        self.assertEqual(self._virtual_calls(), 3)
+
+        # And refreshing the modules
+        loader.clear()
+        loader = self._get_loader()
+        self.assertNotIn('indexbad.test', loader)
+        self.assertEqual(self._virtual_calls(), 4)
+
+        # Including with new loaders, as the minion module refresh does
+        loader = self._get_loader()
+        self.assertNotIn('indexbad.test', loader)
+        self.assertEqual(self._virtual_calls(), 4)
+        salt.loader.reset_index(self.loader_opts)
+        loader = self._get_loader()
+        self.assertNotIn('indexbad.test', loader)
+        self.assertEqual(self._virtual_calls(), 5)
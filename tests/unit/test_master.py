@@ -331,3 +331,43 @@ class ClearFuncsTestCase(TestCase):
                 patch('salt.utils.master.get_values_of_matching_keys', MagicMock(return_value=['test'])), \
                 patch('salt.utils.minions.CkMinions.auth_check', MagicMock(return_value=False)):
             self.assertEqual(mock_ret, self.clear_funcs.publish(load))
+
+
+class PillarWorkersTestCase(TestCase):
+    '''
+    TestCase for the pillar workers of the master
+    '''
+
+    def setUp(self):
+        self.opts = salt.config.master_config(None)
+
+    def test_pillar_workers_enabled(self):
+        '''
+        The pillar workers are only used when configured with the tcp
+        transport and reachable over IPC sockets
+        '''
+        self.assertFalse(salt.master.pillar_workers_enabled(self.opts))
+        self.opts['pillar_workers'] = 2
+        self.assertFalse(salt.master.pillar_workers_enabled(self.opts))
+        self.opts['transport'] = 'tcp'
+        self.assertTrue(salt.master.pillar_workers_enabled(self.opts))
+        self.opts['ipc_mode'] = 'tcp'
+        self.assertFalse(salt.master.pillar_workers_enabled(self.opts))
+        self.opts['ipc_mode'] = 'ipc'
+        with patch('salt.master.zmq', None):
+            self.assertFalse(salt.master.pillar_workers_enabled(self.opts))
+
+    def test_compile_minion_pillar(self):
+        '''
+        The pillar is compiled with the parameters of the minion payload
+        '''
+        load = {'id': 'minion', 'grains': {'id': 'minion'}, 'saltenv': 'dev',
+                'pillarenv': 'dev'}
+        pillar = MagicMock()
+        pillar.compile_pillar.return_value = {'foo': 'bar'}
+        with patch('salt.pillar.get_pillar', MagicMock(return_value=pillar)) as get_pillar:
+            self.assertEqual(salt.master.compile_minion_pillar(self.opts, load),
+                             {'foo': 'bar'})
+        get_pillar.assert_called_once_with(
+            self.opts, {'id': 'minion'}, 'minion', 'dev', ext=None,
+            pillar_override={}, pillarenv='dev', extra_minion_data=None)
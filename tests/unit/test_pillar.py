@@ -9,6 +9,7 @@
 
 # Import python libs
 from __future__ import absolute_import
+import copy
 import tempfile
 
 # Import Salt Testing libs
@@ -18,6 +19,7 @@ from tests.support.paths import TMP
 
 # Import salt libs
 import salt.pillar
+import salt.utils.files
 import salt.utils.stringutils
 import salt.exceptions
 
@@ -99,6 +101,41 @@ class PillarTestCase(TestCase):
                                                      'fake_pillar',
                                                      arg='foo')
 
+    def test_ext_pillar_workers(self):
+        opts = {
+            'optimization_order': [0, 1, 2],
+            'renderer': 'json',
+            'renderer_blacklist': [],
+            'renderer_whitelist': [],
+            'state_top': '',
+            'pillar_roots': {
+                'base': []
+            },
+            'file_roots': {
+                'base': []
+            },
+            'extension_modules': '',
+            'ext_pillar': [{'first': {'arg': 'foo'}},
+                           {'second': ['bar']}],
+            'ext_pillar_workers': 2,
+        }
+        first = MagicMock(return_value={'key': 'first', 'first': True})
+        second = MagicMock(return_value={'key': 'second'})
+        with patch('salt.loader.pillars',
+                   MagicMock(return_value={'first': first,
+                                           'second': second})):
+            pillar = salt.pillar.Pillar(opts, {}, 'mocked-minion', 'base')
+        with patch('salt.utils.args.get_function_argspec',
+                   MagicMock(return_value=MagicMock(args=[]))):
+            ret, errors = pillar.ext_pillar({'pillar': True})
+        self.assertEqual(errors, [])
+        # The data is merged in the configured order
+        self.assertEqual(ret, {'pillar': True, 'key': 'second', 'first': True})
+        first.assert_called_once_with('mocked-minion', {'pillar': True}, arg='foo')
+        second.assert_called_once_with('mocked-minion', {'pillar': True}, 'bar')
+        self.assertEqual([key for key, _ in pillar.ext_pillar_times],
+                         ['first', 'second'])
+
     def test_ext_pillar_no_extra_minion_data_val_list(self):
         opts = {
             'optimization_order': [0, 1, 2],
@@ -639,6 +676,45 @@ generic:
             self.assertEqual(compiled_pillar['foo1'], 'bar1')
             self.assertEqual(compiled_pillar['foo2'], 'bar2')
 
+    def test_pillar_sls_memo(self):
+        with patch('salt.pillar.salt.fileclient.get_file_client', autospec=True) as get_file_client, \
+                patch('salt.pillar.salt.minion.Matcher') as Matcher, \
+                patch('salt.pillar._PSTATE_MEMO', salt.pillar.OrderedDict()):  # autospec=True disabled due to py3 mock bug
+            opts = {
+                'optimization_order': [0, 1, 2],
+                'renderer': 'yaml',
+                'renderer_blacklist': [],
+                'renderer_whitelist': [],
+                'state_top': '',
+                'pillar_roots': [],
+                'extension_modules': '',
+                'saltenv': 'base',
+                'file_roots': [],
+                'pillar_sls_memo': ['test*'],
+            }
+
+            self._setup_test_include_mocks(Matcher, get_file_client)
+            pillar = salt.pillar.Pillar(opts, {'os': 'Ubuntu'}, 'minion1', 'base')
+            compiled_pillar = pillar.compile_pillar()
+            self.assertEqual(pillar.sls_memo_stats, {'hits': 0, 'misses': 4})
+
+            pillar = salt.pillar.Pillar(opts, {'os': 'Debian'}, 'minion2', 'base')
+            self.assertEqual(pillar.compile_pillar(), compiled_pillar)
+            # The SLS files do not read any grain
+            self.assertEqual(pillar.sls_memo_stats, {'hits': 4, 'misses': 0})
+
+            with salt.utils.files.fopen(self.sub1_sls.name, 'w') as fp_:
+                fp_.write('foo1: changed\n')
+            pillar = salt.pillar.Pillar(opts, {'os': 'Debian'}, 'minion2', 'base')
+            self.assertEqual(pillar.compile_pillar()['foo1'], 'changed')
+            self.assertEqual(pillar.sls_memo_stats, {'hits': 3, 'misses': 1})
+
+            # The rendered data expires with the pillar cache TTL
+            opts['pillar_cache_ttl'] = -1
+            pillar = salt.pillar.Pillar(opts, {'os': 'Debian'}, 'minion2', 'base')
+            pillar.compile_pillar()
+            self.assertEqual(pillar.sls_memo_stats, {'hits': 0, 'misses': 4})
+
     def _setup_test_include_mocks(self, Matcher, get_file_client):
         self.top_file = top_file = tempfile.NamedTemporaryFile(dir=TMP, delete=False)
         top_file.write(b'''
@@ -696,6 +772,91 @@ foo_wildcard:
 
         client.get_state.side_effect = get_state
 
+    def test_tracked_dict_scope(self):
+        grains = salt.pillar.TrackedDict({'os': 'Ubuntu', 'kernel': 'Linux'})
+        self.assertEqual(grains['os'], 'Ubuntu')
+        scope = grains.push_scope()
+        self.assertEqual(grains['kernel'], 'Linux')
+        grains.pop_scope(scope)
+        grains.get('virtual')
+        reads = grains.digests(scope)
+        self.assertEqual(list(reads['keys']), ['kernel'])
+        self.assertTrue(salt.pillar._reads_match({'kernel': 'Linux'}, reads))
+        self.assertFalse(salt.pillar._reads_match({'kernel': 'Darwin'}, reads))
+        self.assertFalse(salt.pillar._reads_match({}, reads))
+
+        other = salt.pillar.TrackedDict({'kernel': 'Linux'})
+        other.replay(reads)
+        self.assertEqual(other.digests(), reads)
+
+    def test_tracked_grains(self):
+        grains = salt.pillar.TrackedDict({'os': 'Ubuntu', 'kernel': 'Linux'})
+        self.assertEqual(grains['os'], 'Ubuntu')
+        self.assertIsNone(grains.get('virtual'))
+        copied = copy.deepcopy(grains)
+        self.assertIn('kernel', copied)
+        digests = grains.digests()
+        self.assertEqual(sorted(digests['keys']), ['kernel', 'os', 'virtual'])
+        self.assertIsNone(digests['keys']['virtual'])
+        list(copied.items())
+        self.assertIn('all', grains.digests())
+
+    def test_pillar_cache_track_deps(self):
+        with patch('salt.pillar.salt.fileclient.get_file_client', autospec=True) as get_file_client, \
+                patch('salt.pillar.salt.minion.Matcher') as Matcher:  # autospec=True disabled due to py3 mock bug
+            opts = {
+                'optimization_order': [0, 1, 2],
+                'renderer': 'yaml',
+                'renderer_blacklist': [],
+                'renderer_whitelist': [],
+                'state_top': '',
+                'pillar_roots': [],
+                'extension_modules': '',
+                'saltenv': 'base',
+                'file_roots': [],
+                'pillar_cache_backend': 'memory',
+                'pillar_cache_ttl': 3600,
+                'pillar_cache_track_deps': True,
+                'pillar_cache_check_interval': 0,
+            }
+            grains = {'os': 'Ubuntu'}
+
+            self._setup_test_include_mocks(Matcher, get_file_client)
+            cache = salt.pillar.PillarCache(opts, grains, 'minion', 'base')
+            self.assertEqual(cache.compile_pillar()['foo1'], 'bar1')
+            entry = cache.cache['minion'][None]
+            self.assertIn(self.sub1_sls.name, entry['deps']['files'])
+            self.assertIn('test.sub1', entry['deps']['sls']['base'])
+            self.assertTrue(
+                salt.pillar.PillarCache.depends_on(entry, sls='test.sub*'))
+            self.assertFalse(
+                salt.pillar.PillarCache.depends_on(entry, sls='users'))
+
+            self.assertEqual(cache.compile_pillar()['foo1'], 'bar1')
+            self.assertEqual(cache.cache['minion']['__stats__'],
+                             {'hits': 1, 'misses': 1, 'invalidations': 0})
+
+            with salt.utils.files.fopen(self.sub1_sls.name, 'w') as fp_:
+                fp_.write('foo1: changed\n')
+            self.assertEqual(cache.compile_pillar()['foo1'], 'changed')
+            self.assertEqual(cache.cache['minion']['__stats__'],
+                             {'hits': 1, 'misses': 2, 'invalidations': 1})
+
+            # The SLS files matching an include glob changed
+            get_file_client.return_value.list_states.return_value = [
+                'top', 'test.init', 'test.sub1', 'test.sub2']
+            self.assertNotIn('foo_wildcard', cache.compile_pillar())
+            self.assertEqual(cache.cache['minion']['__stats__'],
+                             {'hits': 1, 'misses': 3, 'invalidations': 2})
+
+            # The files are not checked again within the check interval
+            opts['pillar_cache_check_interval'] = 3600
+            with salt.utils.files.fopen(self.sub1_sls.name, 'w') as fp_:
+                fp_.write('foo1: again\n')
+            self.assertEqual(cache.compile_pillar()['foo1'], 'changed')
+            self.assertEqual(cache.cache['minion']['__stats__'],
+                             {'hits': 2, 'misses': 3, 'invalidations': 2})
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 @patch('salt.transport.Channel.factory', MagicMock())
@@ -8,6 +8,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 import os
 import shutil
 import tempfile
+import time
 
 # Import Salt Testing libs
 import tests.integration as integration
@@ -23,9 +24,14 @@ from tests.support.paths import BASE_FILES
 # Import Salt libs
 import salt.exceptions
 import salt.state
+import salt.utils.files
+import salt.utils.platform
 from salt.utils.odict import OrderedDict
 from salt.utils.decorators import state as statedecorators
 
+# Import 3rd-party libs
+from salt.ext import six
+
 try:
     import pytest
 except ImportError as err:
@@ -73,6 +79,179 @@ class StateCompilerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             with self.assertRaises(salt.exceptions.SaltRenderError):
                 state_obj.call_high(high_data)
 
+    def test_chunk_index(self):
+        '''
+        Test that the requisite index matches chunks the same way as the
+        fnmatch scan of the chunk list
+        '''
+        chunks = [
+            {'state': 'pkg', '__id__': 'git', 'name': 'git', '__sls__': 'scm', 'fun': 'installed'},
+            {'state': 'file', '__id__': 'gitconfig', 'name': '/etc/gitconfig', '__sls__': 'scm', 'fun': 'managed'},
+            {'state': 'service', '__id__': 'web', 'name': 'nginx', '__sls__': 'web.server', 'fun': 'running'},
+            {'state': 'pkg', '__id__': 'nginx', 'name': 'nginx', '__sls__': 'web.server', 'fun': 'installed'},
+        ]
+        index = salt.state.ChunkIndex(chunks)
+        self.assertTrue(index.current(chunks))
+        self.assertFalse(index.current(list(chunks)))
+        self.assertEqual(index.find('id', 'git'), [chunks[0]])
+        self.assertEqual(index.find('pkg', 'nginx'), [chunks[3]])
+        self.assertEqual(index.find('id', 'nginx'), [chunks[2], chunks[3]])
+        self.assertEqual(index.find('file', '/etc/gitconfig'), [chunks[1]])
+        self.assertEqual(index.find('service', 'git'), [])
+        self.assertEqual(index.find('id', 'git*'), [chunks[0], chunks[1]])
+        self.assertEqual(index.find('sls', 'scm'), [chunks[0], chunks[1]])
+        self.assertEqual(index.find('sls', 'web.*'), [chunks[2], chunks[3]])
+        self.assertEqual(index.find('id', None), [])
+        self.assertEqual(index.find_id_or_name('nginx'), [chunks[2], chunks[3]])
+        self.assertEqual(index.find_id_or_name('ngin'), [])
+
+        chunks.pop()
+        self.assertFalse(index.current(chunks))
+
+    def test_chunk_deps(self):
+        '''
+        Test that the dag state executor waits for the requisites of a chunk
+        but not for its prereqs
+        '''
+        chunks = [
+            {'state': 'pkg', '__id__': 'nginx', 'name': 'nginx', '__sls__': 'web', 'fun': 'installed'},
+            {'state': 'file', '__id__': 'conf', 'name': '/etc/nginx.conf', '__sls__': 'web', 'fun': 'managed',
+             'require': [{'pkg': 'nginx'}]},
+            {'state': 'service', '__id__': 'web', 'name': 'nginx', '__sls__': 'web', 'fun': 'running',
+             'watch': [{'file': 'conf'}], 'onchanges_any': ['nginx'], 'prereq': [{'pkg': 'nginx'}],
+             'require': [{'sls': 'web'}, {'file': 'missing'}]},
+        ]
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(self.get_temp_config('minion'))
+        index = salt.state.ChunkIndex(chunks)
+        tags = [salt.state._gen_tag(chunk) for chunk in chunks]
+        self.assertEqual(state_obj._chunk_deps(chunks[0], index), set())
+        self.assertEqual(state_obj._chunk_deps(chunks[1], index), set([tags[0]]))
+        self.assertEqual(state_obj._chunk_deps(chunks[2], index), set(tags[:2]))
+
+    def test_chunk_order_deps(self):
+        '''
+        Test that the chunks wait for the chunks with a lower explicit order
+        '''
+        chunks = [
+            {'state': 'pkg', '__id__': 'first', 'name': 'first', 'fun': 'installed', 'order': 0},
+            {'state': 'file', '__id__': 'one', 'name': 'one', 'fun': 'managed', 'order': 1},
+            {'state': 'file', '__id__': 'two', 'name': 'two', 'fun': 'managed', 'order': 101.0001},
+            {'state': 'file', '__id__': 'two', 'name': 'three', 'fun': 'managed', 'order': 101.0002},
+            {'state': 'service', '__id__': 'last', 'name': 'last', 'fun': 'running', 'order': 1000101},
+        ]
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(self.get_temp_config('minion'))
+        tags = [salt.state._gen_tag(chunk) for chunk in chunks]
+        self.assertEqual(state_obj._chunk_order_deps(chunks),
+                         {tags[0]: set(),
+                          tags[1]: set([tags[0]]),
+                          tags[2]: set([tags[1]]),
+                          tags[3]: set([tags[1]]),
+                          tags[4]: set(tags[2:4])})
+
+        # The orders set by state_auto_order are not waited on
+        chunks = [
+            {'state': 'pkg', '__id__': 'first', 'name': 'first', 'fun': 'installed', 'order': 0},
+            {'state': 'file', '__id__': 'one', 'name': 'one', 'fun': 'managed',
+             'order': 10000, '__auto_order__': 10000},
+            {'state': 'file', '__id__': 'two', 'name': 'two', 'fun': 'managed',
+             'order': 10001.0001, '__auto_order__': 10001},
+            {'state': 'file', '__id__': 'three', 'name': 'three', 'fun': 'managed',
+             'order': 5, '__auto_order__': 10002},
+        ]
+        tags = [salt.state._gen_tag(chunk) for chunk in chunks]
+        self.assertEqual(state_obj._chunk_order_deps(chunks),
+                         {tags[0]: set(),
+                          tags[1]: set([tags[3]]),
+                          tags[2]: set([tags[3]]),
+                          tags[3]: set([tags[0]])})
+
+    def test_fingerprint(self):
+        '''
+        Test that a state is skipped until the file it manages changes
+        '''
+        tmp_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        path = os.path.join(tmp_dir, 'motd')
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('hello')
+        low = {'state': 'file', '__id__': 'motd', 'name': path, '__sls__': 'motd',
+               '__env__': 'base', 'fun': 'managed', 'contents': 'hello', 'order': 10000}
+        minion_opts = self.get_temp_config('minion', cachedir=tmp_dir,
+                                           state_fingerprint=['file.managed'])
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+
+        self.assertIsNone(state_obj.check_fingerprint(low))
+        running = {salt.state._gen_tag(low): {'result': True, 'changes': {}}}
+        state_obj.save_fingerprints([low], running)
+
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+        self.assertTrue(state_obj.check_fingerprint(low)['result'])
+        self.assertIsNone(state_obj.check_fingerprint(dict(low, contents='bye')))
+        state_obj.opts['state_fingerprint_force'] = True
+        self.assertIsNone(state_obj.check_fingerprint(low))
+        state_obj.opts['state_fingerprint_force'] = False
+
+        with salt.utils.files.fopen(path, 'a') as fp_:
+            fp_.write(' world')
+        self.assertIsNone(state_obj.check_fingerprint(low))
+
+    def test_fingerprint_pillar_contents(self):
+        '''
+        Test that the fingerprint of a state changes with the values of the
+        pillar and grains keys it reads its data from
+        '''
+        tmp_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        low = {'state': 'file', '__id__': 'motd', 'name': '/etc/motd', '__sls__': 'motd',
+               '__env__': 'base', 'fun': 'managed', 'contents_pillar': 'motd:text',
+               'order': 10000}
+        minion_opts = self.get_temp_config('minion', cachedir=tmp_dir,
+                                           state_fingerprint=['file.*'])
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+        state_obj.opts['pillar'] = {'motd': {'text': 'hello'}, 'other': 1}
+        state_obj.opts['grains'] = {'motd': 'hello'}
+        fingerprint = state_obj._fingerprint(low)
+        self.assertIsNotNone(fingerprint)
+        state_obj.opts['pillar']['other'] = 2
+        self.assertEqual(state_obj._fingerprint(low), fingerprint)
+        state_obj.opts['pillar']['motd']['text'] = 'bye'
+        self.assertNotEqual(state_obj._fingerprint(low), fingerprint)
+
+        low = dict(low, contents_pillar=None, contents_grains='motd')
+        fingerprint = state_obj._fingerprint(low)
+        state_obj.opts['grains']['motd'] = 'bye'
+        self.assertNotEqual(state_obj._fingerprint(low), fingerprint)
+
+    def test_fingerprint_parallel(self):
+        '''
+        Test that the fingerprints returned along with the results of chunks
+        skipped or run in other processes are saved as they are
+        '''
+        tmp_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        low = {'state': 'file', '__id__': 'motd', 'name': '/etc/motd', '__sls__': 'motd',
+               '__env__': 'base', 'fun': 'managed', 'contents': 'hello', 'order': 10000}
+        minion_opts = self.get_temp_config('minion', cachedir=tmp_dir,
+                                           state_fingerprint=['file.*'])
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+        tag = salt.state._gen_tag(low)
+        entry = {'fingerprint': 'abc', 'time': 1}
+        running = {tag: {'result': True, 'changes': {}, '__fingerprint__': entry}}
+        state_obj.save_fingerprints([low], running)
+        self.assertNotIn('__fingerprint__', running[tag])
+
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+        state_obj._load_fingerprints()
+        self.assertEqual(state_obj.fingerprints, {tag: entry})
+        self.assertIsNone(state_obj._fingerprint(dict(low, fun='recurse')))
+
 
 class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
     def setUp(self):
@@ -171,6 +350,141 @@ class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
         ret = salt.state.find_sls_ids('issue-47182.stateA.newer', high)
         self.assertEqual(ret, [('somestuff', 'cmd')])
 
+    def test_render_cache(self):
+        '''
+        Test that an SLS file is only rendered again when it or a template it
+        imports changed
+        '''
+        map_jinja = os.path.join(self.state_tree_dir, 'map.jinja')
+        with salt.utils.files.fopen(map_jinja, 'w') as fp_:
+            fp_.write("{% set pkg = 'nginx' %}\n")
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'web.sls'), 'w') as fp_:
+            fp_.write("{% from 'map.jinja' import pkg %}\n{{ pkg }}:\n  pkg.installed: []\n")
+        self.highstate.opts['state_render_cache'] = True
+
+        for _ in range(2):
+            state, errors = self.highstate.render_state('web', 'base', set(), None)
+            self.assertEqual(errors, [])
+            self.assertIn('nginx', state)
+        self.assertEqual(self.highstate.render_cache_stats, {'hits': 1, 'misses': 1})
+
+        with salt.utils.files.fopen(map_jinja, 'w') as fp_:
+            fp_.write("{% set pkg = 'apache2' %}\n")
+        state, errors = self.highstate.render_state('web', 'base', set(), None)
+        self.assertIn('apache2', state)
+        self.assertEqual(self.highstate.render_cache_stats, {'hits': 1, 'misses': 2})
+
+        ret = self.highstate.render_cache_ret({})
+        self.assertEqual(ret['render_cache_|-stats_|-stats_|-None']['render_cache'],
+                         {'hits': 1, 'misses': 2})
+
+    def test_render_cache_extends(self):
+        '''
+        Test that an SLS file extending a template is rendered again when the
+        template it extends changed
+        '''
+        base_jinja = os.path.join(self.state_tree_dir, 'base.jinja')
+        with salt.utils.files.fopen(base_jinja, 'w') as fp_:
+            fp_.write("{% block pkgs %}nginx{% endblock %}:\n  pkg.installed: []\n")
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'web.sls'), 'w') as fp_:
+            fp_.write("{% extends 'base.jinja' %}\n")
+        self.highstate.opts['state_render_cache'] = True
+
+        state, errors = self.highstate.render_state('web', 'base', set(), None)
+        self.assertEqual(errors, [])
+        self.assertIn('nginx', state)
+
+        with salt.utils.files.fopen(base_jinja, 'w') as fp_:
+            fp_.write("{% block pkgs %}apache2{% endblock %}:\n  pkg.installed: []\n")
+        state, errors = self.highstate.render_state('web', 'base', set(), None)
+        self.assertIn('apache2', state)
+        self.assertEqual(self.highstate.render_cache_stats, {'hits': 0, 'misses': 2})
+
+    def test_render_cache_dynamic_import(self):
+        '''
+        Test that an SLS file importing a template named by an expression is
+        not cached
+        '''
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'map.jinja'), 'w') as fp_:
+            fp_.write("{% set pkg = 'nginx' %}\n")
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'web.sls'), 'w') as fp_:
+            fp_.write("{% from tpldir ~ '/map.jinja' import pkg %}\n{{ pkg }}:\n  pkg.installed: []\n")
+        self.highstate.opts['state_render_cache'] = True
+
+        for _ in range(2):
+            self.highstate.render_state('web', 'base', set(), None)
+        self.assertEqual(self.highstate.render_cache_stats, {'hits': 0, 'misses': 0})
+        self.assertEqual(salt.state.template_refs("{% include 'a.sls' %}"), ['a.sls'])
+        self.assertEqual(salt.state.template_refs("{% extends 'base.jinja' %}"), ['base.jinja'])
+        self.assertIsNone(salt.state.template_refs('{% include var %}'))
+
+    @skipIf(salt.utils.platform.is_windows(), 'Render workers are not used on Windows')
+    def test_render_workers(self):
+        '''
+        Test that rendering the SLS files in render workers returns the same
+        high data and errors as rendering them serially
+        '''
+        os.makedirs(os.path.join(self.state_tree_dir, 'web'))
+        sls_files = {
+            'web/init.sls': "include:\n  - .conf\n  - missing\nnginx:\n  pkg.installed: []\n",
+            'web/conf.sls': "/etc/nginx.conf:\n  file.managed:\n    - contents: {{ 'x' * 3 }}\n",
+            'db.sls': "postgresql:\n  pkg.installed: []\n",
+        }
+        for name, contents in six.iteritems(sls_files):
+            with salt.utils.files.fopen(os.path.join(self.state_tree_dir, name), 'w') as fp_:
+                fp_.write(contents)
+        matches = {'base': ['web', 'db']}
+        self.highstate.avail = {'base': ['web', 'web.conf', 'db']}
+
+        high, errors = self.highstate.render_highstate(matches)
+        highstate = salt.state.HighState(self.config)
+        highstate.avail = self.highstate.avail
+        highstate.opts['state_render_workers'] = 2
+        self.assertEqual(highstate.render_highstate(matches), (high, errors))
+        self.assertEqual(highstate.prerendered, {})
+
+    @skipIf(salt.utils.platform.is_windows(), 'Render workers are not used on Windows')
+    def test_render_workers_timeout(self):
+        '''
+        Test that the SLS files not rendered by the render workers in time are
+        rendered by the state run process
+        '''
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'slow.sls'), 'w') as fp_:
+            fp_.write("{% set _ = salt['test.sleep'](3) %}\n"
+                      "nginx:\n  pkg.installed: []\n")
+        matches = {'base': ['slow']}
+        self.highstate.avail = {'base': ['slow']}
+        self.highstate.opts['state_render_workers'] = 2
+        self.highstate.opts['state_render_workers_timeout'] = 1
+        self.highstate.prerender(matches)
+        self.assertNotIn('state', self.highstate.prerendered['base:slow'])
+        high, errors = self.highstate.render_highstate(matches)
+        self.assertEqual(errors, [])
+        self.assertIn('nginx', high)
+
+    @skipIf(salt.utils.platform.is_windows(), 'The states run the sleep command')
+    def test_dag_executor_auto_order(self):
+        '''
+        Test that the dag executor runs the independent states of a highstate
+        at the same time with the default state_auto_order
+        '''
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'top.sls'), 'w') as fp_:
+            fp_.write("base:\n  '*':\n    - sleep\n")
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'sleep.sls'), 'w') as fp_:
+            fp_.write("{% for idx in range(3) %}\n"
+                      "sleep{{ idx }}:\n  cmd.run:\n    - name: sleep 2\n"
+                      "{% endfor %}\n")
+        self.assertTrue(self.config['state_auto_order'])
+        highstate = salt.state.HighState(dict(self.config, state_executor='dag'),
+                                         jid='20180101000000000000')
+        highstate.push_active()
+        self.addCleanup(highstate.pop_active)
+        start = time.time()
+        ret = highstate.call_highstate()
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(len(ret), 3)
+        self.assertTrue(all(state_ret['result'] for state_ret in six.itervalues(ret)))
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 @skipIf(pytest is None, 'PyTest is missing')
@@ -11,6 +11,8 @@
 from __future__ import absolute_import, unicode_literals, print_function
 import os
 import hashlib
+import tempfile
+import threading
 import time
 from tornado.testing import AsyncTestCase
 import zmq
@@ -26,6 +28,7 @@ from tests.support.unit import expectedFailure, skipIf, TestCase
 
 # Import salt libs
 import salt.utils.event
+import salt.utils.files
 import salt.utils.stringutils
 import tests.integration as integration
 from salt.utils.process import clean_proc
@@ -292,6 +295,38 @@ class TestSaltEvent(TestCase):
             evt2 = me2.get_event(tag='evt1')
             self.assertGotEvent(evt2, {'data': 'foo1'})
 
+    def test_event_tag_filter(self):
+        '''Test the publisher only sends the events matching the tag filter'''
+        with eventpublisher_process():
+            me1 = salt.utils.event.MasterEvent(SOCK_DIR, listen=True)
+            me1.set_tag_filter(['evt2', ('*3', 'fnmatch')])
+            me2 = salt.utils.event.MasterEvent(SOCK_DIR, listen=True)
+            # Give the publisher time to read the filter
+            time.sleep(0.5)
+            me2.fire_event({'data': 'foo1'}, 'evt1')
+            me2.fire_event({'data': 'foo2'}, 'evt2')
+            me2.fire_event({'data': 'foo3'}, 'evt3')
+            me1.subscribe('')
+            evt = me1.get_event(full=True)
+            self.assertEqual(evt['tag'], 'evt2')
+            evt = me1.get_event(full=True)
+            self.assertEqual(evt['tag'], 'evt3')
+            evt1 = me2.get_event(tag='evt1')
+            self.assertGotEvent(evt1, {'data': 'foo1'})
+            # Receive all events again
+            me1.set_tag_filter(None)
+            time.sleep(0.5)
+            me2.fire_event({'data': 'foo1'}, 'evt1')
+            evt1 = me1.get_event(tag='evt1')
+            self.assertGotEvent(evt1, {'data': 'foo1'})
+
+    def test_match_tag_filter(self):
+        tag_filter = [['salt/job/', 'startswith'], ['/ret/.*', 'regex']]
+        self.assertTrue(salt.utils.event._match_tag_filter('salt/job/123/new', tag_filter))
+        self.assertFalse(salt.utils.event._match_tag_filter('salt/run/123/ret/x', tag_filter))
+        self.assertTrue(salt.utils.event._match_tag_filter('/ret/x', tag_filter))
+        self.assertTrue(salt.utils.event._match_tag_filter('foo', [['bar', 'unknown']]))
+
     @expectedFailure
     def test_event_nested_sub_all(self):
         '''Test nested event subscriptions do not drop events, get event for all tags'''
@@ -366,3 +401,75 @@ class TestAsyncEventPublisher(AsyncTestCase):
         self.assertEqual(self.tag, 'evt1')
         self.data.pop('_stamp')  # drop the stamp
         self.assertEqual(self.data, {'data': 'foo1'})
+
+
+class TestEventReturnQueue(TestCase):
+    '''
+    Tests for the queues of the event returners
+    '''
+    def setUp(self):
+        self.stored = []
+        self.batches = []
+        self.blocked = threading.Event()
+        self.blocked.set()
+
+    def _returner(self, events):
+        self.blocked.wait()
+        self.stored.extend(events)
+        self.batches.append(len(events))
+
+    def _events(self, start, stop):
+        return [{'tag': 'test/{0}'.format(idx), 'data': {}}
+                for idx in range(start, stop)]
+
+    def test_drop(self):
+        '''
+        Tests that the oldest events are dropped when the queue is full
+        '''
+        self.blocked.clear()
+        queue = salt.utils.event.EventReturnQueue('test.event_return',
+                                                  self._returner,
+                                                  max_size=5)
+        queue.put(self._events(0, 1))
+        # Wait for the thread to be blocked in the returner
+        while queue.queue:
+            time.sleep(0.01)
+        queue.put(self._events(1, 8))
+        self.assertEqual(queue.get_stats()['queued'], 5)
+        self.assertEqual(queue.get_stats()['dropped'], 2)
+        self.blocked.set()
+        queue.stop(5)
+        self.assertEqual([event['tag'] for event in self.stored],
+                         ['test/0', 'test/3', 'test/4', 'test/5', 'test/6', 'test/7'])
+        self.assertEqual(queue.get_stats()['events'], 6)
+
+    def test_spill(self):
+        '''
+        Tests that the events exceeding the queue are spilled to disk and
+        stored in order
+        '''
+        spill_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.addCleanup(salt.utils.files.rm_rf, spill_dir)
+        self.blocked.clear()
+        queue = salt.utils.event.EventReturnQueue('test.event_return',
+                                                  self._returner,
+                                                  max_size=5,
+                                                  overflow='spill',
+                                                  spill_dir=spill_dir)
+        queue.put(self._events(0, 1))
+        while queue.queue:
+            time.sleep(0.01)
+        queue.put(self._events(1, 8))
+        queue.put(self._events(8, 10))
+        stats = queue.get_stats()
+        self.assertEqual((stats['queued'], stats['spilled'], stats['dropped']), (5, 4, 0))
+        self.assertEqual(len(os.listdir(spill_dir)), 2)
+        self.blocked.set()
+        while len(self.stored) < 10:
+            time.sleep(0.01)
+        queue.stop(5)
+        self.assertEqual([event['tag'] for event in self.stored],
+                         ['test/{0}'.format(idx) for idx in range(10)])
+        # The spill files are read back in a single batch
+        self.assertEqual(self.batches, [1, 5, 4])
+        self.assertEqual(os.listdir(spill_dir), [])
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for salt.utils.job
+'''
+
+# Import Python libs
+from __future__ import absolute_import, unicode_literals
+import shutil
+import tempfile
+import time
+
+# Import Salt Testing libs
+from tests.support.mock import patch, NO_MOCK, NO_MOCK_REASON
+from tests.support.paths import TMP
+from tests.support.unit import TestCase, skipIf
+
+# Import Salt libs
+import salt.config
+import salt.utils.job
+
+
+class JobRegistryTestCase(TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp(dir=TMP)
+        opts = salt.config.DEFAULT_MASTER_OPTS.copy()
+        opts['cachedir'] = self.cachedir
+        self.registry = salt.utils.job.JobRegistry(opts)
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def test_start_finish(self):
+        jid = '20180101000000000000'
+        self.registry.start(jid, 'minion1',
+                            {'jid': jid, 'fun': 'test.sleep', 'arg': [60], 'pid': 1234,
+                             'ret': 'ignored'},
+                            30)
+        self.registry.start(jid, 'minion2', {'jid': jid, 'fun': 'test.sleep'}, 30)
+        running = self.registry.running(jid)
+        self.assertEqual(sorted(running), ['minion1', 'minion2'])
+        self.assertEqual(running['minion1']['pid'], 1234)
+        self.assertNotIn('ret', running['minion1'])
+        self.assertEqual(list(self.registry.jobs()), [jid])
+
+        self.registry.finish(jid, 'minion1')
+        self.assertEqual(list(self.registry.running(jid)), ['minion2'])
+        # A start event arriving after the return is ignored
+        self.registry.start(jid, 'minion1', {'jid': jid, 'fun': 'test.sleep'}, 30)
+        self.registry.heartbeat('minion1', [{'jid': jid, 'fun': 'test.sleep'}], 30)
+        self.assertEqual(list(self.registry.running(jid)), ['minion2'])
+
+    @skipIf(NO_MOCK, NO_MOCK_REASON)
+    def test_heartbeat_expire(self):
+        jid = '20180101000000000000'
+        self.registry.start(jid, 'minion1', {'jid': jid, 'fun': 'test.sleep'}, 30)
+        self.registry.start(jid, 'minion2', {'jid': jid, 'fun': 'test.sleep'}, 30)
+        # minion2 went away, minion1 still runs the job
+        expired = time.time() + 100
+        self.registry.heartbeat('minion1', [{'jid': jid, 'fun': 'test.sleep'}], 60)
+        with patch('time.time', return_value=expired):
+            self.assertEqual(list(self.registry.running(jid)), ['minion1'])
+            self.registry.clean()
+        self.assertEqual(list(self.registry.running(jid)), ['minion1'])
+        self.registry.finish(jid, 'minion1')
+        self.assertEqual(self.registry.jobs(), {})
+        # The mark of the return expires as well
+        expired = time.time() + 1000
+        with patch('time.time', return_value=expired):
+            self.registry.clean()
+        self.assertEqual(self.registry.cache.list('job_registry/jobs'), [])
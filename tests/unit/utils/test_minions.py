@@ -2,12 +2,18 @@
 
 # Import python libs
 from __future__ import absolute_import, unicode_literals
+import shutil
 import sys
+import tempfile
 
 # Import Salt Libs
+import salt.config
+import salt.utils.data
 import salt.utils.minions
+from salt.ext import six
 
 # Import Salt Testing Libs
+from tests.support.paths import TMP
 from tests.support.unit import TestCase, skipIf
 from tests.support.mock import (
     patch,
@@ -509,3 +515,91 @@ class NodegroupCompTest(TestCase):
         # If this works, it should also print an error to the console
         ret = salt.utils.minions.nodegroup_comp('group1', referenced_nodegroups)
         self.assertEqual(ret, [])
+
+
+class MinionDataIndexTestCase(TestCase):
+    '''
+    TestCase for salt.utils.minions.MinionDataIndex class
+    '''
+    MINIONS = {
+        'web1': {'os': 'Ubuntu', 'roles': ['web', 'app'],
+                 'ip_interfaces': {'eth0': ['10.0.0.1']}},
+        'web2': {'os': 'CentOS', 'roles': ['web'],
+                 'ip_interfaces': {'eth0': ['10.0.0.2']}},
+        'db1': {'os': 'Ubuntu', 'roles': ['db'], 'cores': 8},
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(dir=TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.opts = salt.config.DEFAULT_MASTER_OPTS.copy()
+        self.opts['cachedir'] = self.tmp_dir
+        self.opts['minion_data_index'] = True
+        self.index = salt.utils.minions.MinionDataIndex(self.opts)
+        for minion_id, grains in six.iteritems(self.MINIONS):
+            self.index.update(minion_id, grains, {})
+
+    def _scan(self, expr, **kwargs):
+        return set(
+            minion_id for minion_id, grains in six.iteritems(self.MINIONS)
+            if salt.utils.data.subdict_match(grains, expr, **kwargs)
+        )
+
+    def test_match_same_as_scan(self):
+        '''
+        The index must return the same minions as subdict_match
+        '''
+        for expr, kwargs in (('os:Ubuntu', {}),
+                             ('os:ubu*', {}),
+                             ('os:Ubu', {}),
+                             ('os:ubuntu', {'exact_match': True}),
+                             ('os:(Cent|Ubu).*', {'regex_match': True}),
+                             ('roles:web', {}),
+                             ('roles:0:web', {}),
+                             ('ip_interfaces:eth0:10.0.0.*', {}),
+                             ('cores:8', {}),
+                             ('missing:value', {}),
+                             ('os', {})):
+            self.assertEqual(self.index.match('grains', expr, **kwargs),
+                             self._scan(expr, **kwargs),
+                             expr)
+
+    def test_update_and_remove(self):
+        '''
+        Changed and removed values are reflected in the index
+        '''
+        self.index.update('web2', {'os': 'Ubuntu'}, {})
+        self.assertEqual(self.index.match('grains', 'os:Ubuntu'),
+                         set(['web1', 'web2', 'db1']))
+        self.assertEqual(self.index.match('grains', 'roles:web'),
+                         set(['web1']))
+        self.index.remove('web1')
+        self.assertEqual(self.index.match('grains', 'os:Ubuntu'),
+                         set(['web2', 'db1']))
+        self.assertEqual(self.index.indexed(), set(['web2', 'db1']))
+
+    def test_unindexable_key(self):
+        '''
+        Keys which can not be stored in the cache are not answered
+        '''
+        self.assertIsNone(self.index.match('grains', 'a/b:c'))
+
+    def test_delimited_key(self):
+        '''
+        Keys holding the delimiter are matched by scanning the cache
+        '''
+        self.index.update('web1', dict(self.MINIONS['web1'], **{'os:family': 'Debian'}), {})
+        self.assertIsNone(self.index.match('grains', 'os:family:Debian'))
+        self.assertEqual(self.index.match('grains', 'os:Ubuntu'),
+                         set(['web1', 'db1']))
+        self.assertIsNone(self.index.match('grains', 'os|Ubuntu', delimiter='|'))
+        self.index.update('web1', self.MINIONS['web1'], {})
+        self.assertEqual(self.index.match('grains', 'os:family:Debian'), set())
+
+    def test_drop(self):
+        '''
+        A dropped index no longer holds any minion
+        '''
+        self.index.drop()
+        self.assertEqual(self.index.indexed(), set())
+        self.assertEqual(self.index.match('grains', 'os:Ubuntu'), set())